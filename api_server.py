@@ -0,0 +1,248 @@
+# api_server.py for HeroForge M&M (Streamlit Edition)
+# Headless JSON-over-HTTP service around CoreEngine (stdlib asyncio, no extra dependencies).
+
+"""
+Runs the character calculations without a Streamlit session:
+
+    python api_server.py --host 127.0.0.1 --port 8765
+
+Endpoints (JSON request and response bodies unless noted):
+    GET  /health           -> {"status", "ruleset_version", "power_cost_cache"}
+    POST /recalculate      {"character": {...}, "changed_key_paths": [[...], ...]?} -> {"character": {...}}
+    POST /validate         {"character": {...}} -> {"validationErrors": [...], "validationIssues": [...], "spentPowerPoints", "totalPowerPoints"}
+    POST /cost-preview     {"power": {...}, "powers": [...]?} -> calculate_individual_power_cost result
+    POST /export/pdf       {"character": {...}} -> application/pdf
+
+One warm CoreEngine is shared by every connection. The event loop only does network I/O;
+engine work is queued to an EngineBatcher that drains up to `max_batch` queued requests
+at a time (waiting at most `batch_window_ms` for a batch to fill) and runs each batch in
+one executor call on a single engine thread, so the engine's caches are never touched
+concurrently and bursts pay one thread hand-off per batch instead of one per request.
+Slow output work (PDF export) only recalculates on the engine thread; the route hands back a
+DeferredResponse that is rendered on a separate render pool, so one export does not hold up
+the recalculations queued behind it.
+"""
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from core_engine import CoreEngine, CharacterState
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+JSON_CONTENT_TYPE = "application/json"
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+ApiResponse = Tuple[int, str, bytes] # (status, content type, body)
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message); self.status = status
+
+
+class DeferredResponse(NamedTuple):
+    """Route work left for after the engine thread; `finish` only reads an already recalculated state and the rule data."""
+    finish: Callable[[], ApiResponse]
+
+
+def _json_response(payload: Any, status: int = 200) -> ApiResponse:
+    return status, JSON_CONTENT_TYPE, json.dumps(payload).encode('utf-8')
+
+
+def _error_response(e: Exception) -> ApiResponse:
+    if isinstance(e, ApiError): return _json_response({'error': str(e)}, status=e.status)
+    return _json_response({'error': f"{type(e).__name__}: {e}"}, status=500)
+
+
+def finish_response(response: Union[ApiResponse, DeferredResponse]) -> ApiResponse:
+    """Runs the deferred part of a response (on any thread), mapping its errors like handle_request."""
+    if not isinstance(response, DeferredResponse): return response
+    try: return response.finish()
+    except Exception as e: return _error_response(e)
+
+
+def _character_from(payload: Dict[str, Any]) -> CharacterState:
+    character = payload.get('character')
+    if not isinstance(character, dict): raise ApiError(400, "Request body needs a 'character' object.")
+    return character
+
+
+def _route_recalculate(engine: CoreEngine, payload: Dict[str, Any]) -> ApiResponse:
+    changed_key_paths = payload.get('changed_key_paths')
+    if changed_key_paths is not None and not (isinstance(changed_key_paths, list) and all(isinstance(p, list) for p in changed_key_paths)):
+        raise ApiError(400, "'changed_key_paths' must be a list of key path lists.")
+    return _json_response({'character': engine.recalculate(_character_from(payload), changed_key_paths=changed_key_paths)})
+
+
+def _route_validate(engine: CoreEngine, payload: Dict[str, Any]) -> ApiResponse:
+    recalculated = engine.recalculate(_character_from(payload))
+    return _json_response({'validationErrors': recalculated.get('validationErrors', []), 'validationIssues': engine.get_validation_issues(recalculated),
+                           'spentPowerPoints': recalculated.get('spentPowerPoints', 0), 'totalPowerPoints': recalculated.get('totalPowerPoints', 0)})
+
+
+def _route_cost_preview(engine: CoreEngine, payload: Dict[str, Any]) -> ApiResponse:
+    power = payload.get('power'); powers_context = payload.get('powers', [power])
+    if not isinstance(power, dict): raise ApiError(400, "Request body needs a 'power' object.")
+    if not isinstance(powers_context, list): raise ApiError(400, "'powers' must be a list of power objects.")
+    return _json_response(engine.calculate_individual_power_cost(power, powers_context))
+
+
+def _render_pdf(engine: CoreEngine, recalculated: CharacterState) -> ApiResponse:
+    from pdf_utils import generate_fpdf_character_sheet # fpdf2 is only needed for this endpoint
+    pdf_buffer = generate_fpdf_character_sheet(recalculated, engine.rule_data, engine)
+    if pdf_buffer is None: raise ApiError(500, "PDF generation failed.")
+    return 200, "application/pdf", pdf_buffer.getvalue()
+
+
+def _route_export_pdf(engine: CoreEngine, payload: Dict[str, Any]) -> DeferredResponse:
+    recalculated = engine.recalculate(_character_from(payload)) # The renderer reads the stored derived data, not the engine caches
+    return DeferredResponse(lambda: _render_pdf(engine, recalculated))
+
+
+POST_ROUTES: Dict[str, Callable[[CoreEngine, Dict[str, Any]], Union[ApiResponse, DeferredResponse]]] = {
+    '/recalculate': _route_recalculate, '/validate': _route_validate,
+    '/cost-preview': _route_cost_preview, '/export/pdf': _route_export_pdf,
+}
+
+
+def handle_request(engine: CoreEngine, method: str, path: str, body: bytes, defer: bool = False) -> Union[ApiResponse, DeferredResponse]:
+    """
+    Routes one request to the engine. Pure and synchronous, so it can be called without a server.
+    With defer=True a route's DeferredResponse is returned as is, for finish_response to complete elsewhere.
+    """
+    try:
+        path = path.split('?', 1)[0].rstrip('/') or '/'
+        if path == '/health':
+            if method != 'GET': raise ApiError(405, "Use GET for /health.")
+            return _json_response({'status': 'ok', 'ruleset_version': engine.ruleset_version, 'power_cost_cache': engine.power_cost_cache_info()})
+        route = POST_ROUTES.get(path)
+        if route is None: raise ApiError(404, f"Unknown endpoint '{path}'.")
+        if method != 'POST': raise ApiError(405, f"Use POST for {path}.")
+        try: payload = json.loads(body.decode('utf-8') or '{}')
+        except (UnicodeDecodeError, json.JSONDecodeError) as e: raise ApiError(400, f"Invalid JSON body: {e}")
+        if not isinstance(payload, dict): raise ApiError(400, "Request body must be a JSON object.")
+        response = route(engine, payload)
+        return response if defer else finish_response(response)
+    except Exception as e:
+        return _error_response(e)
+
+
+class EngineBatcher:
+    """Queues engine calls from many connections and runs them in batches on one engine thread; deferred responses finish on a render pool."""
+
+    def __init__(self, engine: CoreEngine, max_batch: int = 32, batch_window_ms: float = 2.0, render_workers: int = 2):
+        self.engine = engine; self.max_batch = max(1, max_batch); self.batch_window = max(0.0, batch_window_ms) / 1000.0
+        self._queue: 'asyncio.Queue[Tuple[Tuple[str, str, bytes], asyncio.Future]]' = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="heroforge-engine")
+        self._render_executor = ThreadPoolExecutor(max_workers=max(1, render_workers), thread_name_prefix="heroforge-render")
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._worker is None: self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._worker is not None: self._worker.cancel()
+        self._executor.shutdown(wait=False); self._render_executor.shutdown(wait=False)
+
+    async def submit(self, method: str, path: str, body: bytes) -> ApiResponse:
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((method, path, body), future))
+        return await future
+
+    def _handle_batch(self, requests: List[Tuple[str, str, bytes]]) -> List[Union[ApiResponse, DeferredResponse]]:
+        return [handle_request(self.engine, method, path, body, defer=True) for method, path, body in requests]
+
+    async def _finish(self, future: asyncio.Future, response: DeferredResponse) -> None:
+        try: result = await asyncio.get_running_loop().run_in_executor(self._render_executor, finish_response, response)
+        except Exception as e: result = _error_response(e)
+        if not future.done(): future.set_result(result)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    if self._queue.empty(): break
+                    batch.append(self._queue.get_nowait()); continue
+                try: batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError: break
+            responses = await loop.run_in_executor(self._executor, self._handle_batch, [request for request, _ in batch])
+            for (_, future), response in zip(batch, responses):
+                if isinstance(response, DeferredResponse): loop.create_task(self._finish(future, response)) # The next batch does not wait for it
+                elif not future.done(): future.set_result(response)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Parses one HTTP/1.1 request; None when the client closed the connection."""
+    try: head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError: return None
+    except (asyncio.LimitOverrunError, ValueError): raise ApiError(431, "Request headers exceed the stream limit.")
+    lines = head.decode('latin-1').split("\r\n")
+    try: method, target, _version = lines[0].split(" ", 2)
+    except ValueError: raise ApiError(400, "Malformed request line.")
+    headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(":") for line in lines[1:] if line)}
+    try: content_length = int(headers.get('content-length', '0') or 0)
+    except ValueError: raise ApiError(400, "Content-Length must be a number.")
+    if content_length < 0: raise ApiError(400, "Content-Length must not be negative.")
+    if content_length > MAX_BODY_BYTES: raise ApiError(413, f"Body exceeds {MAX_BODY_BYTES} bytes.")
+    body = await reader.readexactly(content_length) if content_length else b""
+    return method.upper(), target, headers, body
+
+
+def _encode_response(status: int, content_type: str, body: bytes, keep_alive: bool) -> bytes:
+    head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'Error')}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+async def _serve_connection(batcher: EngineBatcher, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try: request = await _read_request(reader)
+            except ApiError as e:
+                writer.write(_encode_response(*_json_response({'error': str(e)}, status=e.status), keep_alive=False)); await writer.drain(); break
+            if request is None: break
+            method, target, headers, body = request
+            keep_alive = headers.get('connection', '').lower() != 'close'
+            writer.write(_encode_response(*(await batcher.submit(method, target, body)), keep_alive=keep_alive)); await writer.drain()
+            if not keep_alive: break
+    except (ConnectionError, asyncio.IncompleteReadError): pass
+    finally:
+        writer.close()
+
+
+async def start_server(engine: CoreEngine, host: str = "127.0.0.1", port: int = 8765, max_batch: int = 32,
+                       batch_window_ms: float = 2.0, render_workers: int = 2) -> Tuple[asyncio.AbstractServer, EngineBatcher]:
+    """Starts listening (port 0 picks a free port) and returns the server with its batcher."""
+    batcher = EngineBatcher(engine, max_batch=max_batch, batch_window_ms=batch_window_ms, render_workers=render_workers); batcher.start()
+    server = await asyncio.start_server(lambda r, w: _serve_connection(batcher, r, w), host, port)
+    return server, batcher
+
+
+async def _main(args: argparse.Namespace) -> None:
+    engine = CoreEngine(rule_dir=args.rules)
+    server, batcher = await start_server(engine, args.host, args.port, args.max_batch, args.batch_window_ms, args.render_workers)
+    print(f"HeroForge API listening on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+    try:
+        async with server: await server.serve_forever()
+    finally:
+        await batcher.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Headless HeroForge M&M character calculation service.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rules', default="rules", help="Rule JSON directory.")
+    parser.add_argument('--max-batch', type=int, default=32, help="Most queued requests run per engine batch.")
+    parser.add_argument('--batch-window-ms', type=float, default=2.0, help="How long a batch waits to fill.")
+    parser.add_argument('--render-workers', type=int, default=2, help="Threads rendering PDF exports off the engine thread.")
+    try: asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt: pass
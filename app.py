@@ -7,16 +7,20 @@ import copy
 import math
 import os
 import uuid # For unique IDs
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Union
 
 # --- Core Application Logic and Data ---
 from core_engine import CoreEngine, CharacterState, PowerDefinition, AdvantageDefinition, EquipmentDefinition, HQDefinition, VehicleDefinition, AllyDefinition
+from character_state import assoc_in, merge_onto_defaults
+from session_memory import measure_session, shared_character_skeleton
+from edit_queue import EditQueue
 # Import for WeasyPrint PDF generation (original)
 #from pdf_utils import generate_pdf_bytes 
 # Import for FPDF PDF generation (new - assuming it will be added to pdf_utils.py or a new fpdf_utils.py)
 # If in a new fpdf_utils.py, the import would be: from fpdf_utils import generate_fpdf_character_sheet
 # For now, let's assume it's added to pdf_utils.py for simplicity in this step.
 from pdf_utils import generate_fpdf_character_sheet 
+from pdf_cache import PdfCache, cached_character_sheet
 
 
 # --- UI Section Imports ---
@@ -75,6 +79,10 @@ def load_core_resources():
 
 engine, rule_data_app = load_core_resources() 
 
+@st.cache_resource # One rendered-PDF cache per server process, shared by all sessions
+def load_pdf_cache() -> PdfCache:
+    return PdfCache()
+
 # --- Unique Key Helper (local to app.py) ---
 def _uk(base: str, *args: Any) -> str:
     """Creates a unique key for Streamlit widgets, sanitized for app.py contexts."""
@@ -84,14 +92,14 @@ def _uk(base: str, *args: Any) -> str:
 # --- Session State Initialization ---
 def initialize_session_state():
     """Initializes all necessary session state variables if they don't exist."""
-    default_char_state = engine.get_default_character_state()
+    default_char_state = shared_character_skeleton(engine) # Frozen, shared by all sessions (see session_memory.py)
 
-    # Initialize or ensure all default keys for 'character' state
+    # Initialize or ensure all default keys for 'character' state; only the top level is session-owned
     if 'character' not in st.session_state:
-        st.session_state.character = copy.deepcopy(default_char_state)
+        st.session_state.character = dict(default_char_state)
     else:
         for key, value in default_char_state.items():
-            st.session_state.character.setdefault(key, copy.deepcopy(value))
+            st.session_state.character.setdefault(key, value)
 
     if 'current_view' not in st.session_state:
         st.session_state.current_view = 'Abilities' 
@@ -103,10 +111,10 @@ def initialize_session_state():
     
     # Initialize or ensure all default keys for 'wizard_character_state'
     if 'wizard_character_state' not in st.session_state:
-        st.session_state.wizard_character_state = copy.deepcopy(default_char_state)
+        st.session_state.wizard_character_state = dict(default_char_state)
     else:
         for key, value in default_char_state.items():
-            st.session_state.wizard_character_state.setdefault(key, copy.deepcopy(value))
+            st.session_state.wizard_character_state.setdefault(key, value)
 
     # Editor/Form States for Advanced Mode
     if 'power_form_state' not in st.session_state:
@@ -125,6 +133,10 @@ def initialize_session_state():
     if 'ally_editor_config' not in st.session_state:
         st.session_state.ally_editor_config = copy.deepcopy(DEFAULT_ALLY_EDITOR_CONFIG)
 
+    # Debounced recalculation of widget edits (see edit_queue.py)
+    if 'edit_queue' not in st.session_state:
+        st.session_state.edit_queue = EditQueue(engine)
+
 initialize_session_state() 
 
 # --- Helper Functions ---
@@ -132,38 +144,39 @@ def generate_unique_id(prefix="item_"):
     """Generates a unique ID string with a given prefix."""
     return f"{prefix}{uuid.uuid4().hex[:12]}"
 
-def update_char_value(key_path: List[str], value: Any, target_state_key: str = 'character', do_recalc: bool = True):
+def update_char_value(key_path: List[Union[str, int]], value: Any, target_state_key: str = 'character', do_recalc: bool = True):
     """
-    Updates a value in the character state dictionary and optionally triggers recalculation.
+    Updates a value in the character state dictionary and optionally queues a recalculation.
+    Integer path parts index into lists (e.g. ['powers', 0, 'rank']). Edits arriving within the
+    edit queue's debounce window are recalculated together, incrementally: only values depending
+    on the edited key paths are rederived. Until then the sidebar shows the last computed totals.
     """
     if target_state_key not in st.session_state:
         st.error(f"Target state key '{target_state_key}' not found in session state.")
         return
 
-    char_obj_ref = st.session_state[target_state_key]
-    current_level = char_obj_ref
     try:
-        for i, k_part in enumerate(key_path):
-            if i == len(key_path) - 1:
-                current_level[k_part] = value
-            else:
-                if not isinstance(current_level.get(k_part), dict): # Ensure path exists if creating nested
-                    current_level[k_part] = {} 
-                current_level = current_level[k_part]
+        # Copy-on-write: only the containers along key_path are copied, other branches are shared
+        st.session_state.edit_queue.stage(st.session_state, target_state_key, key_path, value, recalc=do_recalc)
     except TypeError as e:
         st.error(f"Error updating character state at path {key_path}: {e}. Current level was not a dictionary or key path issue.")
-        return
-    except KeyError as e:
+    except (KeyError, IndexError) as e:
         st.error(f"Error accessing key during character state update at path {key_path}: {e}. Check if path parts are correct.")
-        return
 
-    if do_recalc:
-        try:
-            st.session_state[target_state_key] = engine.recalculate(char_obj_ref)
-        except Exception as e_recalc:
-            st.error(f"Error during recalculation after update to {key_path}: {e_recalc}")
-            # Optionally, revert to a previous state or handle more gracefully
-            # For now, the corrupted state might persist until next successful recalc.
+def flush_pending_edits(state_keys: Optional[List[str]] = None, due_only: bool = False) -> bool:
+    """Recalculates queued edits now (or only those past their debounce window). Returns True if any state changed."""
+    edit_queue: EditQueue = st.session_state.edit_queue
+    results = edit_queue.flush_due(st.session_state) if due_only else edit_queue.flush(st.session_state, state_keys)
+    for state_key, error in results.items():
+        if error: st.session_state.recalc_error = f"Error during recalculation of '{state_key}': {error}"
+    return bool(results)
+
+_fragment = getattr(st, 'fragment', None) or st.experimental_fragment
+
+@_fragment(run_every=st.session_state.edit_queue.debounce_seconds)
+def render_pending_edits_flusher():
+    """Reruns on a timer while edits are queued, so totals refresh without another interaction."""
+    if flush_pending_edits(due_only=True): st.rerun()
 
 # --- Wizard Mode Callbacks ---
 def update_char_value_wiz(key_path: List[str], value: Any, do_recalc: bool = True):
@@ -174,7 +187,7 @@ def apply_archetype_to_wizard_state_callback(archetype_id: str):
         current_pl = st.session_state.wizard_character_state.get('powerLevel', 10)
         name = st.session_state.wizard_character_state.get('name', 'New Hero')
         concept = st.session_state.wizard_character_state.get('concept', '')
-        st.session_state.wizard_character_state = engine.get_default_character_state(pl=current_pl)
+        st.session_state.wizard_character_state = dict(shared_character_skeleton(engine, current_pl))
         st.session_state.wizard_character_state['name'] = name
         st.session_state.wizard_character_state['concept'] = concept
         st.session_state.wizard_character_state = engine.recalculate(st.session_state.wizard_character_state)
@@ -249,11 +262,11 @@ def apply_archetype_to_wizard_state_callback(archetype_id: str):
     st.rerun()
 
 def finish_wizard_callback():
-    st.session_state.character = copy.deepcopy(st.session_state.wizard_character_state)
-    st.session_state.character = engine.recalculate(st.session_state.character)
+    flush_pending_edits(['wizard_character_state'])
+    st.session_state.character = engine.recalculate(st.session_state.wizard_character_state) # Never mutates its input
     st.session_state.in_wizard_mode = False
     st.session_state.current_view = 'Character Sheet' 
-    st.session_state.wizard_character_state = engine.get_default_character_state(st.session_state.character.get('powerLevel',10))
+    st.session_state.wizard_character_state = dict(shared_character_skeleton(engine, st.session_state.character.get('powerLevel',10)))
     st.session_state.wizard_step = 1
     st.success("Character created! Switched to Advanced Mode.")
     st.rerun()
@@ -266,7 +279,8 @@ def render_sidebar():
         st.markdown("---")
 
         active_char_state_key = 'wizard_character_state' if st.session_state.in_wizard_mode else 'character'
-        active_char_state = st.session_state[active_char_state_key]
+        active_char_state = st.session_state.edit_queue.display_state(st.session_state, active_char_state_key) # Last computed totals
+        pending_edit_keys = st.session_state.edit_queue.pending_keys(st.session_state)
 
         st.header("Character Info")
         st.markdown(f"**Name:** {active_char_state.get('name', 'N/A')}")
@@ -276,6 +290,10 @@ def render_sidebar():
         remaining_pp = active_char_state.get('totalPowerPoints',0) - active_char_state.get('spentPowerPoints',0)
         pp_color_style = "color: red;" if remaining_pp < 0 else "color: green;"
         st.markdown(f"<span style='{pp_color_style}'>Remaining PP: {remaining_pp}</span>", unsafe_allow_html=True)
+        if pending_edit_keys:
+            st.caption("⏳ Recalculating recent edits...")
+            render_pending_edits_flusher()
+        if st.session_state.get('recalc_error'): st.error(st.session_state.pop('recalc_error'))
         st.markdown("---")
 
         if st.session_state.in_wizard_mode:
@@ -287,8 +305,7 @@ def render_sidebar():
             if cols_wiz_nav[1].button("Next ➡️", disabled=(st.session_state.wizard_step >= max_steps), use_container_width=True, key="wiz_next_btn"):
                 st.session_state.wizard_step += 1; st.rerun()
             if st.button("Exit Wizard to Advanced Mode", key="exit_wizard_sidebar_btn", use_container_width=True):
-                st.session_state.character = copy.deepcopy(st.session_state.wizard_character_state)
-                st.session_state.character = engine.recalculate(st.session_state.character)
+                st.session_state.character = engine.recalculate(st.session_state.wizard_character_state) # Shares unchanged branches
                 st.session_state.in_wizard_mode = False
                 st.session_state.current_view = 'Abilities'; st.rerun()
         else: 
@@ -300,15 +317,15 @@ def render_sidebar():
             if new_view != current_view_adv:
                 st.session_state.current_view = new_view; st.rerun()
             if st.button("✨ Start Character Wizard", key="start_wizard_btn_sidebar", use_container_width=True):
-                st.session_state.wizard_character_state = engine.get_default_character_state(st.session_state.character.get('powerLevel',10))
+                st.session_state.wizard_character_state = dict(shared_character_skeleton(engine, st.session_state.character.get('powerLevel',10)))
                 st.session_state.wizard_step = 1; st.session_state.in_wizard_mode = True; st.rerun()
         st.markdown("---")
 
         st.subheader("File Operations")
         if st.button("➕ New Character", key="new_char_sidebar_btn", use_container_width=True):
             default_pl = st.session_state.character.get('powerLevel', 10)
-            st.session_state.character = engine.get_default_character_state(pl=default_pl)
-            st.session_state.wizard_character_state = engine.get_default_character_state(pl=default_pl)
+            st.session_state.character = dict(shared_character_skeleton(engine, default_pl))
+            st.session_state.wizard_character_state = dict(shared_character_skeleton(engine, default_pl))
             st.session_state.power_form_state = get_default_power_form_state(rule_data_app)
             st.session_state.advantage_editor_config = copy.deepcopy(DEFAULT_ADVANTAGE_EDITOR_CONFIG)
             st.session_state.equipment_editor_config = copy.deepcopy(DEFAULT_EQUIPMENT_EDITOR_CONFIG)
@@ -329,22 +346,8 @@ def render_sidebar():
             try:
                 loaded_data = json.load(uploaded_file)
                 if 'powerLevel' in loaded_data and 'abilities' in loaded_data: # Basic check
-                    default_for_load = engine.get_default_character_state(loaded_data.get('powerLevel',10))
-                    # Deep merge loaded data onto default to ensure all keys are present
-                    # A simple update might miss nested structures if default is more complex later
-                    merged_char_state = copy.deepcopy(default_for_load)
-                    
-                    # Helper for deep update
-                    def deep_update(target_dict, source_dict):
-                        for key, value in source_dict.items():
-                            if isinstance(value, dict) and key in target_dict and isinstance(target_dict[key], dict):
-                                deep_update(target_dict[key], value)
-                            else:
-                                target_dict[key] = value
-                        return target_dict
-
-                    merged_char_state = deep_update(merged_char_state, loaded_data)
-                                     
+                    # Layer the file over the defaults so every key is present; no deep copies (see character_state.py)
+                    merged_char_state = merge_onto_defaults(engine.get_default_character_state(loaded_data.get('powerLevel',10)), loaded_data)
                     st.session_state.character = engine.recalculate(merged_char_state)
                     st.session_state.in_wizard_mode = False 
                     st.session_state.current_view = 'Character Sheet'
@@ -356,6 +359,7 @@ def render_sidebar():
         
         # WeasyPrint PDF Export (Original)
         if st.button("📄 Export to PDF (WeasyPrint)", key="export_pdf_weasy_sidebar_btn", use_container_width=True):
+            flush_pending_edits(['character'])
             pdf_char_state_weasy = st.session_state.character 
             with st.spinner("Generating PDF (WeasyPrint)..."):
                 pdf_bytes_weasy = generate_pdf_bytes(pdf_char_state_weasy, rule_data_app, engine) # Original function
@@ -372,11 +376,13 @@ def render_sidebar():
 
         # FPDF PDF Export (New)
         if st.button("📄 Export to PDF (FPDF)", key="export_pdf_fpdf_sidebar_btn", use_container_width=True):
+            flush_pending_edits(['character'])
             pdf_char_state_fpdf = st.session_state.character
             with st.spinner("Generating PDF (FPDF)..."):
                 try:
                     # Assuming generate_fpdf_character_sheet returns a BytesIO object
-                    pdf_bytes_io_fpdf = generate_fpdf_character_sheet(pdf_char_state_fpdf, rule_data_app, engine)
+                    # Rendered only if this exact character and layout is not cached yet (see pdf_cache.py)
+                    pdf_bytes_io_fpdf = cached_character_sheet(pdf_char_state_fpdf, rule_data_app, engine, cache=load_pdf_cache())
                     if pdf_bytes_io_fpdf:
                         st.download_button(
                             label="📥 Download PDF Sheet (FPDF)",
@@ -408,14 +414,25 @@ def render_sidebar():
         
         if st.button("🔄 Force Full Recalculate", key="force_recalc_sidebar_btn", use_container_width=True):
             try:
-                st.session_state[active_char_state_key] = engine.recalculate(active_char_state)
+                st.session_state[active_char_state_key] = engine.recalculate(st.session_state[active_char_state_key]) # Drops any queued batch
                 st.success("Character data recalculated."); st.rerun()
             except Exception as e_recalc_force:
                  st.error(f"Error during forced recalculation: {e_recalc_force}")
 
+        with st.expander("🧠 Session Memory", expanded=False):
+            st.caption("Memory held by this session. Rule data and default states are interned once per server process and shared by every session.")
+            if st.checkbox("Measure this session", key="measure_session_memory_sidebar_cb"):
+                memory_report = measure_session({key: st.session_state[key] for key in st.session_state.keys()})
+                st.metric("Session-owned", f"{memory_report['session_bytes'] / 1024:.1f} KiB")
+                st.metric("Interned (shared by all sessions)", f"{memory_report['interned_bytes_total'] / 1024:.1f} KiB", help=f"{memory_report['interned_values']} interned values")
+                st.dataframe([{'Key': key, 'Owned KiB': round(entry['bytes'] / 1024, 1), 'Shared with other keys KiB': round(entry['shared_with_earlier_keys_bytes'] / 1024, 1),
+                               'Interned KiB': round(entry['interned_bytes'] / 1024, 1)} for key, entry in sorted(memory_report['keys'].items(), key=lambda item: -item[1]['bytes'])],
+                             hide_index=True, use_container_width=True)
+
 
 # --- Main Application Flow ---
 def main():
+    flush_pending_edits(due_only=True) # Edits from earlier reruns whose debounce window has passed
     render_sidebar() 
     if st.session_state.in_wizard_mode:
         wizard_render_functions = {
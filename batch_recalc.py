@@ -0,0 +1,80 @@
+# batch_recalc.py for HeroForge M&M (Streamlit Edition)
+# Recalculates many characters at once, fanned out over a process pool.
+
+"""
+Backs CoreEngine.recalculate_many. Every worker process recalculates with one engine
+loaded before the pool starts: on platforms with `fork` the workers inherit the parent's
+engine (and its rule catalog) without pickling or re-reading any rules, elsewhere each
+worker loads its own engine once from the same rule directory.
+
+Results stream back in input order as plain dicts:
+    {'index': <position in the input>, 'state': <recalculated state or None>, 'error': <None or message>}
+A character that fails to recalculate reports its error and the batch carries on.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core_engine import CoreEngine, CharacterState
+
+BatchResult = Dict[str, Any]
+
+_worker_engine: Optional['CoreEngine'] = None # The engine used inside each pool worker
+
+
+def _init_worker(engine_or_rule_dir: Union['CoreEngine', str]) -> None:
+    global _worker_engine
+    if isinstance(engine_or_rule_dir, str):
+        from core_engine import CoreEngine
+        _worker_engine = CoreEngine(rule_dir=engine_or_rule_dir)
+    else:
+        _worker_engine = engine_or_rule_dir # Inherited through fork, never pickled
+
+
+def _recalculate_one(engine: 'CoreEngine', index: int, state: 'CharacterState') -> BatchResult:
+    try:
+        return {'index': index, 'state': engine.recalculate(state), 'error': None}
+    except Exception as e:
+        return {'index': index, 'state': None, 'error': f"{type(e).__name__}: {e}"}
+
+
+def _recalculate_chunk(chunk: List[Tuple[int, 'CharacterState']]) -> List[BatchResult]:
+    assert _worker_engine is not None, "Batch worker used before _init_worker ran."
+    return [_recalculate_one(_worker_engine, index, state) for index, state in chunk]
+
+
+def _chunks(states: Iterable['CharacterState'], chunksize: int) -> Iterator[List[Tuple[int, 'CharacterState']]]:
+    indexed_states = enumerate(states)
+    while True:
+        chunk = list(islice(indexed_states, chunksize))
+        if not chunk: return
+        yield chunk
+
+
+def recalculate_many(engine: 'CoreEngine', states: Iterable['CharacterState'], workers: Optional[int] = None,
+                     chunksize: int = 16) -> Iterator[BatchResult]:
+    """
+    Yields one BatchResult per input state, in input order.
+    `workers` defaults to the CPU count; 1 (or fewer) recalculates in this process.
+    `states` may be any iterable, including a lazy generator: at most 2 * workers chunks are in flight.
+    """
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers <= 1:
+        for index, state in enumerate(states): yield _recalculate_one(engine, index, state)
+        return
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('fork'); worker_init_arg: Union['CoreEngine', str] = engine
+    else:
+        mp_context = multiprocessing.get_context('spawn'); worker_init_arg = engine.rule_dir
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker, initargs=(worker_init_arg,)) as pool:
+        in_flight: Deque[Future] = deque()
+        for chunk in _chunks(states, max(1, chunksize)):
+            in_flight.append(pool.submit(_recalculate_chunk, chunk))
+            if len(in_flight) >= workers * 2: yield from in_flight.popleft().result()
+        while in_flight: yield from in_flight.popleft().result()
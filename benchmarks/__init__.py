@@ -0,0 +1,19 @@
+# benchmarks/__init__.py for HeroForge M&M (Streamlit Edition)
+
+"""
+HeroForge M&M - Performance Benchmarks
+======================================
+
+Standalone, reproducible timings of the CoreEngine and PDF hot paths.
+
+- `synthetic.py`: deterministic generator of characters of controlled size
+  (powers, modifiers per power, arrays, Enhanced Trait chains, sense and immunity
+  packages, headquarters and vehicles).
+- `run_benchmarks.py`: times the hot paths on those characters and writes the
+  results as JSON to `benchmarks/results/` so runs can be compared across commits.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --sizes small,large --repeat 7
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/<older>.json
+"""
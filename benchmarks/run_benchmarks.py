@@ -0,0 +1,104 @@
+# benchmarks/run_benchmarks.py for HeroForge M&M (Streamlit Edition)
+# Times the engine and PDF hot paths on synthetic characters and stores the results as JSON.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path: sys.path.insert(0, ROOT_DIR)
+
+from core_engine import CoreEngine, CharacterState # noqa: E402
+from benchmarks.synthetic import CHARACTER_SIZES, make_sized_character # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+RESULTS_FORMAT = 1
+
+
+def time_call(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """Runs `fn` once to warm up, then `repeat` timed runs (each after `setup`); timings in milliseconds."""
+    if setup: setup()
+    fn()
+    samples: List[float] = []
+    for _ in range(repeat):
+        if setup: setup()
+        start = time.perf_counter(); fn(); samples.append((time.perf_counter() - start) * 1000.0)
+    return {'min_ms': min(samples), 'median_ms': statistics.median(samples), 'mean_ms': statistics.fmean(samples),
+            'max_ms': max(samples), 'repeat': repeat}
+
+
+def benchmark_character(engine: CoreEngine, state: CharacterState, repeat: int, include_pdf: bool = True) -> Dict[str, Dict[str, float]]:
+    """Timings of every hot path for one character. `*_cold` runs start from an empty power cost cache."""
+    recalculated = engine.recalculate(state); powers = recalculated['powers']
+    timings = {
+        'recalculate_cold': time_call(lambda: engine.recalculate(state), repeat, setup=engine.clear_power_cost_cache),
+        'recalculate_warm': time_call(lambda: engine.recalculate(state), repeat),
+        'recalculate_incremental_skill': time_call(lambda: engine.recalculate(recalculated, changed_key_paths=[['skills', 'skill_stealth']]), repeat),
+        'calculate_power_cost_cold': time_call(lambda: engine.calculate_power_cost([{k: v for k, v in p.items() if k != 'cost'} for p in powers]), repeat, setup=engine.clear_power_cost_cache),
+        'validate_all': time_call(lambda: engine.validate_all(recalculated), repeat),
+        'get_power_measurement_details': time_call(lambda: [engine.get_power_measurement_details(p) for p in powers], repeat),
+    }
+    if include_pdf:
+        from pdf_utils import generate_fpdf_character_sheet # fpdf2 is optional for engine-only runs
+        timings['generate_fpdf_character_sheet'] = time_call(lambda: generate_fpdf_character_sheet(recalculated, engine.rule_data, engine), max(1, repeat // 2))
+        timings['generate_fpdf_character_sheet']['produced_pdf'] = generate_fpdf_character_sheet(recalculated, engine.rule_data, engine) is not None
+    return timings
+
+
+def _git_revision() -> Optional[str]:
+    try: return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+
+def run(sizes: List[str], repeat: int, seed: int, include_pdf: bool) -> Dict[str, Any]:
+    engine = CoreEngine(rule_dir=os.path.join(ROOT_DIR, "rules"))
+    results: Dict[str, Any] = {
+        'format': RESULTS_FORMAT, 'git_revision': _git_revision(), 'ruleset_version': engine.ruleset_version,
+        'created_utc': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(), 'platform': platform.platform(), 'seed': seed, 'sizes': {},
+    }
+    for size in sizes:
+        state = make_sized_character(engine, size, seed=seed)
+        results['sizes'][size] = {'shape': CHARACTER_SIZES[size], 'power_count': len(state['powers']),
+                                  'timings': benchmark_character(engine, state, repeat, include_pdf=include_pdf)}
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Median ratio current/baseline for every benchmark present in both runs."""
+    lines = [f"Baseline {baseline.get('git_revision')} -> current {current.get('git_revision')} (median ms, ratio)"]
+    for size, size_results in current['sizes'].items():
+        baseline_timings = baseline.get('sizes', {}).get(size, {}).get('timings', {})
+        for name, timing in size_results['timings'].items():
+            if name not in baseline_timings: continue
+            old, new = baseline_timings[name]['median_ms'], timing['median_ms']
+            lines.append(f"  {size:>6} {name:<32} {old:10.3f} -> {new:10.3f}  x{(new / old) if old else float('inf'):.2f}")
+    return lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the HeroForge CoreEngine hot paths.")
+    parser.add_argument('--sizes', default="small,medium,large", help=f"Comma-separated presets from {sorted(CHARACTER_SIZES)}.")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-pdf', action='store_true', help="Skip the PDF export benchmark.")
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/<utc time>-<git revision>.json).")
+    parser.add_argument('--compare', help="Earlier result file to compare against.")
+    args = parser.parse_args()
+
+    bench_results = run([s.strip() for s in args.sizes.split(",") if s.strip()], max(1, args.repeat), args.seed, include_pdf=not args.no_pdf)
+    output_path = args.output or os.path.join(RESULTS_DIR, f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{bench_results['git_revision'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f: json.dump(bench_results, f, indent=2)
+    for size, size_results in bench_results['sizes'].items():
+        for name, timing in size_results['timings'].items(): print(f"{size:>6} {name:<32} median {timing['median_ms']:10.3f} ms")
+    print(f"Results written to {output_path}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f: print("\n".join(compare(bench_results, json.load(f))))
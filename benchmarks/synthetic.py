@@ -0,0 +1,84 @@
+# benchmarks/synthetic.py for HeroForge M&M (Streamlit Edition)
+# Deterministic synthetic characters of controlled size for benchmarking.
+
+import random
+from typing import Any, Dict, List
+
+from core_engine import CoreEngine, CharacterState, PowerDefinition
+
+# Named size presets: powers, modifiers per power, array size, Enhanced Trait chain length,
+# sense/immunity packages, headquarters and vehicles.
+CHARACTER_SIZES: Dict[str, Dict[str, int]] = {
+    'small': {'powers': 5, 'modifiers_per_power': 1, 'array_size': 2, 'enhancement_chain': 1, 'packages': 1, 'headquarters': 0, 'vehicles': 0},
+    'medium': {'powers': 20, 'modifiers_per_power': 3, 'array_size': 4, 'enhancement_chain': 2, 'packages': 2, 'headquarters': 1, 'vehicles': 1},
+    'large': {'powers': 60, 'modifiers_per_power': 4, 'array_size': 8, 'enhancement_chain': 3, 'packages': 4, 'headquarters': 2, 'vehicles': 2},
+    'huge': {'powers': 200, 'modifiers_per_power': 6, 'array_size': 12, 'enhancement_chain': 5, 'packages': 8, 'headquarters': 4, 'vehicles': 4},
+}
+
+# Effects whose cost depends only on rank and modifiers (containers are generated separately)
+_CONTAINER_FLAGS = ('isSenseContainer', 'isImmunityContainer', 'isEnhancementEffect', 'isVariableContainer', 'isTransformContainer', 'isAllyEffect', 'isFixedCostByRank')
+
+
+def make_character(engine: CoreEngine, powers: int = 20, modifiers_per_power: int = 3, array_size: int = 4,
+                   enhancement_chain: int = 2, packages: int = 2, headquarters: int = 1, vehicles: int = 1,
+                   seed: int = 0) -> CharacterState:
+    """
+    Builds a character with exactly `powers` regular powers (the first `array_size` of them form one
+    dynamic array), an Enhanced Trait (PowerRank) chain of `enhancement_chain` powers, `packages` sense
+    and immunity powers each, plus HQs and vehicles. The same arguments always give the same character.
+    """
+    rng = random.Random(seed); catalog = engine.catalog
+    state = engine.get_default_character_state(pl=10)
+    state['name'] = f"Synthetic {powers}x{modifiers_per_power} (seed {seed})"
+    for ability_id in state['abilities']: state['abilities'][ability_id] = rng.randint(0, 6)
+    for defense_id in state['defenses']: state['defenses'][defense_id] = rng.randint(0, 6)
+    for skill_id in state['skills']: state['skills'][skill_id] = rng.randint(0, 8)
+    state['skills']['skill_expertise_science'] = rng.randint(0, 8)
+    state['advantages'] = [{'id': adv_id, 'rank': rng.randint(1, 3) if catalog.advantages[adv_id].get('ranked') else 1, 'params': {}, 'instance_id': f"adv_{i}"}
+                           for i, adv_id in enumerate(rng.sample(sorted(catalog.advantages), 6))]
+    state['complications'] = [{'description': "Motivation: Benchmarks", 'instance_id': "comp_1"}, {'description': "Weakness: Profilers", 'instance_id': "comp_2"}]
+
+    simple_effects = sorted(effect_id for effect_id, rule in catalog.effects.items() if not any(rule.get(flag) for flag in _CONTAINER_FLAGS))
+    ranked_modifiers = sorted(mod_id for mod_id, rule in catalog.modifiers.items() if rule.get('costType') in ('perRank', 'flatPerRankOfModifier', 'flat'))
+    power_list: List[PowerDefinition] = []
+    for i in range(powers):
+        power: PowerDefinition = {
+            'id': f"pwr_{i}", 'name': f"Power {i}", 'baseEffectId': rng.choice(simple_effects), 'rank': rng.randint(1, 12),
+            'modifiersConfig': [{'id': mod_id, 'rank': rng.randint(1, 3), 'instance_id': f"mod_{i}_{j}"}
+                                for j, mod_id in enumerate(rng.sample(ranked_modifiers, min(modifiers_per_power, len(ranked_modifiers))))],
+        }
+        if i < array_size:
+            power['arrayId'] = "array_main"
+            if i == 0: power.update({'isArrayBase': True, 'isDynamicArray': True})
+            else: power['isAlternateEffectOf'] = "pwr_0"
+        power_list.append(power)
+    # Enhanced Trait (PowerRank) chain: pwr_enh_0 -> last regular power, pwr_enh_k -> pwr_enh_(k-1)
+    chain_target = power_list[-1]['id'] if power_list else None
+    for k in range(enhancement_chain if chain_target else 0):
+        power_list.append({'id': f"pwr_enh_{k}", 'name': f"Enhanced {chain_target}", 'baseEffectId': 'eff_enhanced_trait', 'rank': rng.randint(1, 4),
+                           'enhanced_trait_params': {'category': 'PowerRank', 'trait_id': chain_target}, 'modifiersConfig': []})
+        chain_target = f"pwr_enh_{k}"
+    sense_ids = sorted(catalog.senses); immunity_ids = sorted(catalog.immunities)
+    for k in range(packages):
+        power_list.append({'id': f"pwr_senses_{k}", 'name': f"Senses {k}", 'baseEffectId': 'eff_senses', 'rank': 1,
+                           'sensesConfig': rng.sample(sense_ids, min(4, len(sense_ids))), 'modifiersConfig': []})
+        power_list.append({'id': f"pwr_immunity_{k}", 'name': f"Immunity {k}", 'baseEffectId': 'eff_immunity', 'rank': 1,
+                           'immunityConfig': rng.sample(immunity_ids, min(4, len(immunity_ids))), 'modifiersConfig': []})
+    state['powers'] = power_list
+
+    hq_sizes = sorted(fid for fid, rule in catalog.hq_features.items() if rule.get('type') == 'Size')
+    hq_features = sorted(fid for fid, rule in catalog.hq_features.items() if rule.get('type') != 'Size')
+    state['headquarters'] = [{'hq_instance_id': f"hq_{k}", 'name': f"Base {k}", 'size_id': rng.choice(hq_sizes), 'bought_toughness_ranks': rng.randint(0, 4),
+                              'features': [{'id': fid, 'rank': 1} for fid in rng.sample(hq_features, min(5, len(hq_features)))]} for k in range(headquarters)]
+    vehicle_sizes = sorted(catalog.vehicle_size_stats); vehicle_features = sorted(catalog.vehicle_features)
+    state['vehicles'] = [{'vehicle_instance_id': f"vh_{k}", 'name': f"Vehicle {k}", 'size_rank': rng.choice(vehicle_sizes),
+                          'features': [{'id': fid, 'rank': 1} for fid in rng.sample(vehicle_features, min(4, len(vehicle_features)))]} for k in range(vehicles)]
+    return state
+
+
+def make_sized_character(engine: CoreEngine, size: str, seed: int = 0) -> CharacterState:
+    return make_character(engine, seed=seed, **CHARACTER_SIZES[size])
+
+
+def make_roster(engine: CoreEngine, count: int, size: str = 'medium', seed: int = 0) -> List[CharacterState]:
+    return [make_sized_character(engine, size, seed=seed + i) for i in range(count)]
@@ -0,0 +1,134 @@
+# bulk_import.py for HeroForge M&M (Streamlit Edition)
+# Streams character JSON libraries through recalculation and validation and reports on each file.
+
+"""
+Imports any mix of directories (searched recursively), single-character .json files,
+.json roster files holding a list of characters, and JSON-lines archives (.jsonl/.ndjson,
+one character per line):
+
+    python bulk_import.py saved_characters/ exports/roster.jsonl --workers 4 --output report.jsonl
+
+Every character is merged onto the default state the same way the sidebar loader does,
+recalculated in a CoreEngine.recalculate_many worker pool and reduced to one compact report
+line, so memory stays bounded by the pool's in-flight window whatever the archive size:
+
+    {"source", "status", "name", "powerLevel", "spentPowerPoints", "totalPowerPoints", "errors"}
+
+status is 'ok', 'invalid' (validation errors), 'malformed' (unreadable JSON or not a
+character) or 'failed' (recalculation raised). Reports come out in input order.
+"""
+
+import json
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+
+from character_state import merge_onto_defaults
+
+if TYPE_CHECKING:
+    from core_engine import CoreEngine, CharacterState
+
+ImportRecord = Dict[str, Any] # {'source', 'data', 'error'}
+ImportReport = Dict[str, Any]
+
+CHARACTER_FILE_EXTENSIONS = ('.json',)
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+REQUIRED_CHARACTER_KEYS = ('powerLevel', 'abilities') # Same basic check as the sidebar loader
+
+
+def _records_from_file(path: str) -> Iterator[ImportRecord]:
+    try:
+        if path.lower().endswith(JSON_LINES_EXTENSIONS):
+            with open(path, encoding='utf-8') as f:
+                for line_number, line in enumerate(f, start=1): # One line in memory at a time
+                    if not line.strip(): continue
+                    source = f"{path}:{line_number}"
+                    try: yield {'source': source, 'data': json.loads(line), 'error': None}
+                    except json.JSONDecodeError as e: yield {'source': source, 'data': None, 'error': f"Invalid JSON: {e}"}
+            return
+        with open(path, encoding='utf-8') as f: data = json.load(f)
+    except json.JSONDecodeError as e:
+        yield {'source': path, 'data': None, 'error': f"Invalid JSON: {e}"}; return
+    except (OSError, UnicodeDecodeError) as e:
+        yield {'source': path, 'data': None, 'error': f"Unreadable file: {e}"}; return
+    if isinstance(data, list): # Roster export
+        for i, entry in enumerate(data): yield {'source': f"{path}[{i}]", 'data': entry, 'error': None}
+    else: yield {'source': path, 'data': data, 'error': None}
+
+
+def iter_character_records(paths: Iterable[str]) -> Iterator[ImportRecord]:
+    """Parsed characters (or their read/parse error) from files and directories, lazily and in a stable order."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(CHARACTER_FILE_EXTENSIONS + JSON_LINES_EXTENSIONS): yield from _records_from_file(os.path.join(root, name))
+        elif os.path.isfile(path): yield from _records_from_file(path)
+        else: yield {'source': path, 'data': None, 'error': "No such file or directory."}
+
+
+def prepare_character(engine: 'CoreEngine', data: Any) -> 'CharacterState':
+    """Loaded save data merged onto the default state for its PL. Raises ValueError when it is not a character."""
+    if not isinstance(data, dict): raise ValueError(f"Expected a character object, got {type(data).__name__}.")
+    missing = [key for key in REQUIRED_CHARACTER_KEYS if key not in data]
+    if missing: raise ValueError(f"Missing essential keys: {', '.join(missing)}.")
+    return merge_onto_defaults(engine.get_default_character_state(data.get('powerLevel', 10)), data)
+
+
+def _report(source: str, status: str, errors: list, state: Optional[Dict[str, Any]] = None) -> ImportReport:
+    state = state or {}
+    return {'source': source, 'status': status, 'name': state.get('name'), 'powerLevel': state.get('powerLevel'),
+            'spentPowerPoints': state.get('spentPowerPoints'), 'totalPowerPoints': state.get('totalPowerPoints'), 'errors': errors}
+
+
+def import_characters(engine: 'CoreEngine', paths: Iterable[str], workers: Optional[int] = None, chunksize: int = 16) -> Iterator[ImportReport]:
+    """One ImportReport per character found under `paths`, in input order. See the module docstring."""
+    pending: Deque[Tuple[ImportReport, bool]] = deque() # (report, waiting for its recalculation), in input order
+
+    def character_states() -> Iterator['CharacterState']:
+        for record in iter_character_records(paths):
+            if record['error'] is not None:
+                pending.append((_report(record['source'], 'malformed', [record['error']]), False)); continue
+            try: state = prepare_character(engine, record['data'])
+            except ValueError as e:
+                pending.append((_report(record['source'], 'malformed', [str(e)]), False)); continue
+            pending.append((_report(record['source'], 'failed', [], state), True))
+            yield state
+
+    for result in engine.recalculate_many(character_states(), workers=workers, chunksize=chunksize):
+        while pending:
+            report, waiting = pending.popleft()
+            if waiting:
+                if result['error'] is not None: report['errors'] = [result['error']]
+                else:
+                    report.update(_report(report['source'], 'ok', list(result['state'].get('validationErrors', [])), result['state']))
+                    if report['errors']: report['status'] = 'invalid'
+            yield report
+            if waiting: break
+    while pending: yield pending.popleft()[0] # Unreadable entries after the last character
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from collections import Counter
+    from core_engine import CoreEngine
+
+    parser = argparse.ArgumentParser(description="Recalculate and validate a library of HeroForge character files.")
+    parser.add_argument('paths', nargs='+', help="Character .json files, .jsonl archives or directories.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count; 1 = in-process).")
+    parser.add_argument('--chunksize', type=int, default=16)
+    parser.add_argument('--rules', default="rules", help="Rule JSON directory.")
+    parser.add_argument('--output', help="Report file (JSON lines; default: stdout).")
+    args = parser.parse_args()
+
+    status_counts: Counter = Counter()
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for import_report in import_characters(CoreEngine(rule_dir=args.rules), args.paths, workers=args.workers, chunksize=args.chunksize):
+            status_counts[import_report['status']] += 1; out.write(json.dumps(import_report) + "\n")
+    finally:
+        if out is not sys.stdout: out.close()
+    print(f"{sum(status_counts.values())} characters: " + ", ".join(f"{count} {status}" for status, count in sorted(status_counts.items())), file=sys.stderr)
+    sys.exit(1 if status_counts['malformed'] or status_counts['failed'] else 0)
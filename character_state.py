@@ -0,0 +1,47 @@
+# character_state.py for HeroForge M&M (Streamlit Edition)
+# Copy-on-write editing of the character state.
+
+"""
+Character states stay plain dicts and lists so they serialize to the save-file JSON
+unchanged, but they are treated as persistent values: nothing edits a state in place.
+An edit builds a new state that copies only the containers on the path to the changed
+value and shares every other branch with the previous state (structural sharing).
+CoreEngine.recalculate follows the same rule, so a recalculation allocates only the
+nodes it actually rewrites and the states kept in the Streamlit session share most of
+their memory.
+"""
+
+from typing import Any, Dict, List, Union
+
+KeyPath = List[Union[str, int]]
+
+
+def assoc_in(state: Any, key_path: KeyPath, value: Any) -> Any:
+    """
+    Returns a copy of `state` with `value` stored at `key_path`; `state` itself is not modified.
+    String parts address dict keys (missing or non-dict intermediate nodes become {}),
+    integer parts index into lists and raise IndexError when out of range.
+    """
+    if not key_path: return value
+    key, rest = key_path[0], key_path[1:]
+    if isinstance(key, int):
+        if not isinstance(state, list): raise TypeError(f"Cannot index {type(state).__name__} with list index {key}.")
+        new_list = list(state); new_list[key] = assoc_in(state[key], rest, value)
+        return new_list
+    if not isinstance(state, dict): raise TypeError(f"Cannot set key '{key}' on {type(state).__name__}.")
+    child = state.get(key)
+    if rest and not isinstance(rest[0], int) and not isinstance(child, dict): child = {} # Create nested dict path
+    new_dict = dict(state); new_dict[key] = assoc_in(child, rest, value)
+    return new_dict
+
+
+def merge_onto_defaults(defaults: Dict[str, Any], loaded: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Loaded save data layered over a default state: nested dicts merge key by key, anything else
+    from `loaded` replaces the default. Neither input is modified; untouched branches are shared.
+    """
+    merged = dict(defaults)
+    for key, value in loaded.items():
+        default_value = merged.get(key)
+        merged[key] = merge_onto_defaults(default_value, value) if isinstance(value, dict) and isinstance(default_value, dict) else value
+    return merged
@@ -4,9 +4,19 @@
 import json
 import math
 import os
+import pickle
+import tempfile
 import copy # For deep copying complex states
+import hashlib
 import uuid # For generating unique IDs if needed internally
-from typing import Dict, List, Any, Optional, Tuple, Union, Set
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union, Set, Iterable, Iterator
+
+from rule_catalog import RuleCatalog, RuleIndex, SkillResolution, SkillResolver, index_rules
+from engine_profiler import MetricsSink, RecalcProfile
+from validation_rules import IssuesByRule, ValidationIssue, flatten_issues, run_validation_rules
+from session_memory import freeze
 
 # --- Type Hint for Character State & Other Structures ---
 CharacterState = Dict[str, Any]
@@ -19,6 +29,55 @@ VehicleDefinition = Dict[str, Any]
 AllyDefinition = Dict[str, Any] 
 VariableConfigTrait = Dict[str, Any]
 SkillRule = Dict[str, Any] 
+KeyPath = List[Union[str, int]]
+# Enhanced Trait (PowerRank) dependencies of a power list, by list index; see CoreEngine.power_rank_graph
+PowerRankGraph = Dict[str, Any]
+# One entry of state['derived_power_arrays'] (array id -> PowerArray); see CoreEngine.build_power_array_index
+PowerArray = Dict[str, Any]
+# state['derived_trait_summary']: every effective trait of a recalculated character, frozen; see CoreEngine.build_trait_summary
+TraitSummary = Dict[str, Any]
+
+# Governing ability of each defense (DHH p.110)
+DEFENSE_ABILITIES: Dict[str, str] = {'Dodge': 'AGL', 'Parry': 'FGT', 'Toughness': 'STA', 'Fortitude': 'STA', 'Will': 'AWE'}
+# Ally pool advantages: advantage id -> (ally type, default points per rank)
+ALLY_POOL_ADVANTAGES: Dict[str, Tuple[str, int]] = {'adv_minions': ('Minion', 15), 'adv_sidekick': ('Sidekick', 5)}
+
+# --- Incremental Recalculation ---
+# Phases of CoreEngine.recalculate invalidated by a change under each top-level state key.
+# 'power_attacks': attack bonus of attack powers, 'derived': calculate_derived_values (the trait summary),
+# 'costs': spentPowerPoints, 'validation': validate_all. Power edits are planned per power.
+# Keys missing here force a full recalculation.
+RECALC_PHASES_BY_STATE_KEY: Dict[str, frozenset] = {
+    'abilities': frozenset({'power_attacks', 'derived', 'costs', 'validation'}),
+    'defenses': frozenset({'derived', 'costs', 'validation'}),
+    'skills': frozenset({'power_attacks', 'derived', 'costs', 'validation'}),
+    'advantages': frozenset({'derived', 'costs', 'validation'}),
+    'equipment': frozenset({'derived', 'validation'}), 'headquarters': frozenset({'derived', 'validation'}),
+    'vehicles': frozenset({'derived', 'validation'}), 'allies': frozenset({'derived', 'validation'}),
+    'complications': frozenset({'validation'}), 'powerLevel': frozenset({'validation'}), 'totalPowerPoints': frozenset({'validation'}),
+    **{descriptive_key: frozenset() for descriptive_key in (
+        'name', 'playerName', 'concept', 'description', 'identity', 'gender', 'age', 'height',
+        'weight', 'eyes', 'hair', 'groupAffiliation', 'baseOfOperationsName', 'saveFileVersion')},
+}
+
+# --- Rule Files & Compiled Snapshot ---
+RULE_FILES: Tuple[str, ...] = (
+    "abilities.json", "advantages_v1.json", "archetypes.json",
+    "equipment_items.json", "hq_features.json", "measurements_table.json",
+    "power_effects.json", "power_immunities_config.json", "power_senses_config.json",
+    "power_modifiers.json", "skills.json",
+    "vehicle_features.json", "vehicle_size_stats.json"
+)
+# Pickled {format, source_hash, rule_data, ruleset_version} written next to the JSON rules.
+# Bump RULE_SNAPSHOT_FORMAT whenever the snapshot layout or the rule post-processing changes.
+RULE_SNAPSHOT_FILENAME = ".compiled_rules.pickle"
+RULE_SNAPSHOT_FORMAT = 1
+
+# Power fields that decide which array a power belongs to and its role there; editing one rebuilds derived_power_arrays.
+POWER_ARRAY_STRUCTURE_FIELDS: frozenset = frozenset({'id', 'arrayId', 'isArrayBase', 'isAlternateEffectOf'})
+
+# Power fields read by calculate_individual_power_cost; together with the ruleset version they key the cost cache.
+POWER_COST_FIELDS: Tuple[str, ...] = ('baseEffectId', 'rank', 'modifiersConfig', 'sensesConfig', 'immunityConfig', 'morph_params', 'enhanced_trait_params')
 
 class CoreEngine:
     """
@@ -27,8 +86,10 @@ class CoreEngine:
     based on the Mutants & Masterminds 3rd Edition Hero's Handbook (DHH).
     """
 
-    def __init__(self, rule_dir: str = "rules"):
-        self.rule_data: RuleData = self._load_all_rule_data(rule_dir)
+    def __init__(self, rule_dir: str = "rules", power_cost_cache_size: int = 2048, use_rule_snapshot: bool = True):
+        self.rule_dir = os.path.abspath(rule_dir)
+        # ruleset_version: content hash of the loaded rules; part of every cached result key
+        self.rule_data, self.ruleset_version = self._load_rules(rule_dir, use_rule_snapshot)
         if not self.rule_data:
             raise ValueError("FATAL: Core rule data could not be loaded. Application cannot proceed.")
         
@@ -40,26 +101,61 @@ class CoreEngine:
         self._power_senses_list = self.rule_data.get('power_senses_config', [])
         self._power_immunities_list = self.rule_data.get('power_immunities_config', [])
         self._measurements_table_orig = self.rule_data.get('measurements_table', []) # Keep original
-        self._measurements_table = sorted( # Ensure sorted by rank for lookups
-            [entry for entry in self._measurements_table_orig if isinstance(entry.get('rank'), (int, float))],
-            key=lambda x: x.get('rank', 0)
-        )
         self._equipment_items_list = self.rule_data.get('equipment_items', [])
         self._hq_features_list = self.rule_data.get('hq_features', [])
         self._vehicle_features_list = self.rule_data.get('vehicle_features', [])
         self._vehicle_size_stats_list = self.rule_data.get('vehicle_size_stats', [])
+        # Id-keyed indexes over the lists above; all engine rule lookups go through this.
+        self.catalog = RuleCatalog(self.rule_data)
+        # Bounded LRU of calculate_individual_power_cost results keyed by power fingerprint
+        self._power_cost_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._power_cost_cache_size = power_cost_cache_size; self._power_cost_cache_hits = 0; self._power_cost_cache_misses = 0
+        # Opt-in recalculation profiling (see engine_profiler.py); None/empty means no timing calls at all
+        self._active_profile: Optional[RecalcProfile] = None; self._metrics_sinks: List[MetricsSink] = []
         
         print("CoreEngine initialized successfully with rule data.")
 
+    def _load_rules(self, directory_path: str, use_rule_snapshot: bool) -> Tuple[RuleData, str]:
+        """
+        Returns (rule_data, ruleset_version). The compiled snapshot in the rule directory is used while
+        its source hash matches the JSON files; otherwise the JSON is parsed and the snapshot rewritten.
+        """
+        source_hash = self._hash_rule_sources(directory_path) if use_rule_snapshot else None
+        snapshot_path = os.path.join(os.path.abspath(directory_path), RULE_SNAPSHOT_FILENAME)
+        if source_hash:
+            try:
+                with open(snapshot_path, 'rb') as f: snapshot = pickle.load(f)
+                if snapshot.get('format') == RULE_SNAPSHOT_FORMAT and snapshot.get('source_hash') == source_hash:
+                    return snapshot['rule_data'], snapshot['ruleset_version']
+            except Exception: pass # Missing, stale or unreadable snapshot: rebuild from JSON
+
+        rule_data = self._load_all_rule_data(directory_path)
+        ruleset_version = hashlib.sha256(json.dumps(rule_data, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        if source_hash:
+            snapshot = {'format': RULE_SNAPSHOT_FORMAT, 'source_hash': source_hash, 'rule_data': rule_data, 'ruleset_version': ruleset_version}
+            tmp_path = None
+            try: # Atomic replace so concurrent workers never read a partial snapshot
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(snapshot_path), prefix=RULE_SNAPSHOT_FILENAME, suffix=".tmp")
+                with os.fdopen(fd, 'wb') as f: pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, snapshot_path)
+            except OSError as e:
+                if tmp_path and os.path.exists(tmp_path): os.remove(tmp_path)
+                print(f"Warning: Could not write rule snapshot to {snapshot_path}: {e}")
+        return rule_data, ruleset_version
+
+    def _hash_rule_sources(self, directory_path: str) -> Optional[str]:
+        """sha256 over the names and bytes of every rule JSON file; None if any is missing (the JSON loader reports it)."""
+        source_hash = hashlib.sha256(str(RULE_SNAPSHOT_FORMAT).encode('utf-8'))
+        for filename in RULE_FILES:
+            try:
+                with open(os.path.join(os.path.abspath(directory_path), filename), 'rb') as f: file_bytes = f.read()
+            except OSError: return None
+            source_hash.update(filename.encode('utf-8')); source_hash.update(len(file_bytes).to_bytes(8, 'little')); source_hash.update(file_bytes)
+        return source_hash.hexdigest()
+
     def _load_all_rule_data(self, directory_path: str) -> RuleData:
         loaded_data: RuleData = {}
-        expected_files = [
-            "abilities.json", "advantages_v1.json", "archetypes.json",
-            "equipment_items.json", "hq_features.json", "measurements_table.json",
-            "power_effects.json", "power_immunities_config.json", "power_senses_config.json",
-            "power_modifiers.json", "skills.json",
-            "vehicle_features.json", "vehicle_size_stats.json"
-        ]
+        expected_files = RULE_FILES
         try:
             abs_path = os.path.abspath(directory_path)
             if not os.path.isdir(abs_path):
@@ -107,51 +203,57 @@ class CoreEngine:
             "derived_languages_known": [], "derived_languages_granted": 0, 
             "derived_total_ep": 0, "derived_spent_ep": 0,
             "derived_total_minion_pool_pp": 0, "derived_spent_minion_pool_pp": 0,
-            "derived_total_sidekick_pool_pp": 0, "derived_spent_sidekick_pool_pp": 0
+            "derived_total_sidekick_pool_pp": 0, "derived_spent_sidekick_pool_pp": 0,
+            "derived_power_arrays": {}, "derived_validation_issues": {}, "derived_trait_summary": {},
+            "derived_applied_enhancements": {}
         }
 
     def get_ability_modifier(self, ability_rank: Optional[Union[int, float]]) -> int:
         return int(ability_rank) if ability_rank is not None else 0
 
-    def get_skill_rule(self, skill_id_or_name: str) -> Optional[SkillRule]:
-        for skill_rule in self._skills_list:
-            if skill_rule['id'] == skill_id_or_name or skill_rule['name'] == skill_id_or_name:
-                return skill_rule
-            if skill_rule.get('specialization_possible') and skill_id_or_name.startswith(skill_rule['id'] + "_"):
-                return skill_rule 
-        return None
+    def _index_for(self, rules: Optional[List[Dict]], engine_rules: List[Dict], engine_index: RuleIndex, key: str = 'id') -> RuleIndex:
+        """Returns the catalog index when callers pass the engine's own rule list (or nothing); indexes foreign lists on the fly."""
+        if rules is None or rules is engine_rules: return engine_index
+        return index_rules(rules, key)
+
+    def _skill_resolver_for(self, skills_rules_list: Optional[List[Dict]]) -> SkillResolver:
+        """The catalog's resolver for the engine's own skill list (or None); a throwaway one for any other list."""
+        if skills_rules_list is None or skills_rules_list is self._skills_list: return self.catalog.skill_resolver
+        return SkillResolver(skills_rules_list)
+
+    def resolve_skill(self, skill_id_or_name: str, skills_rules_list: Optional[List[Dict]] = None) -> Optional[SkillResolution]:
+        """Base rule, governing ability and display name of a skill id, name or specialized id; None if unknown."""
+        return self._skill_resolver_for(skills_rules_list).resolve(skill_id_or_name)
+
+    def get_skill_rule(self, skill_id_or_name: str, skills_rules_list: Optional[List[Dict]] = None) -> Optional[SkillRule]:
+        resolution = self.resolve_skill(skill_id_or_name, skills_rules_list)
+        return resolution.rule if resolution else None
         
     def get_skill_name_by_id(self, skill_id: str, skills_rules_list: Optional[List[Dict]] = None) -> str:
-        if skills_rules_list is None: skills_rules_list = self._skills_list
-        base_skill_id_parts = skill_id.split('_')
-        base_skill_id_lookup = "_".join(base_skill_id_parts[:2]) if len(base_skill_id_parts) >=2 else skill_id
-        base_skill_rule = next((s for s in skills_rules_list if s['id'] == base_skill_id_lookup), None)
-        if not base_skill_rule: return skill_id 
-        if base_skill_rule.get('specialization_possible') and skill_id.startswith(base_skill_rule['id'] + "_") and len(skill_id) > len(base_skill_rule['id'] + "_"):
-            specialization_name_part = skill_id[len(base_skill_rule['id'] + "_"):]
-            specialization_name = specialization_name_part.replace("_"," ").title()
-            return f"{base_skill_rule['name']}: {specialization_name}"
-        return base_skill_rule['name']
+        resolution = self.resolve_skill(skill_id, skills_rules_list)
+        return resolution.display_name if resolution else skill_id
 
     def get_trait_cost_per_rank(
         self, 
         trait_category: str, 
         trait_id: Optional[str] = None, 
         character_powers_context: Optional[List[PowerDefinition]] = None,
-        _costing_recursion_set: Optional[Set[str]] = None # For recursion detection
+        _costing_recursion_set: Optional[Set[str]] = None, # For recursion detection
+        resolved_costs_per_rank: Optional[Dict[str, float]] = None # Power id -> cost per rank, filled in power_rank_graph order
     ) -> float:
         if trait_category == "Ability": return 2.0
         if trait_category == "Defense": return 1.0 
         if trait_category == "Skill": return 0.5
         if trait_category == "Advantage":
             if trait_id and self._advantages_list:
-                adv_rule = next((adv for adv in self._advantages_list if adv['id'] == trait_id), None)
+                adv_rule = self.catalog.advantages.get(trait_id)
                 return float(adv_rule.get('costPerRank', 1.0)) if adv_rule else 1.0
             return 1.0
         if trait_category == "PowerRank" and trait_id and character_powers_context:
+            # A recalculate costs targets before their enhancers; a target not costed yet closes a cycle (or is missing)
+            if resolved_costs_per_rank is not None: return resolved_costs_per_rank.get(trait_id, 1.0)
             if _costing_recursion_set and trait_id in _costing_recursion_set:
-                print(f"Warning: Recursion detected for PowerRank enhancement of {trait_id}. Returning default cost.")
-                return 1.0 # Break recursion, return default
+                return 1.0 # Break recursion, return default; validate_all reports the cycle
 
             target_power = next((pwr for pwr in character_powers_context if pwr.get('id') == trait_id), None)
             if target_power:
@@ -163,109 +265,49 @@ class CoreEngine:
                 # The trait_id is the ID of the power being enhanced.
                 
                 cost_details = self.calculate_individual_power_cost(target_power, character_powers_context, _costing_recursion_set=temp_recursion_set)
-                cpr_final_val = cost_details.get('costPerRankFinal')
-                if isinstance(cpr_final_val, (int, float)): return float(cpr_final_val)
-                if isinstance(cpr_final_val, str): 
-                    if "1 per " in cpr_final_val:
-                        try: return 1.0 / int(cpr_final_val.split("1 per ")[1])
-                        except (ValueError, ZeroDivisionError): return 1.0 
-                    try: return float(cpr_final_val) 
-                    except ValueError: return 1.0 
-                return 1.0 
+                return self._cost_per_rank_value(cost_details.get('costPerRankFinal'))
             return 1.0 
         return 1.0
 
-    def get_measurement_by_rank(self, rank: int, measurement_type: str) -> str:
-        if not self._measurements_table: return f"Rank {rank} (Table N/A)"
-        
-        # Direct match
-        for entry in self._measurements_table:
-            if entry.get('rank') == rank:
-                return entry.get(measurement_type, f"Rank {rank} (Type N/A in Table Entry)")
-        
-        # Handle ranks outside the defined table range
-        min_rank_in_table = self._measurements_table[0].get('rank', -float('inf'))
-        max_rank_in_table = self._measurements_table[-1].get('rank', float('inf'))
+    def _cost_per_rank_value(self, cpr_final_val: Any) -> float:
+        """A power's costPerRankFinal as the cost per rank an Enhanced Trait (PowerRank) of it pays."""
+        if isinstance(cpr_final_val, (int, float)): return float(cpr_final_val)
+        if isinstance(cpr_final_val, str): 
+            if "1 per " in cpr_final_val:
+                try: return 1.0 / int(cpr_final_val.split("1 per ")[1])
+                except (ValueError, ZeroDivisionError): return 1.0 
+            try: return float(cpr_final_val) 
+            except ValueError: return 1.0 
+        return 1.0
 
-        if rank < min_rank_in_table:
-            return f"< {self._measurements_table[0].get(measurement_type, '')} (Below Table Minimum)"
-        
-        if rank > max_rank_in_table:
-            # Refined Extrapolation
-            if len(self._measurements_table) >= 2:
-                last_entry = self._measurements_table[-1]
-                second_last_entry = self._measurements_table[-2]
-                
-                try:
-                    # Attempt to parse values as numbers for extrapolation
-                    # This simplified parsing may not work for all M&M table string formats (e.g. "1/2 mile")
-                    def parse_measurement_value(val_str: str) -> Optional[float]:
-                        if isinstance(val_str, (int, float)): return float(val_str)
-                        if isinstance(val_str, str):
-                            # Basic parsing for numbers, fractions, and some units - very simplified
-                            if 'Subatomic' in val_str or 'Planetary' in val_str: return None
-                            val_str_cleaned = val_str.split(" ")[0].replace(",", "") # "25 Kilograms" -> "25"
-                            if "/" in val_str_cleaned: # "1/2"
-                                num, den = val_str_cleaned.split("/")
-                                return float(num) / float(den)
-                            return float(val_str_cleaned)
-                        return None
-
-                    last_val_num = parse_measurement_value(last_entry.get(measurement_type))
-                    second_last_val_num = parse_measurement_value(second_last_entry.get(measurement_type))
-                    
-                    last_rank_val = last_entry.get('rank')
-                    second_last_rank_val = second_last_entry.get('rank')
-
-                    if last_val_num is not None and second_last_val_num is not None and \
-                       isinstance(last_rank_val, (int, float)) and isinstance(second_last_rank_val, (int, float)) and \
-                       last_rank_val != second_last_rank_val:
-                        
-                        rank_diff_table = last_rank_val - second_last_rank_val
-                        val_diff_table = last_val_num - second_last_val_num
-                        
-                        # If it's an M&M-style doubling per X ranks, simple linear won't work well.
-                        # For many M&M progressions, a large jump means a multiplicative factor.
-                        # For a small jump, an additive factor.
-                        # This is still an approximation.
-                        
-                        ranks_above_max = rank - last_rank_val
-                        
-                        if abs(val_diff_table) > abs(second_last_val_num * rank_diff_table * 0.5) and second_last_val_num != 0: # Heuristic: large jump suggests multiplicative
-                            # Multiplicative factor over one rank step in the table
-                            if second_last_val_num != 0 and rank_diff_table > 0:
-                                factor_per_table_rank_step = (last_val_num / second_last_val_num) ** (1/rank_diff_table) if second_last_val_num !=0 else 2 # default factor
-                                extrapolated_value = last_val_num * (factor_per_table_rank_step ** ranks_above_max)
-                                return f"~{extrapolated_value:.2g} (Extrapolated Multiplicatively)"
-                        else: # Additive
-                            increment_per_rank_step = val_diff_table / rank_diff_table
-                            extrapolated_value = last_val_num + (increment_per_rank_step * ranks_above_max)
-                            # M&M often has doubling of increment for steps beyond table for *some* measures
-                            # This is too specific to generalize without knowing measurement_type behavior
-                            # Simple linear for now if not clearly multiplicative
-                            return f"~{extrapolated_value:.2g} (Extrapolated Linearly)"
-                except (ValueError, TypeError, ZeroDivisionError):
-                    # Fallback if numeric conversion/calculation fails
-                    pass # Handled by returning last known value below
-            
-            # Fallback for non-numeric or if extrapolation fails
-            return f"> {self._measurements_table[-1].get(measurement_type, '')} (Above Table Maximum)"
-
-        # Interpolation for ranks within the table but not explicitly listed
-        # (The provided table is quite dense, so this might not be hit often)
-        closest_lower_entry = None
-        for entry in self._measurements_table: # Already sorted
-            entry_rank_val = entry.get('rank')
-            if isinstance(entry_rank_val, (int, float)) and entry_rank_val < rank:
-                closest_lower_entry = entry
-            elif isinstance(entry_rank_val, (int, float)) and entry_rank_val >= rank:
-                break # Found first entry >= rank, closest_lower_entry is set
-        
-        if closest_lower_entry:
-            return f"{closest_lower_entry.get(measurement_type, '')} (at Rank {closest_lower_entry.get('rank')}, value for rank {rank} not explicitly listed)"
-        
-        return f"Rank {rank} (Value N/A or out of typical range)"
+    def power_rank_graph(self, powers: List[PowerDefinition]) -> PowerRankGraph:
+        """
+        Enhanced Trait (PowerRank) dependencies between `powers`, by list index:
+        'targets' {enhancer: target}, 'enhancers' {target: [enhancers]}, 'order' (every index, each target
+        before its enhancers), 'cycles' (lists of indexes enhancing each other in a loop), 'cyclic' and
+        'index_by_id'. A power id used twice resolves to its first power, as the costing lookups do.
+        Every enhancer has at most one target, so one walk per chain finds both the order and the cycles.
+        """
+        first_index_by_id: Dict[str, int] = {}
+        for idx, pwr in enumerate(powers):
+            if pwr.get('id'): first_index_by_id.setdefault(pwr['id'], idx)
+        targets: Dict[int, int] = {}; enhancers: Dict[int, List[int]] = {}
+        for idx, pwr in enumerate(powers):
+            et_params = pwr.get('enhanced_trait_params') or {}
+            if pwr.get('baseEffectId') == 'eff_enhanced_trait' and et_params.get('category') == 'PowerRank' and et_params.get('trait_id') in first_index_by_id:
+                targets[idx] = first_index_by_id[et_params['trait_id']]; enhancers.setdefault(targets[idx], []).append(idx)
+        order: List[int] = []; cycles: List[List[int]] = []; walk_state: Dict[int, bool] = {} # idx -> finished
+        for start_idx in range(len(powers)):
+            chain: List[int] = []; idx: Optional[int] = start_idx
+            while idx is not None and idx not in walk_state: walk_state[idx] = False; chain.append(idx); idx = targets.get(idx)
+            if idx is not None and not walk_state[idx]: cycles.append(chain[chain.index(idx):]) # Walked back into this chain
+            for chain_idx in reversed(chain): walk_state[chain_idx] = True; order.append(chain_idx)
+        return {'targets': targets, 'enhancers': enhancers, 'order': order, 'cycles': cycles,
+                'cyclic': {idx for cycle in cycles for idx in cycle}, 'index_by_id': first_index_by_id}
 
+    def get_measurement_by_rank(self, rank: int, measurement_type: str) -> str:
+        """Measurements table display for `rank`; bisect over the precompiled per-type curve in the catalog."""
+        return self.catalog.get_measurement_curve(measurement_type).lookup(rank)
 
     def calculate_ability_cost(self, abilities_state: Dict[str, int]) -> int:
         cost = 0
@@ -285,7 +327,7 @@ class CoreEngine:
         cost = 0
         if not self._advantages_list: return 0
         for adv_entry in advantages_state:
-            adv_rule = next((r for r in self._advantages_list if r['id'] == adv_entry.get('id')), None)
+            adv_rule = self.catalog.advantages.get(adv_entry.get('id'))
             cost_per_rank = adv_rule.get('costPerRank', 1) if adv_rule else 1
             rank_taken = adv_entry.get('rank', 1)
             cost += rank_taken * cost_per_rank
@@ -295,14 +337,13 @@ class CoreEngine:
         return sum(item.get('ep_cost', 0) for item in equipment_list)
 
     def calculate_hq_cost(self, hq_definition: HQDefinition, hq_features_rules: Optional[List[Dict]] = None) -> int:
-        if hq_features_rules is None: hq_features_rules = self._hq_features_list
+        hq_features_index = self._index_for(hq_features_rules, self._hq_features_list, self.catalog.hq_features)
         cost = 0
-        size_id = hq_definition.get('size_id')
-        size_rule = next((f for f in hq_features_rules if f.get('id') == size_id and f.get('type') == 'Size'), None)
-        if size_rule: cost += size_rule.get('ep_cost', 0)
+        size_rule = hq_features_index.get(hq_definition.get('size_id'))
+        if size_rule and size_rule.get('type') == 'Size': cost += size_rule.get('ep_cost', 0)
         cost += hq_definition.get('bought_toughness_ranks', 0)
         for feat_entry in hq_definition.get('features', []):
-            feat_rule = next((f for f in hq_features_rules if f.get('id') == feat_entry.get('id')), None)
+            feat_rule = hq_features_index.get(feat_entry.get('id'))
             if feat_rule:
                 cost_val = feat_rule.get('ep_cost', feat_rule.get('ep_cost_per_rank', 1))
                 if feat_rule.get('ranked'):
@@ -314,14 +355,13 @@ class CoreEngine:
     def calculate_vehicle_cost(self, vehicle_def: VehicleDefinition, 
                                vehicle_features_rules: Optional[List[Dict]] = None, 
                                vehicle_size_stats_rules: Optional[List[Dict]] = None) -> int:
-        if vehicle_features_rules is None: vehicle_features_rules = self._vehicle_features_list
-        if vehicle_size_stats_rules is None: vehicle_size_stats_rules = self._vehicle_size_stats_list
+        vehicle_features_index = self._index_for(vehicle_features_rules, self._vehicle_features_list, self.catalog.vehicle_features)
+        size_stats_index = self._index_for(vehicle_size_stats_rules, self._vehicle_size_stats_list, self.catalog.vehicle_size_stats, key='size_rank_value')
         cost = 0
-        size_rank_val = vehicle_def.get('size_rank', 0)
-        size_stat_rule = next((s for s in vehicle_size_stats_rules if s.get('size_rank_value') == size_rank_val), None)
+        size_stat_rule = size_stats_index.get(vehicle_def.get('size_rank', 0))
         if size_stat_rule: cost += size_stat_rule.get('base_ep_cost', 0)
         for feat_entry in vehicle_def.get('features', []):
-            feat_rule = next((f for f in vehicle_features_rules if f.get('id') == feat_entry.get('id')), None)
+            feat_rule = vehicle_features_index.get(feat_entry.get('id'))
             if feat_rule:
                 cost_val = feat_rule.get('ep_cost', feat_rule.get('ep_cost_per_rank', 1))
                 if feat_rule.get('ranked'):
@@ -330,15 +370,81 @@ class CoreEngine:
                     cost += cost_val
         return cost
         
+    def power_cost_cache_info(self) -> Dict[str, int]:
+        """Hit/miss counters and occupancy of the per-power cost cache."""
+        return {'hits': self._power_cost_cache_hits, 'misses': self._power_cost_cache_misses,
+                'maxsize': self._power_cost_cache_size, 'currsize': len(self._power_cost_cache)}
+
+    def clear_power_cost_cache(self) -> None:
+        self._power_cost_cache.clear(); self._power_cost_cache_hits = 0; self._power_cost_cache_misses = 0
+
+    def sweep_power_costs(self, base_power: PowerDefinition, ranks: Iterable[int],
+                          modifier_variants: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                          powers_context: Optional[List[PowerDefinition]] = None) -> Dict[str, Any]:
+        """
+        What-if costs of `base_power` over a grid of ranks x modifier variants (label -> modifiersConfig),
+        evaluated in one vectorized pass. See cost_sweep.py for the result table layout.
+        """
+        from cost_sweep import sweep_power_costs # NumPy is only needed for sweeps
+        return sweep_power_costs(self, base_power, ranks, modifier_variants=modifier_variants, powers_context=powers_context)
+
+    def optimize_archetype_build(self, archetype_id: str, pl: int = 10, **search_options: Any) -> Dict[str, Any]:
+        """Maximal PL-legal build of an archetype within its PP budget; see npc_optimizer.py for the search and result layout."""
+        from npc_optimizer import optimize_archetype_build
+        return optimize_archetype_build(self, archetype_id, pl=pl, **search_options)
+
+    def _power_cost_fingerprint(self, power_definition: PowerDefinition, all_character_powers_context: List[PowerDefinition],
+                                _visiting: Optional[Set[str]] = None, resolved_costs_per_rank: Optional[Dict[str, float]] = None) -> Optional[str]:
+        """
+        Canonical key over the cost-relevant fields of a power (POWER_COST_FIELDS) and the ruleset version.
+        An Enhanced Trait (PowerRank) power costs per rank what its target does, so its key nests the target's key,
+        or the target's already resolved cost per rank during a recalculate.
+        Returns None when the result cannot be cached (PowerRank enhancement cycles).
+        """
+        cost_fields: Dict[str, Any] = {field: power_definition.get(field) for field in POWER_COST_FIELDS}
+        et_params = power_definition.get('enhanced_trait_params') or {}
+        if power_definition.get('baseEffectId') == 'eff_enhanced_trait' and et_params.get('category') == 'PowerRank' and et_params.get('trait_id'):
+            target_id = et_params['trait_id']; visiting = set(_visiting) if _visiting else set()
+            if resolved_costs_per_rank is not None: cost_fields['_target_cpr'] = resolved_costs_per_rank.get(target_id, 1.0)
+            else:
+                if power_definition.get('id'): visiting.add(power_definition['id'])
+                if target_id in visiting: return None
+                target_power = next((pwr for pwr in all_character_powers_context or [] if pwr.get('id') == target_id), None)
+                if target_power is not None:
+                    cost_fields['_target'] = self._power_cost_fingerprint(target_power, all_character_powers_context, visiting)
+                    if cost_fields['_target'] is None: return None
+        canonical = json.dumps([self.ruleset_version, cost_fields], sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
     def calculate_individual_power_cost(
         self, 
         power_definition: PowerDefinition, 
         all_character_powers_context: List[PowerDefinition],
-        _costing_recursion_set: Optional[Set[str]] = None # For recursion detection in Enhanced Trait (PowerRank)
+        _costing_recursion_set: Optional[Set[str]] = None, # For recursion detection in Enhanced Trait (PowerRank)
+        resolved_costs_per_rank: Optional[Dict[str, float]] = None # Enhanced Trait (PowerRank) targets already costed, by power id
+    ) -> Dict[str, Any]:
+        """Costs one power; results for unchanged cost-relevant fields are served from the LRU cost cache."""
+        cache_key = self._power_cost_fingerprint(power_definition, all_character_powers_context, resolved_costs_per_rank=resolved_costs_per_rank) if self._power_cost_cache_size > 0 else None
+        if cache_key is not None and cache_key in self._power_cost_cache:
+            self._power_cost_cache_hits += 1; self._power_cost_cache.move_to_end(cache_key)
+            results = self._power_cost_cache[cache_key]
+        else:
+            results = self._calculate_individual_power_cost_uncached(power_definition, all_character_powers_context, _costing_recursion_set, resolved_costs_per_rank)
+            if cache_key is not None:
+                self._power_cost_cache_misses += 1; self._power_cost_cache[cache_key] = results
+                if len(self._power_cost_cache) > self._power_cost_cache_size: self._power_cost_cache.popitem(last=False)
+        return {**results, 'costBreakdown': dict(results['costBreakdown'])} # Callers store the breakdown on their power
+
+    def _calculate_individual_power_cost_uncached(
+        self, 
+        power_definition: PowerDefinition, 
+        all_character_powers_context: List[PowerDefinition],
+        _costing_recursion_set: Optional[Set[str]] = None, # For recursion detection in Enhanced Trait (PowerRank)
+        resolved_costs_per_rank: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
         results = {'totalCost': 0, 'costPerRankFinal': 0.0, 'costBreakdown': {'base_effect_cpr':0.0, 'extras_cpr':0.0, 'flaws_cpr':0.0, 'flat_total':0.0, 'senses_total': 0.0, 'immunities_total':0.0, 'variable_base_cost':0.0, 'enh_trait_base_cost':0.0, 'special_fixed_cost':0.0}}
         base_effect_id = power_definition.get('baseEffectId'); power_rank = int(power_definition.get('rank', 0)); modifiers_config = power_definition.get('modifiersConfig', [])
-        base_effect_rule = next((e for e in self._power_effects_list if e['id'] == base_effect_id), None)
+        base_effect_rule = self.catalog.effects.get(base_effect_id)
         
         current_power_id = power_definition.get('id')
         if current_power_id and _costing_recursion_set and current_power_id in _costing_recursion_set:
@@ -355,89 +461,74 @@ class CoreEngine:
 
         if not base_effect_rule: return results 
         if base_effect_rule.get('isSenseContainer'):
-            sense_total_cost = sum(s_rule.get('cost',0) for s_id in power_definition.get('sensesConfig', []) for s_rule in self._power_senses_list if s_rule['id'] == s_id)
+            sense_total_cost = sum(self.catalog.senses[s_id].get('cost',0) for s_id in power_definition.get('sensesConfig', []) if s_id in self.catalog.senses)
             results['costBreakdown']['senses_total'] = float(sense_total_cost); flat_mod_cost = sum(self._get_modifier_flat_cost(mod_conf) for mod_conf in modifiers_config)
             results['costBreakdown']['flat_total'] = flat_mod_cost; results['totalCost'] = math.ceil(sense_total_cost + flat_mod_cost); results['costPerRankFinal'] = "N/A (Senses Package)"; return results
         if base_effect_rule.get('isImmunityContainer'):
-            immunity_total_cost = sum(i_rule.get('cost',0) for i_id in power_definition.get('immunityConfig', []) for i_rule in self._power_immunities_list if i_rule['id'] == i_id)
+            immunity_total_cost = sum(self.catalog.immunities[i_id].get('cost',0) for i_id in power_definition.get('immunityConfig', []) if i_id in self.catalog.immunities)
             results['costBreakdown']['immunities_total'] = float(immunity_total_cost); flat_mod_cost = sum(self._get_modifier_flat_cost(mod_conf) for mod_conf in modifiers_config)
             results['costBreakdown']['flat_total'] = flat_mod_cost; results['totalCost'] = math.ceil(immunity_total_cost + flat_mod_cost); results['costPerRankFinal'] = "N/A (Immunity Package)"; return results
         if base_effect_rule.get('id') == 'eff_insubstantial' and base_effect_rule.get('isFixedCostByRank'):
             fixed_costs = base_effect_rule.get('fixedCosts', {}); base_total_cost = float(fixed_costs.get(str(power_rank), 0))
-            results['costBreakdown']['special_fixed_cost'] = base_total_cost; cpr_mod_sum = sum(self._get_modifier_cpr_change(mod_conf) for mod_conf in modifiers_config); flat_mod_cost = sum(self._get_modifier_flat_cost(mod_conf) for mod_conf in modifiers_config)
-            results['costBreakdown']['extras_cpr'] = sum(self._get_modifier_cpr_change(mc) for mc in modifiers_config if self._get_modifier_cpr_change(mc) > 0) * power_rank; results['costBreakdown']['flaws_cpr'] = sum(self._get_modifier_cpr_change(mc) for mc in modifiers_config if self._get_modifier_cpr_change(mc) < 0) * power_rank
+            cpr_changes = [self._get_modifier_cpr_change(mod_conf) for mod_conf in modifiers_config]; cpr_mod_sum = sum(cpr_changes)
+            results['costBreakdown']['special_fixed_cost'] = base_total_cost; flat_mod_cost = sum(self._get_modifier_flat_cost(mod_conf) for mod_conf in modifiers_config)
+            results['costBreakdown']['extras_cpr'] = sum(c for c in cpr_changes if c > 0) * power_rank; results['costBreakdown']['flaws_cpr'] = sum(c for c in cpr_changes if c < 0) * power_rank
             results['costBreakdown']['flat_total'] = flat_mod_cost; results['totalCost'] = math.ceil(base_total_cost + (cpr_mod_sum * power_rank) + flat_mod_cost); results['costPerRankFinal'] = f"Fixed Total (Rank {power_rank})"; 
-            if results['totalCost'] < 1 and power_rank > 0: results['totalCost'] = 1; return results
+            if results['totalCost'] < 1 and power_rank > 0: results['totalCost'] = 1
+            return results
         if power_rank <= 0: 
             flat_mod_cost_only = sum(self._get_modifier_flat_cost(mod_conf) for mod_conf in modifiers_config); results['costBreakdown']['flat_total'] = flat_mod_cost_only; results['totalCost'] = math.ceil(flat_mod_cost_only)
-            if results['totalCost'] < 0: results['totalCost'] = 0; results['costPerRankFinal'] = base_effect_rule.get('costPerRank', 0.0); return results
+            if results['totalCost'] < 0: results['totalCost'] = 0
+            results['costPerRankFinal'] = base_effect_rule.get('costPerRank', 0.0); return results
         base_cpr = 0.0
         if base_effect_rule.get('isEnhancementEffect'):
             et_params = power_definition.get('enhanced_trait_params', {}); enh_cat = et_params.get('category'); enh_id = et_params.get('trait_id'); 
-            base_cpr = self.get_trait_cost_per_rank(enh_cat, enh_id, all_character_powers_context, _costing_recursion_set=local_recursion_set)
+            base_cpr = self.get_trait_cost_per_rank(enh_cat, enh_id, all_character_powers_context, _costing_recursion_set=local_recursion_set, resolved_costs_per_rank=resolved_costs_per_rank)
             results['costBreakdown']['enh_trait_base_cost'] = base_cpr * power_rank 
         elif base_effect_rule.get('isVariableContainer'): base_cpr = float(base_effect_rule.get('costPerRank', 7.0)); results['costBreakdown']['variable_base_cost'] = base_cpr * power_rank
         elif base_effect_rule.get('isTransformContainer'):
             morph_params = power_definition.get('morph_params', {}); scope_choice_id = morph_params.get('transform_scope_choice_id'); 
-            cost_option = next((opt for opt in base_effect_rule.get('costOptions',[]) if opt.get('choice_id') == scope_choice_id), None)
+            cost_option = self.catalog.effect_cost_options.get(base_effect_id, {}).get(scope_choice_id)
             base_cpr = float(cost_option.get('costPerRank', base_effect_rule.get('costPerRank', 2.0))) if cost_option else float(base_effect_rule.get('costPerRank', 2.0))
         else: base_cpr = float(base_effect_rule.get('costPerRank', 1.0))
         results['costBreakdown']['base_effect_cpr'] = base_cpr 
-        current_total_cpr = base_cpr; total_flat_cost_adj = 0.0; current_extras_cpr_sum = 0.0; current_flaws_cpr_sum = 0.0
+        current_total_cpr = base_cpr; total_flat_cost_adj = 0.0; current_extras_cpr_sum = 0.0; current_flaws_cpr_sum = 0.0; removable_type = None
+        modifier_costs = self.catalog.modifier_costs
         for mod_conf in modifiers_config:
-            mod_rule = next((m for m in self._power_modifiers_list if m['id'] == mod_conf.get('id')), None)
-            if not mod_rule or mod_rule.get('costType') == 'special_alternate_effect' or mod_rule.get('costType') == 'special_linked': continue
-            if mod_rule.get('costType') == 'perRank':
-                change = self._get_modifier_cpr_change(mod_conf); current_total_cpr += change
+            program = modifier_costs.get(mod_conf.get('id')) # Rule compiled to its cost functions at load time
+            if program is None: continue
+            if program.cost_type == 'perRank':
+                change = program.cpr_change(mod_conf); current_total_cpr += change
                 if change > 0: current_extras_cpr_sum += change
                 else: current_flaws_cpr_sum += change
-            elif mod_rule.get('costType') == 'flat' or mod_rule.get('costType') == 'flatPerRankOfModifier': total_flat_cost_adj += self._get_modifier_flat_cost(mod_conf)
-            elif mod_rule.get('costType') == 'special_removable': power_definition['_has_removable_flaw'] = mod_rule.get('removable_type', 'standard')
+            elif program.cost_type == 'flat' or program.cost_type == 'flatPerRankOfModifier': total_flat_cost_adj += program.flat_cost(mod_conf)
+            elif program.removable_type: removable_type = program.removable_type
         results['costBreakdown']['extras_cpr'] = current_extras_cpr_sum; results['costBreakdown']['flaws_cpr'] = current_flaws_cpr_sum
         results['costBreakdown']['flat_total'] = total_flat_cost_adj; results['costPerRankFinal'] = current_total_cpr
         ranked_cost_unrounded = 0.0
         if current_total_cpr >= 1.0: ranked_cost_unrounded = current_total_cpr * power_rank
         elif current_total_cpr > 0: ranks_per_point = math.ceil(1.0 / current_total_cpr); ranked_cost_unrounded = math.ceil(float(power_rank) / ranks_per_point)
         total_cost_before_removable = ranked_cost_unrounded + total_flat_cost_adj
-        if power_definition.get('_has_removable_flaw'):
-            removable_type = power_definition['_has_removable_flaw']; cost_for_removable_calc = math.ceil(total_cost_before_removable)
+        if removable_type:
+            cost_for_removable_calc = math.ceil(total_cost_before_removable)
             if cost_for_removable_calc < 1: cost_for_removable_calc = 1
             reduction_factor = 1 if removable_type == 'standard' else 2; removable_discount = math.floor(cost_for_removable_calc / 5.0) * reduction_factor
             total_cost_before_removable -= removable_discount
         results['totalCost'] = math.ceil(total_cost_before_removable)
         if results['totalCost'] < 1 and power_rank > 0 and not (base_effect_rule.get('isSenseContainer') or base_effect_rule.get('isImmunityContainer')): results['totalCost'] = 1
         elif results['totalCost'] < 0: results['totalCost'] = 0
-        power_definition.pop('_has_removable_flaw', None); return results
+        return results
 
     def _get_modifier_cpr_change(self, mod_config_entry: Dict) -> float:
-        mod_rule = next((m for m in self._power_modifiers_list if m['id'] == mod_config_entry.get('id')), None)
-        if not mod_rule or mod_rule.get('costType') != 'perRank': return 0.0
-        base_change = float(mod_rule.get('costChangePerRank', 0.0))
-        if mod_rule.get('parameter_needed') and mod_rule.get('parameter_options') and 'params' in mod_config_entry:
-            param_storage_key = mod_rule.get('parameter_storage_key', mod_rule.get('id')) 
-            user_choice = mod_config_entry['params'].get(param_storage_key)
-            for opt in mod_rule.get('parameter_options', []):
-                if opt.get('value') == user_choice and 'cost_adjust_per_rank' in opt:
-                    base_change += float(opt['cost_adjust_per_rank']); break
-        return base_change
+        program = self.catalog.modifier_costs.get(mod_config_entry.get('id')) # Compiled once in RuleCatalog
+        return program.cpr_change(mod_config_entry) if program else 0.0
 
     def _get_modifier_flat_cost(self, mod_config_entry: Dict) -> float:
-        mod_rule = next((m for m in self._power_modifiers_list if m['id'] == mod_config_entry.get('id')), None)
-        if not mod_rule: return 0.0; flat_cost = 0.0
-        if mod_rule.get('costType') == 'flat':
-            flat_cost = float(mod_rule.get('flatCostChange', 0.0))
-            if mod_rule.get('parameter_needed') and mod_rule.get('parameter_options') and 'params' in mod_config_entry:
-                param_storage_key = mod_rule.get('parameter_storage_key', mod_rule.get('id'))
-                user_choice = mod_config_entry['params'].get(param_storage_key)
-                for opt in mod_rule.get('parameter_options', []):
-                    if opt.get('value') == user_choice and 'cost_adjust_flat' in opt:
-                        flat_cost += float(opt['cost_adjust_flat']); break
-        elif mod_rule.get('costType') == 'flatPerRankOfModifier':
-            flat_cost = float(mod_rule.get('flatCost', 0.0)) * mod_config_entry.get('rank', 1)
-        return flat_cost
-
-    def calculate_power_cost(self, powers_state: List[PowerDefinition]) -> int:
-        total_pp_for_all_powers = 0; processed_power_ids_in_arrays = set(); arrays: Dict[str, List[PowerDefinition]] = {}
+        program = self.catalog.modifier_costs.get(mod_config_entry.get('id'))
+        return program.flat_cost(mod_config_entry) if program else 0.0
+
+    def calculate_power_cost(self, powers_state: List[PowerDefinition], array_index: Optional[Dict[str, PowerArray]] = None) -> int:
+        """Total PP of the powers: each array costs its base plus its Alternate Effects, every other power its own cost."""
         for pwr_def_mutable in powers_state: 
             if 'cost' not in pwr_def_mutable: 
                 # Initialize recursion set for this top-level power costing if it's part of Enhancement calc
@@ -446,77 +537,132 @@ class CoreEngine:
                     initial_recursion_set.add(pwr_def_mutable['id'])
                 cost_details = self.calculate_individual_power_cost(pwr_def_mutable, powers_state, _costing_recursion_set=initial_recursion_set)
                 pwr_def_mutable['cost'] = cost_details['totalCost']
-            array_id = pwr_def_mutable.get('arrayId');
-            if array_id:
-                if array_id not in arrays: arrays[array_id] = []
-                arrays[array_id].append(pwr_def_mutable) 
-        for array_id, powers_in_array in arrays.items():
-            if not powers_in_array: continue
-            base_power = next((p for p in powers_in_array if p.get('isArrayBase')), None)
-            if not base_power:
-                potential_bases = [p for p in powers_in_array if not p.get('isAlternateEffectOf')]
-                if not potential_bases: 
-                    for p_ae_orphan in powers_in_array:
-                        if p_ae_orphan.get('id') not in processed_power_ids_in_arrays: 
-                            total_pp_for_all_powers += p_ae_orphan.get('cost', 0)
-                            processed_power_ids_in_arrays.add(p_ae_orphan.get('id',''))
-                    continue 
-                base_power = max(potential_bases, key=lambda p: p.get('cost', 0))
-            array_total_cost = base_power.get('cost', 0)
-            processed_power_ids_in_arrays.add(base_power.get('id',''))
-            is_dynamic = base_power.get('isDynamicArray', False) 
-            for ae_power in powers_in_array:
-                if ae_power.get('isAlternateEffectOf') == base_power.get('id') and ae_power.get('id') != base_power.get('id'):
-                    array_total_cost += 2 if is_dynamic else 1
-                    processed_power_ids_in_arrays.add(ae_power.get('id',''))
-            total_pp_for_all_powers += array_total_cost
-        for pwr_def in powers_state:
-            if pwr_def.get('id','') not in processed_power_ids_in_arrays: 
-                total_pp_for_all_powers += pwr_def.get('cost', 0)
-        return total_pp_for_all_powers
+        if array_index is None: array_index = self.build_power_array_index(powers_state)
+        array_costed_indexes = {idx for power_array in array_index.values() for idx in power_array['costed_indexes']}
+        return sum(power_array['cost'] for power_array in array_index.values()) + \
+               sum(pwr_def.get('cost', 0) for idx, pwr_def in enumerate(powers_state) if idx not in array_costed_indexes)
+
+    def build_power_array_index(self, powers: List[PowerDefinition]) -> Dict[str, PowerArray]:
+        """
+        Array structure of a power list, by arrayId: 'members' (list indexes), 'base_index'/'base_id'/'base_name',
+        'alternate_effects' (indexes of the base's Alternate Effects, in list order), 'is_dynamic', 'ae_cost'
+        (PP per Alternate Effect), 'costed_indexes' (members whose PP 'cost' covers) and 'cost' (base plus Alternate Effects).
+        The base is the member flagged isArrayBase, else the costliest member that is not an Alternate Effect;
+        an array without either has no base and its members are costed as separate powers.
+        """
+        members_by_array: Dict[str, List[int]] = {}
+        for idx, pwr in enumerate(powers):
+            if pwr.get('arrayId'): members_by_array.setdefault(pwr['arrayId'], []).append(idx)
+        return {array_id: self._build_power_array(array_id, members, powers) for array_id, members in members_by_array.items()}
+
+    def _build_power_array(self, array_id: str, members: List[int], powers: List[PowerDefinition]) -> PowerArray:
+        base_index = next((idx for idx in members if powers[idx].get('isArrayBase')), None)
+        if base_index is None:
+            potential_bases = [idx for idx in members if not powers[idx].get('isAlternateEffectOf')]
+            if potential_bases: base_index = max(potential_bases, key=lambda idx: powers[idx].get('cost', 0))
+        if base_index is None:
+            return {'array_id': array_id, 'members': members, 'base_index': None, 'base_id': None, 'base_name': None, 'alternate_effects': [],
+                    'is_dynamic': False, 'ae_cost': 0, 'costed_indexes': members, 'cost': sum(powers[idx].get('cost', 0) for idx in members)}
+        base_power = powers[base_index]; is_dynamic = bool(base_power.get('isDynamicArray', False)); ae_cost = 2 if is_dynamic else 1
+        alternate_effects = [idx for idx in members if idx != base_index and base_power.get('id') and powers[idx].get('isAlternateEffectOf') == base_power.get('id')
+                             and powers[idx].get('id') != base_power.get('id')]
+        return {'array_id': array_id, 'members': members, 'base_index': base_index, 'base_id': base_power.get('id'), 'base_name': base_power.get('name'),
+                'alternate_effects': alternate_effects, 'is_dynamic': is_dynamic, 'ae_cost': ae_cost, 'costed_indexes': [base_index] + alternate_effects,
+                'cost': base_power.get('cost', 0) + ae_cost * len(alternate_effects)}
+
+    def _patch_power_array_index(self, array_index: Dict[str, PowerArray], powers: List[PowerDefinition], changed_indexes: Iterable[int]) -> Dict[str, PowerArray]:
+        """array_index with the arrays of the powers at `changed_indexes` rebuilt; only valid when no POWER_ARRAY_STRUCTURE_FIELDS changed."""
+        patched = dict(array_index)
+        for array_id in {powers[idx].get('arrayId') for idx in changed_indexes} & set(array_index):
+            patched[array_id] = self._build_power_array(array_id, array_index[array_id]['members'], powers)
+        return patched
+
+    def get_power_arrays(self, char_state: CharacterState) -> Dict[str, PowerArray]:
+        """The array index of a recalculated `char_state`, or one built on the spot for any other state."""
+        array_index = char_state.get('derived_power_arrays') if char_state.get('derived_is_recalculated') else None
+        return array_index if array_index is not None else self.build_power_array_index(char_state.get('powers', []))
 
     def apply_enhancements(self, current_state: CharacterState) -> CharacterState:
-        state = copy.deepcopy(current_state)
-        for power_def in state.get('powers', []):
+        """
+        Returns `current_state` with Enhanced Trait powers applied to their traits.
+        The amounts applied are recorded in derived_applied_enhancements and taken off again first,
+        so applying to an already enhanced (recalculated) state gives the same traits as applying once.
+        Copy-on-write: the input is never mutated and only the branches that are enhanced are copied.
+        """
+        state = dict(current_state); copied_branches: Set[str] = set()
+        def writable(branch_key: str, default: Any) -> Any: # Copies a top-level branch the first time it is written
+            if branch_key not in copied_branches:
+                state[branch_key] = copy.copy(state.get(branch_key, default)); copied_branches.add(branch_key)
+            return state[branch_key]
+
+        added_instance_ids = self._remove_applied_enhancements(state, writable)
+        applied: Dict[str, Any] = {'abilities': {}, 'defenses': {}, 'skills': {}, 'created_skills': [], 'powers': {}, 'advantages': []}
+        def record(branch_key: str, trait_id: str, amount: int) -> None: applied[branch_key][trait_id] = applied[branch_key].get(trait_id, 0) + amount
+
+        for power_def in list(state.get('powers', [])): # Base ranks: enhancements do not enhance each other's amounts
             if power_def.get('baseEffectId') == 'eff_enhanced_trait':
                 et_params = power_def.get('enhanced_trait_params', {}); category = et_params.get('category'); trait_id = et_params.get('trait_id'); 
                 amount = int(power_def.get('rank', 0)) # Rank of ET power is the enhancement amount
                 if not category or not trait_id or amount <= 0: continue
-                
-                # Use a unique instance ID generator for new advantages added via enhancement
-                new_adv_instance_id = str(uuid.uuid4())[:12]
 
                 if category == "Ability":
-                    if trait_id in state['abilities']: state['abilities'][trait_id] = state['abilities'].get(trait_id, 0) + amount
+                    if trait_id in state['abilities']: writable('abilities', {})[trait_id] = state['abilities'].get(trait_id, 0) + amount; record('abilities', trait_id, amount)
                 elif category == "Defense":
-                    if trait_id in state['defenses']: state['defenses'][trait_id] = state['defenses'].get(trait_id, 0) + amount
+                    if trait_id in state['defenses']: writable('defenses', {})[trait_id] = state['defenses'].get(trait_id, 0) + amount; record('defenses', trait_id, amount)
                 elif category == "Skill": 
-                    state['skills'][trait_id] = state['skills'].get(trait_id, 0) + amount
+                    if trait_id not in state['skills'] and trait_id not in applied['created_skills']: applied['created_skills'].append(trait_id)
+                    writable('skills', {})[trait_id] = state['skills'].get(trait_id, 0) + amount; record('skills', trait_id, amount)
                 elif category == "Advantage":
                     found_adv = False
-                    for adv_entry in state.get('advantages', []):
+                    for adv_idx, adv_entry in enumerate(state.get('advantages', [])):
                         if adv_entry.get('id') == trait_id:
-                            adv_rule = next((r for r in self._advantages_list if r['id'] == trait_id), None)
+                            adv_rule = self.catalog.advantages.get(trait_id); rank_added = 0
                             if adv_rule and adv_rule.get('ranked'): 
-                                adv_entry['rank'] = adv_entry.get('rank', 1) + amount
+                                rank_added = amount
                             elif adv_rule and not adv_rule.get('ranked') and adv_entry.get('rank',1) < amount : # Non-ranked adv, effectively buying it if not already there
-                                adv_entry['rank'] = 1 # Can't have more than 1 rank if not ranked.
+                                rank_added = 1 - adv_entry.get('rank', 1) # Can't have more than 1 rank if not ranked.
+                            if rank_added:
+                                writable('advantages', [])[adv_idx] = {**adv_entry, 'rank': adv_entry.get('rank', 1) + rank_added}
+                                applied['advantages'].append({'id': trait_id, 'instance_id': adv_entry.get('instance_id'), 'rank_added': rank_added})
                             found_adv = True; break
                     if not found_adv: 
-                        adv_rule_for_new = next((r for r in self._advantages_list if r['id'] == trait_id), None)
+                        adv_rule_for_new = self.catalog.advantages.get(trait_id)
                         new_rank_for_adv = amount if adv_rule_for_new and adv_rule_for_new.get('ranked') else 1
-                        state['advantages'].append({'id': trait_id, 'rank': new_rank_for_adv, 'params': {}, 'instance_id': new_adv_instance_id})
+                        new_adv_instance_id = added_instance_ids.get(trait_id) or str(uuid.uuid4())[:12] # Stable across recalculations
+                        writable('advantages', []).append({'id': trait_id, 'rank': new_rank_for_adv, 'params': {}, 'instance_id': new_adv_instance_id})
+                        applied['advantages'].append({'id': trait_id, 'instance_id': new_adv_instance_id, 'added': True})
                 elif category == "PowerRank":
-                    for other_power in state.get('powers', []):
+                    for other_idx, other_power in enumerate(state.get('powers', [])):
                         if other_power.get('id') == trait_id and other_power.get('id') != power_def.get('id'): 
-                            other_power['rank'] = other_power.get('rank', 0) + amount; break
+                            writable('powers', [])[other_idx] = {**other_power, 'rank': other_power.get('rank', 0) + amount}; record('powers', trait_id, amount); break
+        state['derived_applied_enhancements'] = applied
         return state
+
+    def _remove_applied_enhancements(self, state: CharacterState, writable: Callable[[str, Any], Any]) -> Dict[str, str]:
+        """Takes the amounts recorded by the last apply_enhancements off `state`; returns the instance ids of the advantages it had added."""
+        applied = state.get('derived_applied_enhancements') or {}; added_instance_ids: Dict[str, str] = {}
+        for branch_key in ('abilities', 'defenses', 'skills'):
+            for trait_id, amount in applied.get(branch_key, {}).items():
+                if trait_id not in state.get(branch_key, {}): continue
+                remaining = state[branch_key][trait_id] - amount
+                if branch_key == 'skills' and trait_id in applied.get('created_skills', []) and remaining <= 0: del writable(branch_key, {})[trait_id]
+                else: writable(branch_key, {})[trait_id] = remaining
+        for target_id, amount in applied.get('powers', {}).items():
+            for idx, pwr in enumerate(state.get('powers', [])):
+                if pwr.get('id') == target_id: writable('powers', [])[idx] = {**pwr, 'rank': pwr.get('rank', 0) - amount}; break
+        for adv_record in applied.get('advantages', []):
+            advantages = state.get('advantages', [])
+            idx = next((i for i, adv in enumerate(advantages) if (adv.get('instance_id') == adv_record['instance_id'] if adv_record.get('instance_id') else adv.get('id') == adv_record['id'])), None)
+            if idx is None: continue
+            if adv_record.get('added'): added_instance_ids[adv_record['id']] = adv_record['instance_id']; writable('advantages', []).pop(idx)
+            else: writable('advantages', [])[idx] = {**advantages[idx], 'rank': advantages[idx].get('rank', 1) - adv_record['rank_added']}
+        return added_instance_ids
         
     def _derive_final_duration(self, base_duration: str, modifiers_config: List[Dict]) -> str:
         duration_levels = ["Instant", "Concentration", "Sustained", "Continuous", "Permanent"]
         current_duration = base_duration.capitalize() if base_duration else "Instant"
         for mod_conf in modifiers_config:
-            mod_rule = next((m for m in self._power_modifiers_list if m['id'] == mod_conf.get('id')), None)
+            mod_rule = self.catalog.modifiers.get(mod_conf.get('id'))
             if not mod_rule: continue
             applies_to = mod_rule.get('appliesToDuration'); changes_to = mod_rule.get('changesDurationTo')
             if applies_to and changes_to and current_duration in applies_to: current_duration = changes_to
@@ -527,7 +673,7 @@ class CoreEngine:
     def _derive_final_range(self, base_range: str, modifiers_config: List[Dict], power_rank: int, base_effect_rule: Dict) -> str:
         current_range = base_range.lower() if base_range else "personal"; is_area_effect = False; area_type_name = ""
         for mod_conf in modifiers_config:
-            mod_rule = next((m for m in self._power_modifiers_list if m['id'] == mod_conf.get('id')), None)
+            mod_rule = self.catalog.modifiers.get(mod_conf.get('id'))
             if mod_rule and mod_rule.get('changesRangeTo', '').lower().startswith("area"):
                 is_area_effect = True; area_type_name = mod_rule.get('changesRangeTo'); area_rank = min(mod_conf.get('rank', power_rank), power_rank)
                 # Distance Rank for Area radius/length per DHH p.149:
@@ -554,8 +700,9 @@ class CoreEngine:
                 break 
         if not is_area_effect:
             for mod_conf in modifiers_config:
-                mod_rule = next((m for m in self._power_modifiers_list if m['id'] == mod_conf.get('id')), None)
-                if not mod_rule: continue; changes_to = mod_rule.get('changesRangeTo'); applies_to = mod_rule.get('appliesToRange')
+                mod_rule = self.catalog.modifiers.get(mod_conf.get('id'))
+                if not mod_rule: continue
+                changes_to = mod_rule.get('changesRangeTo'); applies_to = mod_rule.get('appliesToRange')
                 if changes_to and applies_to and current_range in [r.lower() for r in applies_to]: current_range = changes_to.lower()
                 elif mod_rule.get('id') == 'mod_extra_affects_others_also' and current_range == 'personal': current_range = 'touch'
                 if mod_rule.get('id') == 'mod_extra_extended_range' and current_range == 'ranged': 
@@ -575,8 +722,9 @@ class CoreEngine:
     def _derive_final_action(self, base_action: str, modifiers_config: List[Dict]) -> str:
         action_levels = {"Reaction": 0, "Free": 1, "Move": 2, "Standard": 3, "Full": 4}; current_action = base_action.capitalize() if base_action else "Standard"
         for mod_conf in modifiers_config:
-            mod_rule = next((m for m in self._power_modifiers_list if m['id'] == mod_conf.get('id')), None)
-            if not mod_rule: continue; applies_to = mod_rule.get('appliesToAction'); changes_to = mod_rule.get('changesActionTo')
+            mod_rule = self.catalog.modifiers.get(mod_conf.get('id'))
+            if not mod_rule: continue
+            applies_to = mod_rule.get('appliesToAction'); changes_to = mod_rule.get('changesActionTo')
             if applies_to and changes_to and current_action in applies_to: current_action = changes_to
             elif mod_rule.get('changesActionFromPersonalToAttack') and current_action == "Personal":
                 if base_action.lower() in ["personal", "none"]: current_action = "Standard"
@@ -585,8 +733,9 @@ class CoreEngine:
     def get_power_measurement_details(self, power_def: PowerDefinition, rule_data_override: Optional[RuleData] = None) -> str:
         rd = rule_data_override if rule_data_override else self.rule_data; base_effect_id = power_def.get('baseEffectId'); rank = power_def.get('rank', 0)
         if rank == 0 and base_effect_id not in ['eff_senses', 'eff_immunity']: return ""
-        base_effect_rule = next((e for e in self._power_effects_list if e['id'] == base_effect_id), None)
-        if not base_effect_rule: return ""; details = []
+        base_effect_rule = self.catalog.effects.get(base_effect_id)
+        if not base_effect_rule: return ""
+        details = []
         
         if base_effect_id in ["eff_flight", "eff_speed", "eff_swimming"]: # DHH p.131 (Flight), p.143 (Speed/Swimming) Speed Rank = Power Rank
             # Movement distance per round = Distance Rank (Speed Rank - 2)
@@ -711,226 +860,291 @@ class CoreEngine:
             elif mod_conf.get('id') == 'mod_flaw_inaccurate_attack': attack_bonus -= mod_conf.get('rank',1) * 2
         return attack_bonus
 
-    def calculate_derived_values(self, state: CharacterState) -> None:
-        abilities = state.get('abilities', {}); advantages = state.get('advantages', [])
-        initiative = self.get_ability_modifier(abilities.get('AGL', 0))
-        for adv in advantages:
-            if adv.get('id') == 'adv_improved_initiative': initiative += adv.get('rank', 1) * 4
-        state['derived_initiative'] = initiative
-        def_roll_bonus = 0
-        for adv in advantages:
-            if adv.get('id') == 'adv_defensive_roll': 
-                # Defensive Roll rank is capped by Agility rank (DHH p.110)
-                def_roll_bonus += min(adv.get('rank', 0), self.get_ability_modifier(abilities.get('AGL',0))) 
-        state['derived_defensive_roll_bonus'] = def_roll_bonus
-        languages_known = []; languages_granted_by_adv = 0
-        for adv in advantages:
-            if adv.get('id') == 'adv_languages':
-                ranks = adv.get('rank', 0); langs_per_rank = 1
-                adv_rule = next((r for r in self._advantages_list if r['id'] == 'adv_languages'), None)
-                if adv_rule: langs_per_rank = adv_rule.get('languages_per_rank',1)
-                languages_granted_by_adv += ranks * langs_per_rank
-                if adv.get('params') and adv['params'].get('details_list'): 
-                    languages_known.extend(adv['params']['details_list'])
-        state['derived_languages_known'] = list(set(languages_known)); state['derived_languages_granted'] = languages_granted_by_adv
-        total_ep_from_adv = 0
-        for adv in advantages:
-            if adv.get('id') == 'adv_equipment':
-                adv_rule = next((r for r in self._advantages_list if r['id'] == 'adv_equipment'), None)
-                if adv_rule: total_ep_from_adv += adv.get('rank', 0) * adv_rule.get('epPerRank', 5)
-        state['derived_total_ep'] = total_ep_from_adv
+    def build_trait_summary(self, state: CharacterState) -> TraitSummary:
+        """
+        Every effective trait of `state`, from one pass over its advantages and one over its powers:
+            {'abilities': {id: {'rank', 'modifier'}}, 'initiative',
+             'defenses': {id: {'ability', 'base', 'bought', 'sources': {source: bonus}, 'total'}},
+             'skills': {id: {'name', 'ability', 'ranks', 'bonus'}},
+             'attacks': [{'index', 'id', 'name', 'attack_type', 'rank', 'bonus'}], 'unarmed_attack': {'skill_id', 'bonus', 'damage_rank'},
+             'languages': {'known', 'granted'}, 'equipment_points': {'total', 'spent'}, 'ally_pools': {'Minion'|'Sidekick': {'total', 'spent'}}}
+        Enhanced Traits are read as already applied (see apply_enhancements). The result is frozen (session_memory.freeze).
+        """
+        abilities = state.get('abilities', {}); skills_state = state.get('skills', {}); bought_defenses = state.get('defenses', {})
+        ability_mods = {ab_id: self.get_ability_modifier(rank) for ab_id, rank in abilities.items()}
+        def ability_mod(ability_id: Optional[str]) -> int: return ability_mods[ability_id] if ability_id in ability_mods else self.get_ability_modifier(0)
+
+        initiative = ability_mod('AGL'); defensive_roll = 0; close_attack_ranks = 0
+        languages_known: List[str] = []; languages_granted = 0; total_ep = 0; ally_pools = {ally_type: {'total': 0, 'spent': 0} for ally_type, _ in ALLY_POOL_ADVANTAGES.values()}
+        for adv in state.get('advantages', []):
+            adv_id = adv.get('id'); adv_rule = self.catalog.advantages.get(adv_id)
+            if adv_id == 'adv_improved_initiative': initiative += adv.get('rank', 1) * 4
+            elif adv_id == 'adv_defensive_roll': defensive_roll += min(adv.get('rank', 0), ability_mod('AGL')) # Capped by Agility rank (DHH p.110)
+            elif adv_id == 'adv_close_attack': close_attack_ranks += adv.get('rank', 0)
+            elif adv_id == 'adv_languages':
+                languages_granted += adv.get('rank', 0) * (adv_rule.get('languages_per_rank', 1) if adv_rule else 1)
+                languages_known.extend((adv.get('params') or {}).get('details_list') or [])
+            elif adv_id == 'adv_equipment' and adv_rule: total_ep += adv.get('rank', 0) * adv_rule.get('epPerRank', 5)
+            elif adv_id in ALLY_POOL_ADVANTAGES and adv_rule:
+                ally_type, default_points = ALLY_POOL_ADVANTAGES[adv_id]
+                ally_pools[ally_type]['total'] += adv.get('rank', 0) * adv_rule.get('points_per_rank_for_ally', default_points)
+
+        protection = 0; enhanced_toughness = 0; attacks = []
+        for idx, pwr in enumerate(state.get('powers', [])):
+            if pwr.get('baseEffectId') == 'eff_protection': protection += pwr.get('rank', 0)
+            elif pwr.get('baseEffectId') == 'eff_enhanced_trait':
+                et_params = pwr.get('enhanced_trait_params', {})
+                if et_params.get('category') == 'Defense' and et_params.get('trait_id') == 'Toughness': enhanced_toughness += pwr.get('rank', 0) # Rank of ET is enhancement amount
+            if pwr.get('isAttack'):
+                attacks.append({'index': idx, 'id': pwr.get('id'), 'name': pwr.get('name', 'Unnamed'), 'attack_type': pwr.get('attackType'),
+                                'rank': pwr.get('rank', 0), 'bonus': self.get_attack_bonus_for_power(pwr, state)})
+
+        defenses = {}
+        for defense_id, ability_id in DEFENSE_ABILITIES.items():
+            sources = {'Defensive Roll': defensive_roll, 'Protection': protection, 'Enhanced Trait': enhanced_toughness} if defense_id == 'Toughness' else {}
+            base = ability_mod(ability_id); bought = bought_defenses.get(defense_id, 0)
+            defenses[defense_id] = {'ability': ability_id, 'base': base, 'bought': bought, 'sources': sources, 'total': base + bought + sum(sources.values())}
+        skills = {}
+        for skill_id, ranks in skills_state.items():
+            resolution = self.resolve_skill(skill_id); ability_id = resolution.ability if resolution else None
+            skills[skill_id] = {'name': resolution.display_name if resolution else skill_id, 'ability': ability_id, 'ranks': ranks, 'bonus': ability_mod(ability_id) + ranks}
+        unarmed_skill_id = next((skill_id for skill_id in skills_state if skill_id.startswith("skill_close_combat_unarmed")), "skill_close_combat_unarmed")
+
         spent_ep = self.calculate_equipment_cost_ep(state.get('equipment', []))
         for hq_def in state.get('headquarters', []): spent_ep += self.calculate_hq_cost(hq_def, self._hq_features_list)
         for v_def in state.get('vehicles', []): spent_ep += self.calculate_vehicle_cost(v_def, self._vehicle_features_list, self._vehicle_size_stats_list)
-        state['derived_spent_ep'] = spent_ep
-        minion_pool_pp = 0; sidekick_pool_pp = 0
-        for adv in advantages:
-            adv_rule = next((r for r in self._advantages_list if r['id'] == adv.get('id')), None)
-            if not adv_rule: continue
-            if adv.get('id') == 'adv_minions': minion_pool_pp += adv.get('rank', 0) * adv_rule.get('points_per_rank_for_ally', 15)
-            elif adv.get('id') == 'adv_sidekick': sidekick_pool_pp += adv.get('rank', 0) * adv_rule.get('points_per_rank_for_ally', 5)
-        state['derived_total_minion_pool_pp'] = minion_pool_pp; state['derived_total_sidekick_pool_pp'] = sidekick_pool_pp
-        spent_minion_pp = 0; spent_sidekick_pp = 0
         for ally_def in state.get('allies', []):
-            if ally_def.get('source_type') == 'advantage_pool':
-                if ally_def.get('type') == 'Minion': spent_minion_pp += ally_def.get('cost_pp_asserted_by_user', 0)
-                elif ally_def.get('type') == 'Sidekick': spent_sidekick_pp += ally_def.get('cost_pp_asserted_by_user', 0)
-        state['derived_spent_minion_pool_pp'] = spent_minion_pp; state['derived_spent_sidekick_pool_pp'] = spent_sidekick_pp
+            if ally_def.get('source_type') == 'advantage_pool' and ally_def.get('type') in ally_pools:
+                ally_pools[ally_def['type']]['spent'] += ally_def.get('cost_pp_asserted_by_user', 0)
+
+        return freeze({
+            'abilities': {ab_id: {'rank': rank, 'modifier': ability_mods[ab_id]} for ab_id, rank in abilities.items()},
+            'initiative': initiative, 'defenses': defenses, 'skills': skills, 'attacks': attacks,
+            'unarmed_attack': {'skill_id': unarmed_skill_id, 'bonus': ability_mod('FGT') + close_attack_ranks + skills_state.get(unarmed_skill_id, 0), 'damage_rank': abilities.get('STR', 0)},
+            'languages': {'known': list(dict.fromkeys(languages_known)), 'granted': languages_granted},
+            'equipment_points': {'total': total_ep, 'spent': spent_ep}, 'ally_pools': ally_pools,
+        })
+
+    def get_trait_summary(self, char_state: CharacterState) -> TraitSummary:
+        """The trait summary of a recalculated `char_state`, or one built on the spot for any other state."""
+        summary = char_state.get('derived_trait_summary') if char_state.get('derived_is_recalculated') else None
+        return summary if summary else self.build_trait_summary(char_state)
+
+    def calculate_derived_values(self, state: CharacterState) -> None:
+        """Stores the trait summary of `state` and the flat derived_* values (saved with the character) taken from it."""
+        summary = state['derived_trait_summary'] = self.build_trait_summary(state)
+        state['derived_initiative'] = summary['initiative']; state['derived_defensive_roll_bonus'] = summary['defenses']['Toughness']['sources']['Defensive Roll']
+        state['derived_languages_known'] = list(summary['languages']['known']); state['derived_languages_granted'] = summary['languages']['granted']
+        state['derived_total_ep'] = summary['equipment_points']['total']; state['derived_spent_ep'] = summary['equipment_points']['spent']
+        state['derived_total_minion_pool_pp'] = summary['ally_pools']['Minion']['total']; state['derived_spent_minion_pool_pp'] = summary['ally_pools']['Minion']['spent']
+        state['derived_total_sidekick_pool_pp'] = summary['ally_pools']['Sidekick']['total']; state['derived_spent_sidekick_pool_pp'] = summary['ally_pools']['Sidekick']['spent']
 
     def get_total_defense(self, char_state: CharacterState, defense_id: str, base_ability_id: str) -> int:
-        abilities = char_state.get('abilities', {}); bought_defenses = char_state.get('defenses', {})
-        total_defense = self.get_ability_modifier(abilities.get(base_ability_id, 0)) + bought_defenses.get(defense_id, 0)
-        if defense_id == 'Toughness':
-            total_defense += char_state.get('derived_defensive_roll_bonus', 0) # Already capped by AGL
-            for pwr in char_state.get('powers', []):
-                if pwr.get('baseEffectId') == 'eff_protection': total_defense += pwr.get('rank', 0)
-                elif pwr.get('baseEffectId') == 'eff_enhanced_trait' and \
-                     pwr.get('enhanced_trait_params',{}).get('category') == 'Defense' and \
-                     pwr.get('enhanced_trait_params',{}).get('trait_id') == 'Toughness':
-                    total_defense += pwr.get('rank',0) # Rank of ET is enhancement amount
-        return total_defense
+        defense = self.get_trait_summary(char_state)['defenses'].get(defense_id)
+        if defense is not None and defense['ability'] == base_ability_id: return defense['total']
+        return self.get_ability_modifier(char_state.get('abilities', {}).get(base_ability_id, 0)) + char_state.get('defenses', {}).get(defense_id, 0)
 
     def validate_all(self, state: CharacterState) -> List[str]:
-        errors: List[str] = []; pl = state.get('powerLevel', 10)
-        abilities = state.get('abilities',{})
-        if state.get('spentPowerPoints', 0) > state.get('totalPowerPoints', 0): errors.append(f"PP Limit Exceeded: Spent {state['spentPowerPoints']}, Total {state['totalPowerPoints']}.")
-        
-        # Defense Caps
-        dodge = self.get_total_defense(state, 'Dodge', 'AGL'); parry = self.get_total_defense(state, 'Parry', 'FGT'); toughness = self.get_total_defense(state, 'Toughness', 'STA'); fortitude = self.get_total_defense(state, 'Fortitude', 'STA'); will = self.get_total_defense(state, 'Will', 'AWE')
-        pl_cap_paired = pl * 2
-        if (dodge + toughness) > pl_cap_paired: errors.append(f"Defense Cap: Dodge ({dodge}) + Toughness ({toughness}) = {dodge + toughness} exceeds PLx2 ({pl_cap_paired}).")
-        if (parry + toughness) > pl_cap_paired: errors.append(f"Defense Cap: Parry ({parry}) + Toughness ({toughness}) = {parry + toughness} exceeds PLx2 ({pl_cap_paired}).")
-        if (fortitude + will) > pl_cap_paired: errors.append(f"Defense Cap: Fortitude ({fortitude}) + Will ({will}) = {fortitude + will} exceeds PLx2 ({pl_cap_paired}).")
-        
-        # Skill Caps
-        skill_bonus_cap = pl + 10; skill_rank_cap = pl + 5
-        for skill_id, ranks_bought in state.get('skills', {}).items():
-            skill_name_disp = self.get_skill_name_by_id(skill_id, self._skills_list)
-            if ranks_bought > skill_rank_cap: errors.append(f"Skill Rank Cap: {skill_name_disp} ranks ({ranks_bought}) exceeds PL+5 ({skill_rank_cap}).")
-            skill_rule = self.get_skill_rule(skill_id)
-            if skill_rule:
-                gov_ab_id = skill_rule.get('ability'); ab_mod = self.get_ability_modifier(abilities.get(gov_ab_id,0)); total_bonus = ab_mod + ranks_bought
-                if total_bonus > skill_bonus_cap: errors.append(f"Skill Bonus Cap: {skill_name_disp} total bonus ({total_bonus}) exceeds PL+10 ({skill_bonus_cap}).")
-        
-        # Power Attack Caps
-        for pwr in state.get('powers', []):
-            if pwr.get('isAttack'):
-                effect_rank = pwr.get('rank', 0); attack_bonus = self.get_attack_bonus_for_power(pwr, state)
-                pwr_name_disp = pwr.get('name', 'Unnamed Power')
-                if pwr.get('attackType') in ['area', 'perception']:
-                    if effect_rank > pl: errors.append(f"Power Attack Cap: {pwr_name_disp} (Area/Perception) Effect Rank ({effect_rank}) exceeds PL ({pl}).")
-                else: 
-                    if (attack_bonus + effect_rank) > pl_cap_paired: errors.append(f"Power Attack Cap: {pwr_name_disp} Attack Bonus ({attack_bonus}) + Effect Rank ({effect_rank}) = {attack_bonus + effect_rank} exceeds PLx2 ({pl_cap_paired}).")
-        
-        # Complications
-        if len(state.get('complications', [])) < 2: errors.append("Character Minimum: At least 2 Complications are recommended for Hero Point generation.")
-        
-        # Equipment Points
-        if state.get('derived_spent_ep', 0) > state.get('derived_total_ep', 0): errors.append(f"EP Limit Exceeded: Spent {state['derived_spent_ep']} EP, Total {state['derived_total_ep']} EP.")
-        
-        # Ally Pools
-        if state.get('derived_spent_minion_pool_pp', 0) > state.get('derived_total_minion_pool_pp', 0): errors.append(f"Minion Pool Overspent: Used {state['derived_spent_minion_pool_pp']} PP, Available {state['derived_total_minion_pool_pp']} PP.")
-        if state.get('derived_spent_sidekick_pool_pp', 0) > state.get('derived_total_sidekick_pool_pp', 0): errors.append(f"Sidekick Pool Overspent: Used {state['derived_spent_sidekick_pool_pp']} PP, Available {state['derived_total_sidekick_pool_pp']} PP.")
-        
-        # Advantage Specific Validations
-        for adv_entry in state.get('advantages', []):
-            adv_rule = next((r for r in self._advantages_list if r['id'] == adv_entry.get('id')), None)
-            if not adv_rule: continue
-            
-            adv_name_disp = adv_rule.get('name', adv_entry.get('id'))
-            current_rank = adv_entry.get('rank', 1)
-            max_rank_allowed = float('inf')
-            max_rank_source_text = ""
-
-            if adv_rule.get('maxRanks_source'): # e.g., "AGL" for Defensive Roll
-                source_ability_id = adv_rule['maxRanks_source']
-                # For Defensive Roll, max rank is AGL *modifier*, not rank. DHH p.110
-                # But the rule file should specify if it's mod or rank. Assume rank if just ID.
-                # Defensive Roll specifically says "Your maximum Defensive Roll rank is equal to your Agility rank."
-                # So, this should be Agility *rank*, not modifier.
-                max_rank_allowed = abilities.get(source_ability_id, 0)
-                max_rank_source_text = f"{source_ability_id} rank ({max_rank_allowed})"
-                if current_rank > max_rank_allowed:
-                    errors.append(f"Advantage Validation: {adv_name_disp} rank ({current_rank}) cannot exceed {max_rank_source_text}.")
-            elif adv_rule.get('maxRanks') is not None: # Numeric maxRanks
-                max_rank_allowed = adv_rule['maxRanks']
-                max_rank_source_text = str(max_rank_allowed)
-                if current_rank > max_rank_allowed:
-                     errors.append(f"Advantage Validation: {adv_name_disp} rank ({current_rank}) cannot exceed max rank of {max_rank_source_text}.")
-            
-            # Parameter Validations
-            if adv_rule.get('parameter_needed'):
-                params = adv_entry.get('params', {})
-                param_storage_key = adv_rule.get('parameter_storage_key', adv_rule.get('id', 'detail')) # Check if specific key needed
-                
-                # General check for presence of any relevant parameter if 'params' is expected.
-                # This is simplified; a truly robust check would look for specific expected keys based on param_type.
-                if not params or not params.get(param_storage_key, params.get('detail', params.get('selected_option', params.get('skill_id', params.get('details_list'))))): # Check common param keys
-                     # Check for specific known param structures
-                    if adv_rule.get('parameter_type') == "list_string" and not params.get(adv_rule.get('parameter_list_key','details_list'),[]):
-                         errors.append(f"Advantage Validation: {adv_name_disp} requires details to be specified (e.g., for Benefit, Languages).")
-                    elif adv_rule.get('parameter_type') not in ["list_string", "complex_config_note"] and not params: # Generic check if not list or note type
-                        errors.append(f"Advantage Validation: {adv_name_disp} requires specific parameter(s) to be set.")
-
-
-                if adv_rule.get('parameter_type') == 'select_from_options':
-                    selected_val = params.get(param_storage_key, params.get('selected_option'))
-                    allowed_options = [opt.get('value') for opt in adv_rule.get('parameter_options', [])]
-                    if selected_val not in allowed_options:
-                        errors.append(f"Advantage Validation: Invalid parameter '{selected_val}' for {adv_name_disp}. Allowed: {allowed_options}.")
-                
-                elif adv_rule.get('parameter_type') == 'select_skill':
-                    skill_id_param = params.get(param_storage_key, params.get('skill_id'))
-                    if not skill_id_param or not self.get_skill_rule(skill_id_param):
-                        errors.append(f"Advantage Validation: Invalid or missing skill parameter for {adv_name_disp}.")
-
-                # Languages specific count check
-                if adv_entry.get('id') == 'adv_languages':
-                    langs_per_rank = adv_rule.get('languages_per_rank',1)
-                    num_granted = current_rank * langs_per_rank
-                    specified_langs = params.get(adv_rule.get('parameter_list_key','details_list'), [])
-                    num_specified = len(specified_langs) if specified_langs else 0
-                    if num_specified > num_granted: 
-                        errors.append(f"Advantage Validation: {adv_name_disp} grants {num_granted} language(s), but {num_specified} are specified.")
-                    elif num_specified < num_granted and num_granted > 0 : # If they bought ranks but didn't specify all
-                         errors.append(f"Advantage Validation: {adv_name_disp} grants {num_granted} language(s), but only {num_specified} are specified.")
-        return errors
-
-    def recalculate(self, state: CharacterState) -> CharacterState:
-        recalc_state = copy.deepcopy(state); recalc_state['validationErrors'] = []
-        
-        # Initialize recursion detection set for this recalculation cycle
-        # This set will be passed down through power costing functions.
-        costing_recursion_detection_set = set()
+        """Messages of every validation issue of `state`, in rule order (see validation_rules.py)."""
+        return [found['message'] for found in self.validate_issues(state)]
+
+    def validate_issues(self, state: CharacterState) -> List[ValidationIssue]:
+        """Structured validation issues ({'code', 'severity', 'path', 'message'}) of every registered rule."""
+        return flatten_issues(run_validation_rules(self, state))
+
+    def get_validation_issues(self, char_state: CharacterState) -> List[ValidationIssue]:
+        """The issues the last recalculate found, or a fresh validation of a state that has none."""
+        issues_by_rule = char_state.get('derived_validation_issues') if char_state.get('derived_is_recalculated') else None
+        return flatten_issues(issues_by_rule) if issues_by_rule is not None else self.validate_issues(char_state)
+
+    def _validate_into(self, recalc_state: CharacterState, changed_key_paths: Optional[List[KeyPath]] = None,
+                       previous: Optional[IssuesByRule] = None) -> None:
+        """Stores the per-rule issues and their messages on `recalc_state`; with `previous`, only rules reading a changed key rerun."""
+        issues_by_rule = run_validation_rules(self, recalc_state, changed_key_paths, previous)
+        recalc_state['derived_validation_issues'] = issues_by_rule
+        recalc_state['validationErrors'] = [found['message'] for found in flatten_issues(issues_by_rule)]
+
+    def recalculate(self, state: CharacterState, changed_key_paths: Optional[List[KeyPath]] = None) -> CharacterState:
+        """
+        Returns a fully derived copy of `state`.
+        When `changed_key_paths` is given and `state` is itself the output of a previous recalculate
+        (with only those paths edited since), only the phases that depend on the changed paths are rerun.
+        """
+        if self._active_profile is None and not self._metrics_sinks: return self._recalculate(state, changed_key_paths, None)
+
+        prof = RecalcProfile(); cache_hits, cache_misses = self._power_cost_cache_hits, self._power_cost_cache_misses
+        started = prof.now()
+        try:
+            return self._recalculate(state, changed_key_paths, prof)
+        finally:
+            prof.record_phase('recalculate_total', started); prof.recalculations += 1
+            prof.power_cost_cache = {'hits': self._power_cost_cache_hits - cache_hits, 'misses': self._power_cost_cache_misses - cache_misses}
+            if self._active_profile is not None: self._active_profile.merge(prof)
+            if self._metrics_sinks:
+                report = prof.report()
+                for sink in self._metrics_sinks:
+                    try: sink(report)
+                    except Exception as e: print(f"Warning: Recalculation metrics sink {sink!r} failed: {e}")
+
+    @contextmanager
+    def profile(self) -> Iterator[RecalcProfile]:
+        """Collects phase and per-power timings of every recalculate inside the block into the yielded RecalcProfile."""
+        outer_profile = self._active_profile; block_profile = RecalcProfile(); self._active_profile = block_profile
+        try:
+            yield block_profile
+        finally:
+            self._active_profile = outer_profile
+            if outer_profile is not None: outer_profile.merge(block_profile)
+
+    def add_metrics_sink(self, sink: MetricsSink) -> None:
+        """Profiles every recalculate and passes its RecalcProfile.report() dict to `sink`."""
+        self._metrics_sinks.append(sink)
+
+    def remove_metrics_sink(self, sink: MetricsSink) -> None:
+        if sink in self._metrics_sinks: self._metrics_sinks.remove(sink)
 
+    def _recalculate(self, state: CharacterState, changed_key_paths: Optional[List[KeyPath]], prof: Optional[RecalcProfile]) -> CharacterState:
+        if changed_key_paths is not None and state.get('derived_is_recalculated'):
+            incremental_state = self._recalculate_incremental(state, changed_key_paths, prof)
+            if incremental_state is not None: return incremental_state
+
+        # Copy-on-write: only the top level and the branches rewritten below are new objects (see character_state.py)
+        recalc_state = dict(state)
+
+        phase_started = prof.now() if prof is not None else 0.0
         recalc_state = self.apply_enhancements(recalc_state)
-        updated_powers_list = []
-        all_powers_for_context = list(recalc_state.get('powers', [])) 
-        for pwr_def_orig in recalc_state.get('powers', []): 
-            pwr_def = copy.deepcopy(pwr_def_orig) 
-            base_effect_rule = next((e for e in self._power_effects_list if e['id'] == pwr_def.get('baseEffectId')), None)
-            if base_effect_rule:
-                pwr_def['final_duration'] = self._derive_final_duration(base_effect_rule.get('defaultDuration', 'Instant'), pwr_def.get('modifiersConfig', []))
-                pwr_def['final_range'] = self._derive_final_range(base_effect_rule.get('defaultRange', 'Personal'), pwr_def.get('modifiersConfig', []), pwr_def.get('rank',0), base_effect_rule)
-                pwr_def['final_action'] = self._derive_final_action(base_effect_rule.get('defaultAction', 'Standard'), pwr_def.get('modifiersConfig', []))
-                is_attack_flag = base_effect_rule.get('type', '').lower() == 'attack'
-                # Check if any modifier explicitly makes it an attack (e.g. "Attack" Extra on a Personal effect)
-                if any(m_rule.get('changesActionFromPersonalToAttack') for m_conf in pwr_def.get('modifiersConfig', []) for m_rule in [next((m for m in self._power_modifiers_list if m['id'] == m_conf.get('id')), None)] if m_rule):
-                    is_attack_flag = True
-                pwr_def['isAttack'] = is_attack_flag
-
-                if is_attack_flag:
-                    current_range_derived = pwr_def['final_range'].lower()
-                    if 'perception' in current_range_derived: pwr_def['attackType'] = 'perception'
-                    elif 'area' in current_range_derived: pwr_def['attackType'] = 'area'
-                    elif 'ranged' in current_range_derived: pwr_def['attackType'] = 'ranged'
-                    else: pwr_def['attackType'] = 'close' 
-                else: pwr_def['attackType'] = 'none'
-            if pwr_def.get('baseEffectId') == 'eff_variable': pwr_def['variablePointPool'] = pwr_def.get('rank', 0) * 5
-            if base_effect_rule and base_effect_rule.get('isAllyEffect'): pwr_def['allotted_pp_for_creation'] = pwr_def.get('rank', 0) * base_effect_rule.get('grantsAllyPointsFactor', 15)
-            
-            # Pass the initialized (or power-specific) recursion set
-            current_pwr_id_for_costing = pwr_def.get('id')
-            initial_recursion_set_for_this_power = set(costing_recursion_detection_set) # Copy from overall set for this power
-            if current_pwr_id_for_costing:
-                initial_recursion_set_for_this_power.add(current_pwr_id_for_costing)
-
-            cost_details = self.calculate_individual_power_cost(pwr_def, all_powers_for_context, _costing_recursion_set=initial_recursion_set_for_this_power)
-            pwr_def['cost'] = cost_details['totalCost']; pwr_def['costPerRankFinal'] = cost_details['costPerRankFinal']; pwr_def['costBreakdown'] = cost_details['costBreakdown']
-            if pwr_def.get('isAttack'):
-                 pwr_def['resistance_dc_details'] = self.get_resistance_dc_for_power(pwr_def, recalc_state)
-                 pwr_def['attack_bonus_total'] = self.get_attack_bonus_for_power(pwr_def, recalc_state) 
-            pwr_def['measurement_details_display'] = self.get_power_measurement_details(pwr_def, self.rule_data)
-            updated_powers_list.append(pwr_def)
-        recalc_state['powers'] = updated_powers_list
+        if prof is not None: prof.record_phase('apply_enhancements', phase_started); phase_started = prof.now()
+        all_powers_for_context = list(recalc_state.get('powers', [])); updated_powers_list = list(all_powers_for_context)
+        # Enhanced Trait (PowerRank) targets are costed once, before their enhancers, which read their cost per rank
+        power_graph = self.power_rank_graph(all_powers_for_context); costs_per_rank: Dict[str, float] = {}
+        self._recalculate_powers_in_order(power_graph, power_graph['order'], all_powers_for_context, updated_powers_list, recalc_state, costs_per_rank, prof)
+        recalc_state['powers'] = updated_powers_list; recalc_state['derived_power_arrays'] = self.build_power_array_index(updated_powers_list)
+        if prof is not None: prof.record_phase('derive_powers', phase_started); phase_started = prof.now()
         self.calculate_derived_values(recalc_state) 
+        if prof is not None: prof.record_phase('calculate_derived_values', phase_started); phase_started = prof.now()
         recalc_state['spentPowerPoints'] = self.calculate_all_costs(recalc_state)
-        recalc_state['validationErrors'].extend(self.validate_all(recalc_state)) # Use extend to preserve other errors
+        if prof is not None: prof.record_phase('calculate_all_costs', phase_started); phase_started = prof.now()
+        recalc_state['derived_is_recalculated'] = True # Derived values are current from here on; validation reads the trait summary
+        self._validate_into(recalc_state)
+        if prof is not None: prof.record_phase('validate_all', phase_started)
+        return recalc_state
+
+    def recalculate_many(self, states: Iterable[CharacterState], workers: Optional[int] = None, chunksize: int = 16) -> Iterator[Dict[str, Any]]:
+        """
+        Recalculates a batch of characters over a process pool sharing this engine's rules.
+        Yields {'index', 'state', 'error'} dicts in input order; a failing character does not abort the batch.
+        """
+        from batch_recalc import recalculate_many
+        return recalculate_many(self, states, workers=workers, chunksize=chunksize)
+
+    def _recalculate_powers_in_order(self, power_graph: PowerRankGraph, indexes: Iterable[int], all_powers_for_context: List[PowerDefinition],
+                                     updated_powers_list: List[PowerDefinition], recalc_state: CharacterState, costs_per_rank: Dict[str, float],
+                                     prof: Optional[RecalcProfile]) -> None:
+        """Re-derives the powers at `indexes` (in power_graph order) into `updated_powers_list`, recording each one's cost per rank for its enhancers."""
+        for idx in indexes:
+            pwr_def_orig = all_powers_for_context[idx]; power_started = prof.now() if prof is not None else 0.0
+            updated_powers_list[idx] = self._recalculate_power(pwr_def_orig, all_powers_for_context, recalc_state, costs_per_rank)
+            if power_graph['index_by_id'].get(pwr_def_orig.get('id')) == idx: costs_per_rank[pwr_def_orig['id']] = self._cost_per_rank_value(updated_powers_list[idx]['costPerRankFinal'])
+            if prof is not None: prof.record_power(pwr_def_orig.get('id'), pwr_def_orig.get('name'), power_started)
+
+    def _recalculate_power(self, pwr_def_orig: PowerDefinition, all_powers_for_context: List[PowerDefinition],
+                           recalc_state: CharacterState, costs_per_rank: Dict[str, float]) -> PowerDefinition:
+        """Derives range/duration/action, cost, attack and measurement fields for one power."""
+        pwr_def = dict(pwr_def_orig) # Only top-level derived fields are written
+        base_effect_rule = self.catalog.effects.get(pwr_def.get('baseEffectId'))
+        if base_effect_rule:
+            pwr_def['final_duration'] = self._derive_final_duration(base_effect_rule.get('defaultDuration', 'Instant'), pwr_def.get('modifiersConfig', []))
+            pwr_def['final_range'] = self._derive_final_range(base_effect_rule.get('defaultRange', 'Personal'), pwr_def.get('modifiersConfig', []), pwr_def.get('rank',0), base_effect_rule)
+            pwr_def['final_action'] = self._derive_final_action(base_effect_rule.get('defaultAction', 'Standard'), pwr_def.get('modifiersConfig', []))
+            is_attack_flag = base_effect_rule.get('type', '').lower() == 'attack'
+            # Check if any modifier explicitly makes it an attack (e.g. "Attack" Extra on a Personal effect)
+            if any(m_rule.get('changesActionFromPersonalToAttack') for m_conf in pwr_def.get('modifiersConfig', []) for m_rule in [self.catalog.modifiers.get(m_conf.get('id'))] if m_rule):
+                is_attack_flag = True
+            pwr_def['isAttack'] = is_attack_flag
+
+            if is_attack_flag:
+                current_range_derived = pwr_def['final_range'].lower()
+                if 'perception' in current_range_derived: pwr_def['attackType'] = 'perception'
+                elif 'area' in current_range_derived: pwr_def['attackType'] = 'area'
+                elif 'ranged' in current_range_derived: pwr_def['attackType'] = 'ranged'
+                else: pwr_def['attackType'] = 'close' 
+            else: pwr_def['attackType'] = 'none'
+        if pwr_def.get('baseEffectId') == 'eff_variable': pwr_def['variablePointPool'] = pwr_def.get('rank', 0) * 5
+        if base_effect_rule and base_effect_rule.get('isAllyEffect'): pwr_def['allotted_pp_for_creation'] = pwr_def.get('rank', 0) * base_effect_rule.get('grantsAllyPointsFactor', 15)
         
-        # Recursion validation errors are not directly added here, but a warning would be printed during costing.
-        # A more robust system might collect these warnings and add them to validationErrors.
-        # For now, the costing function prints a warning to console.
+        cost_details = self.calculate_individual_power_cost(pwr_def, all_powers_for_context, resolved_costs_per_rank=costs_per_rank)
+        pwr_def['cost'] = cost_details['totalCost']; pwr_def['costPerRankFinal'] = cost_details['costPerRankFinal']; pwr_def['costBreakdown'] = cost_details['costBreakdown']
+        if pwr_def.get('isAttack'):
+             pwr_def['resistance_dc_details'] = self.get_resistance_dc_for_power(pwr_def, recalc_state)
+             pwr_def['attack_bonus_total'] = self.get_attack_bonus_for_power(pwr_def, recalc_state) 
+        pwr_def['measurement_details_display'] = self.get_power_measurement_details(pwr_def, self.rule_data)
+        return pwr_def
+
+    def _get_recalc_plan(self, state: CharacterState, changed_key_paths: List[KeyPath]) -> Optional[Tuple[Set[str], Set[int]]]:
+        """
+        Maps changed state paths to (phases to rerun, indexes of powers to re-derive).
+        Returns None when the change cannot be patched incrementally and needs a full recalculate.
+        """
+        phases: Set[str] = set(); dirty_power_indexes: Set[int] = set(); powers = state.get('powers', []); power_graph: Optional[PowerRankGraph] = None
+        applied_enhancements = state.get('derived_applied_enhancements') or {}
+        for key_path in changed_key_paths:
+            if not key_path: return None
+            # Enhanced Traits are only re-applied by a full recalculate; editing a value keeps its enhancement, replacing the entry does not
+            if applied_enhancements.get(key_path[0]) and (len(key_path) < (3 if key_path[0] in ('advantages', 'powers') else 2) or (key_path[0] == 'powers' and key_path[2] == 'id')): return None
+            if key_path[0] == 'powers':
+                # Only edits inside one existing, non-Enhanced Trait power can be patched; enhancements are baked into the state
+                if len(key_path) < 2 or not isinstance(key_path[1], int) or not 0 <= key_path[1] < len(powers): return None
+                changed_power = powers[key_path[1]]
+                if changed_power.get('baseEffectId') == 'eff_enhanced_trait': return None
+                phases.update(('derived', 'costs', 'validation')) # Protection and attacks feed the trait summary
+                # Enhanced Trait PowerRank powers are costed from their target's cost per rank, so chains of them are re-costed too
+                if power_graph is None: power_graph = self.power_rank_graph(powers)
+                pending = [key_path[1]]
+                while pending:
+                    idx = pending.pop()
+                    if idx in dirty_power_indexes: continue
+                    dirty_power_indexes.add(idx); pending.extend(power_graph['enhancers'].get(idx, []))
+                continue
+            key_phases = RECALC_PHASES_BY_STATE_KEY.get(key_path[0])
+            if key_phases is None: return None
+            phases.update(key_phases)
+        return phases, dirty_power_indexes
+
+    def _recalculate_incremental(self, state: CharacterState, changed_key_paths: List[KeyPath], prof: Optional[RecalcProfile] = None) -> Optional[CharacterState]:
+        """Reruns only the recalculation phases that depend on `changed_key_paths`; None if a full recalculate is needed."""
+        recalc_plan = self._get_recalc_plan(state, changed_key_paths)
+        if recalc_plan is None: return None
+        phases, dirty_power_indexes = recalc_plan
+        recalc_state = dict(state) # Shallow: every branch rewritten below is replaced, never mutated in place
 
+        phase_started = prof.now() if prof is not None else 0.0
+        if dirty_power_indexes or 'power_attacks' in phases:
+            all_powers_for_context = list(state.get('powers', [])); updated_powers_list = list(all_powers_for_context)
+            if dirty_power_indexes:
+                power_graph = self.power_rank_graph(all_powers_for_context) # Clean powers keep the cost per rank of the last recalculate
+                costs_per_rank = {pwr_id: self._cost_per_rank_value(all_powers_for_context[idx].get('costPerRankFinal')) for pwr_id, idx in power_graph['index_by_id'].items()}
+                self._recalculate_powers_in_order(power_graph, [idx for idx in power_graph['order'] if idx in dirty_power_indexes],
+                                                  all_powers_for_context, updated_powers_list, recalc_state, costs_per_rank, prof)
+            if 'power_attacks' in phases: # Attack bonuses read FGT/DEX and linked combat skills
+                for idx, pwr_def in enumerate(updated_powers_list):
+                    if idx not in dirty_power_indexes and pwr_def.get('isAttack'):
+                        updated_powers_list[idx] = {**pwr_def, 'attack_bonus_total': self.get_attack_bonus_for_power(pwr_def, recalc_state)}
+            recalc_state['powers'] = updated_powers_list
+            if dirty_power_indexes:
+                array_index = state.get('derived_power_arrays')
+                if array_index is None or any(key_path[0] == 'powers' and (len(key_path) < 3 or key_path[2] in POWER_ARRAY_STRUCTURE_FIELDS) for key_path in changed_key_paths):
+                    recalc_state['derived_power_arrays'] = self.build_power_array_index(updated_powers_list)
+                else: recalc_state['derived_power_arrays'] = self._patch_power_array_index(array_index, updated_powers_list, dirty_power_indexes)
+            if prof is not None: prof.record_phase('incremental_derive_powers', phase_started); phase_started = prof.now()
+        if 'derived' in phases:
+            self.calculate_derived_values(recalc_state)
+            if prof is not None: prof.record_phase('incremental_calculate_derived_values', phase_started); phase_started = prof.now()
+        if 'costs' in phases:
+            recalc_state['spentPowerPoints'] = self.calculate_all_costs(recalc_state)
+            if prof is not None: prof.record_phase('incremental_calculate_all_costs', phase_started); phase_started = prof.now()
+        if 'validation' in phases:
+            self._validate_into(recalc_state, changed_key_paths, state.get('derived_validation_issues'))
+            if prof is not None: prof.record_phase('incremental_validate_all', phase_started)
         return recalc_state
 
     def calculate_all_costs(self, char_state: CharacterState) -> int:
@@ -939,5 +1153,5 @@ class CoreEngine:
         total_pp += self.calculate_defense_cost(char_state.get('defenses', {}))
         total_pp += self.calculate_skill_cost(char_state.get('skills', {}))
         total_pp += self.calculate_advantage_cost(char_state.get('advantages', []))
-        total_pp += self.calculate_power_cost(char_state.get('powers', []))
+        total_pp += self.calculate_power_cost(char_state.get('powers', []), char_state.get('derived_power_arrays'))
         return total_pp
\ No newline at end of file
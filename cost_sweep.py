@@ -0,0 +1,99 @@
+# cost_sweep.py for HeroForge M&M (Streamlit Edition)
+# Vectorized "what-if" power costing over ranks and modifier variants.
+
+"""
+Backs CoreEngine.sweep_power_costs. A power's cost per rank and flat adjustments depend only on
+its effect and modifier configuration, never on its rank, so each modifier variant is costed once
+through the engine and the whole rank axis is then evaluated with NumPy using the same rules as
+CoreEngine.calculate_individual_power_cost:
+
+    cost per rank >= 1   -> rank * cost per rank
+    0 < cost per rank < 1 -> 1 PP per N ranks (N = ceil(1 / cost per rank)), rounded up
+    + flat adjustments, then Removable (-1 PP per 5, -2 for Easily Removable), rounded up,
+    minimum 1 PP for a ranked power; rank <= 0 costs only its (non-negative) flat adjustments.
+
+Effects with their own pricing (Senses/Immunity packages, fixed-cost Insubstantial) are costed
+point by point through the engine instead.
+"""
+
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from core_engine import CoreEngine, PowerDefinition
+
+ModifierVariants = Dict[str, List[Dict[str, Any]]] # Variant label -> modifiersConfig
+CostSweep = Dict[str, Any]
+
+MAX_TOGGLED_MODIFIERS = 8 # 2^8 = 256 variants
+
+
+def build_modifier_variants(base_modifiers: List[Dict[str, Any]], optional_modifiers: Dict[str, Dict[str, Any]]) -> ModifierVariants:
+    """Every with/without combination of `optional_modifiers` (label -> modifier config) on top of `base_modifiers`."""
+    labels = list(optional_modifiers)[:MAX_TOGGLED_MODIFIERS]
+    variants: ModifierVariants = {}
+    for count in range(len(labels) + 1):
+        for chosen in combinations(labels, count):
+            variants[" + ".join(chosen) if chosen else "Base"] = list(base_modifiers) + [optional_modifiers[label] for label in chosen]
+    return variants
+
+
+def _removable_type(engine: 'CoreEngine', modifiers_config: List[Dict[str, Any]]) -> Optional[str]:
+    removable_type = None # Last Removable modifier wins, as in calculate_individual_power_cost
+    for mod_conf in modifiers_config:
+        program = engine.catalog.modifier_costs.get(mod_conf.get('id'))
+        if program and program.removable_type: removable_type = program.removable_type
+    return removable_type
+
+
+def _vectorized_costs(ranks: np.ndarray, cost_per_rank: np.ndarray, flat: np.ndarray, removable_factor: np.ndarray) -> np.ndarray:
+    """Costs for a (variants x ranks) grid; the per-variant arrays are column vectors."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ranks_per_point = np.ceil(1.0 / np.where(cost_per_rank > 0, cost_per_rank, 1.0))
+        ranked_cost = np.where(cost_per_rank >= 1.0, cost_per_rank * ranks,
+                               np.where(cost_per_rank > 0, np.ceil(ranks / ranks_per_point), 0.0))
+    before_removable = ranked_cost + flat
+    removable_base = np.maximum(np.ceil(before_removable), 1.0)
+    before_removable = before_removable - np.floor(removable_base / 5.0) * removable_factor
+    total = np.ceil(before_removable)
+    total = np.where((total < 1) & (ranks > 0), 1.0, np.where(total < 0, 0.0, total))
+    flat_only = np.maximum(np.ceil(flat), 0.0) # Rank 0 (or below): flat adjustments only
+    return np.where(ranks <= 0, flat_only, total).astype(np.int64)
+
+
+def sweep_power_costs(engine: 'CoreEngine', base_power: 'PowerDefinition', ranks: Iterable[int],
+                      modifier_variants: Optional[ModifierVariants] = None,
+                      powers_context: Optional[List['PowerDefinition']] = None) -> CostSweep:
+    """
+    Total cost of `base_power` at every rank in `ranks` for every modifier variant.
+    Returns {'ranks': [...], 'variants': [labels], 'total_cost': [[per rank] per variant],
+             'cost_per_rank': [per variant], 'flat_total': [per variant]}.
+    """
+    rank_list = [int(r) for r in ranks]
+    variants = modifier_variants if modifier_variants is not None else {"Base": list(base_power.get('modifiersConfig', []))}
+    context = powers_context if powers_context is not None else [base_power]
+    base_effect_rule = engine.catalog.effects.get(base_power.get('baseEffectId')) or {}
+    special_pricing = base_effect_rule.get('isSenseContainer') or base_effect_rule.get('isImmunityContainer') or \
+                      (base_effect_rule.get('id') == 'eff_insubstantial' and base_effect_rule.get('isFixedCostByRank'))
+
+    labels = list(variants); totals: List[List[int]] = []; cost_per_rank: List[Any] = []; flat_totals: List[float] = []
+    vector_rows: List[int] = []; cprs: List[float] = []; flats: List[float] = []; removable_factors: List[float] = []
+    for row, label in enumerate(labels):
+        variant_power = {**base_power, 'modifiersConfig': variants[label], 'rank': max(1, rank_list[0] if rank_list else 1)}
+        reference = engine.calculate_individual_power_cost(variant_power, context)
+        cost_per_rank.append(reference['costPerRankFinal']); flat_totals.append(reference['costBreakdown'].get('flat_total', 0.0))
+        if special_pricing or not isinstance(reference['costPerRankFinal'], (int, float)) or not base_effect_rule:
+            totals.append([engine.calculate_individual_power_cost({**variant_power, 'rank': r}, context)['totalCost'] for r in rank_list])
+            continue
+        removable_type = _removable_type(engine, variants[label])
+        vector_rows.append(row); totals.append([])
+        cprs.append(float(reference['costPerRankFinal'])); flats.append(float(reference['costBreakdown'].get('flat_total', 0.0)))
+        removable_factors.append(0.0 if not removable_type else (1.0 if removable_type == 'standard' else 2.0))
+
+    if vector_rows and rank_list:
+        grid = _vectorized_costs(np.asarray(rank_list, dtype=np.float64)[np.newaxis, :], np.asarray(cprs)[:, np.newaxis],
+                                 np.asarray(flats)[:, np.newaxis], np.asarray(removable_factors)[:, np.newaxis])
+        for grid_row, row in enumerate(vector_rows): totals[row] = grid[grid_row].tolist()
+    return {'ranks': rank_list, 'variants': labels, 'total_cost': totals, 'cost_per_rank': cost_per_rank, 'flat_total': flat_totals}
@@ -0,0 +1,112 @@
+# edit_queue.py for HeroForge M&M (Streamlit Edition)
+# Coalesces a session's character edits into one debounced recalculation.
+
+"""
+Widget callbacks stage their edits here instead of recalculating on every change:
+
+    queue.stage(st.session_state, 'character', ['abilities', 'STR'], 6) # Applied at once (copy-on-write)
+    ...
+    queue.flush_due(st.session_state) # One recalculate per state, for every path staged since the last one
+
+Staged edits land in the session state immediately, so widgets show what the user typed, but
+derived values (PP totals, validation) stay those of the last recalculation; display_state()
+returns that last computed state for the sidebar until the batch flushes. The staged state itself
+drops the derived caches its edit makes stale (STAGED_STALE_CACHES), so CoreEngine getters such as
+get_power_arrays and get_trait_summary rebuild them for the values just entered. A batch is due once
+no edit has arrived for `debounce_seconds`, or `max_delay_seconds` after its first edit so that
+continuous editing still refreshes. The flush hands all staged key paths to
+CoreEngine.recalculate, whose incremental path rederives only what they touch.
+
+If code outside the queue replaces a staged state (e.g. a full recalculate or loading a file),
+the pending batch is dropped: whoever replaced the state is responsible for it.
+"""
+
+import time
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Tuple, TYPE_CHECKING
+
+from character_state import KeyPath, assoc_in
+
+if TYPE_CHECKING:
+    from core_engine import CoreEngine, CharacterState
+
+FlushResult = Dict[str, Optional[str]] # State key -> None, or the recalculation error message
+
+DEFAULT_DEBOUNCE_SECONDS = 0.4
+DEFAULT_MAX_DELAY_SECONDS = 2.0
+# Derived caches dropped from a staged state -> the top-level branches whose edits make them stale (None: any edit)
+STAGED_STALE_CACHES: Dict[str, Optional[Tuple[str, ...]]] = {'derived_power_arrays': ('powers',), 'derived_trait_summary': None, 'derived_validation_issues': None}
+
+
+def coalesce_key_paths(key_paths: List[KeyPath]) -> List[KeyPath]:
+    """Unique key paths in first-seen order, without paths that lie under another staged path."""
+    unique: List[KeyPath] = []
+    for path in key_paths:
+        if path not in unique: unique.append(list(path))
+    return [path for path in unique if not any(len(other) < len(path) and path[:len(other)] == other for other in unique)]
+
+
+class EditQueue:
+    """Pending edits of one session, per state key ('character', 'wizard_character_state')."""
+
+    def __init__(self, engine: 'CoreEngine', debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+                 max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.engine = engine; self.debounce_seconds = debounce_seconds; self.max_delay_seconds = max_delay_seconds; self.clock = clock
+        self._pending: Dict[str, Dict[str, Any]] = {} # State key -> {'staged', 'computed', 'paths', 'first_at', 'last_at'}
+        self.recalculations = 0; self.staged_edits = 0
+
+    def _live_batch(self, states: MutableMapping[str, Any], state_key: str) -> Optional[Dict[str, Any]]:
+        batch = self._pending.get(state_key)
+        if batch is not None and states.get(state_key) is not batch['staged']: # Replaced outside the queue
+            del self._pending[state_key]; return None
+        return batch
+
+    def stage(self, states: MutableMapping[str, Any], state_key: str, key_path: KeyPath, value: Any, recalc: bool = True) -> 'CharacterState':
+        """
+        Applies one edit to states[state_key] right away and queues its recalculation.
+        With recalc=False the edit joins a pending batch if there is one but never starts a batch;
+        the state is marked as needing a full recalculation either way. Raises like assoc_in.
+        """
+        current = states[state_key]; batch = self._live_batch(states, state_key)
+        updated = assoc_in(current, key_path, value); now = self.clock()
+        if not recalc: updated.pop('derived_is_recalculated', None) # Only a full recalculation may follow
+        for cache_key, branches in STAGED_STALE_CACHES.items():
+            if branches is None or (key_path and key_path[0] in branches): updated.pop(cache_key, None) # Getters rebuild it on the spot
+        if batch is None and recalc: batch = self._pending[state_key] = {'computed': current, 'paths': [], 'first_at': now}
+        if batch is not None: batch.update(staged=updated, last_at=now); batch['paths'].append(list(key_path))
+        states[state_key] = updated; self.staged_edits += 1
+        return updated
+
+    def pending_keys(self, states: MutableMapping[str, Any]) -> List[str]:
+        return [state_key for state_key in list(self._pending) if self._live_batch(states, state_key) is not None]
+
+    def is_due(self, state_key: str, now: Optional[float] = None) -> bool:
+        batch = self._pending.get(state_key)
+        if batch is None: return False
+        now = self.clock() if now is None else now
+        return now - batch['last_at'] >= self.debounce_seconds or now - batch['first_at'] >= self.max_delay_seconds
+
+    def display_state(self, states: MutableMapping[str, Any], state_key: str) -> 'CharacterState':
+        """The last recalculated state while a batch is pending, otherwise the current one."""
+        batch = self._live_batch(states, state_key)
+        return batch['computed'] if batch is not None else states[state_key]
+
+    def flush(self, states: MutableMapping[str, Any], state_keys: Optional[List[str]] = None) -> FlushResult:
+        """Recalculates every pending batch (or those of `state_keys`) now, once per state."""
+        results: FlushResult = {}
+        for state_key in (state_keys if state_keys is not None else list(self._pending)):
+            batch = self._live_batch(states, state_key)
+            if batch is None: continue
+            del self._pending[state_key]
+            staged = dict(batch['staged']) # The incremental path starts from the caches of the last recalculation
+            staged.update({cache_key: batch['computed'][cache_key] for cache_key in STAGED_STALE_CACHES if cache_key in batch['computed']})
+            try:
+                states[state_key] = self.engine.recalculate(staged, changed_key_paths=coalesce_key_paths(batch['paths']))
+                self.recalculations += 1; results[state_key] = None
+            except Exception as e:
+                failed = dict(batch['staged']); failed.pop('derived_is_recalculated', None) # Retry as a full recalculation later
+                states[state_key] = failed; results[state_key] = f"{type(e).__name__}: {e}"
+        return results
+
+    def flush_due(self, states: MutableMapping[str, Any]) -> FlushResult:
+        now = self.clock()
+        return self.flush(states, [state_key for state_key in list(self._pending) if self.is_due(state_key, now)])
@@ -0,0 +1,73 @@
+# engine_profiler.py for HeroForge M&M (Streamlit Edition)
+# Opt-in wall-time and call-count accounting for CoreEngine.recalculate.
+
+"""
+CoreEngine records into a RecalcProfile only while profiling is on, either for a block:
+
+    with engine.profile() as profile:
+        engine.recalculate(state)
+    print(profile.report())
+
+or for every recalculation, delivered to metrics sinks (e.g. a logger or a StatsD client):
+
+    engine.add_metrics_sink(lambda report: log.info("recalc", extra=report))
+
+When neither is active the engine skips all timing calls, so profiling costs nothing.
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+TimingStats = Dict[str, Any]
+MetricsSink = Callable[[Dict[str, Any]], None]
+
+
+def _empty_stats() -> TimingStats:
+    return {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+
+class RecalcProfile:
+    """Accumulated phase and per-power timings of one or more recalculations."""
+
+    def __init__(self):
+        self.recalculations = 0
+        self.phases: Dict[str, TimingStats] = {}
+        self.powers: Dict[str, TimingStats] = {} # Keyed by power id
+        self.power_cost_cache = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def now() -> float:
+        return time.perf_counter()
+
+    @staticmethod
+    def _add(stats: TimingStats, elapsed_ms: float, calls: int = 1) -> None:
+        stats['calls'] += calls; stats['total_ms'] += elapsed_ms
+        if elapsed_ms > stats['max_ms']: stats['max_ms'] = elapsed_ms
+
+    def record_phase(self, phase: str, started: float) -> None:
+        """Adds the time since `started` (a RecalcProfile.now() value) to `phase`."""
+        self._add(self.phases.setdefault(phase, _empty_stats()), (time.perf_counter() - started) * 1000.0)
+
+    def record_power(self, power_id: Optional[str], power_name: Optional[str], started: float) -> None:
+        stats = self.powers.setdefault(power_id or "<no id>", {**_empty_stats(), 'name': power_name or ""})
+        self._add(stats, (time.perf_counter() - started) * 1000.0)
+
+    def merge(self, other: 'RecalcProfile') -> None:
+        self.recalculations += other.recalculations
+        for phase, stats in other.phases.items():
+            target = self.phases.setdefault(phase, _empty_stats()); self._add(target, stats['total_ms'], stats['calls'])
+            target['max_ms'] = max(target['max_ms'], stats['max_ms'])
+        for power_id, stats in other.powers.items():
+            target = self.powers.setdefault(power_id, {**_empty_stats(), 'name': stats.get('name', "")}); self._add(target, stats['total_ms'], stats['calls'])
+            target['max_ms'] = max(target['max_ms'], stats['max_ms'])
+        for counter in self.power_cost_cache: self.power_cost_cache[counter] += other.power_cost_cache[counter]
+
+    def report(self, top_powers: int = 10) -> Dict[str, Any]:
+        """JSON-serializable summary; powers are the `top_powers` slowest by total time."""
+        slowest = sorted(self.powers.items(), key=lambda item: item[1]['total_ms'], reverse=True)[:top_powers]
+        return {
+            'recalculations': self.recalculations,
+            'phases': {phase: dict(stats) for phase, stats in self.phases.items()},
+            'slowest_powers': [{'id': power_id, **stats} for power_id, stats in slowest],
+            'power_cost_cache': dict(self.power_cost_cache),
+        }
@@ -0,0 +1,274 @@
+# npc_optimizer.py for HeroForge M&M (Streamlit Edition)
+# Fills a PP budget with a maximal archetype build that stays inside the PL caps.
+
+"""
+Backs CoreEngine.optimize_archetype_build. The archetype templates in rules/archetypes.json are
+PL 10 builds; their ranks are scaled to the requested PL and used as the target shape of the build.
+
+Every optimizable trait (abilities, bought defenses, template skills, ranked template powers) is an
+integer variable. All PL caps validate_all checks are linear in those variables, so they are read
+off the engine once: one recalculate of the all-zero build gives the cap values, and bumping each
+trait by one rank (CoreEngine.build_trait_summary of the bumped state) gives
+its coefficients. Costs come from the engine's cost functions as per-trait rank -> PP tables (powers
+through sweep_power_costs). The search then never recalculates:
+
+    1. Greedy fill: raise the trait with the lowest rank / target ratio while the next rank fits
+       the caps and the budget (caps only tighten as ranks grow, so a blocked trait stays blocked).
+    2. Branch-and-bound: search every trait within `search_radius` ranks of the greedy build for the
+       one that spends the most PP without going over, preferring the smallest total rank change.
+       Branches are pruned on the budget bounds and on the cap inequalities with the unassigned
+       traits at their lowest ranks.
+
+One final recalculate produces the returned character. Powers the search cannot resize without
+breaking their structure (Alternate Effects, Enhanced Traits, Senses/Immunity packages, effects
+missing from the rules) keep their scaled template rank, capped at the PL.
+"""
+
+import copy
+import heapq
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core_engine import CoreEngine, CharacterState, PowerDefinition
+
+TraitKey = Tuple[str, str] # ('abilities', 'STR'), ('defenses', 'Dodge'), ('skills', skill id) or ('powers', power id)
+CapValues = Dict[str, Tuple[int, int]] # Cap name -> (current value, limit)
+OptimizerResult = Dict[str, Any]
+
+TEMPLATE_POWER_LEVEL = 10
+DEFAULT_RANK_HEADROOM = 0.5 # Traits may grow to 150% of their scaled template rank
+DEFAULT_SEARCH_RADIUS = 2
+DEFAULT_MAX_NODES = 20000
+_FIXED_POWER_FLAGS = ('isSenseContainer', 'isImmunityContainer', 'isEnhancementEffect')
+
+
+def _scaled(rank: Any, pl: int) -> int:
+    return max(0, int(round((rank or 0) * pl / TEMPLATE_POWER_LEVEL)))
+
+
+def _is_optimizable_power(engine: 'CoreEngine', template_power: Dict[str, Any]) -> bool:
+    effect_rule = engine.catalog.effects.get(template_power.get('baseEffectId'))
+    return bool(effect_rule) and not template_power.get('isAlternateEffectOf') and (template_power.get('rank') or 0) > 0 and \
+           template_power.get('baseEffectId') != 'eff_enhanced_trait' and not any(effect_rule.get(flag) for flag in _FIXED_POWER_FLAGS)
+
+
+def get_archetype(engine: 'CoreEngine', archetype_id: str) -> Dict[str, Any]:
+    archetype = next((arch for arch in engine.rule_data.get('archetypes', []) if arch.get('id') == archetype_id), None)
+    if archetype is None: raise KeyError(f"Archetype '{archetype_id}' not found.")
+    return archetype
+
+
+def build_archetype_character(engine: 'CoreEngine', archetype_id: str, pl: int = 10,
+                              trait_ranks: Optional[Dict[TraitKey, int]] = None) -> 'CharacterState':
+    """
+    Character sheet (not recalculated) for an archetype with its template ranks scaled to `pl`.
+    `trait_ranks` overrides individual ranks; power ids are 'pwr_<template power id>'.
+    """
+    archetype = get_archetype(engine, archetype_id); template = archetype.get('template', {}); overrides = trait_ranks or {}
+    state = engine.get_default_character_state(pl=pl)
+    state['name'] = archetype.get('name', 'NPC'); state['concept'] = archetype.get('description', '')
+    for ability_id, rank in template.get('abilities', {}).items():
+        if ability_id in state['abilities']: state['abilities'][ability_id] = overrides.get(('abilities', ability_id), _scaled(rank, pl))
+    for defense_id, rank in template.get('defenses', {}).items():
+        if defense_id in state['defenses']: state['defenses'][defense_id] = overrides.get(('defenses', defense_id), _scaled(rank, pl))
+    for skill_id, rank in template.get('skills', {}).items():
+        if engine.get_skill_rule(skill_id): state['skills'][skill_id] = overrides.get(('skills', skill_id), _scaled(rank, pl))
+    state['advantages'] = [{'params': {}, **copy.deepcopy(adv), 'instance_id': f"adv_{archetype_id}_{i}"} for i, adv in enumerate(template.get('advantages', []))]
+
+    powers: List['PowerDefinition'] = []
+    for p_template in template.get('powers', []):
+        power_id = f"pwr_{p_template.get('id')}"
+        rank = _scaled(p_template.get('enhancementAmount', p_template.get('rank', 1)), pl)
+        rank = overrides.get(('powers', power_id), rank if _is_optimizable_power(engine, p_template) else min(rank, pl))
+        power: 'PowerDefinition' = {
+            'id': power_id, 'name': p_template.get('name', 'Archetype Power'), 'baseEffectId': p_template.get('baseEffectId'),
+            'rank': rank, 'descriptors': p_template.get('descriptors', ''),
+            'modifiersConfig': [{**copy.deepcopy(mod_conf), 'instance_id': mod_conf.get('instance_id', f"mod_{power_id}_{j}")}
+                                for j, mod_conf in enumerate(p_template.get('modifiersConfig', []))],
+            'sensesConfig': copy.deepcopy(p_template.get('sensesConfig', [])), 'immunityConfig': copy.deepcopy(p_template.get('immunityConfig', [])),
+            'powerSpecificData': copy.deepcopy(p_template.get('powerSpecificData', {})), 'linkedCombatSkill': p_template.get('linkedCombatSkill'),
+            'arrayId': p_template.get('arrayId'), 'isArrayBase': p_template.get('isArrayBase', False),
+            'isAlternateEffectOf': f"pwr_{p_template['isAlternateEffectOf']}" if p_template.get('isAlternateEffectOf') else None,
+        }
+        if p_template.get('enhancedTraitCategory'): # Archetype shorthand -> the engine's Enhanced Trait parameters
+            power['enhanced_trait_params'] = {'category': p_template['enhancedTraitCategory'], 'trait_id': p_template.get('enhancedTraitId')}
+        powers.append(power)
+    state['powers'] = powers
+    return state
+
+
+def _cap_values(engine: 'CoreEngine', recalculated_state: 'CharacterState') -> CapValues:
+    """Left-hand side and limit of every PL cap inequality validate_all checks."""
+    summary = engine.build_trait_summary(recalculated_state) # Fresh: Defensive Roll depends on Agility
+    pl = recalculated_state.get('powerLevel', 10); totals = {defense_id: defense['total'] for defense_id, defense in summary['defenses'].items()}
+    caps: CapValues = {f"{first} + {second}": (totals[first] + totals[second], pl * 2) for first, second in (('Dodge', 'Toughness'), ('Parry', 'Toughness'), ('Fortitude', 'Will'))}
+    for skill_id, skill in summary['skills'].items():
+        caps[f"Skill ranks: {skill_id}"] = (skill['ranks'], pl + 5)
+        if skill['ability']: caps[f"Skill bonus: {skill_id}"] = (skill['bonus'], pl + 10)
+    for attack in summary['attacks']:
+        if attack['attack_type'] in ['area', 'perception']: caps[f"Attack: {attack['id']}"] = (attack['rank'], pl)
+        else: caps[f"Attack: {attack['id']}"] = (attack['bonus'] + attack['rank'], pl * 2)
+    return caps
+
+
+def _bumped(state: 'CharacterState', trait: TraitKey) -> 'CharacterState':
+    branch, trait_id = trait; bumped = dict(state)
+    if branch == 'powers': bumped['powers'] = [{**p, 'rank': p.get('rank', 0) + 1} if p.get('id') == trait_id else p for p in state['powers']]
+    else: bumped[branch] = {**state[branch], trait_id: state[branch].get(trait_id, 0) + 1}
+    return bumped
+
+
+class _BuildModel:
+    """Linear cap model and per-trait cost tables of one archetype at one PL, measured at the all-zero build."""
+
+    def __init__(self, engine: 'CoreEngine', archetype_id: str, pl: int, rank_headroom: float):
+        template = get_archetype(engine, archetype_id).get('template', {})
+        targets: Dict[TraitKey, int] = {}
+        for ability_id, rank in template.get('abilities', {}).items(): targets[('abilities', ability_id)] = _scaled(rank, pl)
+        for defense_id, rank in template.get('defenses', {}).items(): targets[('defenses', defense_id)] = _scaled(rank, pl)
+        for skill_id, rank in template.get('skills', {}).items():
+            if engine.get_skill_rule(skill_id): targets[('skills', skill_id)] = _scaled(rank, pl)
+        for p_template in template.get('powers', []):
+            if _is_optimizable_power(engine, p_template): targets[('powers', f"pwr_{p_template.get('id')}")] = _scaled(p_template.get('rank'), pl)
+        self.traits: List[TraitKey] = [trait for trait, target in targets.items() if target > 0] # Zero-target traits stay at 0
+        self.targets = targets; self.upper = {trait: math.ceil(targets[trait] * (1 + rank_headroom)) for trait in self.traits}
+
+        self.zero_state = build_archetype_character(engine, archetype_id, pl, trait_ranks={trait: 0 for trait in targets})
+        probe = engine.recalculate(self.zero_state)
+        self.base_spent = probe.get('spentPowerPoints', 0); self.budget = probe.get('totalPowerPoints', pl * 15)
+        base_caps = _cap_values(engine, probe)
+        self.cap_names = list(base_caps); self.cap_base = [base_caps[name][0] for name in self.cap_names]; self.cap_limits = [base_caps[name][1] for name in self.cap_names]
+        self.coefficients: Dict[TraitKey, List[Tuple[int, int]]] = {} # Trait -> [(cap index, PL cap change per rank)]
+        for trait in self.traits:
+            bumped_caps = _cap_values(engine, _bumped(probe, trait))
+            self.coefficients[trait] = [(i, bumped_caps[name][0] - self.cap_base[i]) for i, name in enumerate(self.cap_names)
+                                        if name in bumped_caps and bumped_caps[name][0] != self.cap_base[i]]
+
+        self.cost_tables: Dict[TraitKey, List[int]] = {}; zero_powers = {p.get('id'): p for p in self.zero_state['powers']}
+        for trait in self.traits:
+            branch, trait_id = trait; ranks = range(self.upper[trait] + 1)
+            if branch == 'abilities': self.cost_tables[trait] = [engine.calculate_ability_cost({trait_id: r}) for r in ranks]
+            elif branch == 'defenses': self.cost_tables[trait] = [engine.calculate_defense_cost({trait_id: r}) for r in ranks]
+            elif branch == 'powers':
+                sweep = engine.sweep_power_costs(zero_powers[trait_id], ranks, powers_context=self.zero_state['powers'])
+                self.cost_tables[trait] = [int(cost) for cost in sweep['total_cost'][0]]
+        self.skill_traits = {trait for trait in self.traits if trait[0] == 'skills'} # Skills are priced together: ceil(total ranks / 2)
+        self.base_skill_ranks = sum(probe.get('skills', {}).values())
+        max_skill_ranks = self.base_skill_ranks + sum(self.upper[trait] for trait in self.skill_traits)
+        self.skill_costs = [engine.calculate_skill_cost({'total': s}) for s in range(max_skill_ranks + 1)]
+
+    def trait_cost(self, trait: TraitKey, rank: int) -> int:
+        """PP of `trait` at `rank` on top of the zero build (skills: 0, priced via skill_costs)."""
+        return 0 if trait in self.skill_traits else self.cost_tables[trait][rank] - self.cost_tables[trait][0]
+
+    def spent(self, ranks: Dict[TraitKey, int]) -> int:
+        skill_ranks = self.base_skill_ranks + sum(ranks[trait] for trait in self.skill_traits)
+        return self.base_spent + sum(self.trait_cost(trait, ranks[trait]) for trait in self.traits) + \
+               self.skill_costs[skill_ranks] - self.skill_costs[self.base_skill_ranks]
+
+
+def _greedy_fill(model: _BuildModel) -> Dict[TraitKey, int]:
+    ranks = {trait: 0 for trait in model.traits}; caps = list(model.cap_base)
+    spent = model.base_spent; skill_ranks = model.base_skill_ranks
+    heap = [(1.0 / model.targets[trait], order, trait) for order, trait in enumerate(model.traits)]; heapq.heapify(heap)
+    while heap:
+        _, order, trait = heapq.heappop(heap); next_rank = ranks[trait] + 1
+        if next_rank > model.upper[trait]: continue
+        if trait in model.skill_traits: delta = model.skill_costs[skill_ranks + 1] - model.skill_costs[skill_ranks]
+        else: delta = model.trait_cost(trait, next_rank) - model.trait_cost(trait, ranks[trait])
+        if spent + delta > model.budget: continue
+        if any(caps[i] + change > model.cap_limits[i] for i, change in model.coefficients[trait]): continue
+        for i, change in model.coefficients[trait]: caps[i] += change
+        ranks[trait] = next_rank; spent += delta
+        if trait in model.skill_traits: skill_ranks += 1
+        heapq.heappush(heap, ((next_rank + 1) / model.targets[trait], order, trait))
+    return ranks
+
+
+def _branch_and_bound(model: _BuildModel, start: Dict[TraitKey, int], radius: int, max_nodes: int) -> Tuple[Dict[TraitKey, int], int, bool]:
+    """Best build within `radius` ranks of `start`: most PP spent within budget, then fewest rank changes. Returns (ranks, nodes, complete)."""
+    windows = {trait: [r for r in sorted(range(start[trait] - radius, start[trait] + radius + 1), key=lambda r: (abs(r - start[trait]), -r))
+                       if 0 <= r <= model.upper[trait]] for trait in model.traits}
+    order = sorted((t for t in model.traits if t not in model.skill_traits), key=lambda t: -(model.trait_cost(t, max(windows[t])) - model.trait_cost(t, min(windows[t]))))
+    order += [trait for trait in model.traits if trait in model.skill_traits]
+    # Suffix bounds over the traits not yet assigned: cheapest/dearest cost, skill ranks, smallest cap contribution
+    count = len(order); min_cost = [0] * (count + 1); max_cost = [0] * (count + 1); min_skill = [0] * (count + 1); max_skill = [0] * (count + 1)
+    min_caps = [[0] * len(model.cap_base) for _ in range(count + 1)]
+    for k in range(count - 1, -1, -1):
+        trait = order[k]; low, high = min(windows[trait]), max(windows[trait]); skill = trait in model.skill_traits
+        min_cost[k] = min_cost[k + 1] + model.trait_cost(trait, low); max_cost[k] = max_cost[k + 1] + model.trait_cost(trait, high)
+        min_skill[k] = min_skill[k + 1] + (low if skill else 0); max_skill[k] = max_skill[k + 1] + (high if skill else 0)
+        min_caps[k] = list(min_caps[k + 1])
+        for i, change in model.coefficients[trait]: min_caps[k][i] += min(change * low, change * high)
+
+    best = {'ranks': dict(start), 'spent': model.spent(start), 'changes': 0}; nodes = 0
+    ranks = dict(start); caps = list(model.cap_base)
+    def skill_cost(skill_ranks: int) -> int: return model.skill_costs[skill_ranks] - model.skill_costs[model.base_skill_ranks]
+
+    def search(k: int, spent: int, skill_ranks: int, changes: int) -> bool: # False once the node budget is used up
+        nonlocal nodes
+        nodes += 1
+        if nodes > max_nodes: return False
+        if spent + min_cost[k] + skill_cost(skill_ranks + min_skill[k]) > model.budget: return True
+        upper_spent = min(model.budget, spent + max_cost[k] + skill_cost(skill_ranks + max_skill[k]))
+        if upper_spent < best['spent'] or (upper_spent == best['spent'] and changes >= best['changes']): return True
+        if any(caps[i] + min_caps[k][i] > model.cap_limits[i] for i in range(len(caps))): return True
+        if k == count:
+            total = spent + skill_cost(skill_ranks)
+            if total > best['spent'] or (total == best['spent'] and changes < best['changes']): best.update(ranks=dict(ranks), spent=total, changes=changes)
+            return True
+        trait = order[k]; skill = trait in model.skill_traits
+        for rank in windows[trait]:
+            for i, change in model.coefficients[trait]: caps[i] += change * rank
+            ranks[trait] = rank
+            carry_on = search(k + 1, spent + model.trait_cost(trait, rank), skill_ranks + (rank if skill else 0), changes + abs(rank - start[trait]))
+            for i, change in model.coefficients[trait]: caps[i] -= change * rank
+            if not carry_on: return False
+        ranks[trait] = start[trait]
+        return True
+
+    complete = search(0, model.base_spent, model.base_skill_ranks, 0)
+    return best['ranks'], nodes, complete
+
+
+def optimize_archetype_build(engine: 'CoreEngine', archetype_id: str, pl: int = 10, rank_headroom: float = DEFAULT_RANK_HEADROOM,
+                             search_radius: int = DEFAULT_SEARCH_RADIUS, max_nodes: int = DEFAULT_MAX_NODES) -> OptimizerResult:
+    """
+    Maximal PL-legal build of an archetype. Returns {'character' (recalculated), 'archetype_id', 'powerLevel',
+    'trait_ranks', 'predicted_spent', 'spentPowerPoints', 'totalPowerPoints', 'search_nodes', 'search_complete', 'elapsed_ms'}.
+    """
+    started = time.perf_counter()
+    model = _BuildModel(engine, archetype_id, pl, rank_headroom)
+    ranks, nodes, complete = _branch_and_bound(model, _greedy_fill(model), max(0, search_radius), max_nodes)
+    all_ranks = {trait: ranks.get(trait, 0) for trait in model.targets}
+    character = engine.recalculate(build_archetype_character(engine, archetype_id, pl, trait_ranks=all_ranks))
+    return {
+        'character': character, 'archetype_id': archetype_id, 'powerLevel': pl,
+        'trait_ranks': {f"{branch}.{trait_id}": rank for (branch, trait_id), rank in all_ranks.items()},
+        'predicted_spent': model.spent(ranks), 'spentPowerPoints': character.get('spentPowerPoints', 0), 'totalPowerPoints': character.get('totalPowerPoints', 0),
+        'search_nodes': nodes, 'search_complete': complete, 'elapsed_ms': (time.perf_counter() - started) * 1000.0,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import sys
+    from core_engine import CoreEngine
+
+    parser = argparse.ArgumentParser(description="Build a maximal PL-legal NPC from an archetype.")
+    parser.add_argument('archetype_id', help="Archetype id from rules/archetypes.json, e.g. arch_paragon.")
+    parser.add_argument('--pl', type=int, default=10)
+    parser.add_argument('--rules', default="rules", help="Rule JSON directory.")
+    parser.add_argument('--output', help="Write the character JSON here instead of stdout.")
+    args = parser.parse_args()
+
+    result = optimize_archetype_build(CoreEngine(rule_dir=args.rules), args.archetype_id, pl=args.pl)
+    character_json = json.dumps(result['character'], indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f: f.write(character_json)
+    else: print(character_json)
+    print(f"{result['spentPowerPoints']}/{result['totalPowerPoints']} PP, {result['search_nodes']} search nodes, {result['elapsed_ms']:.1f} ms; "
+          f"issues: {result['character'].get('validationErrors', [])}", file=sys.stderr)
@@ -0,0 +1,146 @@
+# pdf_cache.py for HeroForge M&M (Streamlit Edition)
+# Size-bounded on-disk cache of rendered character sheet PDFs, keyed by content hash.
+
+"""
+Rendering a sheet with FPDF takes far longer than looking it up, and GMs export the same
+rosters again and again. A rendered PDF depends only on:
+
+    - the recalculated character state (canonical JSON, so key order never matters),
+    - the ruleset (CoreEngine.ruleset_version, for rule names printed on the sheet),
+    - the layout: pdf_utils' module-level constants (page size, margins, fonts, line heights),
+      PDF_LAYOUT_VERSION (bumped when a renderer changes) and the installed fpdf version.
+
+so their sha256 is the cache key:
+
+    pdf_buffer = cached_character_sheet(character_state, rule_data, engine, cache=PdfCache())
+
+PdfCache stores one file per key, written atomically, and evicts least recently used files
+(by modification time, refreshed on every hit) once the directory exceeds `max_bytes`.
+Several processes may share a directory: a racing writer only ever replaces a file with
+identical bytes. Failed renders are not cached.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core_engine import CoreEngine, CharacterState, RuleData
+
+PdfRenderer = Callable[['CharacterState', 'RuleData', 'CoreEngine'], Optional[io.BytesIO]]
+
+PDF_CACHE_DIR_ENV = 'HEROFORGE_PDF_CACHE_DIR'
+DEFAULT_PDF_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'heroforge_pdf_cache')
+DEFAULT_PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PDF_CACHE_SUFFIX = '.pdf'
+VOLATILE_STATE_KEYS = ('derived_is_recalculated',) # Bookkeeping that never reaches the sheet
+
+
+def state_hash(character_state: 'CharacterState') -> str:
+    """sha256 of the character's canonical JSON (sorted keys, no whitespace)."""
+    content = {k: v for k, v in character_state.items() if k not in VOLATILE_STATE_KEYS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')).hexdigest()
+
+
+_layout_signature_cache: Dict[str, str] = {}
+
+def layout_signature() -> str:
+    """Hash of every layout input of pdf_utils; computed once per process."""
+    if 'signature' not in _layout_signature_cache:
+        import fpdf
+        import pdf_utils
+        constants = {name: value for name, value in vars(pdf_utils).items()
+                     if name.isupper() and isinstance(value, (int, float, str, tuple))}
+        constants['fpdf_version'] = getattr(fpdf, '__version__', 'unknown')
+        _layout_signature_cache['signature'] = hashlib.sha256(json.dumps(constants, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return _layout_signature_cache['signature']
+
+
+def sheet_cache_key(character_state: 'CharacterState', engine: 'CoreEngine', variant: str = 'sheet') -> str:
+    """Cache key of one rendered document; `variant` separates document kinds rendered from the same state."""
+    return hashlib.sha256(f"{variant}|{engine.ruleset_version}|{layout_signature()}|{state_hash(character_state)}".encode('utf-8')).hexdigest()
+
+
+class PdfCache:
+    """Rendered PDFs on disk, one file per key, bounded to `max_bytes` with LRU eviction."""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_PDF_CACHE_MAX_BYTES):
+        self.directory = directory or os.environ.get(PDF_CACHE_DIR_ENV) or DEFAULT_PDF_CACHE_DIR
+        self.max_bytes = max_bytes; self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0; self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str: return os.path.join(self.directory, key + PDF_CACHE_SUFFIX)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f: pdf_bytes = f.read()
+            os.utime(path) # Most recently used
+        except OSError:
+            self.misses += 1; return None
+        self.hits += 1
+        return pdf_bytes
+
+    def put(self, key: str, pdf_bytes: bytes) -> None:
+        if len(pdf_bytes) > self.max_bytes: return # Would evict everything and still not fit
+        tmp_path = None
+        try: # Atomic replace: readers never see a partial PDF
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=key, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f: f.write(pdf_bytes)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            if tmp_path and os.path.exists(tmp_path): os.remove(tmp_path)
+            print(f"Warning: Could not write PDF cache entry to {self.directory}: {e}"); return
+        self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every cached PDF, oldest first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(PDF_CACHE_SUFFIX): continue
+            path = os.path.join(self.directory, name)
+            try: stat = os.stat(path)
+            except OSError: continue # Evicted by another process meanwhile
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = self._entries(); total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes: break
+                try: os.remove(path); self.evictions += 1
+                except OSError: pass
+                total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {'directory': self.directory, 'entries': len(entries), 'bytes': sum(size for _, size, _ in entries), 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def clear(self) -> None:
+        for _, _, path in self._entries():
+            try: os.remove(path)
+            except OSError: pass
+
+
+def cached_character_sheet(character_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', cache: Optional[PdfCache] = None,
+                           render: Optional[PdfRenderer] = None, variant: str = 'sheet') -> Optional[io.BytesIO]:
+    """
+    Same contract as pdf_utils.generate_fpdf_character_sheet (a BytesIO, or None on failure),
+    but renders only when no PDF for this exact state and layout is cached.
+    """
+    if render is None:
+        from pdf_utils import generate_fpdf_character_sheet as render
+    if cache is None: return render(character_state, rule_data, engine)
+    key = sheet_cache_key(character_state, engine, variant)
+    pdf_bytes = cache.get(key)
+    if pdf_bytes is not None: return io.BytesIO(pdf_bytes)
+    pdf_buffer = render(character_state, rule_data, engine)
+    if pdf_buffer is not None: cache.put(key, pdf_buffer.getvalue())
+    return pdf_buffer
@@ -0,0 +1,266 @@
+# pdf_roster.py for HeroForge M&M (Streamlit Edition)
+# Renders many character sheets in parallel and streams them into one bookmarked roster PDF.
+
+"""
+One call for convention tables:
+
+    entries = generate_fpdf_roster(states, engine.rule_data, engine, "table_3.pdf", workers=4)
+    python pdf_roster.py saved_characters/ --output table_3.pdf
+
+Each sheet is rendered by pdf_utils.generate_fpdf_character_sheet in a process pool that shares
+the parent's engine the same way batch_recalc does (states that are not recalculated yet are
+recalculated in the worker first; with a PdfCache, unchanged sheets are read from it instead).
+Sheets come back in input order with at most 2 * workers in flight, and each one is appended to
+the output right away: its objects are renumbered and written, and only their byte offsets and
+page object numbers are kept. So memory does not grow with the roster size, and the output may
+be a path or any writable binary stream, seekable or not.
+
+The document opens with an index page (name, PL, PP and first page of every character), and
+carries one bookmark per character. The index is rendered last, once page numbers are known,
+but placed first in the page tree. Characters that fail to render are listed as such in the index
+and in the returned entries:
+
+    {'index', 'name', 'powerLevel', 'spentPowerPoints', 'totalPowerPoints', 'first_page', 'pages', 'error'}
+
+The concatenation relies on what fpdf2 writes: a classic xref table, no object streams and a
+single flat page tree. It is not a general PDF merger.
+"""
+
+import math
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, BinaryIO, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core_engine import CoreEngine, CharacterState, RuleData
+    from pdf_cache import PdfCache
+
+RosterEntry = Dict[str, Any]
+RenderResult = Tuple[int, Optional[bytes], Optional[str]] # (index, PDF bytes, error)
+
+ROSTER_INDEX_ROWS_PER_PAGE = 32
+PDF_HEADER = b"%PDF-1.3\n%\xe9\xeb\xf1\xbf\n"
+
+_worker_engine: Optional['CoreEngine'] = None
+_worker_cache: Optional['PdfCache'] = None
+
+
+def _init_worker(engine_or_rule_dir: Union['CoreEngine', str], cache_settings: Optional[Tuple[str, int]]) -> None:
+    global _worker_engine, _worker_cache
+    if isinstance(engine_or_rule_dir, str):
+        from core_engine import CoreEngine
+        _worker_engine = CoreEngine(rule_dir=engine_or_rule_dir)
+    else:
+        _worker_engine = engine_or_rule_dir # Inherited through fork, never pickled
+    if cache_settings is not None:
+        from pdf_cache import PdfCache
+        _worker_cache = PdfCache(*cache_settings)
+
+
+def _render_one(engine: 'CoreEngine', cache: Optional['PdfCache'], index: int, state: 'CharacterState') -> RenderResult:
+    from pdf_cache import cached_character_sheet
+    try:
+        if not state.get('derived_is_recalculated'): state = engine.recalculate(state)
+        pdf_buffer = cached_character_sheet(state, engine.rule_data, engine, cache=cache)
+        if pdf_buffer is None: return index, None, "PDF generation failed."
+        return index, pdf_buffer.getvalue(), None
+    except Exception as e:
+        return index, None, f"{type(e).__name__}: {e}"
+
+
+def _render_chunk(chunk: List[Tuple[int, 'CharacterState']]) -> List[RenderResult]:
+    assert _worker_engine is not None, "Roster worker used before _init_worker ran."
+    return [_render_one(_worker_engine, _worker_cache, index, state) for index, state in chunk]
+
+
+def _summary(index: int, state: 'CharacterState') -> RosterEntry:
+    return {'index': index, 'name': state.get('name') or f"Character {index + 1}", 'powerLevel': state.get('powerLevel'),
+            'spentPowerPoints': state.get('spentPowerPoints'), 'totalPowerPoints': state.get('totalPowerPoints'),
+            'first_page': None, 'pages': 0, 'error': None}
+
+
+def _render_in_order(engine: 'CoreEngine', states: Iterable['CharacterState'], entries: List[RosterEntry], workers: int,
+                     chunksize: int, cache: Optional['PdfCache']) -> Iterator[RenderResult]:
+    """Renders `states` (recording their summaries in `entries`), yielding results in input order."""
+    def indexed() -> Iterator[Tuple[int, 'CharacterState']]:
+        for index, state in enumerate(states):
+            entries.append(_summary(index, state)); yield index, state
+
+    if workers <= 1:
+        for index, state in indexed(): yield _render_one(engine, cache, index, state)
+        return
+    if 'fork' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('fork'); worker_init_arg: Union['CoreEngine', str] = engine
+    else:
+        mp_context = multiprocessing.get_context('spawn'); worker_init_arg = engine.rule_dir
+    cache_settings = (cache.directory, cache.max_bytes) if cache is not None else None
+    source = indexed()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker, initargs=(worker_init_arg, cache_settings)) as pool:
+        in_flight: Deque[Future] = deque()
+        while True:
+            chunk = list(islice(source, max(1, chunksize)))
+            if not chunk: break
+            in_flight.append(pool.submit(_render_chunk, chunk))
+            if len(in_flight) >= workers * 2: yield from in_flight.popleft().result()
+        while in_flight: yield from in_flight.popleft().result()
+
+
+def _pdf_text_string(text: str) -> bytes:
+    """PDF text string as UTF-16BE hex, safe for any character."""
+    return b"<FEFF" + text.encode('utf-16-be').hex().upper().encode('ascii') + b">"
+
+
+_REF_PATTERN = re.compile(rb"(\d+) 0 R")
+_PARENT_PATTERN = re.compile(rb"/Parent \d+ 0 R")
+_KIDS_PATTERN = re.compile(rb"/Kids \[([^\]]*)\]")
+_MEDIABOX_PATTERN = re.compile(rb"/MediaBox \[[^\]]*\]")
+
+
+class _PdfConcatWriter:
+    """Streams the objects of whole fpdf2 documents into one PDF. Objects 1 and 2 are the merged page tree and catalog."""
+    PAGES_OBJ = 1; CATALOG_OBJ = 2
+
+    def __init__(self, out: BinaryIO):
+        self.out = out; self.position = 0; self.offsets: Dict[int, int] = {}; self.next_obj = 3
+        self._write(PDF_HEADER)
+
+    def _write(self, data: bytes) -> None:
+        self.out.write(data); self.position += len(data)
+
+    def _write_object(self, obj_num: int, body: bytes) -> None:
+        self.offsets[obj_num] = self.position
+        self._write(b"%d 0 obj\n" % obj_num + body + b"\nendobj\n")
+
+    def _allocate(self) -> int:
+        obj_num = self.next_obj; self.next_obj += 1
+        return obj_num
+
+    @staticmethod
+    def _objects(pdf_bytes: bytes) -> Tuple[Dict[int, bytes], bytes]:
+        """({object number: body between 'obj' and 'endobj'}, trailer dictionary), located through the xref table."""
+        xref_start = int(pdf_bytes[pdf_bytes.rindex(b"startxref") + 9:].split()[0])
+        xref_lines = pdf_bytes[xref_start:pdf_bytes.index(b"trailer", xref_start)].split(b"\n")
+        first_obj, count = (int(v) for v in xref_lines[1].split())
+        offsets = {first_obj + i: int(line[:10]) for i, line in enumerate(xref_lines[2:2 + count]) if line[17:18] == b"n"}
+        bounds = sorted(offsets.values()) + [xref_start]; objects: Dict[int, bytes] = {}
+        for obj_num, offset in offsets.items():
+            raw = pdf_bytes[offset:bounds[bounds.index(offset) + 1]]
+            objects[obj_num] = raw[raw.index(b"obj") + 3:raw.rindex(b"endobj")].strip(b"\n")
+        return objects, pdf_bytes[pdf_bytes.index(b"trailer", xref_start):]
+
+    def append_document(self, pdf_bytes: bytes) -> List[int]:
+        """Writes every object of one document except its catalog, page tree and info; returns its page object numbers in order."""
+        objects, trailer = self._objects(pdf_bytes)
+        root = int(re.search(rb"/Root (\d+) 0 R", trailer).group(1)); info = re.search(rb"/Info (\d+) 0 R", trailer)
+        pages_root = int(re.search(rb"/Pages (\d+) 0 R", objects[root]).group(1))
+        skipped = {root, pages_root} | ({int(info.group(1))} if info else set())
+        renumbered = {obj_num: self._allocate() for obj_num in sorted(objects) if obj_num not in skipped}
+        renumbered[pages_root] = self.PAGES_OBJ
+        mediabox = _MEDIABOX_PATTERN.search(objects[pages_root]) # Inherited by fpdf2 pages; made explicit per page
+        for obj_num, body in sorted(objects.items()):
+            if obj_num in skipped: continue
+            stream_at = body.find(b"stream\n"); head, stream = (body, b"") if stream_at < 0 else (body[:stream_at], body[stream_at:])
+            head = _REF_PATTERN.sub(lambda m: b"%d 0 R" % renumbered.get(int(m.group(1)), 0), head) # Only the dictionary holds references
+            if b"/Type /Page\n" in head + b"\n" and mediabox and b"/MediaBox" not in head:
+                head = head.replace(b"/Type /Page", mediabox.group(0) + b"\n/Type /Page", 1)
+            self._write_object(renumbered[obj_num], head + stream)
+        kids = _KIDS_PATTERN.search(objects[pages_root]).group(1)
+        return [renumbered[int(m.group(1))] for m in _REF_PATTERN.finditer(kids)]
+
+    def finish(self, kids: List[int], bookmarks: List[Tuple[str, int]]) -> None:
+        """Writes the page tree (in `kids` order), the outline of (title, page object) bookmarks, the catalog and the xref."""
+        outline_root = self._allocate() if bookmarks else None
+        if outline_root is not None:
+            item_nums = [self._allocate() for _ in bookmarks]
+            for i, (title, page_obj) in enumerate(bookmarks):
+                links = b"".join([b"\n/Prev %d 0 R" % item_nums[i - 1] if i > 0 else b"", b"\n/Next %d 0 R" % item_nums[i + 1] if i + 1 < len(item_nums) else b""])
+                self._write_object(item_nums[i], b"<<\n/Title " + _pdf_text_string(title) + b"\n/Parent %d 0 R" % outline_root + links + b"\n/Dest [%d 0 R /XYZ null null null]\n>>" % page_obj)
+            self._write_object(outline_root, b"<<\n/Type /Outlines\n/First %d 0 R\n/Last %d 0 R\n/Count %d\n>>" % (item_nums[0], item_nums[-1], len(item_nums)))
+        self._write_object(self.PAGES_OBJ, b"<<\n/Type /Pages\n/Count %d\n/Kids [" % len(kids) + b" ".join(b"%d 0 R" % k for k in kids) + b"]\n>>")
+        outlines = b"\n/Outlines %d 0 R\n/PageMode /UseOutlines" % outline_root if outline_root is not None else b""
+        self._write_object(self.CATALOG_OBJ, b"<<\n/Type /Catalog\n/Pages %d 0 R" % self.PAGES_OBJ + outlines + b"\n>>")
+        xref_at = self.position; size = self.next_obj
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % size + b"".join(b"%010d 00000 n \n" % self.offsets[n] for n in range(1, size)))
+        self._write(b"trailer\n<<\n/Size %d\n/Root %d 0 R\n>>\nstartxref\n%d\n%%%%EOF\n" % (size, self.CATALOG_OBJ, xref_at))
+
+
+def _render_index_pdf(title: str, entries: List[RosterEntry], index_pages: int) -> bytes:
+    """The roster's summary pages; page numbers count the index pages themselves."""
+    from pdf_utils import (MMCharSheetPDF, FONT_FAMILY_HEADER, FONT_FAMILY_MAIN, FONT_BOLD, FONT_ITALIC, FONT_REGULAR,
+                           LEFT_MARGIN, TOP_MARGIN, EFFECTIVE_PAGE_WIDTH, LINE_HEIGHT_LARGE, SECTION_TITLE_HEIGHT)
+    pdf = MMCharSheetPDF('P', 'mm', 'Letter'); pdf.alias_nb_pages(); pdf.set_auto_page_break(False)
+    col_widths = [EFFECTIVE_PAGE_WIDTH * w for w in (0.08, 0.50, 0.10, 0.17, 0.15)]
+    header = ["#", "Character", "PL", "PP", "Page"]
+    for page_start in range(0, max(len(entries), 1), ROSTER_INDEX_ROWS_PER_PAGE):
+        pdf.add_page(); pdf.set_xy(LEFT_MARGIN, TOP_MARGIN)
+        pdf.set_font(FONT_FAMILY_HEADER, FONT_BOLD, 18); pdf.cell(EFFECTIVE_PAGE_WIDTH, 10, title, 0, 1, 'L')
+        pdf.set_font(FONT_FAMILY_MAIN, FONT_ITALIC, 8); pdf.cell(EFFECTIVE_PAGE_WIDTH, 5, f"{len(entries)} characters", 0, 1, 'L')
+        pdf.set_x(LEFT_MARGIN); pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 9); pdf.set_fill_color(220, 220, 220)
+        for i, h_text in enumerate(header): pdf.cell(col_widths[i], SECTION_TITLE_HEIGHT, h_text, border=1, fill=True, ln=0 if i < len(header) - 1 else 1, align='C')
+        for entry in entries[page_start:page_start + ROSTER_INDEX_ROWS_PER_PAGE]:
+            first_page = f"{entry['first_page'] + index_pages}" if entry['first_page'] is not None else "Render failed"
+            row = [str(entry['index'] + 1), str(entry['name']), str(entry['powerLevel'] if entry['powerLevel'] is not None else ""),
+                   f"{entry['spentPowerPoints']}/{entry['totalPowerPoints']}" if entry['totalPowerPoints'] is not None else "", first_page]
+            pdf.set_x(LEFT_MARGIN); pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 9)
+            for i, cell_text in enumerate(row):
+                pdf.cell(col_widths[i], LINE_HEIGHT_LARGE, cell_text[:60], border=1, ln=0 if i < len(row) - 1 else 1, align='L' if i == 1 else 'C')
+    return bytes(pdf.output())
+
+
+def generate_fpdf_roster(character_states: Iterable['CharacterState'], rule_data: 'RuleData', engine: 'CoreEngine', output: Union[str, BinaryIO],
+                         workers: Optional[int] = None, chunksize: int = 1, title: str = "Roster", cache: Optional['PdfCache'] = None) -> List[RosterEntry]:
+    """
+    Renders every character to one roster PDF written to `output` (a path or binary stream); see the module docstring.
+    `workers` defaults to the CPU count; 1 renders in this process. Returns one RosterEntry per character, in input order.
+    """
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    own_file = isinstance(output, str); out: BinaryIO = open(output, 'wb') if own_file else output # type: ignore[assignment]
+    try:
+        writer = _PdfConcatWriter(out); entries: List[RosterEntry] = []; sheet_kids: List[int] = []; bookmarks: List[Tuple[str, int]] = []
+        for index, pdf_bytes, error in _render_in_order(engine, character_states, entries, workers, chunksize, cache):
+            entry = entries[index]
+            if pdf_bytes is None: entry['error'] = error; continue
+            page_objs = writer.append_document(pdf_bytes)
+            entry.update(first_page=len(sheet_kids) + 1, pages=len(page_objs))
+            bookmarks.append((str(entry['name']), page_objs[0])); sheet_kids.extend(page_objs)
+        index_pages = math.ceil(max(len(entries), 1) / ROSTER_INDEX_ROWS_PER_PAGE)
+        index_kids = writer.append_document(_render_index_pdf(title, entries, index_pages))
+        writer.finish(index_kids + sheet_kids, [("Roster Index", index_kids[0])] + bookmarks)
+        for entry in entries:
+            if entry['first_page'] is not None: entry['first_page'] += len(index_kids)
+    finally:
+        if own_file: out.close()
+    return entries
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from bulk_import import iter_character_records, prepare_character
+    from core_engine import CoreEngine
+
+    parser = argparse.ArgumentParser(description="Render a folder or archive of HeroForge characters into one roster PDF.")
+    parser.add_argument('paths', nargs='+', help="Character .json files, .jsonl archives or directories.")
+    parser.add_argument('--output', required=True, help="Roster PDF path.")
+    parser.add_argument('--title', default="Roster")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count; 1 = in-process).")
+    parser.add_argument('--rules', default="rules", help="Rule JSON directory.")
+    args = parser.parse_args()
+
+    cli_engine = CoreEngine(rule_dir=args.rules); skipped: List[str] = []
+    def loaded_states() -> Iterator['CharacterState']:
+        for record in iter_character_records(args.paths):
+            try:
+                if record['error'] is not None: raise ValueError(record['error'])
+                yield prepare_character(cli_engine, record['data'])
+            except ValueError as e: skipped.append(f"{record['source']}: {e}")
+
+    roster_entries = generate_fpdf_roster(loaded_states(), cli_engine.rule_data, cli_engine, args.output, workers=args.workers, title=args.title)
+    failed = [entry for entry in roster_entries if entry['error']]
+    for message in skipped + [f"{entry['name']}: {entry['error']}" for entry in failed]: print(message, file=sys.stderr)
+    print(f"{len(roster_entries) - len(failed)} of {len(roster_entries)} characters rendered to {args.output}", file=sys.stderr)
+    sys.exit(1 if failed or skipped else 0)
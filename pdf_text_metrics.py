@@ -0,0 +1,115 @@
+# pdf_text_metrics.py for HeroForge M&M (Streamlit Edition)
+# Cached glyph width tables and memoized text measurement/wrapping for the FPDF sheet renderers.
+
+"""
+fpdf2 measures text glyph by glyph on every get_string_width and re-runs its line breaker on
+every multi_cell, even for strings a sheet repeats dozens of times (modifier names, "Effect: ...",
+section headings). The renderers in pdf_utils measure and wrap through this module instead:
+
+    string_width(pdf, text)        # == pdf.get_string_width(text) for the current font
+    wrap_text(pdf, width, text)    # lines of a multi_cell(width, ...) of `text`
+    multi_cell(pdf, width, line_height, text, align='L')
+
+For the core fonts, a width table per (font, size) is built once per process from fpdf2's
+character widths, already scaled to mm. Widths and wraps are memoized per (font, size, text)
+and (font, size, width, text). multi_cell() draws the pre-wrapped lines with plain cells and
+leaves the position where fpdf2's multi_cell would. On a PDF with `measuring = True` (the
+layout's dry run) it only advances the position. Other fonts fall back to fpdf2's own
+measurement, which is slower but equivalent.
+"""
+
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+from fpdf.fonts import CORE_FONTS_CHARWIDTHS
+
+WrappedLines = Tuple[str, ...]
+
+CORE_FONT_SUBSTITUTIONS = str.maketrans({'•': '·', '–': '-', '—': '-', '‘': "'", '’': "'", '“': '"', '”': '"', '…': '...'})
+WRAP_TOLERANCE = 1e-9 # mm; rounding slack when a line fills the width exactly
+TEXT_CACHE_SIZE = 16384
+
+
+def to_core_font_text(text: str) -> str:
+    """Text as the latin-1 core fonts can show it: common typography mapped, anything else '?'."""
+    return text.translate(CORE_FONT_SUBSTITUTIONS).encode('latin-1', 'replace').decode('latin-1')
+
+
+@lru_cache(maxsize=None)
+def glyph_widths(fontkey: str, size_pt: float, scale: float) -> Dict[str, float]:
+    """Width in mm (user units) of every glyph of a core font at one size; `scale` is the PDF's points per unit."""
+    factor = size_pt * 0.001 / scale
+    return {char: width * factor for char, width in CORE_FONTS_CHARWIDTHS[fontkey].items()}
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _core_string_width(fontkey: str, size_pt: float, scale: float, text: str) -> float:
+    widths = glyph_widths(fontkey, size_pt, scale); fallback = widths['?']
+    return sum(widths.get(char, fallback) for char in to_core_font_text(text))
+
+
+def _is_core_font(pdf: FPDF) -> bool:
+    return getattr(pdf.current_font, 'type', None) == 'core'
+
+
+def string_width(pdf: FPDF, text: str) -> float:
+    if not _is_core_font(pdf): return pdf.get_string_width(text)
+    return _core_string_width(pdf.current_font.fontkey, pdf.font_size_pt, pdf.k, text)
+
+
+def _break_word(word: str, widths: Dict[str, float], fallback: float, max_width: float) -> Tuple[WrappedLines, str]:
+    """Splits a word wider than a line into full-width pieces; returns (full pieces, remainder)."""
+    pieces = []; piece = ""; piece_w = 0.0
+    for char in word:
+        char_w = widths.get(char, fallback)
+        if piece and piece_w + char_w > max_width + WRAP_TOLERANCE: pieces.append(piece); piece = ""; piece_w = 0.0
+        piece += char; piece_w += char_w
+    return tuple(pieces), piece
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _core_wrap(fontkey: str, size_pt: float, scale: float, max_width: float, text: str) -> WrappedLines:
+    widths = glyph_widths(fontkey, size_pt, scale); fallback = widths['?']; space_w = widths[' ']
+    lines = []
+    for paragraph in to_core_font_text(text).split('\n'):
+        line = None; line_w = 0.0 # None until the paragraph's first word, so leading spaces survive
+        for word in paragraph.split(' '):
+            word_w = sum(widths.get(char, fallback) for char in word)
+            if line is not None and line_w + space_w + word_w <= max_width + WRAP_TOLERANCE:
+                line += ' ' + word; line_w += space_w + word_w; continue
+            if line is not None: lines.append(line)
+            if word_w > max_width + WRAP_TOLERANCE:
+                pieces, word = _break_word(word, widths, fallback, max_width); lines.extend(pieces)
+                word_w = sum(widths.get(char, fallback) for char in word)
+            line, line_w = word, word_w
+        lines.append(line)
+    if len(lines) > 1 and not lines[-1]: lines.pop() # Like fpdf2, a trailing newline or overflowing space adds no line
+    return tuple(lines)
+
+
+def wrap_text(pdf: FPDF, width: float, text: str) -> WrappedLines:
+    """The lines a multi_cell of `width` shows `text` in (inner width excludes the cell margins)."""
+    if not _is_core_font(pdf): return tuple(pdf.multi_cell(width, text=text, border=0, dry_run=True, output="LINES"))
+    return _core_wrap(pdf.current_font.fontkey, pdf.font_size_pt, pdf.k, width - 2 * pdf.c_margin, text)
+
+
+def multi_cell(pdf: FPDF, width: float, line_height: float, text: str, align: str = 'L') -> float:
+    """
+    Borderless multi_cell from pre-wrapped lines. Like fpdf2's default it leaves x right of the
+    cell and y below it; returns that y.
+    """
+    x, y = pdf.get_x(), pdf.get_y(); lines = wrap_text(pdf, width, text)
+    if not getattr(pdf, 'measuring', False):
+        for i, line in enumerate(lines):
+            pdf.set_xy(x, y + i * line_height)
+            pdf.cell(width, line_height, line, border=0, align=align, new_x=XPos.RIGHT, new_y=YPos.TOP)
+    pdf.set_xy(x + width, y + len(lines) * line_height)
+    return pdf.get_y()
+
+
+def cache_info() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counts of the memoized widths, wraps and glyph tables."""
+    return {name: func.cache_info()._asdict() for name, func in
+            (('string_width', _core_string_width), ('wrap', _core_wrap), ('glyph_tables', glyph_widths))}
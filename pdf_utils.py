@@ -6,10 +6,13 @@ from typing import Dict, List, Any, Optional, TYPE_CHECKING, Callable, Tuple
 
 from fpdf import FPDF # Main FPDF import
 
+from pdf_text_metrics import multi_cell, string_width, to_core_font_text, wrap_text # Cached measurement (see pdf_text_metrics.py)
+
 if TYPE_CHECKING:
     from core_engine import CoreEngine, CharacterState, RuleData, PowerDefinition, AdvantageDefinition, SkillRule, AllyDefinition, HQDefinition, VehicleDefinition
 
 # --- Constants for PDF Layout (Letter size: 215.9mm x 279.4mm) ---
+PDF_LAYOUT_VERSION = 7 # Bump whenever a renderer changes its output; part of the rendered-PDF cache key (pdf_cache.py)
 PAGE_WIDTH = 215.9
 PAGE_HEIGHT = 279.4
 LEFT_MARGIN = 10 
@@ -24,8 +27,8 @@ COLUMN_GAP = 4 # mm
 COLUMN_WIDTH = (EFFECTIVE_PAGE_WIDTH - (COLUMN_GAP * (COLUMN_COUNT - 1))) / COLUMN_COUNT
 
 # Font settings
-FONT_FAMILY_MAIN = 'Arial' 
-FONT_FAMILY_HEADER = 'Arial' 
+FONT_FAMILY_MAIN = 'Helvetica' # Core font; 'Arial' is only a deprecated alias of it in fpdf2
+FONT_FAMILY_HEADER = 'Helvetica'
 FONT_BOLD = 'B'
 FONT_ITALIC = 'I'
 FONT_REGULAR = ''
@@ -55,6 +58,11 @@ class MMCharSheetPDF(FPDF):
         self.cell(0, 10, f'Page {self.page_no()}/{{nb}}', 0, 0, 'C')
         self.set_text_color(0,0,0) # Reset text color
 
+    def normalize_text(self, text):
+        # Core fonts (Arial/Helvetica) only cover latin-1: map common typography, replace the rest with '?'
+        if not self.is_ttf_font: text = to_core_font_text(text)
+        return super().normalize_text(text)
+
 # --- Text Formatting Helpers ---
 def _format_fpdf_text(text: Optional[Any]) -> str:
     if text is None: return ""
@@ -122,7 +130,8 @@ def _render_subsection_title(pdf: FPDF, title: str, x: float, y: float, width: f
 
 
 def _check_y_add_page(pdf: FPDF, current_y: float, needed_height: float) -> float:
-    """Checks if content fits, adds new page and resets Y if not. Returns new Y."""
+    """Checks if content fits, adds new page and resets Y if not. Returns new Y. A no-op under the measured layout, which places every block itself."""
+    if getattr(pdf, 'layout_managed', False): return current_y
     if current_y + needed_height > (PAGE_HEIGHT - BOTTOM_MARGIN):
         pdf.add_page()
         return TOP_MARGIN 
@@ -133,7 +142,7 @@ def _render_header_fpdf(pdf: FPDF, char_state: 'CharacterState', start_x: float,
     pdf.set_xy(start_x, current_y)
     pdf.set_font(FONT_FAMILY_HEADER, FONT_BOLD, 18)
     char_name = _format_fpdf_text(char_state.get('name', 'Unnamed Hero'))
-    pdf.multi_cell(width, 8, char_name, 0, 'L')
+    multi_cell(pdf, width, 8, char_name)
     current_y = pdf.get_y() + 1 # Space after name
 
     item_h = LINE_HEIGHT_SMALL
@@ -158,7 +167,7 @@ def _render_header_fpdf(pdf: FPDF, char_state: 'CharacterState', start_x: float,
         pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 7)
         pdf.cell(label_w, item_h, _format_fpdf_text(label) + ":", 0, 0, 'L')
         pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 8)
-        pdf.multi_cell(value_w, item_h, _format_fpdf_text(value), 0, 'L')
+        multi_cell(pdf, value_w, item_h, _format_fpdf_text(value))
         y_col1 = pdf.get_y() if pdf.get_y() > y_col1 + item_h else y_col1 + item_h + 0.5
 
     for label, value in info_pairs_col2:
@@ -166,7 +175,7 @@ def _render_header_fpdf(pdf: FPDF, char_state: 'CharacterState', start_x: float,
         pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 7)
         pdf.cell(label_w, item_h, _format_fpdf_text(label) + ":", 0, 0, 'L')
         pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 8)
-        pdf.multi_cell(value_w, item_h, _format_fpdf_text(value), 0, 'L')
+        multi_cell(pdf, value_w, item_h, _format_fpdf_text(value))
         y_col2 = pdf.get_y() if pdf.get_y() > y_col2 + item_h else y_col2 + item_h + 0.5
         
     current_y = max(y_col1, y_col2) 
@@ -180,7 +189,7 @@ def _render_header_fpdf(pdf: FPDF, char_state: 'CharacterState', start_x: float,
             pdf.cell(width, item_h, title + ":", 0, 1, 'L')
             pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 8)
             pdf.set_x(start_x)
-            pdf.multi_cell(width, LINE_HEIGHT_SMALL, content, 0, 'L')
+            multi_cell(pdf, width, LINE_HEIGHT_SMALL, content)
             current_y = pdf.get_y() + 1
     
     pdf.set_draw_color(50, 50, 50); pdf.set_line_width(0.5)
@@ -189,7 +198,7 @@ def _render_header_fpdf(pdf: FPDF, char_state: 'CharacterState', start_x: float,
 
 def _render_abilities_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
     current_y = _render_section_title(pdf, "Abilities", x, y, width)
-    abilities = char_state.get('abilities', {}); ability_rules = rule_data.get('abilities', {}).get('list', [])
+    ability_summary = engine.get_trait_summary(char_state)['abilities']; ability_rules = rule_data.get('abilities', {}).get('list', [])
     item_h = LINE_HEIGHT_NORMAL; num_ability_cols = 2
     inner_col_width = (width - (num_ability_cols - 1) * 2) / num_ability_cols
     y_col_tracks = [current_y] * num_ability_cols
@@ -202,48 +211,36 @@ def _render_abilities_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: '
         pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 8)
         pdf.cell(18, item_h, _format_fpdf_text(ab_rule['name'][:3].upper()) + ":", 0, 0) # Abbreviate
         pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 9)
-        ab_rank = abilities.get(ab_rule['id'], 0)
-        pdf.cell(10, item_h, str(ab_rank), 0, 0, 'C')
+        ability = ability_summary.get(ab_rule['id'], {'rank': 0, 'modifier': engine.get_ability_modifier(0)})
+        pdf.cell(10, item_h, str(ability['rank']), 0, 0, 'C')
         pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 8)
-        ab_mod = engine.get_ability_modifier(ab_rank)
+        ab_mod = ability['modifier']
         pdf.cell(10, item_h, f"({ab_mod:+})", 0, 0)
         y_col_tracks[col_idx] += item_h
     return max(y_col_tracks) + SECTION_BOTTOM_PADDING
 
 def _render_defenses_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
     current_y = _render_section_title(pdf, "Defenses", x, y, width)
-    defense_order = ["Dodge", "Parry", "Toughness", "Fortitude", "Will"]
-    base_ability_map = {"Dodge": "AGL", "Parry": "FGT", "Toughness": "STA", "Fortitude": "STA", "Will": "AWE"}
+    defenses = engine.get_trait_summary(char_state)['defenses']; source_labels = {"Defensive Roll": "D.Roll"}
     item_h = LINE_HEIGHT_SMALL; label_w = 22; total_w = 12; detail_w = width - label_w - total_w - 2
 
-    for def_id in defense_order:
+    for def_id, defense in defenses.items():
         current_y = _check_y_add_page(pdf, current_y, item_h)
         pdf.set_xy(x, current_y)
-        base_ab_id = base_ability_map[def_id]
-        total_val = engine.get_total_defense(char_state, def_id, base_ab_id)
-        base_from_ab = engine.get_ability_modifier(char_state.get('abilities', {}).get(base_ab_id, 0))
-        bought = char_state.get('defenses', {}).get(def_id, 0)
-        details_parts = [f"Base {base_from_ab}", f"Bought {bought}"]
-        if def_id == "Toughness" and char_state.get('derived_defensive_roll_bonus', 0) > 0:
-            details_parts.append(f"D.Roll +{char_state['derived_defensive_roll_bonus']}")
+        details_parts = [f"Base {defense['base']}", f"Bought {defense['bought']}"]
+        details_parts += [f"{source_labels.get(source, source)} +{bonus}" for source, bonus in defense['sources'].items() if bonus > 0]
         
         pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 8)
         pdf.cell(label_w, item_h, _format_fpdf_text(def_id) + ":", 0, 0)
         pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 9.5)
-        pdf.cell(total_w, item_h, str(total_val), 0, 0, 'C')
+        pdf.cell(total_w, item_h, str(defense['total']), 0, 0, 'C')
         pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 7)
-        pdf.multi_cell(detail_w, item_h, "(" + ", ".join(details_parts) + ")", 0, 'L')
+        multi_cell(pdf, detail_w, item_h, "(" + ", ".join(details_parts) + ")")
         current_y = pdf.get_y() if pdf.get_y() > current_y + item_h else current_y + item_h
 
     current_y += ITEM_SPACING; pdf.set_font(FONT_FAMILY_MAIN, FONT_ITALIC, 7)
     pl = char_state.get('powerLevel', 10); pl_cap_paired = pl * 2
-    totals = {
-        'Dodge': engine.get_total_defense(char_state, 'Dodge', 'AGL'),
-        'Parry': engine.get_total_defense(char_state, 'Parry', 'FGT'),
-        'Toughness': engine.get_total_defense(char_state, 'Toughness', 'STA'),
-        'Fortitude': engine.get_total_defense(char_state, 'Fortitude', 'STA'),
-        'Will': engine.get_total_defense(char_state, 'Will', 'AWE')
-    }
+    totals = {def_id: defense['total'] for def_id, defense in defenses.items()}
     cap_checks = [
         (f"Dodge ({totals['Dodge']}) + Toughness ({totals['Toughness']})", totals['Dodge'] + totals['Toughness']),
         (f"Parry ({totals['Parry']}) + Toughness ({totals['Toughness']})", totals['Parry'] + totals['Toughness']),
@@ -255,12 +252,32 @@ def _render_defenses_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'R
         is_over_cap = val > pl_cap_paired
         original_text_color = pdf.text_color
         if is_over_cap: pdf.set_text_color(180, 0, 0)
-        pdf.multi_cell(width, LINE_HEIGHT_VSMALL, f"{label} = {val} / {pl_cap_paired}", 0, "L")
-        if is_over_cap: pdf.set_text_color(original_text_color.r, original_text_color.g, original_text_color.b)
+        multi_cell(pdf, width, LINE_HEIGHT_VSMALL, f"{label} = {val} / {pl_cap_paired}")
+        if is_over_cap: pdf.set_text_color(original_text_color)
         current_y = pdf.get_y()
     return current_y + SECTION_BOTTOM_PADDING
 
-def _render_combat_summary_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
+COMBAT_TABLE_HEADER = ["Attack/Effect", "Bonus", "Effect (Rk)", "Range", "Resist (DC)"]
+COMBAT_TABLE_COLUMN_FRACTIONS = (0.30, 0.12, 0.18, 0.20, 0.20)
+
+def _combat_attack_rows(char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine') -> List[Tuple[Any, ...]]:
+    """(name, bonus, effect, range, resistance) for every attack power, plus the unarmed strike."""
+    attacks_data = []; summary = engine.get_trait_summary(char_state); powers = char_state.get('powers', [])
+    for attack in summary['attacks']:
+        pwr = powers[attack['index']]
+        atk_bonus_str = "N/A" if attack['attack_type'] in ['area', 'perception'] else f"{attack['bonus']:+}"
+        base_effect_rule = next((e for e in rule_data.get('power_effects', []) if e['id'] == pwr.get('baseEffectId')), None)
+        effect_name = base_effect_rule['name'] if base_effect_rule else pwr.get('baseEffectId','Unk')
+        res_details = pwr.get('resistance_dc_details', {}); res_str = f"{res_details.get('dc_type','')} DC {res_details.get('dc','')}"
+        if res_details.get('dodge_dc_for_half'): res_str += f" (Dodge {res_details['dodge_dc_for_half']})"
+        attacks_data.append((pwr.get('name', 'Unnamed'), atk_bonus_str,f"{effect_name} {pwr.get('rank',0)}",pwr.get('final_range', 'N/A'), res_str))
+    
+    unarmed = summary['unarmed_attack']; str_rank = unarmed['damage_rank']
+    attacks_data.append(("Unarmed Strike", f"{unarmed['bonus']:+}", f"Damage {str_rank}", "Close", f"Toughness DC {15 + str_rank}"))
+    return attacks_data
+
+def _render_combat_header_fpdf(pdf: FPDF, char_state: 'CharacterState', x: float, y: float, width: float) -> float:
+    """Combat title, initiative and the attack table's header row."""
     current_y = _render_section_title(pdf, "Combat", x, y, width)
     pdf.set_xy(x, current_y); pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 8.5)
     pdf.cell(25, LINE_HEIGHT_NORMAL, "Initiative:", 0, 0)
@@ -268,66 +285,44 @@ def _render_combat_summary_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_da
     pdf.cell(0, LINE_HEIGHT_NORMAL, f"{char_state.get('derived_initiative', 0):+}", 0, 1); current_y = pdf.get_y()
 
     current_y = _render_subsection_title(pdf, "Attacks / Effects", x, current_y + ITEM_SPACING, width)
-    header = ["Attack/Effect", "Bonus", "Effect (Rk)", "Range", "Resist (DC)"]
-    col_widths_abs = [width * 0.30, width * 0.12, width * 0.18, width * 0.20, width * 0.20]
+    col_widths_abs = [width * fraction for fraction in COMBAT_TABLE_COLUMN_FRACTIONS]
     pdf.set_xy(x, current_y); pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 6.5); pdf.set_fill_color(235,235,235)
-    for i, h_text in enumerate(header):
-        pdf.cell(col_widths_abs[i], LINE_HEIGHT_SMALL, h_text, border=1, fill=True, ln=0 if i < len(header)-1 else 1, align='C')
-    current_y = pdf.get_y()
-
-    attacks_data = [] # Populate this list as before
-    for pwr in char_state.get('powers', []):
-        if pwr.get('isAttack'):
-            atk_bonus = engine.get_attack_bonus_for_power(pwr, char_state)
-            atk_bonus_str = "N/A" if pwr.get('attackType') in ['area', 'perception'] else f"{atk_bonus:+}"
-            base_effect_rule = next((e for e in rule_data.get('power_effects', []) if e['id'] == pwr.get('baseEffectId')), None)
-            effect_name = base_effect_rule['name'] if base_effect_rule else pwr.get('baseEffectId','Unk')
-            res_details = pwr.get('resistance_dc_details', {}); res_str = f"{res_details.get('dc_type','')} DC {res_details.get('dc','')}"
-            if res_details.get('dodge_dc_for_half'): res_str += f" (Dodge {res_details['dodge_dc_for_half']})"
-            attacks_data.append((pwr.get('name', 'Unnamed'), atk_bonus_str,f"{effect_name} {pwr.get('rank',0)}",pwr.get('final_range', 'N/A'), res_str))
+    for i, h_text in enumerate(COMBAT_TABLE_HEADER):
+        pdf.cell(col_widths_abs[i], LINE_HEIGHT_SMALL, h_text, border=1, fill=True, ln=0 if i < len(COMBAT_TABLE_HEADER)-1 else 1, align='C')
+    return pdf.get_y()
+
+def _render_combat_row_fpdf(pdf: FPDF, row_data: Tuple[Any, ...], x: float, y: float, width: float) -> float:
+    col_widths_abs = [width * fraction for fraction in COMBAT_TABLE_COLUMN_FRACTIONS]
+    max_h = LINE_HEIGHT_VSMALL * 1.2 # Min height for a row
+    for i, cell_text_any in enumerate(row_data): # Pre-calculate height
+        cell_text = _format_fpdf_text(cell_text_any)
+        pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD if i==0 else FONT_REGULAR, 7)
+        max_h = max(max_h, len(wrap_text(pdf, col_widths_abs[i], cell_text)) * LINE_HEIGHT_VSMALL)
     
-    fgt_mod = engine.get_ability_modifier(char_state.get('abilities',{}).get('FGT',0))
-    base_close_atk_bonus = fgt_mod + sum(adv.get('rank',0) for adv in char_state.get('advantages',[]) if adv.get('id') == 'adv_close_attack')
-    unarmed_skill_id = next((sid for sid in char_state.get('skills',{}) if sid.startswith("skill_close_combat_unarmed")), "skill_close_combat_unarmed")
-    unarmed_skill_ranks = char_state.get('skills',{}).get(unarmed_skill_id,0)
-    unarmed_total_bonus = base_close_atk_bonus + unarmed_skill_ranks; str_rank = char_state.get('abilities',{}).get('STR',0); unarmed_dc = 15 + str_rank
-    attacks_data.append(("Unarmed Strike", f"{unarmed_total_bonus:+}", f"Damage {str_rank}", "Close", f"Toughness DC {unarmed_dc}"))
-
-    for row_data in attacks_data:
-        max_h = LINE_HEIGHT_VSMALL * 1.2 # Min height for a row
-        temp_y = current_y
-        for i, cell_text_any in enumerate(row_data): # Pre-calculate height
-            cell_text = _format_fpdf_text(cell_text_any)
-            pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD if i==0 else FONT_REGULAR, 7)
-            lines = pdf.multi_cell(col_widths_abs[i] - 1, LINE_HEIGHT_VSMALL, cell_text, border=0, align='L', split_only=True)
-            max_h = max(max_h, len(lines) * LINE_HEIGHT_VSMALL)
-        
-        current_y = _check_y_add_page(pdf, current_y, max_h)
-        pdf.set_xy(x, current_y)
-        for i, cell_text_any in enumerate(row_data):
-            cell_text = _format_fpdf_text(cell_text_any)
-            align = 'C' if i == 1 else 'L'; font_style = FONT_BOLD if i == 0 else FONT_REGULAR
-            pdf.set_font(FONT_FAMILY_MAIN, font_style, 7)
-            pdf.multi_cell(col_widths_abs[i], max_h, cell_text, border=1, align=align, new_x="RIGHT", new_y="TOP", max_line_height=LINE_HEIGHT_VSMALL)
-        pdf.ln(max_h); current_y = pdf.get_y()
+    current_y = _check_y_add_page(pdf, y, max_h)
+    cell_x = x
+    for i, cell_text_any in enumerate(row_data):
+        cell_text = _format_fpdf_text(cell_text_any)
+        align = 'C' if i == 1 else 'L'; font_style = FONT_BOLD if i == 0 else FONT_REGULAR
+        pdf.set_font(FONT_FAMILY_MAIN, font_style, 7)
+        pdf.rect(cell_x, current_y, col_widths_abs[i], max_h) # Bordered cell, text top-aligned as multi_cell(max_line_height=...) drew it
+        pdf.set_xy(cell_x, current_y); multi_cell(pdf, col_widths_abs[i], LINE_HEIGHT_VSMALL, cell_text, align=align); cell_x += col_widths_abs[i]
+    pdf.set_xy(x, current_y + max_h) # ln() would return to the page margin rather than this column
+    return pdf.get_y()
+
+def _render_combat_summary_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
+    current_y = _render_combat_header_fpdf(pdf, char_state, x, y, width)
+    for row_data in _combat_attack_rows(char_state, rule_data, engine): current_y = _render_combat_row_fpdf(pdf, row_data, x, current_y, width)
     return current_y + SECTION_BOTTOM_PADDING
 
 def _render_skills_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
     current_y = _render_section_title(pdf, "Skills", x, y, width)
-    skills_state = char_state.get('skills', {}); abilities = char_state.get('abilities', {})
-    all_skill_rules = rule_data.get('skills', {}).get('list', [])
     pl = char_state.get('powerLevel', 10); skill_bonus_cap = pl + 10
     item_h = LINE_HEIGHT_SMALL; skill_entries = []
     
-    sorted_skill_ids = sorted(skills_state.keys(), key=lambda skill_id: engine.get_skill_name_by_id(skill_id, all_skill_rules))
-    for skill_id in sorted_skill_ids:
-        rank = skills_state[skill_id]
-        if rank <= 0: continue
-        skill_rule = engine.get_skill_rule(skill_id); skill_name_display = engine.get_skill_name_by_id(skill_id, all_skill_rules)
-        gov_ab_id = skill_rule.get('ability', 'N/A') if skill_rule else 'N/A'
-        ability_mod = engine.get_ability_modifier(abilities.get(gov_ab_id, 0))
-        total_bonus = ability_mod + rank; is_capped = total_bonus > skill_bonus_cap
-        skill_entries.append({"name": skill_name_display, "ab": gov_ab_id, "bonus": total_bonus, "rank": rank, "capped": is_capped})
+    for skill in sorted(engine.get_trait_summary(char_state)['skills'].values(), key=lambda skill: skill['name']):
+        if skill['ranks'] <= 0: continue
+        skill_entries.append({"name": skill['name'], "ab": skill['ability'] or 'N/A', "bonus": skill['bonus'], "rank": skill['ranks'], "capped": skill['bonus'] > skill_bonus_cap})
 
     if not skill_entries:
         pdf.set_xy(x,current_y);pdf.set_font(FONT_FAMILY_MAIN,FONT_ITALIC,8);pdf.cell(width,item_h,"No skills with ranks.",0,1)
@@ -349,7 +344,7 @@ def _render_skills_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'Rul
         rank_str = f"(Rk:{entry['rank']})"
         if entry['capped']: original_text_color = pdf.text_color; pdf.set_text_color(180,0,0); rank_str += "!"
         pdf.cell(inner_skill_col_width * 0.25, item_h, rank_str, 0, 0, 'L')
-        if entry['capped']: pdf.set_text_color(original_text_color.r,original_text_color.g,original_text_color.b)
+        if entry['capped']: pdf.set_text_color(original_text_color)
         y_col_tracks_skill[col_idx] += item_h
     return max(y_col_tracks_skill) + SECTION_BOTTOM_PADDING
 
@@ -380,118 +375,201 @@ def _render_advantages_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data:
 
     for i, adv_text in enumerate(adv_strings):
         col_idx = i % num_adv_cols; current_x_adv = x + col_idx * (inner_adv_col_width + 2)
-        lines = pdf.multi_cell(inner_adv_col_width - 3, LINE_HEIGHT_VSMALL, adv_text, border=0, align='L', split_only=True)
+        lines = wrap_text(pdf, inner_adv_col_width - 3, adv_text)
         needed_h = len(lines) * LINE_HEIGHT_VSMALL + ITEM_SPACING / 2
         y_col_tracks_adv[col_idx] = _check_y_add_page(pdf, y_col_tracks_adv[col_idx], needed_h)
         pdf.set_xy(current_x_adv, y_col_tracks_adv[col_idx])
         pdf.cell(3, LINE_HEIGHT_VSMALL * len(lines), "\u2022",0,0)
         pdf.set_x(current_x_adv + 3)
-        pdf.multi_cell(inner_adv_col_width - 3, LINE_HEIGHT_VSMALL, adv_text, 0, 'L')
+        multi_cell(pdf, inner_adv_col_width - 3, LINE_HEIGHT_VSMALL, adv_text)
         y_col_tracks_adv[col_idx] = pdf.get_y()
     return max(y_col_tracks_adv) + SECTION_BOTTOM_PADDING
 
 def _render_powers_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
     current_y = _render_section_title(pdf, "Powers & Devices", x, y, width)
-    all_mod_rules = rule_data.get('power_modifiers', [])
     powers: List[PowerDefinition] = char_state.get('powers', [])
     if not powers:
         pdf.set_xy(x,current_y);pdf.set_font(FONT_FAMILY_MAIN,FONT_ITALIC,8);pdf.cell(width,LINE_HEIGHT_NORMAL,"None",0,1)
         return pdf.get_y() + SECTION_BOTTOM_PADDING
 
     for pwr_idx, pwr in enumerate(powers):
-        current_y = _check_y_add_page(pdf, current_y, 20) # Min height for a power
-        
-        start_of_power_y = current_y
-        pdf.set_xy(x, current_y)
-        pdf.set_font(FONT_FAMILY_HEADER, FONT_BOLD, 9); pwr_name = _format_fpdf_text(pwr.get('name','Unnamed'))
-        pwr_rank_val = pwr.get('rank',0); pwr_cost = pwr.get('cost',0)
-        base_eff_rule = next((e for e in rule_data.get('power_effects',[]) if e['id'] == pwr.get('baseEffectId')),None)
-        rank_disp = f" [{pwr_rank_val}]" if pwr_rank_val > 0 or (base_eff_rule and not (base_eff_rule.get('isSenseContainer') or base_eff_rule.get('isImmunityContainer'))) else ""
-        name_rank_str = f"{pwr_name}{rank_disp}"; cost_str = f"({pwr_cost} PP)"
-        name_w = width - pdf.get_string_width(cost_str) - 2
-        pdf.cell(name_w, SUBSECTION_TITLE_HEIGHT, name_rank_str, "B" if pwr_idx < len(powers)-1 else 0, 0, 'L') # Bottom border except last
-        pdf.set_font(FONT_FAMILY_MAIN, FONT_ITALIC, 7.5)
-        pdf.cell(pdf.get_string_width(cost_str)+2, SUBSECTION_TITLE_HEIGHT, cost_str, "B" if pwr_idx < len(powers)-1 else 0, 1, 'R')
-        current_y = pdf.get_y()
+        current_y = _render_power_entry_fpdf(pdf, pwr, pwr_idx, char_state, rule_data, engine, x, current_y, width)
+    return current_y + SECTION_BOTTOM_PADDING
 
-        pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 7)
-        indent_x = x + 2; text_w = width - 4
-        
-        eff_name = base_eff_rule['name'] if base_eff_rule else pwr.get('baseEffectId','N/A')
-        pdf.set_x(indent_x); pdf.multi_cell(text_w, LINE_HEIGHT_VSMALL, f"Effect: {_format_fpdf_text(eff_name)}",0,'L'); current_y = pdf.get_y()
-        if pwr.get('descriptors'):
-            pdf.set_x(indent_x); pdf.multi_cell(text_w, LINE_HEIGHT_VSMALL, f"Descriptors: {_format_fpdf_text(pwr['descriptors'])}",0,'L'); current_y = pdf.get_y()
-        
-        details_lines = []
-        if pwr.get('final_range'): details_lines.append(f"Range: {_format_fpdf_text(pwr['final_range'])}")
-        if pwr.get('final_duration'): details_lines.append(f"Duration: {_format_fpdf_text(pwr['final_duration'])}")
-        if pwr.get('final_action'): details_lines.append(f"Action: {_format_fpdf_text(pwr['final_action'])}")
-        if pwr.get('measurement_details_display'): details_lines.append(f"Details: {_format_fpdf_text(pwr['measurement_details_display'])}")
-        if details_lines:
-            pdf.set_x(indent_x); pdf.multi_cell(text_w, LINE_HEIGHT_VSMALL, " | ".join(details_lines),0,'L'); current_y = pdf.get_y()
-
-        if pwr.get('isAlternateEffectOf') or pwr.get('isArrayBase'): # Array Info
-            pdf.set_font(FONT_FAMILY_MAIN, FONT_ITALIC, 6.5)
-            if pwr.get('isAlternateEffectOf'):
-                base_p_name = next((p_b.get('name') for p_b in powers if p_b.get('id') == pwr['isAlternateEffectOf']), "Unk.Base")
-                ae_cost = "(+1 PP)" if not next((p_b.get('isDynamicArray') for p_b in powers if p_b.get('id') == pwr['isAlternateEffectOf']), False) else "(+2 PP)"
-                pdf.set_x(indent_x); pdf.multi_cell(text_w,LINE_HEIGHT_VSMALL,f"AE of: {_format_fpdf_text(base_p_name)} {ae_cost} (Array: {_format_fpdf_text(pwr.get('arrayId','N/A'))})",0,'L')
-            elif pwr.get('isArrayBase'):
-                arr_type = "Dynamic Array" if pwr.get('isDynamicArray') else "Static Array"
-                pdf.set_x(indent_x); pdf.multi_cell(text_w,LINE_HEIGHT_VSMALL,f"{arr_type} Base ({_format_fpdf_text(pwr.get('arrayId','N/A'))})",0,'L')
-            current_y = pdf.get_y(); pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 7) # Reset font
-
-        if pwr.get('modifiersConfig'):
+def _render_power_entry_fpdf(pdf: FPDF, pwr: 'PowerDefinition', pwr_idx: int, char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
+    """One power of the Powers & Devices section (name, cost, effect details, modifiers and sub-lists)."""
+    all_mod_rules = rule_data.get('power_modifiers', []); adv_rules_list = rule_data.get('advantages_v1', [])
+    powers: List[PowerDefinition] = char_state.get('powers', []); current_y = y
+    current_y = _check_y_add_page(pdf, current_y, 20) # Min height for a power
+    
+    start_of_power_y = current_y
+    pdf.set_xy(x, current_y)
+    pdf.set_font(FONT_FAMILY_HEADER, FONT_BOLD, 9); pwr_name = _format_fpdf_text(pwr.get('name','Unnamed'))
+    pwr_rank_val = pwr.get('rank',0); pwr_cost = pwr.get('cost',0)
+    base_eff_rule = next((e for e in rule_data.get('power_effects',[]) if e['id'] == pwr.get('baseEffectId')),None)
+    rank_disp = f" [{pwr_rank_val}]" if pwr_rank_val > 0 or (base_eff_rule and not (base_eff_rule.get('isSenseContainer') or base_eff_rule.get('isImmunityContainer'))) else ""
+    name_rank_str = f"{pwr_name}{rank_disp}"; cost_str = f"({pwr_cost} PP)"
+    name_w = width - string_width(pdf, cost_str) - 2
+    pdf.cell(name_w, SUBSECTION_TITLE_HEIGHT, name_rank_str, "B" if pwr_idx < len(powers)-1 else 0, 0, 'L') # Bottom border except last
+    pdf.set_font(FONT_FAMILY_MAIN, FONT_ITALIC, 7.5)
+    pdf.cell(string_width(pdf, cost_str)+2, SUBSECTION_TITLE_HEIGHT, cost_str, "B" if pwr_idx < len(powers)-1 else 0, 1, 'R')
+    current_y = pdf.get_y()
+
+    pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 7)
+    indent_x = x + 2; text_w = width - 4
+    
+    eff_name = base_eff_rule['name'] if base_eff_rule else pwr.get('baseEffectId','N/A')
+    pdf.set_x(indent_x); multi_cell(pdf, text_w, LINE_HEIGHT_VSMALL, f"Effect: {_format_fpdf_text(eff_name)}"); current_y = pdf.get_y()
+    if pwr.get('descriptors'):
+        pdf.set_x(indent_x); multi_cell(pdf, text_w, LINE_HEIGHT_VSMALL, f"Descriptors: {_format_fpdf_text(pwr['descriptors'])}"); current_y = pdf.get_y()
+    
+    details_lines = []
+    if pwr.get('final_range'): details_lines.append(f"Range: {_format_fpdf_text(pwr['final_range'])}")
+    if pwr.get('final_duration'): details_lines.append(f"Duration: {_format_fpdf_text(pwr['final_duration'])}")
+    if pwr.get('final_action'): details_lines.append(f"Action: {_format_fpdf_text(pwr['final_action'])}")
+    if pwr.get('measurement_details_display'): details_lines.append(f"Details: {_format_fpdf_text(pwr['measurement_details_display'])}")
+    if details_lines:
+        pdf.set_x(indent_x); multi_cell(pdf, text_w, LINE_HEIGHT_VSMALL, " | ".join(details_lines)); current_y = pdf.get_y()
+
+    if pwr.get('isAlternateEffectOf') or pwr.get('isArrayBase'): # Array Info
+        pdf.set_font(FONT_FAMILY_MAIN, FONT_ITALIC, 6.5)
+        power_array = engine.get_power_arrays(char_state).get(pwr.get('arrayId')) if pwr.get('arrayId') else None
+        if pwr.get('isAlternateEffectOf'):
+            if power_array is not None and pwr_idx in power_array['alternate_effects']: base_p_name = power_array['base_name']; ae_cost = f"(+{power_array['ae_cost']} PP)"
+            else: base_p_name = "Unk.Base"; ae_cost = "(full cost)" # Not linked to the base of its array
+            pdf.set_x(indent_x); multi_cell(pdf, text_w,LINE_HEIGHT_VSMALL,f"AE of: {_format_fpdf_text(base_p_name)} {ae_cost} (Array: {_format_fpdf_text(pwr.get('arrayId','N/A'))})")
+        elif pwr.get('isArrayBase'):
+            arr_type = "Dynamic Array" if pwr.get('isDynamicArray') else "Static Array"
+            pdf.set_x(indent_x); multi_cell(pdf, text_w,LINE_HEIGHT_VSMALL,f"{arr_type} Base ({_format_fpdf_text(pwr.get('arrayId','N/A'))})")
+        current_y = pdf.get_y(); pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 7) # Reset font
+
+    if pwr.get('modifiersConfig'):
+        pdf.set_xy(indent_x, current_y); pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 7)
+        pdf.cell(text_w, LINE_HEIGHT_VSMALL, "Modifiers:",0,1); current_y = pdf.get_y()
+        pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 6.5)
+        for mod_conf in pwr.get('modifiersConfig', []):
+            if mod_conf.get('id') == 'mod_extra_dynamic_array' and pwr.get('isArrayBase'): continue
+            mod_text = _format_modifier_for_fpdf(mod_conf, all_mod_rules, char_state, rule_data, engine)
+            pdf.set_x(indent_x + 2); multi_cell(pdf, text_w-2, LINE_HEIGHT_VSMALL, f"\u2022 {mod_text}"); current_y = pdf.get_y()
+    
+    # Senses, Immunity, Variable, Summon, Affliction, Enhanced Trait details
+    if base_eff_rule:
+        def _render_power_sub_list(sub_title, items_list, item_name_func, item_cost_func):
+            nonlocal current_y
             pdf.set_xy(indent_x, current_y); pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 7)
-            pdf.cell(text_w, LINE_HEIGHT_VSMALL, "Modifiers:",0,1); current_y = pdf.get_y()
+            pdf.cell(text_w, LINE_HEIGHT_VSMALL, sub_title + ":",0,1); current_y = pdf.get_y()
             pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 6.5)
-            for mod_conf in pwr.get('modifiersConfig', []):
-                if mod_conf.get('id') == 'mod_extra_dynamic_array' and pwr.get('isArrayBase'): continue
-                mod_text = _format_modifier_for_fpdf(mod_conf, all_mod_rules, char_state, rule_data, engine)
-                pdf.set_x(indent_x + 2); pdf.multi_cell(text_w-2, LINE_HEIGHT_VSMALL, f"\u2022 {mod_text}",0,'L'); current_y = pdf.get_y()
-        
-        # Senses, Immunity, Variable, Summon, Affliction, Enhanced Trait details
-        if base_eff_rule:
-            def _render_power_sub_list(sub_title, items_list, item_name_func, item_cost_func):
-                nonlocal current_y
-                pdf.set_xy(indent_x, current_y); pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 7)
-                pdf.cell(text_w, LINE_HEIGHT_VSMALL, sub_title + ":",0,1); current_y = pdf.get_y()
-                pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 6.5)
-                for item_id_or_obj in items_list:
-                    name = item_name_func(item_id_or_obj)
-                    cost = item_cost_func(item_id_or_obj)
-                    pdf.set_x(indent_x+2); pdf.multi_cell(text_w-2, LINE_HEIGHT_VSMALL, f"\u2022 {_format_fpdf_text(name)} ({cost} PP)",0,'L'); current_y = pdf.get_y()
-
-            if base_eff_rule.get('isSenseContainer') and pwr.get('sensesConfig'):
-                _render_power_sub_list("Senses", pwr.get('sensesConfig',[]),
-                                       lambda s_id: next((s['name'] for s in rule_data.get('power_senses_config',[]) if s['id']==s_id),s_id),
-                                       lambda s_id: next((s.get('cost',0) for s in rule_data.get('power_senses_config',[]) if s['id']==s_id),'?' ) )
-            if base_eff_rule.get('isImmunityContainer') and pwr.get('immunityConfig'):
-                _render_power_sub_list("Immunities", pwr.get('immunityConfig',[]),
-                                       lambda i_id: next((i['name'] for i in rule_data.get('power_immunities_config',[]) if i['id']==i_id),i_id),
-                                       lambda i_id: next((i.get('cost',0) for i in rule_data.get('power_immunities_config',[]) if i['id']==i_id),'?' ) )
-            if base_eff_rule.get('id') == 'eff_affliction' and pwr.get('affliction_params'):
-                ap = pwr['affliction_params']; pdf.set_xy(indent_x,current_y); pdf.set_font(FONT_FAMILY_MAIN,FONT_REGULAR,7)
-                aff_text = f"Affliction ({ap.get('resistance_type','Fort')}) 1st: {ap.get('degree1','')}, 2nd: {ap.get('degree2','')}, 3rd: {ap.get('degree3','')}"
-                pdf.multi_cell(text_w,LINE_HEIGHT_VSMALL,aff_text,0,'L'); current_y=pdf.get_y()
-
-            if base_eff_rule.get('isEnhancementEffect') and pwr.get('enhanced_trait_params'):
-                etp = pwr['enhanced_trait_params']
-                enh_trait_name = engine.get_skill_name_by_id(etp.get('trait_id','N/A')) if etp.get('category')=='Skill' else etp.get('trait_id','N/A')
-                if etp.get('category')=='Advantage': enh_trait_name = next((a.get('name') for a in adv_rules_list if a.get('id')==etp.get('trait_id')), enh_trait_name)
-                pdf.set_xy(indent_x,current_y); pdf.set_font(FONT_FAMILY_MAIN,FONT_REGULAR,7)
-                pdf.multi_cell(text_w,LINE_HEIGHT_VSMALL,f"Enhances: {etp.get('category','')} - {_format_fpdf_text(enh_trait_name)} +{pwr.get('rank',0)} Ranks",0,'L'); current_y=pdf.get_y()
-
-            # Add Variable and Summon/Ally details here if needed, similar to Senses/Immunity/Affliction
-            if base_eff_rule.get('isAllyEffect') and pwr.get('ally_notes_and_stats_structured'):
-                ally_stats = pwr.get('ally_notes_and_stats_structured')
-                pdf.set_xy(indent_x, current_y); pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 7)
-                pdf.multi_cell(text_w, LINE_HEIGHT_VSMALL, f"Summoned: {ally_stats.get('name', 'Creation')} (PL {ally_stats.get('pl_for_ally','N/A')}, {ally_stats.get('cost_pp_asserted_by_user',0)}/{pwr.get('allotted_pp_for_creation',0)} PP)",0,'L')
-                current_y = pdf.get_y()
-                # Could add more ally details if space allows, but might get too verbose
-        current_y += ITEM_SPACING
+            for item_id_or_obj in items_list:
+                name = item_name_func(item_id_or_obj)
+                cost = item_cost_func(item_id_or_obj)
+                pdf.set_x(indent_x+2); multi_cell(pdf, text_w-2, LINE_HEIGHT_VSMALL, f"\u2022 {_format_fpdf_text(name)} ({cost} PP)"); current_y = pdf.get_y()
+
+        if base_eff_rule.get('isSenseContainer') and pwr.get('sensesConfig'):
+            _render_power_sub_list("Senses", pwr.get('sensesConfig',[]),
+                                   lambda s_id: next((s['name'] for s in rule_data.get('power_senses_config',[]) if s['id']==s_id),s_id),
+                                   lambda s_id: next((s.get('cost',0) for s in rule_data.get('power_senses_config',[]) if s['id']==s_id),'?' ) )
+        if base_eff_rule.get('isImmunityContainer') and pwr.get('immunityConfig'):
+            _render_power_sub_list("Immunities", pwr.get('immunityConfig',[]),
+                                   lambda i_id: next((i['name'] for i in rule_data.get('power_immunities_config',[]) if i['id']==i_id),i_id),
+                                   lambda i_id: next((i.get('cost',0) for i in rule_data.get('power_immunities_config',[]) if i['id']==i_id),'?' ) )
+        if base_eff_rule.get('id') == 'eff_affliction' and pwr.get('affliction_params'):
+            ap = pwr['affliction_params']; pdf.set_xy(indent_x,current_y); pdf.set_font(FONT_FAMILY_MAIN,FONT_REGULAR,7)
+            aff_text = f"Affliction ({ap.get('resistance_type','Fort')}) 1st: {ap.get('degree1','')}, 2nd: {ap.get('degree2','')}, 3rd: {ap.get('degree3','')}"
+            multi_cell(pdf, text_w,LINE_HEIGHT_VSMALL,aff_text); current_y=pdf.get_y()
+
+        if base_eff_rule.get('isEnhancementEffect') and pwr.get('enhanced_trait_params'):
+            etp = pwr['enhanced_trait_params']
+            enh_trait_name = engine.get_skill_name_by_id(etp.get('trait_id','N/A')) if etp.get('category')=='Skill' else etp.get('trait_id','N/A')
+            if etp.get('category')=='Advantage': enh_trait_name = next((a.get('name') for a in adv_rules_list if a.get('id')==etp.get('trait_id')), enh_trait_name)
+            pdf.set_xy(indent_x,current_y); pdf.set_font(FONT_FAMILY_MAIN,FONT_REGULAR,7)
+            multi_cell(pdf, text_w,LINE_HEIGHT_VSMALL,f"Enhances: {etp.get('category','')} - {_format_fpdf_text(enh_trait_name)} +{pwr.get('rank',0)} Ranks"); current_y=pdf.get_y()
+
+        # Add Variable and Summon/Ally details here if needed, similar to Senses/Immunity/Affliction
+        if base_eff_rule.get('isAllyEffect') and pwr.get('ally_notes_and_stats_structured'):
+            ally_stats = pwr.get('ally_notes_and_stats_structured')
+            pdf.set_xy(indent_x, current_y); pdf.set_font(FONT_FAMILY_MAIN, FONT_BOLD, 7)
+            multi_cell(pdf, text_w, LINE_HEIGHT_VSMALL, f"Summoned: {ally_stats.get('name', 'Creation')} (PL {ally_stats.get('pl_for_ally','N/A')}, {ally_stats.get('cost_pp_asserted_by_user',0)}/{pwr.get('allotted_pp_for_creation',0)} PP)")
+            current_y = pdf.get_y()
+            # Could add more ally details if space allows, but might get too verbose
+    current_y += ITEM_SPACING
+    return current_y
+
+def _render_bullet_lines_fpdf(pdf: FPDF, lines_text: List[str], x: float, y: float, width: float, font_size: float = 7.5) -> float:
+    """Bulleted, wrapped lines; returns Y after the last one."""
+    current_y = y; pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, font_size)
+    for line_text in lines_text:
+        wrapped = wrap_text(pdf, width - 3, line_text)
+        current_y = _check_y_add_page(pdf, current_y, len(wrapped) * LINE_HEIGHT_VSMALL)
+        pdf.set_xy(x, current_y); pdf.cell(3, LINE_HEIGHT_VSMALL, "•", 0, 0)
+        pdf.set_x(x + 3); multi_cell(pdf, width - 3, LINE_HEIGHT_VSMALL, line_text)
+        current_y = pdf.get_y() + ITEM_SPACING / 2
+    return current_y
+
+def _render_complications_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
+    current_y = _render_section_title(pdf, "Complications", x, y, width)
+    descriptions = [_format_fpdf_text(comp.get('description', '')) for comp in char_state.get('complications', []) if comp.get('description')]
+    if not descriptions:
+        pdf.set_xy(x,current_y);pdf.set_font(FONT_FAMILY_MAIN,FONT_ITALIC,8);pdf.cell(width,LINE_HEIGHT_NORMAL,"None",0,1)
+        return pdf.get_y() + SECTION_BOTTOM_PADDING
+    return _render_bullet_lines_fpdf(pdf, descriptions, x, current_y, width) + SECTION_BOTTOM_PADDING
+
+def _render_equipment_fpdf(pdf: FPDF, char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
+    current_y = _render_section_title(pdf, "Equipment", x, y, width)
+    equipment: List[Dict[str, Any]] = char_state.get('equipment', [])
+    pdf.set_xy(x, current_y); pdf.set_font(FONT_FAMILY_MAIN, FONT_ITALIC, 7)
+    pdf.cell(width, LINE_HEIGHT_VSMALL, f"EP: {char_state.get('derived_spent_ep', 0)} / {char_state.get('derived_total_ep', 0)}", 0, 1); current_y = pdf.get_y()
+    if not equipment:
+        pdf.set_xy(x,current_y);pdf.set_font(FONT_FAMILY_MAIN,FONT_ITALIC,8);pdf.cell(width,LINE_HEIGHT_NORMAL,"None",0,1)
+        return pdf.get_y() + SECTION_BOTTOM_PADDING
+    item_texts = []
+    for item in equipment:
+        effects = item.get('effects_text') or item.get('description', '')
+        item_texts.append(f"{_format_fpdf_text(item.get('name', 'Item'))} ({item.get('ep_cost', 0)} EP)" + (f": {_format_fpdf_text(effects)}" if effects else ""))
+    return _render_bullet_lines_fpdf(pdf, item_texts, x, current_y, width, font_size=7) + SECTION_BOTTOM_PADDING
+
+def _render_generic_list_section_fpdf(pdf: FPDF, title: str, items: List[Dict[str, Any]], name_key: str, cost_key: str, cost_unit: str, x: float, y: float, width: float,
+                                      details_callback: Optional[Callable[[FPDF, Dict[str, Any], float, float, float], float]] = None) -> float:
+    """Titled list of named entries (allies, HQs) with an optional cost and per-entry details; nothing at all when `items` is empty."""
+    if not items: return y
+    current_y = _render_section_title(pdf, title, x, y, width)
+    for item in items: current_y = _render_generic_list_item_fpdf(pdf, item, name_key, cost_key, cost_unit, x, current_y, width, details_callback)
     return current_y + SECTION_BOTTOM_PADDING
 
+def _render_generic_list_item_fpdf(pdf: FPDF, item: Dict[str, Any], name_key: str, cost_key: str, cost_unit: str, x: float, y: float, width: float,
+                                   details_callback: Optional[Callable[[FPDF, Dict[str, Any], float, float, float], float]] = None) -> float:
+    current_y = _check_y_add_page(pdf, y, LINE_HEIGHT_NORMAL * 2)
+    pdf.set_xy(x, current_y); pdf.set_font(FONT_FAMILY_HEADER, FONT_BOLD, 8.5)
+    cost = item.get(cost_key); cost_str = f"({cost} {cost_unit})" if cost is not None else ""
+    pdf.cell(width - string_width(pdf, cost_str) - 2, LINE_HEIGHT_NORMAL, _format_fpdf_text(item.get(name_key, 'Unnamed')), "B", 0, 'L')
+    pdf.set_font(FONT_FAMILY_MAIN, FONT_ITALIC, 7.5); pdf.cell(string_width(pdf, cost_str) + 2, LINE_HEIGHT_NORMAL, cost_str, "B", 1, 'R')
+    current_y = pdf.get_y()
+    if details_callback: current_y = details_callback(pdf, item, x + 2, current_y, width - 2)
+    return current_y + ITEM_SPACING
+
+def _render_ally_details_fpdf(pdf: FPDF, ally: 'AllyDefinition', x: float, y: float, width: float) -> float:
+    current_y = y; pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 6.5)
+    detail_lines = [f"{_format_fpdf_text(ally.get('type', 'Ally'))}, PL {ally.get('pl_for_ally', ally.get('pl', 'N/A'))}"]
+    for label, key in [("Abilities", 'abilities_summary_text'), ("Defenses", 'defenses_summary_text'), ("Skills", 'skills_summary_text'),
+                       ("Powers/Adv.", 'powers_advantages_summary_text'), ("Notes", 'notes')]:
+        if ally.get(key): detail_lines.append(f"{label}: {_format_fpdf_text(ally[key])}")
+    for line_text in detail_lines:
+        pdf.set_xy(x, current_y); multi_cell(pdf, width, LINE_HEIGHT_VSMALL, line_text); current_y = pdf.get_y()
+    return current_y
+
+def _render_hq_details_fpdf(pdf: FPDF, hq: 'HQDefinition', rule_data: 'RuleData', engine: 'CoreEngine', x: float, y: float, width: float) -> float:
+    hq_rules = rule_data.get('hq_features', [])
+    size_name = next((f['name'] for f in hq_rules if f['id'] == hq.get('size_id')), hq.get('size_id') or 'N/A')
+    feature_names = []
+    for feat_entry in hq.get('features', []):
+        feat_rule = next((f for f in hq_rules if f['id'] == feat_entry.get('id')), None)
+        feature_names.append((feat_rule['name'] if feat_rule else feat_entry.get('id', 'Feature')) + (f" {feat_entry.get('rank', 1)}" if feat_rule and feat_rule.get('ranked') else ""))
+    lines_text = [f"Cost: {engine.calculate_hq_cost(hq, hq_rules)} EP | Size: {_format_fpdf_text(size_name)} | Toughness +{hq.get('bought_toughness_ranks', 0)}"]
+    if feature_names: lines_text.append("Features: " + ", ".join(map(_format_fpdf_text, feature_names)))
+    current_y = y; pdf.set_font(FONT_FAMILY_MAIN, FONT_REGULAR, 6.5)
+    for line_text in lines_text:
+        pdf.set_xy(x, current_y); multi_cell(pdf, width, LINE_HEIGHT_VSMALL, line_text); current_y = pdf.get_y()
+    return current_y
+
 
 def _render_footer_notes_fpdf(pdf: FPDF, char_state: 'CharacterState', x: float, y: float, width: float) -> float:
     current_y = y
@@ -522,12 +600,94 @@ def _render_footer_notes_fpdf(pdf: FPDF, char_state: 'CharacterState', x: float,
     current_y += notes_box_height + 2
     return current_y
 
+# --- Measured Layout ---
+# The sheet body is a sequence of blocks: whole sections, or a section's entries when it can run long
+# (powers, companions, headquarters), with the section title kept together with its first entry.
+# Pass 1 dry-runs every block on a scratch page to measure its exact height (`measuring` lets the
+# pdf_text_metrics helpers skip drawing text); pass 2 packs the blocks
+# newspaper-style into COLUMN_COUNT columns per page, balancing the columns of the last page, and
+# draws each block once at its final position. _check_y_add_page is a no-op meanwhile.
+LayoutBlock = Tuple[Callable[[FPDF, float, float, float], float], bool] # (draw(pdf, x, y, width) -> bottom y, keep with next block)
+BlockPlacement = Tuple[int, float] # (column index counted across pages, top y)
+CONTENT_BOTTOM_Y = PAGE_HEIGHT - BOTTOM_MARGIN
+FOOTER_NOTES_GAP = 5
+LAYOUT_BALANCE_TOLERANCE = 0.25 # mm
+
+def _sheet_blocks(char_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine') -> List[LayoutBlock]:
+    def section(render: Callable[..., float]) -> LayoutBlock: return (lambda p, x, y, w: render(p, char_state, rule_data, engine, x, y, w), False)
+    def entries(title: str, items: List[Dict[str, Any]], render_item: Callable[[FPDF, int, Dict[str, Any], float, float, float], float]) -> List[LayoutBlock]:
+        if not items: return []
+        item_blocks: List[LayoutBlock] = [(lambda p, x, y, w: _render_section_title(p, title, x, y, w), True)]
+        for idx, item in enumerate(items):
+            padding = SECTION_BOTTOM_PADDING if idx == len(items) - 1 else 0
+            item_blocks.append((lambda p, x, y, w, idx=idx, item=item, padding=padding: render_item(p, idx, item, x, y, w) + padding, False))
+        return item_blocks
+
+    attack_rows = _combat_attack_rows(char_state, rule_data, engine)
+    blocks = [section(_render_abilities_fpdf), section(_render_defenses_fpdf), (lambda p, x, y, w: _render_combat_header_fpdf(p, char_state, x, y, w), True)]
+    blocks += [(lambda p, x, y, w, row=row, padding=(SECTION_BOTTOM_PADDING if idx == len(attack_rows) - 1 else 0): _render_combat_row_fpdf(p, row, x, y, w) + padding, False)
+               for idx, row in enumerate(attack_rows)]
+    blocks += [section(_render_complications_fpdf), section(_render_skills_fpdf), section(_render_advantages_fpdf), section(_render_equipment_fpdf)]
+    powers = char_state.get('powers', [])
+    blocks += entries("Powers & Devices", powers, lambda p, idx, pwr, x, y, w: _render_power_entry_fpdf(p, pwr, idx, char_state, rule_data, engine, x, y, w)) if powers else [section(_render_powers_fpdf)]
+    blocks += entries("Companions", char_state.get('allies', []), lambda p, idx, ally, x, y, w: _render_generic_list_item_fpdf(
+        p, ally, 'name', 'cost_pp_asserted_by_user', 'PP', x, y, w, details_callback=_render_ally_details_fpdf))
+    blocks += entries("Headquarters", char_state.get('headquarters', []), lambda p, idx, hq, x, y, w: _render_generic_list_item_fpdf(
+        p, hq, 'name', 'calculated_cost_placeholder', 'EP', x, y, w, details_callback=lambda item_pdf, item, item_x, item_y, item_w: _render_hq_details_fpdf(item_pdf, item, rule_data, engine, item_x, item_y, item_w)))
+    return blocks
+
+def _join_kept_blocks(blocks: List[LayoutBlock]) -> List[Callable[[FPDF, float, float, float], float]]:
+    """Merges every keep-with-next block into the block after it."""
+    joined: List[Callable[[FPDF, float, float, float], float]] = []; pending: List[Callable[[FPDF, float, float, float], float]] = []
+    for draw, keep_with_next in blocks:
+        pending.append(draw)
+        if keep_with_next: continue
+        if len(pending) == 1: joined.append(draw)
+        else:
+            def draw_joined(p: FPDF, x: float, y: float, w: float, parts=tuple(pending)) -> float:
+                for part in parts: y = part(p, x, y, w)
+                return y
+            joined.append(draw_joined)
+        pending = []
+    return joined + pending
+
+def _measure_blocks(draws: List[Callable[[FPDF, float, float, float], float]], width: float) -> List[float]:
+    """Exact height of every block, from a dry run on a scratch page."""
+    scratch = MMCharSheetPDF('P', 'mm', 'Letter'); scratch.layout_managed = True; scratch.measuring = True; scratch.set_auto_page_break(False); scratch.add_page()
+    return [draw(scratch, LEFT_MARGIN, TOP_MARGIN, width) - TOP_MARGIN for draw in draws]
+
+def _assign_columns(heights: List[float], column_top: Callable[[int], float], first_column: int = 0, height_cap: Optional[float] = None) -> List[BlockPlacement]:
+    """Greedy fill in reading order; a block that does not fit starts the next column (a block taller than a whole column overflows it)."""
+    placements: List[BlockPlacement] = []; column = first_column; used = 0.0
+    for height in heights:
+        capacity = CONTENT_BOTTOM_Y - column_top(column)
+        if height_cap is not None: capacity = min(capacity, height_cap)
+        if used > 0 and used + height > capacity + 1e-6: column += 1; used = 0.0
+        placements.append((column, column_top(column) + used)); used += height
+    return placements
+
+def _pack_blocks(heights: List[float], column_top: Callable[[int], float]) -> List[BlockPlacement]:
+    """Column placements for every block, with the columns of the last page balanced by bisecting a column height cap."""
+    placements = _assign_columns(heights, column_top)
+    if not placements: return placements
+    last_page_first_column = (placements[-1][0] // COLUMN_COUNT) * COLUMN_COUNT
+    first_on_page = next(i for i, (column, _) in enumerate(placements) if column >= last_page_first_column)
+    page_heights = heights[first_on_page:]
+    fits = lambda cap: _assign_columns(page_heights, column_top, last_page_first_column, cap)[-1][0] < last_page_first_column + COLUMN_COUNT
+    low, high = max(page_heights), CONTENT_BOTTOM_Y - column_top(last_page_first_column) # fits(high) always holds
+    while high - low > LAYOUT_BALANCE_TOLERANCE:
+        middle = (low + high) / 2
+        if fits(middle): high = middle
+        else: low = middle
+    return placements[:first_on_page] + _assign_columns(page_heights, column_top, last_page_first_column, high)
+
 # --- Main FPDF Generation Function ---
 def generate_fpdf_character_sheet(character_state: 'CharacterState', rule_data: 'RuleData', engine: 'CoreEngine') -> Optional[io.BytesIO]:
     try:
         pdf = MMCharSheetPDF('P', 'mm', 'Letter')
         pdf.alias_nb_pages()
-        pdf.set_auto_page_break(False) # Manual page break management for columns
+        pdf.set_auto_page_break(False) # Every page break is decided by the measured layout
+        pdf.layout_managed = True
         pdf.add_page()
         
         processed_char_state = character_state 
@@ -536,79 +696,22 @@ def generate_fpdf_character_sheet(character_state: 'CharacterState', rule_data:
         for i in range(1, COLUMN_COUNT): col_starts_x.append(col_starts_x[-1] + COLUMN_WIDTH + COLUMN_GAP)
         
         current_y_header = _render_header_fpdf(pdf, processed_char_state, LEFT_MARGIN, TOP_MARGIN, EFFECTIVE_PAGE_WIDTH)
-        
-        # Y position for the start of content in each column for the current page
-        col_content_start_y = [current_y_header] * COLUMN_COUNT 
-        # Tracks the current drawing Y position for each column
-        current_y_per_col = list(col_content_start_y) 
-
-        sections_col_map = [
-            [ # Column 1
-                lambda p, cs, rd, e, x, y, w: _render_abilities_fpdf(p,cs,rd,e,x,y,w),
-                lambda p, cs, rd, e, x, y, w: _render_defenses_fpdf(p,cs,rd,e,x,y,w),
-                lambda p, cs, rd, e, x, y, w: _render_combat_summary_fpdf(p,cs,rd,e,x,y,w),
-                lambda p, cs, rd, e, x, y, w: _render_complications_fpdf(p,cs,rd,e,x,y,w),
-            ],
-            [ # Column 2
-                lambda p, cs, rd, e, x, y, w: _render_skills_fpdf(p,cs,rd,e,x,y,w),
-                lambda p, cs, rd, e, x, y, w: _render_advantages_fpdf(p,cs,rd,e,x,y,w),
-                lambda p, cs, rd, e, x, y, w: _render_equipment_fpdf(p,cs,rd,e,x,y,w),
-            ],
-            [ # Column 3
-                lambda p, cs, rd, e, x, y, w: _render_powers_fpdf(p,cs,rd,e,x,y,w),
-                lambda p, cs, rd, e, x, y, w: _render_generic_list_section_fpdf(p, "Companions", processed_char_state.get('allies',[]), 'name', 'cost_pp_asserted_by_user', 'PP', x,y,w, details_callback=lambda item_pdf, item, item_x, item_y_cb, item_w: _render_ally_details_fpdf(item_pdf, item, item_x, item_y_cb, item_w)),
-                lambda p, cs, rd, e, x, y, w: _render_generic_list_section_fpdf(p, "Headquarters", processed_char_state.get('headquarters',[]), 'name', 'calculated_cost_placeholder', 'EP', x,y,w, details_callback=lambda item_pdf, item, item_x, item_y_cb, item_w: _render_hq_details_fpdf(item_pdf, item, rule_data, engine, item_x, item_y_cb, item_w)),
-                # lambda p, cs, rd, e, x, y, w: _render_vehicles_fpdf(p, cs, rd, e, x, y, w), # Placeholder for Vehicles
-            ]
-        ]
-        
-        # Iterate through columns and render sections
-        # This simple sequential rendering might lead to unbalanced columns on the last page.
-        # True balancing is complex.
-        page_bottom_write_limit = PAGE_HEIGHT - BOTTOM_MARGIN - 5 # Small buffer
-
-        for col_idx in range(COLUMN_COUNT):
-            current_y_val = col_content_start_y[col_idx] # Start Y for this column on current page
-            for render_func in sections_col_map[col_idx]:
-                 # Estimate needed height very roughly - for complex sections, this needs to be better
-                 # or the render function itself handles internal page breaks.
-                est_height = 30 # Default estimate
-                if current_y_val + est_height > page_bottom_write_limit and pdf.page_no() == 1 and col_idx >0 : # If it won't fit and not first col
-                    # This basic logic doesn't fully handle column overflow to next page elegantly.
-                    # FPDF's auto_page_break with set_auto_page_break(True, margin) is the main page break driver.
-                    # Manual column transitions are harder.
-                    pass # For now, let auto page break handle most things or sections make themselves fit.
-
-                if pdf.get_y() > page_bottom_write_limit : # If already past limit due to previous section
-                     pdf.add_page()
-                     current_y_val = TOP_MARGIN
-                     # If a new page is added, all subsequent columns on this "conceptual row" also start at top.
-                     for k in range(COLUMN_COUNT): col_content_start_y[k] = TOP_MARGIN
-
-
-                current_y_val = render_func(pdf, processed_char_state, rule_data, engine, col_starts_x[col_idx], current_y_val, COLUMN_WIDTH)
-                current_y_per_col[col_idx] = current_y_val # Update max Y for this column
-
-                # Check for page overflow *after* rendering a section
-                if current_y_val > page_bottom_write_limit:
-                    if col_idx < COLUMN_COUNT - 1: # If not the last column
-                        # Content overflowed, next section in this column would start on new page,
-                        # but we want to try moving to next column first.
-                        # This means the *next* section should start at TOP_MARGIN in *next* column.
-                        # This logic is tricky with current loop structure.
-                        # Simplification: Let sections handle internal breaks or make them shorter.
-                        pass
-                    else: # Last column overflowed, new page
-                        pdf.add_page()
-                        # Reset Y for all columns for the new page
-                        for k_reset in range(COLUMN_COUNT):
-                            col_content_start_y[k_reset] = TOP_MARGIN
-                        current_y_val = TOP_MARGIN # Current section continues at top of new page, col 0.
-                        # This doesn't re-distribute remaining sections to columns on new page properly yet.
-
-        # Footer notes at the end of all content
-        final_y_for_footer = max(current_y_per_col) + 5
-        if final_y_for_footer + 40 > page_bottom_write_limit : # If footer itself needs new page
+        column_top = lambda column: current_y_header if column < COLUMN_COUNT else TOP_MARGIN # Header only on page 1
+
+        # Pass 1: measure; pass 2: pack and draw each block once
+        block_draws = _join_kept_blocks(_sheet_blocks(processed_char_state, rule_data, engine))
+        block_heights = _measure_blocks(block_draws, COLUMN_WIDTH)
+        column_bottoms: Dict[int, float] = {}
+        for draw, height, (column, top_y) in zip(block_draws, block_heights, _pack_blocks(block_heights, column_top)):
+            while pdf.page_no() <= column // COLUMN_COUNT: pdf.add_page()
+            draw(pdf, col_starts_x[column % COLUMN_COUNT], top_y, COLUMN_WIDTH)
+            column_bottoms[column] = top_y + height
+
+        # Footer notes below the last page's columns, or on a page of their own
+        last_page_columns = [bottom for column, bottom in column_bottoms.items() if column // COLUMN_COUNT == pdf.page_no() - 1]
+        final_y_for_footer = max(last_page_columns, default=current_y_header if pdf.page_no() == 1 else TOP_MARGIN) + FOOTER_NOTES_GAP
+        footer_height = _measure_blocks([lambda p, x, y, w: _render_footer_notes_fpdf(p, processed_char_state, x, y, w)], EFFECTIVE_PAGE_WIDTH)[0]
+        if final_y_for_footer + footer_height > CONTENT_BOTTOM_Y:
              pdf.add_page()
              final_y_for_footer = TOP_MARGIN
         
@@ -0,0 +1,247 @@
+# rule_catalog.py for HeroForge M&M (Streamlit Edition)
+# Read-only, id-indexed view over the rule data loaded by CoreEngine.
+
+from bisect import bisect_left
+from types import MappingProxyType
+from typing import Callable, Dict, Hashable, List, Any, NamedTuple, Optional, Mapping, Tuple, Union
+
+RuleEntry = Dict[str, Any]
+RuleIndex = Mapping[Any, RuleEntry]
+ModifierCost = Callable[[Dict[str, Any]], float] # modifiersConfig entry -> cost
+
+
+def index_rules(rules: Optional[List[RuleEntry]], key: str = 'id') -> RuleIndex:
+    """
+    Builds a read-only `key -> rule` mapping from a rule list.
+    The first entry wins on duplicate keys, matching the `next(...)` scans this replaces.
+    """
+    index: Dict[Any, RuleEntry] = {}
+    for rule in rules or []:
+        rule_key = rule.get(key)
+        if rule_key is not None and rule_key not in index:
+            index[rule_key] = rule
+    return MappingProxyType(index)
+
+
+def parse_measurement_value(val_str: Any) -> Optional[float]:
+    """
+    Leading number of a measurements table cell, e.g. "25 Kilograms" -> 25.0, "1/2 mile" -> 0.5.
+    Simplified parsing; returns None for Subatomic/Planetary cells and raises ValueError on other text.
+    """
+    if isinstance(val_str, (int, float)): return float(val_str)
+    if isinstance(val_str, str):
+        if 'Subatomic' in val_str or 'Planetary' in val_str: return None
+        val_str_cleaned = val_str.split(" ")[0].replace(",", "") # "25 Kilograms" -> "25"
+        if "/" in val_str_cleaned: # "1/2"
+            num, den = val_str_cleaned.split("/")
+            return float(num) / float(den)
+        return float(val_str_cleaned)
+    return None
+
+
+class MeasurementCurve:
+    """
+    One measurement type ('distance', 'mass', ...) of the measurements table compiled for O(log n) lookups.
+
+    `ranks`, `displays` and `values` are parallel arrays sorted by rank; `values` holds each cell's
+    leading number (None where it does not parse). Ranks above the table follow an extrapolation
+    curve fitted once from the last two entries, so lookups never parse strings.
+    """
+    _MISSING = object() # Table entry without this measurement type
+
+    def __init__(self, measurement_type: str, sorted_table: List[RuleEntry]):
+        self.measurement_type = measurement_type
+        self.ranks: Tuple[Union[int, float], ...] = tuple(entry['rank'] for entry in sorted_table)
+        self.displays: Tuple[Any, ...] = tuple(entry.get(measurement_type, self._MISSING) for entry in sorted_table)
+        self.values: Tuple[Optional[float], ...] = tuple(self._safe_parse(display) for display in self.displays)
+        self.min_display = sorted_table[0].get(measurement_type, '') if sorted_table else ''
+        self.max_display = sorted_table[-1].get(measurement_type, '') if sorted_table else ''
+        # (kind, last_rank, last_value, factor or increment per rank) beyond the table maximum
+        self._extrapolation: Optional[Tuple[str, Union[int, float], float, Any]] = self._fit_extrapolation()
+
+    def _safe_parse(self, display: Any) -> Optional[float]:
+        if display is self._MISSING: return None
+        try: return parse_measurement_value(display)
+        except (ValueError, TypeError, ZeroDivisionError): return None
+
+    def _fit_extrapolation(self) -> Optional[Tuple[str, Union[int, float], float, Any]]:
+        if len(self.ranks) < 2: return None
+        last_val_num, second_last_val_num = self.values[-1], self.values[-2]
+        last_rank_val, second_last_rank_val = self.ranks[-1], self.ranks[-2]
+        if last_val_num is None or second_last_val_num is None or last_rank_val == second_last_rank_val: return None
+        rank_diff_table = last_rank_val - second_last_rank_val; val_diff_table = last_val_num - second_last_val_num
+        # Heuristic: a large jump over the last table step suggests a multiplicative progression
+        if abs(val_diff_table) > abs(second_last_val_num * rank_diff_table * 0.5) and second_last_val_num != 0:
+            if rank_diff_table <= 0: return None
+            return ('multiplicative', last_rank_val, last_val_num, (last_val_num / second_last_val_num) ** (1/rank_diff_table))
+        return ('linear', last_rank_val, last_val_num, val_diff_table / rank_diff_table)
+
+    def lookup(self, rank: Union[int, float]) -> str:
+        """Display string for `rank`, matching CoreEngine.get_measurement_by_rank's wording."""
+        if not self.ranks: return f"Rank {rank} (Table N/A)"
+        idx = bisect_left(self.ranks, rank)
+        if idx < len(self.ranks) and self.ranks[idx] == rank: # Direct match
+            display = self.displays[idx]
+            return f"Rank {rank} (Type N/A in Table Entry)" if display is self._MISSING else display
+        if rank < self.ranks[0]: return f"< {self.min_display} (Below Table Minimum)"
+        if rank > self.ranks[-1]:
+            if self._extrapolation:
+                kind, last_rank, last_value, step = self._extrapolation; ranks_above_max = rank - last_rank
+                try:
+                    if kind == 'multiplicative': return f"~{last_value * (step ** ranks_above_max):.2g} (Extrapolated Multiplicatively)"
+                    return f"~{last_value + (step * ranks_above_max):.2g} (Extrapolated Linearly)"
+                except (OverflowError, ValueError, TypeError, ZeroDivisionError): pass
+            return f"> {self.max_display} (Above Table Maximum)"
+        # Within the table but not listed: report the closest lower entry
+        lower_display = self.displays[idx - 1]
+        lower_display = '' if lower_display is self._MISSING else lower_display
+        return f"{lower_display} (at Rank {self.ranks[idx - 1]}, value for rank {rank} not explicitly listed)"
+
+
+class ModifierCostProgram(NamedTuple):
+    """A power modifier rule compiled for costing: the cost functions take one modifiersConfig entry."""
+    cost_type: Optional[str]
+    cpr_change: ModifierCost # Cost per rank change ('perRank' modifiers)
+    flat_cost: ModifierCost # Flat cost ('flat' and 'flatPerRankOfModifier' modifiers)
+    removable_type: Optional[str] # 'standard'/'easily' for 'special_removable' modifiers
+
+
+def _no_cost(mod_config_entry: Dict[str, Any]) -> float:
+    return 0.0
+
+
+def _option_adjustments(mod_rule: RuleEntry, adjustment_key: str) -> Dict[Any, float]:
+    """parameter_options value -> cost adjustment; the first option with the adjustment wins, as in the option scan it replaces."""
+    adjustments: Dict[Any, float] = {}
+    if not (mod_rule.get('parameter_needed') and mod_rule.get('parameter_options')): return adjustments
+    for opt in mod_rule['parameter_options']:
+        if adjustment_key in opt and isinstance(opt.get('value'), Hashable): adjustments.setdefault(opt.get('value'), float(opt[adjustment_key]))
+    return adjustments
+
+
+def _cost_with_option(base_cost: float, storage_key: str, adjustments: Dict[Any, float]) -> ModifierCost:
+    if not adjustments: return lambda mod_config_entry: base_cost
+    def cost(mod_config_entry: Dict[str, Any]) -> float:
+        params = mod_config_entry.get('params')
+        if not isinstance(params, dict): return base_cost
+        try: return base_cost + adjustments.get(params.get(storage_key), 0.0)
+        except TypeError: return base_cost # Unhashable choices never match an option
+    return cost
+
+
+def compile_modifier_cost(mod_rule: RuleEntry) -> ModifierCostProgram:
+    """Specializes a power_modifiers.json rule into its cost functions once, so costing a modifier is a single call."""
+    cost_type = mod_rule.get('costType'); storage_key = mod_rule.get('parameter_storage_key', mod_rule.get('id'))
+    if cost_type == 'perRank':
+        cpr_change = _cost_with_option(float(mod_rule.get('costChangePerRank', 0.0)), storage_key, _option_adjustments(mod_rule, 'cost_adjust_per_rank'))
+        return ModifierCostProgram(cost_type, cpr_change, _no_cost, None)
+    if cost_type == 'flat':
+        flat_cost = _cost_with_option(float(mod_rule.get('flatCostChange', 0.0)), storage_key, _option_adjustments(mod_rule, 'cost_adjust_flat'))
+        return ModifierCostProgram(cost_type, _no_cost, flat_cost, None)
+    if cost_type == 'flatPerRankOfModifier':
+        flat_per_rank = float(mod_rule.get('flatCost', 0.0))
+        return ModifierCostProgram(cost_type, _no_cost, lambda mod_config_entry: flat_per_rank * mod_config_entry.get('rank', 1), None)
+    if cost_type == 'special_removable': return ModifierCostProgram(cost_type, _no_cost, _no_cost, mod_rule.get('removable_type', 'standard'))
+    return ModifierCostProgram(cost_type, _no_cost, _no_cost, None) # Alternate Effect / Linked markers and unknown types
+
+
+class SkillResolution(NamedTuple):
+    rule: RuleEntry # Base skill rule
+    ability: Optional[str] # Governing ability id
+    display_name: str # e.g. "Close Combat: Swords"
+    specialization: Optional[str] # e.g. "Swords"; None for a base skill
+
+
+class SkillResolver:
+    """
+    Resolves skill ids, display names and specialized ids ("skill_close_combat_swords") in one lookup:
+    an exact map over ids and names, then the longest matching "<id>_" prefix of a specializable
+    skill from a character trie, so a lookup costs O(len(skill id)) whatever the number of skills.
+    Resolutions (display names included) are memoized; the rule list must not change afterwards.
+    """
+    MEMO_SIZE = 4096
+
+    def __init__(self, skills_list: Optional[List[RuleEntry]]):
+        self._exact: Dict[str, RuleEntry] = {}
+        for key in ('id', 'name'): # Ids win over names, the first entry wins on duplicates
+            for rule in skills_list or []:
+                if rule.get(key) is not None: self._exact.setdefault(rule[key], rule)
+        self._prefix_trie: Dict[Optional[str], Any] = {} # char -> child node; None -> rule whose "<id>_" ends here
+        for rule in skills_list or []:
+            if not rule.get('specialization_possible') or not rule.get('id'): continue
+            node = self._prefix_trie
+            for char in rule['id'] + "_": node = node.setdefault(char, {})
+            node.setdefault(None, rule)
+        self._memo: Dict[str, Optional[SkillResolution]] = {}
+
+    def _longest_prefix(self, skill_id: str) -> Tuple[Optional[RuleEntry], int]:
+        node = self._prefix_trie; match: Tuple[Optional[RuleEntry], int] = (None, 0)
+        for depth, char in enumerate(skill_id, start=1):
+            node = node.get(char)
+            if node is None: break
+            if None in node: match = (node[None], depth)
+        return match
+
+    def resolve(self, skill_id_or_name: str) -> Optional[SkillResolution]:
+        if skill_id_or_name in self._memo: return self._memo[skill_id_or_name]
+        rule = self._exact.get(skill_id_or_name); specialization = None
+        if rule is None:
+            rule, prefix_len = self._longest_prefix(skill_id_or_name)
+            if prefix_len < len(skill_id_or_name): specialization = skill_id_or_name[prefix_len:].replace("_", " ").title()
+        resolution = None
+        if rule is not None:
+            display_name = f"{rule['name']}: {specialization}" if specialization else rule.get('name', skill_id_or_name)
+            resolution = SkillResolution(rule, rule.get('ability'), display_name, specialization)
+        if len(self._memo) >= self.MEMO_SIZE: self._memo.clear()
+        self._memo[skill_id_or_name] = resolution
+        return resolution
+
+
+class RuleCatalog:
+    """
+    Precompiled lookup tables over CoreEngine.rule_data.
+
+    Built once in CoreEngine.__init__ so that every rule resolution made while costing,
+    deriving and validating a character is a dictionary hit instead of a linear scan
+    over the JSON rule lists. The catalog never copies rule entries; the indexes
+    reference the same dicts held in `rule_data`, and none of them may be mutated.
+    """
+
+    def __init__(self, rule_data: Dict[str, Any]):
+        self.effects: RuleIndex = index_rules(rule_data.get('power_effects', []))
+        self.modifiers: RuleIndex = index_rules(rule_data.get('power_modifiers', []))
+        self.modifier_costs: Mapping[str, ModifierCostProgram] = MappingProxyType({mod_id: compile_modifier_cost(rule) for mod_id, rule in self.modifiers.items()})
+        self.advantages: RuleIndex = index_rules(rule_data.get('advantages_v1', []))
+        self.senses: RuleIndex = index_rules(rule_data.get('power_senses_config', []))
+        self.immunities: RuleIndex = index_rules(rule_data.get('power_immunities_config', []))
+        self.hq_features: RuleIndex = index_rules(rule_data.get('hq_features', []))
+        self.vehicle_features: RuleIndex = index_rules(rule_data.get('vehicle_features', []))
+        self.vehicle_size_stats: RuleIndex = index_rules(rule_data.get('vehicle_size_stats', []), key='size_rank_value')
+        # Per-effect choice tables, e.g. Transform scope options keyed by choice_id
+        self.effect_cost_options: Mapping[str, RuleIndex] = MappingProxyType({
+            effect_id: index_rules(effect_rule.get('costOptions'), key='choice_id')
+            for effect_id, effect_rule in self.effects.items() if effect_rule.get('costOptions')
+        })
+
+        # Measurements table sorted by rank; per-type curves are compiled on first use
+        self._measurements_table: List[RuleEntry] = sorted(
+            [entry for entry in rule_data.get('measurements_table', []) if isinstance(entry.get('rank'), (int, float))],
+            key=lambda x: x.get('rank', 0)
+        )
+        self._measurement_curves: Dict[str, MeasurementCurve] = {
+            measurement_type: MeasurementCurve(measurement_type, self._measurements_table) for measurement_type in ('distance', 'time', 'mass', 'volume')
+        }
+
+        skills_list = rule_data.get('skills', {}).get('list', [])
+        self.skills: RuleIndex = index_rules(skills_list)
+        self.skill_resolver = SkillResolver(skills_list) # Ids, names and specializations such as "skill_expertise_magic"
+
+    def get_measurement_curve(self, measurement_type: str) -> MeasurementCurve:
+        curve = self._measurement_curves.get(measurement_type)
+        if curve is None: curve = self._measurement_curves[measurement_type] = MeasurementCurve(measurement_type, self._measurements_table)
+        return curve
+
+    def get_skill(self, skill_id_or_name: str) -> Optional[RuleEntry]:
+        """Resolves a skill id, display name or specialized id (e.g. 'skill_expertise_magic') to its base rule."""
+        resolution = self.skill_resolver.resolve(skill_id_or_name)
+        return resolution.rule if resolution else None
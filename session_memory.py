@@ -0,0 +1,133 @@
+# session_memory.py for HeroForge M&M (Streamlit Edition)
+# Process-wide interning of immutable rule-derived defaults, and per-session memory accounting.
+
+"""
+One Streamlit process serves every session, and load_core_resources already shares one
+CoreEngine (and its rule data) between them. Defaults derived only from the rules (the default
+character skeleton per PL, the default power form) are likewise built once, frozen and
+interned, and sessions reference them instead of holding private deep copies:
+
+    state = dict(shared_character_skeleton(engine, pl)) # Only the top level is session-owned
+
+FrozenDict and FrozenList are dict and list subclasses, so JSON export, isinstance checks and
+the engine read them unchanged, while any in-place write raises TypeError. Copying them
+(dict(), list(), copy.copy, copy.deepcopy) yields ordinary mutable containers, which is exactly
+what the copy-on-write edits of character_state.assoc_in and CoreEngine.recalculate do, so a
+session only ever owns the branches it has actually changed.
+
+measure_session() walks a session's values and splits their memory into what each key holds,
+what it shares with the keys before it (structural sharing between states) and what points
+into interned data shared by all sessions.
+"""
+
+import copy
+import sys
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Set
+
+MemoryReport = Dict[str, Any]
+
+
+def _read_only(self, *args: Any, **kwargs: Any) -> Any:
+    raise TypeError(f"{type(self).__name__} is shared between sessions and cannot be modified in place; copy it first.")
+
+
+class FrozenDict(dict):
+    """Read-only dict. Copies are plain dicts."""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self) -> Dict[Any, Any]: return dict(self)
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[Any, Any]: return {copy.deepcopy(k, memo): copy.deepcopy(v, memo) for k, v in self.items()}
+    def __reduce__(self) -> Any: return (dict, (dict(self),)) # Pickles (and unpickles) as a plain dict
+
+
+class FrozenList(list):
+    """Read-only list. Copies are plain lists."""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self) -> List[Any]: return list(self)
+    def __deepcopy__(self, memo: Dict[int, Any]) -> List[Any]: return [copy.deepcopy(v, memo) for v in self]
+    def __reduce__(self) -> Any: return (list, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively converts dicts and lists to FrozenDict and FrozenList."""
+    if isinstance(value, FrozenDict) or isinstance(value, FrozenList): return value
+    if isinstance(value, dict): return FrozenDict({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list): return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Fully mutable deep copy of a (possibly frozen) value."""
+    return copy.deepcopy(value)
+
+
+_interned: Dict[Hashable, Any] = {}
+_interned_owners: Dict[Hashable, Any] = {} # Keeps objects whose id() is part of a key alive
+_interned_lock = threading.Lock()
+_interned_ids_cache: Dict[str, Any] = {'count': -1, 'ids': frozenset(), 'bytes': 0}
+
+
+def intern_frozen(key: Hashable, factory: Callable[[], Any], owner: Optional[Any] = None) -> Any:
+    """
+    The frozen result of `factory()`, built once per process for `key`.
+    With `owner` (e.g. a rule_data dict) the value is interned per owner object.
+    """
+    if owner is not None: key = (key, id(owner))
+    value = _interned.get(key)
+    if value is None:
+        with _interned_lock:
+            value = _interned.get(key)
+            if value is None:
+                value = _interned[key] = freeze(factory())
+                if owner is not None: _interned_owners[key] = owner
+    return value
+
+
+def shared_character_skeleton(engine: Any, pl: int = 10) -> FrozenDict:
+    """engine.get_default_character_state(pl), frozen and shared by every session using this ruleset."""
+    return intern_frozen(('character_skeleton', engine.ruleset_version, pl), lambda: engine.get_default_character_state(pl=pl))
+
+
+def _walk(roots: Iterable[Any], seen: Set[int], stop_ids: frozenset) -> Dict[str, int]:
+    """Bytes of the objects reachable from `roots` not yet in `seen`; objects in `stop_ids` are counted as interned and not entered."""
+    counts = {'bytes': 0, 'interned_bytes': 0}; stack = list(roots)
+    while stack:
+        obj = stack.pop(); obj_id = id(obj)
+        if obj_id in seen: continue
+        seen.add(obj_id)
+        if obj_id in stop_ids: counts['interned_bytes'] += sys.getsizeof(obj); continue
+        counts['bytes'] += sys.getsizeof(obj)
+        if isinstance(obj, dict): stack.extend(obj.keys()); stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)): stack.extend(obj)
+    return counts
+
+
+def _interned_ids() -> Dict[str, Any]:
+    """Ids and total size of every object reachable from interned values (recomputed only when the registry grows)."""
+    with _interned_lock: values = list(_interned.values())
+    if _interned_ids_cache['count'] != len(values):
+        seen: Set[int] = set(); counts = _walk(values, seen, frozenset())
+        _interned_ids_cache.update(count=len(values), ids=frozenset(seen), bytes=counts['bytes'])
+    return _interned_ids_cache
+
+
+def measure_session(session_values: Mapping[str, Any]) -> MemoryReport:
+    """
+    Memory held by one session, key by key (approximate, via sys.getsizeof):
+    {'keys': {key: {'bytes', 'shared_with_earlier_keys_bytes', 'interned_bytes'}},
+     'session_bytes', 'interned_bytes_total', 'interned_values'}.
+    'bytes' counts only objects first reached from that key; interned objects are never session-owned.
+    """
+    interned = _interned_ids(); session_seen: Set[int] = set(); keys: Dict[str, Dict[str, int]] = {}
+    for key in sorted(session_values, key=str):
+        value = session_values[key]
+        reachable = _walk([value], set(), interned['ids']) # Everything this key references
+        owned = _walk([value], session_seen, interned['ids']) # Only what no earlier key already holds
+        keys[str(key)] = {'bytes': owned['bytes'], 'shared_with_earlier_keys_bytes': reachable['bytes'] - owned['bytes'],
+                          'interned_bytes': reachable['interned_bytes']}
+    return {'keys': keys, 'session_bytes': sum(entry['bytes'] for entry in keys.values()),
+            'interned_bytes_total': interned['bytes'], 'interned_values': interned['count']}
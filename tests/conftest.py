@@ -0,0 +1,39 @@
+# tests/conftest.py
+
+"""
+Shared pytest fixtures for the HeroForge M&M test suite.
+
+Puts the project root on `sys.path` so test modules can import `core_engine`
+directly, and provides a single CoreEngine (rule loading is the slow part)
+plus a fresh default character state per test.
+"""
+
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from core_engine import CoreEngine, CharacterState, RuleData # noqa: E402
+
+RULES_DIR = os.path.join(PROJECT_ROOT, "rules")
+
+
+@pytest.fixture(scope="session")
+def core_engine_instance() -> CoreEngine:
+    """One engine for the whole session; tests must not mutate its rule data."""
+    return CoreEngine(rule_dir=RULES_DIR)
+
+
+@pytest.fixture
+def fresh_character_state(core_engine_instance: CoreEngine) -> CharacterState:
+    """A brand-new PL 10 character with no traits bought."""
+    return core_engine_instance.get_default_character_state()
+
+
+@pytest.fixture
+def rule_data_fixture(core_engine_instance: CoreEngine) -> RuleData:
+    return core_engine_instance.rule_data
@@ -0,0 +1,108 @@
+# tests/test_api_server.py
+
+import asyncio
+import json
+import threading
+import pytest
+
+import api_server # type: ignore
+from core_engine import CoreEngine, CharacterState # type: ignore
+from api_server import handle_request, start_server # type: ignore
+
+def _post(engine: CoreEngine, path: str, payload: dict):
+    status, content_type, body = handle_request(engine, 'POST', path, json.dumps(payload).encode('utf-8'))
+    return status, json.loads(body) if content_type == "application/json" else body
+
+def test_routes_recalculate_validate_and_cost_preview(core_engine_instance: CoreEngine, fresh_character_state: CharacterState):
+    engine = core_engine_instance
+    fresh_character_state['abilities']['STR'] = 4
+    status, body = _post(engine, '/recalculate', {'character': fresh_character_state})
+    assert status == 200 and body['character']['spentPowerPoints'] == 8
+    status, body = _post(engine, '/validate', {'character': fresh_character_state})
+    assert status == 200 and any("Complications" in err for err in body['validationErrors'])
+    assert {'code': 'complications_minimum', 'severity': 'warning', 'path': ['complications']}.items() <= body['validationIssues'][-1].items()
+    status, body = _post(engine, '/cost-preview', {'power': {"baseEffectId": "eff_flight", "rank": 4}})
+    assert status == 200 and body['totalCost'] == 8
+
+def test_route_errors_are_json(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    assert handle_request(engine, 'GET', '/nope', b"")[0] == 404
+    assert handle_request(engine, 'GET', '/recalculate', b"")[0] == 405
+    assert handle_request(engine, 'POST', '/recalculate', b"{not json")[0] == 400
+    status, body = _post(engine, '/recalculate', {'character': "not an object"})
+    assert status == 400 and "character" in body['error']
+
+def test_server_batches_concurrent_keep_alive_requests(core_engine_instance: CoreEngine, fresh_character_state: CharacterState):
+    async def scenario():
+        server, batcher = await start_server(core_engine_instance, port=0, batch_window_ms=5)
+        port = server.sockets[0].getsockname()[1]
+        async def client(pl: int):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            results = []
+            for path, payload in (('/health', None), ('/recalculate', {'character': dict(fresh_character_state, powerLevel=pl)})):
+                body = json.dumps(payload).encode() if payload else b""
+                method = "POST" if payload else "GET"
+                writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(next(l for l in head.decode().split("\r\n") if l.lower().startswith("content-length")).split(":")[1])
+                results.append((head.split(b" ")[1], json.loads(await reader.readexactly(length))))
+            writer.close()
+            return results
+        try:
+            return await asyncio.gather(*(client(pl) for pl in range(5, 13)))
+        finally:
+            server.close(); await server.wait_closed(); await batcher.close()
+    all_results = asyncio.run(scenario())
+    for pl, ((health_status, health), (recalc_status, recalc)) in zip(range(5, 13), all_results):
+        assert health_status == b"200" and health['status'] == "ok"
+        assert recalc_status == b"200" and recalc['character']['powerLevel'] == pl
+
+def test_server_answers_malformed_headers_before_closing(core_engine_instance: CoreEngine):
+    async def scenario():
+        server, batcher = await start_server(core_engine_instance, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async def send(raw: bytes):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw); await writer.drain()
+            response = await reader.read() # Server closes after the error response
+            writer.close()
+            return response
+        try:
+            return [await send(b"POST /validate HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n") for length in (b"abc", b"-5")] + \
+                   [await send(b"GET /health HTTP/1.1\r\nX-Filler: " + b"a" * (70 * 1024) + b"\r\n\r\n")]
+        finally:
+            server.close(); await server.wait_closed(); await batcher.close()
+    not_numeric, negative, oversized = asyncio.run(scenario())
+    assert not_numeric.startswith(b"HTTP/1.1 400") and b"Content-Length" in not_numeric
+    assert negative.startswith(b"HTTP/1.1 400")
+    assert oversized.startswith(b"HTTP/1.1 431")
+
+def test_pdf_export_renders_off_the_engine_thread(core_engine_instance: CoreEngine, fresh_character_state: CharacterState, monkeypatch):
+    status, pdf = _post(core_engine_instance, '/export/pdf', {'character': fresh_character_state})
+    assert status == 200 and pdf.startswith(b"%PDF")
+    release = threading.Event(); real_render = api_server._render_pdf; render_threads = []
+    def slow_render(engine, recalculated):
+        render_threads.append(threading.current_thread().name); release.wait(5)
+        return real_render(engine, recalculated)
+    monkeypatch.setattr(api_server, '_render_pdf', slow_render)
+
+    async def scenario():
+        server, batcher = await start_server(core_engine_instance, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async def post(path: str):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            body = json.dumps({'character': fresh_character_state}).encode()
+            writer.write(f"POST {path} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body); await writer.drain()
+            response = await reader.read(); writer.close()
+            return response
+        try:
+            export = asyncio.ensure_future(post('/export/pdf')); await asyncio.sleep(0.05)
+            recalculated = await asyncio.wait_for(post('/recalculate'), 2) # Answered while the export is still rendering
+            pending = not export.done(); release.set()
+            return recalculated, pending, await export
+        finally:
+            release.set(); server.close(); await server.wait_closed(); await batcher.close()
+    recalculated, export_pending, export = asyncio.run(scenario())
+    assert recalculated.startswith(b"HTTP/1.1 200") and export_pending
+    assert export.startswith(b"HTTP/1.1 200") and b"application/pdf" in export and render_threads[0].startswith("heroforge-render")
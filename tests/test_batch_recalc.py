@@ -0,0 +1,33 @@
+# tests/test_batch_recalc.py
+
+import pytest
+from typing import Dict, List, Any
+
+from core_engine import CoreEngine, CharacterState # type: ignore
+
+def _roster(engine: CoreEngine, count: int) -> List[CharacterState]:
+    roster = []
+    for i in range(count):
+        state = engine.get_default_character_state(pl=8 + i % 4)
+        state['name'] = f"NPC {i}"; state['abilities']['STR'] = i % 6
+        state['powers'].append({"id": f"pwr_{i}", "name": "Blast", "baseEffectId": "eff_damage", "rank": 1 + i % 10, "modifiersConfig": []})
+        roster.append(state)
+    return roster
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_recalculate_many_matches_sequential_in_order(core_engine_instance: CoreEngine, workers: int):
+    engine = core_engine_instance
+    roster = _roster(engine, 23)
+    results = list(engine.recalculate_many(iter(roster), workers=workers, chunksize=4))
+    assert [r['index'] for r in results] == list(range(23))
+    for result, state in zip(results, roster):
+        assert result['error'] is None
+        assert result['state']['spentPowerPoints'] == engine.recalculate(state)['spentPowerPoints']
+
+def test_recalculate_many_reports_errors_without_aborting(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    roster: List[Any] = _roster(engine, 3); roster.insert(1, {"powers": "not a list"})
+    results = list(engine.recalculate_many(roster, workers=2, chunksize=1))
+    assert [r['error'] is None for r in results] == [True, False, True, True]
+    assert results[1]['state'] is None and results[1]['error']
+    assert results[3]['state']['name'] == "NPC 2"
@@ -0,0 +1,23 @@
+# tests/test_benchmarks_synthetic.py
+
+from core_engine import CoreEngine # type: ignore
+from benchmarks.synthetic import make_character # type: ignore
+from benchmarks.run_benchmarks import benchmark_character # type: ignore
+
+def test_synthetic_character_has_requested_shape_and_is_deterministic(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    state = make_character(engine, powers=12, modifiers_per_power=3, array_size=4, enhancement_chain=2, packages=1, headquarters=1, vehicles=2, seed=7)
+    assert state == make_character(engine, powers=12, modifiers_per_power=3, array_size=4, enhancement_chain=2, packages=1, headquarters=1, vehicles=2, seed=7)
+    powers = state['powers']
+    assert len(powers) == 12 + 2 + 2 and all(len(p['modifiersConfig']) == 3 for p in powers[:12])
+    assert sum(1 for p in powers if p.get('arrayId') == "array_main") == 4
+    assert powers[13]['enhanced_trait_params']['trait_id'] == "pwr_enh_0" # Chained enhancement
+    assert len(state['headquarters']) == 1 and len(state['vehicles']) == 2
+    recalculated = engine.recalculate(state)
+    assert recalculated['spentPowerPoints'] > 0 and recalculated['derived_spent_ep'] > 0
+
+def test_benchmark_character_reports_every_hot_path(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    timings = benchmark_character(engine, make_character(engine, powers=3, modifiers_per_power=1, seed=1), repeat=1, include_pdf=False)
+    assert {'recalculate_cold', 'recalculate_warm', 'calculate_power_cost_cold', 'validate_all', 'get_power_measurement_details'} <= set(timings)
+    assert all(t['median_ms'] >= 0 for t in timings.values())
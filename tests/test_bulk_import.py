@@ -0,0 +1,37 @@
+# tests/test_bulk_import.py
+
+import json
+import os
+import pytest
+
+from core_engine import CoreEngine, CharacterState # type: ignore
+from bulk_import import import_characters # type: ignore
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_reports_every_entry_in_order(core_engine_instance: CoreEngine, fresh_character_state: CharacterState, tmp_path, workers: int):
+    engine = core_engine_instance
+    library = tmp_path / "library"; (library / "nested").mkdir(parents=True)
+    hero = {**fresh_character_state, 'name': "Valid Hero", 'complications': [{'description': "A"}, {'description': "B"}]}
+    (library / "a_hero.json").write_text(json.dumps(hero))
+    (library / "b_broken.json").write_text('{"name": "Broken",\n "powerLevel": 10,,}')
+    (library / "nested" / "roster.jsonl").write_text("\n".join([
+        json.dumps({'name': "Sparse", 'powerLevel': 8, 'abilities': {'STR': 2}, 'complications': hero['complications']}), # Merged onto the PL 8 defaults
+        "{not json", "", json.dumps({'name': "No abilities", 'powerLevel': 8}),
+        json.dumps({**hero, 'name': "Overspent", 'defenses': {**hero['defenses'], 'Dodge': 200}}),
+    ]))
+    reports = list(import_characters(engine, [str(library), str(tmp_path / "missing.json")], workers=workers, chunksize=1))
+    assert [(os.path.basename(r['source']), r['status']) for r in reports] == [
+        ("a_hero.json", 'ok'), ("b_broken.json", 'malformed'), ("roster.jsonl:1", 'ok'), ("roster.jsonl:2", 'malformed'),
+        ("roster.jsonl:4", 'malformed'), ("roster.jsonl:5", 'invalid'), ("missing.json", 'malformed')]
+    assert reports[0]['totalPowerPoints'] == 150 and reports[0]['errors'] == []
+    assert "line 2" in reports[1]['errors'][0]
+    assert reports[2]['powerLevel'] == 8 and reports[2]['spentPowerPoints'] == 4 and reports[2]['totalPowerPoints'] == 120
+    assert "powerLevel" not in reports[4]['errors'][0] and "abilities" in reports[4]['errors'][0]
+    assert any(e.startswith("PP Limit Exceeded") for e in reports[5]['errors'])
+
+def test_shipped_example_hero_is_reported_as_malformed(core_engine_instance: CoreEngine):
+    reports = list(import_characters(core_engine_instance, [os.path.join(REPO_DIR, "saved_characters")], workers=1))
+    example = next(r for r in reports if r['source'].endswith("example_hero.json"))
+    assert example['status'] == 'malformed' and "line 37" in example['errors'][0]
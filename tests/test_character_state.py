@@ -0,0 +1,44 @@
+# tests/test_character_state.py
+
+import copy
+import json
+import pytest
+
+from core_engine import CoreEngine, CharacterState # type: ignore
+from character_state import assoc_in, merge_onto_defaults # type: ignore
+
+def test_assoc_in_copies_only_the_edited_path():
+    state = {"name": "Hero", "skills": {"skill_stealth": 2}, "powers": [{"id": "p1", "rank": 3}, {"id": "p2", "rank": 1}]}
+    snapshot = copy.deepcopy(state)
+    edited = assoc_in(state, ['powers', 1, 'rank'], 5)
+    assert state == snapshot # Input untouched
+    assert edited['powers'][1]['rank'] == 5
+    assert edited['skills'] is state['skills'] and edited['powers'][0] is state['powers'][0] # Shared branches
+    assert assoc_in(state, ['headquarters_notes', 'main'], "x")['headquarters_notes'] == {"main": "x"} # Missing dicts created
+    with pytest.raises(IndexError):
+        assoc_in(state, ['powers', 5, 'rank'], 1)
+
+def test_recalculate_never_mutates_and_shares_unchanged_branches(core_engine_instance: CoreEngine, fresh_character_state: CharacterState):
+    engine = core_engine_instance
+    state = fresh_character_state
+    state['powers'].extend([
+        {"id": "pwr_fly", "name": "Flight", "baseEffectId": "eff_flight", "rank": 4, "modifiersConfig": [{"id": "mod_extra_increased_duration_continuous"}]},
+        {"id": "pwr_str", "name": "Super Strength", "baseEffectId": "eff_enhanced_trait", "rank": 3,
+         "enhanced_trait_params": {"category": "Ability", "trait_id": "STR"}, "modifiersConfig": []},
+    ])
+    snapshot = copy.deepcopy(state)
+    recalculated = engine.recalculate(state)
+    assert state == snapshot # Enhancements and derived fields land on copies only
+    assert recalculated['abilities']['STR'] == 3 and state['abilities']['STR'] == 0
+    assert recalculated['skills'] is state['skills'] and recalculated['defenses'] is state['defenses']
+    assert recalculated['powers'][0]['modifiersConfig'] is state['powers'][0]['modifiersConfig']
+    assert json.loads(json.dumps(recalculated)) == recalculated # Still the save-file JSON schema
+
+def test_merge_onto_defaults_shares_and_never_mutates():
+    defaults = {"name": "New Hero", "abilities": {"STR": 0, "AGL": 0}, "skills": {"skill_stealth": 0}, "powers": []}
+    loaded = {"name": "Loaded", "abilities": {"STR": 4}, "powers": [{"id": "p1"}], "notes": {"a": 1}}
+    snapshot = copy.deepcopy((defaults, loaded))
+    merged = merge_onto_defaults(defaults, loaded)
+    assert (defaults, loaded) == snapshot
+    assert merged == {"name": "Loaded", "abilities": {"STR": 4, "AGL": 0}, "skills": {"skill_stealth": 0}, "powers": [{"id": "p1"}], "notes": {"a": 1}}
+    assert merged['skills'] is defaults['skills'] and merged['powers'] is loaded['powers']
@@ -5,7 +5,7 @@ import math
 from typing import Dict, List, Any
 
 # Assuming CoreEngine is importable (see conftest.py for sys.path manipulation)
-from core_engine import CoreEngine, CharacterState # type: ignore
+from core_engine import CoreEngine, CharacterState, RuleData # type: ignore
 
 def test_calculate_advantage_cost(core_engine_instance: CoreEngine, fresh_character_state: CharacterState, rule_data_fixture: RuleData):
     """Tests calculation of total PP cost for advantages."""
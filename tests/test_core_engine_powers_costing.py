@@ -0,0 +1,40 @@
+# tests/test_core_engine_powers_costing.py
+
+import pytest
+from typing import Dict, List, Any
+
+from core_engine import CoreEngine, PowerDefinition # type: ignore
+
+@pytest.fixture
+def engine() -> CoreEngine:
+    return CoreEngine(rule_dir="rules", power_cost_cache_size=4) # Own instance: cache counters are per engine
+
+def test_power_cost_cache_hits_for_unchanged_cost_fields(engine: CoreEngine):
+    blast: PowerDefinition = {"id": "pwr_blast", "name": "Blast", "baseEffectId": "eff_damage", "rank": 8,
+                              "modifiersConfig": [{"id": "mod_extra_increased_range_close_to_ranged"}]}
+    first = engine.calculate_individual_power_cost(blast, [blast])
+    renamed = dict(blast, id="pwr_other", name="Renamed Blast", descriptors="fire") # Not cost-relevant
+    second = engine.calculate_individual_power_cost(renamed, [renamed])
+    assert first == second and first['totalCost'] == 16
+    assert first['costBreakdown'] is not second['costBreakdown'] # Callers get their own copies
+    assert engine.power_cost_cache_info() == {'hits': 1, 'misses': 1, 'maxsize': 4, 'currsize': 1}
+    engine.calculate_individual_power_cost(dict(blast, rank=9), [blast])
+    assert engine.power_cost_cache_info()['misses'] == 2
+
+def test_power_cost_cache_is_bounded_lru(engine: CoreEngine):
+    for rank in range(1, 7):
+        engine.calculate_individual_power_cost({"baseEffectId": "eff_flight", "rank": rank}, [])
+    assert engine.power_cost_cache_info()['currsize'] == 4
+    engine.calculate_individual_power_cost({"baseEffectId": "eff_flight", "rank": 1}, []) # Evicted
+    assert engine.power_cost_cache_info()['hits'] == 0
+
+def test_power_rank_enhancement_key_tracks_its_target(engine: CoreEngine):
+    flight = {"id": "pwr_fly", "baseEffectId": "eff_flight", "rank": 4, "modifiersConfig": []}
+    faster = {"id": "pwr_faster", "baseEffectId": "eff_enhanced_trait", "rank": 2, "modifiersConfig": [],
+              "enhanced_trait_params": {"category": "PowerRank", "trait_id": "pwr_fly"}}
+    base_cost = engine.calculate_individual_power_cost(faster, [flight, faster])
+    boosted_flight = dict(flight, modifiersConfig=[{"id": "mod_extra_increased_duration_continuous"}])
+    boosted_cost = engine.calculate_individual_power_cost(faster, [boosted_flight, faster])
+    assert boosted_cost['costPerRankFinal'] > base_cost['costPerRankFinal'] # Target change is not a stale hit
+    looped = dict(faster, enhanced_trait_params={"category": "PowerRank", "trait_id": "pwr_faster"})
+    assert engine._power_cost_fingerprint(looped, [looped]) is None # Cycles are never cached
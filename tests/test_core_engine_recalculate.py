@@ -0,0 +1,176 @@
+# tests/test_core_engine_recalculate.py
+
+import pytest
+from typing import Dict, List, Any
+
+from core_engine import CoreEngine, CharacterState # type: ignore
+
+@pytest.fixture
+def built_character(core_engine_instance: CoreEngine, fresh_character_state: CharacterState) -> CharacterState:
+    state = fresh_character_state
+    state['abilities'].update({"FGT": 4, "DEX": 2, "AGL": 3})
+    state['skills']["skill_stealth"] = 4
+    state['advantages'].append({"id": "adv_improved_initiative", "rank": 1, "params": {}, "instance_id": "adv1"})
+    state['powers'].extend([
+        {"id": "pwr_blast", "name": "Blast", "baseEffectId": "eff_damage", "rank": 8, "linkedCombatSkill": "skill_ranged_combat_blast",
+         "modifiersConfig": [{"id": "mod_extra_increased_range_close_to_ranged"}]},
+        {"id": "pwr_fly", "name": "Flight", "baseEffectId": "eff_flight", "rank": 4, "modifiersConfig": []},
+        {"id": "pwr_more_fly", "name": "Faster Flight", "baseEffectId": "eff_enhanced_trait", "rank": 2,
+         "enhanced_trait_params": {"category": "PowerRank", "trait_id": "pwr_fly"}, "modifiersConfig": []},
+    ])
+    return core_engine_instance.recalculate(state)
+
+def test_descriptive_change_recomputes_nothing(core_engine_instance: CoreEngine, built_character: CharacterState):
+    edited = dict(built_character, name="Renamed")
+    result = core_engine_instance.recalculate(edited, changed_key_paths=[['name']])
+    assert result['name'] == "Renamed"
+    assert result['powers'] is built_character['powers'] # Untouched branches are shared, not copied
+    assert result['validationErrors'] == built_character['validationErrors']
+
+def test_skill_change_patches_costs_validation_and_attack_bonus(core_engine_instance: CoreEngine, built_character: CharacterState):
+    engine = core_engine_instance
+    edited = dict(built_character, skills=dict(built_character['skills'], skill_stealth=40, skill_ranged_combat_blast=3))
+    result = engine.recalculate(edited, changed_key_paths=[['skills', 'skill_stealth'], ['skills', 'skill_ranged_combat_blast']])
+    assert result['spentPowerPoints'] == engine.calculate_all_costs(result)
+    assert any("Skill Rank Cap" in err for err in result['validationErrors'])
+    blast = next(p for p in result['powers'] if p['id'] == 'pwr_blast')
+    assert blast['attack_bonus_total'] == engine.get_attack_bonus_for_power(blast, result) == 2 + 3 # Ranged: DEX + linked skill
+    assert built_character['skills']['skill_stealth'] == 4 # Input not mutated
+
+def test_ability_change_matches_full_recalculate(core_engine_instance: CoreEngine, fresh_character_state: CharacterState):
+    engine = core_engine_instance
+    state = fresh_character_state
+    state['powers'].append({"id": "pwr_punch", "name": "Punch", "baseEffectId": "eff_damage", "rank": 6, "modifiersConfig": []})
+    recalculated = engine.recalculate(state)
+    edited = dict(recalculated, abilities=dict(recalculated['abilities'], AGL=6, FGT=5))
+    incremental = engine.recalculate(edited, changed_key_paths=[['abilities', 'AGL'], ['abilities', 'FGT']])
+    full = engine.recalculate(edited)
+    assert incremental['spentPowerPoints'] == full['spentPowerPoints']
+    assert incremental['validationErrors'] == full['validationErrors']
+    assert incremental['derived_initiative'] == full['derived_initiative'] == 6
+    assert incremental['powers'][0]['attack_bonus_total'] == full['powers'][0]['attack_bonus_total'] == 5 # Close: FGT
+
+def test_power_rank_change_recosts_power_and_power_rank_dependents(core_engine_instance: CoreEngine, built_character: CharacterState):
+    engine = core_engine_instance
+    powers = list(built_character['powers']); powers[1] = dict(powers[1], rank=6, modifiersConfig=[{"id": "mod_extra_increased_duration_continuous"}])
+    edited = dict(built_character, powers=powers)
+    result = engine.recalculate(edited, changed_key_paths=[['powers', 1, 'rank'], ['powers', 1, 'modifiersConfig']])
+    flight, enhancement = result['powers'][1], result['powers'][2]
+    assert flight['cost'] == 6 * flight['costPerRankFinal'] and flight['final_duration'] == "Continuous"
+    assert enhancement['costPerRankFinal'] == flight['costPerRankFinal'] # ET PowerRank costs as its target
+    assert result['powers'][0] is built_character['powers'][0] # Unrelated power untouched
+    assert result['spentPowerPoints'] == engine.calculate_all_costs(result)
+
+def test_unplannable_changes_fall_back_to_full_recalculate(core_engine_instance: CoreEngine, built_character: CharacterState, fresh_character_state: CharacterState):
+    engine = core_engine_instance
+    assert engine._get_recalc_plan(built_character, [['powers']]) is None # Whole list replaced
+    assert engine._get_recalc_plan(built_character, [['powers', 2, 'rank']]) is None # Enhanced Trait itself
+    assert engine._get_recalc_plan(built_character, [['some_unknown_key']]) is None
+    # A state that never went through recalculate is always fully recalculated
+    result = engine.recalculate(fresh_character_state, changed_key_paths=[['name']])
+    assert result['derived_is_recalculated'] and any("Complications" in err for err in result['validationErrors'])
+
+def _enhancer(power_id: str, target_id: str, rank: int = 1) -> Dict[str, Any]:
+    return {"id": power_id, "name": power_id, "baseEffectId": "eff_enhanced_trait", "rank": rank, "modifiersConfig": [],
+            "enhanced_trait_params": {"category": "PowerRank", "trait_id": target_id}}
+
+def test_enhanced_trait_chains_cost_each_target_once_in_dependency_order(fresh_character_state: CharacterState, monkeypatch: pytest.MonkeyPatch):
+    engine = CoreEngine(rule_dir="rules", power_cost_cache_size=0)
+    state = fresh_character_state # Listed enhancer-first: costing order comes from the graph, not the list
+    state['powers'].extend([_enhancer("pwr_c", "pwr_b"), _enhancer("pwr_b", "pwr_a"), _enhancer("pwr_a", "pwr_fly"),
+                            {"id": "pwr_fly", "name": "Flight", "baseEffectId": "eff_flight", "rank": 4, "modifiersConfig": []}])
+    graph = engine.power_rank_graph(state['powers'])
+    assert graph['order'] == [3, 2, 1, 0] and graph['cycles'] == [] and graph['enhancers'] == {1: [0], 2: [1], 3: [2]}
+    costed: List[str] = []; calculate = engine.calculate_individual_power_cost
+    monkeypatch.setattr(engine, 'calculate_individual_power_cost', lambda power, *args, **kwargs: costed.append(power['id']) or calculate(power, *args, **kwargs))
+    result = engine.recalculate(state)
+    assert costed == ["pwr_fly", "pwr_a", "pwr_b", "pwr_c"]
+    assert len({p['costPerRankFinal'] for p in result['powers']}) == 1 # Every link costs what flight does
+
+    powers = list(result['powers']); powers[3] = dict(powers[3], modifiersConfig=[{"id": "mod_extra_increased_duration_continuous"}])
+    incremental = engine.recalculate(dict(result, powers=powers), changed_key_paths=[['powers', 3, 'modifiersConfig']])
+    full = engine.recalculate(dict(state, powers=[dict(p, modifiersConfig=powers[i]['modifiersConfig']) for i, p in enumerate(state['powers'])]))
+    assert [p['costPerRankFinal'] for p in incremental['powers']] == [p['costPerRankFinal'] for p in full['powers']]
+    assert incremental['powers'][0]['costPerRankFinal'] > result['powers'][0]['costPerRankFinal'] # Reached through the whole chain
+
+def test_enhanced_trait_cycles_are_validation_errors(core_engine_instance: CoreEngine, fresh_character_state: CharacterState, capsys: pytest.CaptureFixture):
+    state = fresh_character_state
+    state['powers'].extend([_enhancer("pwr_x", "pwr_y"), _enhancer("pwr_y", "pwr_x"), _enhancer("pwr_tail", "pwr_x")])
+    graph = core_engine_instance.power_rank_graph(state['powers'])
+    assert graph['cycles'] == [[0, 1]] and graph['cyclic'] == {0, 1}
+    capsys.readouterr(); result = core_engine_instance.recalculate(state)
+    assert "Recursion" not in capsys.readouterr().out
+    assert [err for err in result['validationErrors'] if "Cycle" in err] == ["Power Enhancement Cycle: pwr_x -> pwr_y -> pwr_x enhance each other's rank; break the loop."]
+    assert all(p['cost'] >= 1 for p in result['powers'])
+
+def test_power_array_index_drives_costs_and_follows_power_edits(core_engine_instance: CoreEngine, fresh_character_state: CharacterState):
+    engine = core_engine_instance; state = fresh_character_state
+    blast = {"baseEffectId": "eff_damage", "modifiersConfig": [], "arrayId": "arr_energy"}
+    state['powers'].extend([dict(blast, id="pwr_base", name="Base", rank=8, isArrayBase=True, isDynamicArray=True),
+                            {"id": "pwr_fly", "name": "Flight", "baseEffectId": "eff_flight", "rank": 4, "modifiersConfig": []},
+                            dict(blast, id="pwr_ae1", name="AE 1", rank=6, isAlternateEffectOf="pwr_base"),
+                            dict(blast, id="pwr_ae2", name="AE 2", rank=6, isAlternateEffectOf="pwr_ae1")]) # Not the base: full cost
+    result = engine.recalculate(state)
+    energy = result['derived_power_arrays']['arr_energy']
+    assert (energy['base_index'], energy['alternate_effects'], energy['members'], energy['ae_cost']) == (0, [2], [0, 2, 3], 2)
+    assert energy['cost'] == result['powers'][0]['cost'] + 2
+    assert engine.calculate_power_cost(result['powers']) == energy['cost'] + result['powers'][1]['cost'] + result['powers'][3]['cost']
+    assert any("AE 2 is not an Alternate Effect of the base of array 'arr_energy'" in err for err in result['validationErrors'])
+
+    powers = list(result['powers']); powers[0] = dict(powers[0], rank=10)
+    ranked = engine.recalculate(dict(result, powers=powers), changed_key_paths=[['powers', 0, 'rank']])
+    assert ranked['derived_power_arrays']['arr_energy']['cost'] == ranked['powers'][0]['cost'] + 2 > energy['cost']
+    powers = list(result['powers']); powers[3] = dict(powers[3], arrayId=None, isAlternateEffectOf=None)
+    detached = engine.recalculate(dict(result, powers=powers), changed_key_paths=[['powers', 3, 'arrayId'], ['powers', 3, 'isAlternateEffectOf']])
+    full = engine.recalculate(dict(state, powers=[dict(p) for p in powers]))
+    assert detached['derived_power_arrays'] == full['derived_power_arrays'] and detached['derived_power_arrays']['arr_energy']['members'] == [0, 2]
+    assert detached['spentPowerPoints'] == full['spentPowerPoints'] and not any("Array" in err for err in detached['validationErrors'])
+
+def test_trait_summary_collects_every_effective_trait(core_engine_instance: CoreEngine, built_character: CharacterState):
+    engine = core_engine_instance
+    state = dict(built_character, advantages=built_character['advantages'] + [{"id": "adv_defensive_roll", "rank": 5}, {"id": "adv_close_attack", "rank": 2}],
+                 powers=built_character['powers'] + [{"id": "pwr_armor", "name": "Armor", "baseEffectId": "eff_protection", "rank": 4, "modifiersConfig": []}],
+                 skills=dict(built_character['skills'], skill_close_combat_unarmed=3), derived_is_recalculated=False)
+    result = engine.recalculate(state); summary = result['derived_trait_summary']
+    toughness = summary['defenses']['Toughness']
+    assert toughness['sources'] == {'Defensive Roll': 3, 'Protection': 4, 'Enhanced Trait': 0} # Defensive Roll capped by AGL 3
+    assert toughness['total'] == engine.get_total_defense(result, 'Toughness', 'STA') == result['abilities']['STA'] + 7
+    assert summary['initiative'] == result['derived_initiative'] == 3 + 4 and summary['abilities']['FGT'] == {'rank': 4, 'modifier': 4}
+    assert summary['skills']['skill_stealth'] == {'name': "Stealth", 'ability': "AGL", 'ranks': 4, 'bonus': 3 + 4}
+    blast = next(p for p in result['powers'] if p['id'] == 'pwr_blast')
+    assert [(attack['id'], attack['bonus']) for attack in summary['attacks']] == [('pwr_blast', blast['attack_bonus_total'])]
+    assert summary['unarmed_attack']['bonus'] == 4 + 2 + 3 # FGT + Close Attack + Close Combat: Unarmed
+    with pytest.raises(TypeError):
+        summary['defenses']['Toughness']['total'] = 0 # type: ignore[index]
+
+    edited = dict(result, defenses=dict(result['defenses'], Toughness=2))
+    incremental = engine.recalculate(edited, changed_key_paths=[['defenses', 'Toughness']])
+    assert incremental['derived_trait_summary'] == engine.recalculate(dict(state, defenses=edited['defenses']))['derived_trait_summary']
+    assert incremental['derived_trait_summary']['defenses']['Toughness']['total'] == toughness['total'] + 2
+
+def _enhanced_trait(power_id: str, category: str, trait_id: str, rank: int) -> Dict[str, Any]:
+    return {"id": power_id, "name": power_id, "baseEffectId": "eff_enhanced_trait", "rank": rank,
+            "enhanced_trait_params": {"category": category, "trait_id": trait_id}, "modifiersConfig": []}
+
+@pytest.mark.parametrize("key_path,value", [(['abilities', 'AGL'], 1), (['abilities', 'STR'], 6), (['defenses', 'Dodge'], 2),
+                                            (['skills', 'skill_stealth'], 5), (['advantages', 0, 'rank'], 3), (['powers', 0, 'rank'], 7)])
+def test_enhanced_traits_give_the_same_state_on_both_paths(core_engine_instance: CoreEngine, fresh_character_state: CharacterState, key_path: List[Any], value: Any):
+    from character_state import assoc_in # type: ignore
+    engine = core_engine_instance
+    state = fresh_character_state
+    state['abilities']['STR'] = 2; state['defenses']['Toughness'] = 1
+    state['advantages'].append({"id": "adv_close_attack", "rank": 1, "params": {}, "instance_id": "adv_ca"})
+    state['powers'].extend([{"id": "pwr_fly", "name": "Flight", "baseEffectId": "eff_flight", "rank": 4, "modifiersConfig": []},
+                            _enhanced_trait("et_str", "Ability", "STR", 3), _enhanced_trait("et_tough", "Defense", "Toughness", 2),
+                            _enhanced_trait("et_skill", "Skill", "skill_expertise_magic", 4), _enhanced_trait("et_close", "Advantage", "adv_close_attack", 2),
+                            _enhanced_trait("et_feint", "Advantage", "adv_agile_feint", 1), _enhanced_trait("et_fly", "PowerRank", "pwr_fly", 2)])
+    recalculated = engine.recalculate(state)
+    assert engine.recalculate(recalculated) == recalculated # Re-applying to an enhanced state changes nothing
+    assert (recalculated['abilities']['STR'], recalculated['defenses']['Toughness'], recalculated['skills']['skill_expertise_magic']) == (5, 3, 4)
+    assert recalculated['powers'][0]['rank'] == 6 and [adv['rank'] for adv in recalculated['advantages']] == [3, 1]
+
+    edited = assoc_in(recalculated, key_path, value)
+    incremental = engine.recalculate(edited, changed_key_paths=[key_path]); full = engine.recalculate(edited)
+    for key in ('abilities', 'defenses', 'skills', 'advantages', 'spentPowerPoints', 'validationErrors', 'derived_trait_summary'):
+        assert incremental[key] == full[key], key
+    assert [pwr['rank'] for pwr in incremental['powers']] == [pwr['rank'] for pwr in full['powers']]
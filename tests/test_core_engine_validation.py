@@ -0,0 +1,39 @@
+# tests/test_core_engine_validation.py
+
+import pytest
+
+from core_engine import CoreEngine, CharacterState # type: ignore
+from validation_rules import VALIDATION_RULES, rules_affected_by, validation_rule # type: ignore
+
+@pytest.fixture
+def over_cap_character(core_engine_instance: CoreEngine, fresh_character_state: CharacterState) -> CharacterState:
+    state = fresh_character_state
+    state.update(powerLevel=4, totalPowerPoints=20, complications=[{"description": "Rival"}])
+    state['abilities'].update({"AGL": 6, "STA": 5})
+    state['defenses'].update({"Dodge": 3, "Toughness": 2})
+    state['skills'].update({"skill_stealth": 12, "skill_acrobatics": 2})
+    return core_engine_instance.recalculate(state)
+
+def test_issues_are_structured_and_match_the_messages_in_order(core_engine_instance: CoreEngine, over_cap_character: CharacterState):
+    issues = core_engine_instance.get_validation_issues(over_cap_character)
+    assert [found['message'] for found in issues] == over_cap_character['validationErrors'] == core_engine_instance.validate_all(over_cap_character)
+    codes = [found['code'] for found in issues]
+    assert codes.index('pp_limit') < codes.index('defense_cap') < codes.index('skill_rank_cap') < codes.index('complications_minimum')
+    skill_issue = next(found for found in issues if found['code'] == 'skill_rank_cap')
+    assert skill_issue['path'] == ['skills', 'skill_stealth'] and skill_issue['severity'] == 'error'
+    assert next(found for found in issues if found['code'] == 'complications_minimum')['severity'] == 'warning'
+
+def test_an_edit_reruns_only_the_rules_reading_it(core_engine_instance: CoreEngine, over_cap_character: CharacterState):
+    engine = core_engine_instance
+    assert {rule.code for rule in rules_affected_by([['complications', 1]])} == {'complications'}
+    edited = dict(over_cap_character, skills=dict(over_cap_character['skills'], skill_stealth=3))
+    result = engine.recalculate(edited, changed_key_paths=[['skills', 'skill_stealth']])
+    rerun = {rule.code for rule in rules_affected_by([['skills']])}
+    for rule in VALIDATION_RULES: # Untouched rules keep the previous run's issue lists
+        assert (result['derived_validation_issues'][rule.code] is over_cap_character['derived_validation_issues'][rule.code]) == (rule.code not in rerun)
+    assert not any(found['code'] == 'skill_rank_cap' for found in engine.get_validation_issues(result))
+    assert result['validationErrors'] == engine.recalculate(dict(edited, derived_is_recalculated=False))['validationErrors']
+
+def test_rule_codes_are_unique():
+    with pytest.raises(ValueError):
+        validation_rule('pp_limit', reads=('powers',))(lambda engine, state: [])
@@ -0,0 +1,34 @@
+# tests/test_cost_sweep.py
+
+import numpy as np
+
+from core_engine import CoreEngine, PowerDefinition # type: ignore
+from cost_sweep import build_modifier_variants, _vectorized_costs # type: ignore
+
+def test_sweep_matches_individual_costing(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    blast: PowerDefinition = {"id": "pwr_blast", "baseEffectId": "eff_damage", "rank": 1, "modifiersConfig": []}
+    variants = build_modifier_variants([], {"Ranged": {"id": "mod_extra_increased_range_close_to_ranged"},
+                                            "Accurate": {"id": "mod_extra_accurate", "rank": 2}})
+    assert list(variants) == ["Base", "Ranged", "Accurate", "Ranged + Accurate"]
+    sweep = engine.sweep_power_costs(blast, range(0, 21), variants)
+    for label, row in zip(sweep['variants'], sweep['total_cost']):
+        for rank, cost in zip(sweep['ranks'], row):
+            assert cost == engine.calculate_individual_power_cost({**blast, 'modifiersConfig': variants[label], 'rank': rank}, [blast])['totalCost']
+    assert sweep['total_cost'][3][10] == 10 * 2 + 2 # 2 PP/rank + Accurate 2 flat
+
+def test_sweep_fractional_and_package_effects(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    quickness: PowerDefinition = {"baseEffectId": "eff_quickness", "rank": 1, "modifiersConfig": []} # 1 PP per 2 ranks
+    sweep = engine.sweep_power_costs(quickness, [1, 2, 3, 4, 5, 10])
+    expected = [engine.calculate_individual_power_cost({**quickness, 'rank': r}, [])['totalCost'] for r in sweep['ranks']]
+    assert sweep['total_cost'][0] == expected == [1, 1, 2, 2, 3, 5]
+    immunity: PowerDefinition = {"baseEffectId": "eff_immunity", "rank": 1, "immunityConfig": sorted(engine.catalog.immunities)[:2], "modifiersConfig": []}
+    assert len(set(engine.sweep_power_costs(immunity, range(1, 6))['total_cost'][0])) == 1 # Package price ignores rank
+
+def test_vectorized_fraction_and_removable_rounding():
+    ranks = np.arange(0, 11, dtype=np.float64)[np.newaxis, :]
+    costs = _vectorized_costs(ranks, np.array([[0.5], [2.0], [2.0]]), np.array([[0.0], [1.0], [1.0]]), np.array([[0.0], [1.0], [2.0]]))
+    assert costs[0].tolist() == [0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5] # 1 PP per 2 ranks, rounded up
+    assert costs[1][10] == 21 - 4 # Removable: -1 per 5 PP
+    assert costs[2][10] == 21 - 8 # Easily Removable: -2 per 5 PP
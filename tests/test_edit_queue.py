@@ -0,0 +1,62 @@
+# tests/test_edit_queue.py
+
+from core_engine import CoreEngine # type: ignore
+from edit_queue import EditQueue, coalesce_key_paths # type: ignore
+
+class _Clock:
+    def __init__(self): self.now = 100.0
+    def __call__(self): return self.now
+
+def test_rapid_edits_are_recalculated_once_after_the_debounce_window(core_engine_instance: CoreEngine, monkeypatch):
+    engine = core_engine_instance; clock = _Clock()
+    states = {'character': engine.recalculate(engine.get_default_character_state(pl=10))}
+    computed = states['character']; queue = EditQueue(engine, debounce_seconds=0.4, max_delay_seconds=2.0, clock=clock)
+    recalc_calls = []; real_recalculate = engine.recalculate
+    monkeypatch.setattr(engine, 'recalculate', lambda state, changed_key_paths=None: recalc_calls.append(changed_key_paths) or real_recalculate(state, changed_key_paths))
+
+    for ability, rank in (('STR', 2), ('STR', 4), ('AGL', 3)):
+        queue.stage(states, 'character', ['abilities', ability], rank); clock.now += 0.1
+    queue.stage(states, 'character', ['skills', 'skill_stealth'], 5)
+    assert states['character']['abilities']['STR'] == 4 and states['character']['skills']['skill_stealth'] == 5 # Visible at once
+    assert queue.display_state(states, 'character') is computed and not queue.is_due('character') and queue.flush_due(states) == {}
+
+    clock.now += 0.4
+    assert queue.flush_due(states) == {'character': None} and queue.pending_keys(states) == []
+    assert recalc_calls == [[['abilities', 'STR'], ['abilities', 'AGL'], ['skills', 'skill_stealth']]]
+    full = real_recalculate(states['character'])
+    assert states['character']['spentPowerPoints'] == full['spentPowerPoints'] == computed['spentPowerPoints'] + (4 + 3) * 2 + 3
+    assert queue.display_state(states, 'character') is states['character']
+
+def test_continuous_editing_flushes_at_max_delay_and_replaced_states_drop_their_batch(core_engine_instance: CoreEngine):
+    engine = core_engine_instance; clock = _Clock()
+    states = {'character': engine.recalculate(engine.get_default_character_state(pl=10))}
+    queue = EditQueue(engine, debounce_seconds=0.4, max_delay_seconds=1.0, clock=clock)
+    for rank in range(1, 7):
+        queue.stage(states, 'character', ['abilities', 'FGT'], rank); clock.now += 0.3
+        if queue.flush_due(states): break
+    assert rank == 4 and states['character']['abilities']['FGT'] == 4 and states['character']['derived_is_recalculated']
+
+    queue.stage(states, 'character', ['name'], "Queued")
+    states['character'] = engine.recalculate(engine.get_default_character_state(pl=8)) # e.g. a loaded file
+    assert queue.pending_keys(states) == [] and queue.flush(states) == {} and states['character']['powerLevel'] == 8
+    assert coalesce_key_paths([['powers', 0, 'rank'], ['powers'], ['name'], ['powers']]) == [['powers'], ['name']]
+
+def test_staged_states_rebuild_derived_data_until_the_flush(core_engine_instance: CoreEngine):
+    engine = core_engine_instance; clock = _Clock()
+    state = engine.get_default_character_state(pl=10)
+    state['powers'] = [{"id": f"pwr_{n}", "name": n, "baseEffectId": "eff_flight", "rank": 2, "modifiersConfig": [], "arrayId": "arr1", "isAlternateEffectOf": None if n == 'base' else "pwr_base"}
+                       for n in ('base', 'ae1', 'ae2')]
+    states = {'character': engine.recalculate(state)}; computed = states['character']
+    queue = EditQueue(engine, clock=clock)
+    assert engine.get_power_arrays(computed)['arr1']['alternate_effects'] == [1, 2]
+
+    staged = queue.stage(states, 'character', ['powers'], computed['powers'][:1] + computed['powers'][2:]) # "Del" on the first alternate effect
+    queue.stage(states, 'character', ['defenses', 'Dodge'], 3); staged = states['character']
+    assert engine.get_power_arrays(staged)['arr1']['alternate_effects'] == [1] and engine.get_trait_summary(staged)['defenses']['Dodge']['bought'] == 3
+    assert queue.display_state(states, 'character') is computed and engine.get_trait_summary(computed)['defenses']['Dodge']['bought'] == 0
+
+    clock.now += 1.0
+    assert queue.flush_due(states) == {'character': None}
+    full = engine.recalculate(states['character'])
+    for key in ('derived_power_arrays', 'derived_trait_summary', 'spentPowerPoints', 'validationErrors'):
+        assert states['character'][key] == full[key], key
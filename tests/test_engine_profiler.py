@@ -0,0 +1,39 @@
+# tests/test_engine_profiler.py
+
+import json
+from typing import Any, Dict, List
+
+from core_engine import CoreEngine, CharacterState # type: ignore
+
+def _character(fresh_character_state: CharacterState) -> CharacterState:
+    fresh_character_state['powers'].extend([
+        {"id": "pwr_blast", "name": "Blast", "baseEffectId": "eff_damage", "rank": 8, "modifiersConfig": []},
+        {"id": "pwr_fly", "name": "Flight", "baseEffectId": "eff_flight", "rank": 4, "modifiersConfig": []},
+    ])
+    return fresh_character_state
+
+def test_profile_block_records_phases_and_powers(core_engine_instance: CoreEngine, fresh_character_state: CharacterState):
+    engine = core_engine_instance; state = _character(fresh_character_state)
+    with engine.profile() as profile:
+        recalculated = engine.recalculate(state)
+        engine.recalculate(dict(recalculated, name="Renamed"), changed_key_paths=[['name']])
+    engine.recalculate(state) # Outside the block: not recorded
+    report = profile.report()
+    assert report['recalculations'] == 2
+    for phase in ('apply_enhancements', 'derive_powers', 'calculate_derived_values', 'calculate_all_costs', 'validate_all'):
+        assert report['phases'][phase]['calls'] == 1
+    assert report['phases']['recalculate_total']['calls'] == 2
+    assert {p['id'] for p in report['slowest_powers']} == {"pwr_blast", "pwr_fly"}
+    assert json.loads(json.dumps(report)) == report
+
+def test_metrics_sink_gets_one_report_per_recalculate(core_engine_instance: CoreEngine, fresh_character_state: CharacterState):
+    engine = core_engine_instance; reports: List[Dict[str, Any]] = []
+    engine.add_metrics_sink(reports.append)
+    try:
+        engine.recalculate(_character(fresh_character_state))
+    finally:
+        engine.remove_metrics_sink(reports.append)
+    engine.recalculate(fresh_character_state)
+    assert len(reports) == 1 and reports[0]['recalculations'] == 1
+    assert reports[0]['power_cost_cache']['hits'] + reports[0]['power_cost_cache']['misses'] >= 2
+    assert engine._active_profile is None and not engine._metrics_sinks # Disabled again: no timing overhead
@@ -0,0 +1,34 @@
+# tests/test_npc_optimizer.py
+
+import pytest
+
+from core_engine import CoreEngine # type: ignore
+from npc_optimizer import build_archetype_character # type: ignore
+
+CAP_ERROR_PREFIXES = ("PP Limit", "Defense Cap", "Skill Rank Cap", "Skill Bonus Cap", "Power Attack Cap")
+
+@pytest.mark.parametrize("pl", [6, 10, 13])
+def test_optimized_archetypes_are_legal_and_costed_exactly(core_engine_instance: CoreEngine, pl: int):
+    engine = core_engine_instance
+    for archetype in engine.rule_data['archetypes']:
+        result = engine.optimize_archetype_build(archetype['id'], pl=pl)
+        character = result['character']
+        assert not [e for e in character['validationErrors'] if e.startswith(CAP_ERROR_PREFIXES)], archetype['id']
+        assert result['predicted_spent'] == character['spentPowerPoints'] <= character['totalPowerPoints'] == pl * 15
+        assert character['powerLevel'] == pl
+
+def test_search_uses_cost_deltas_not_recalculations(core_engine_instance: CoreEngine, monkeypatch):
+    engine = core_engine_instance; calls = []
+    original = engine.recalculate
+    monkeypatch.setattr(engine, 'recalculate', lambda state, changed_key_paths=None: calls.append(1) or original(state, changed_key_paths))
+    result = engine.optimize_archetype_build('arch_gadgeteer', pl=10)
+    assert len(calls) == 2 # Model probe + final character
+    assert result['spentPowerPoints'] == 150 # Exactly fills the budget
+
+def test_build_archetype_character_scales_and_overrides(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    paragon = build_archetype_character(engine, 'arch_paragon', pl=5, trait_ranks={('abilities', 'STA'): 1})
+    assert paragon['abilities']['STR'] == 5 and paragon['abilities']['STA'] == 1
+    strength = next(p for p in paragon['powers'] if p['baseEffectId'] == 'eff_enhanced_trait')
+    assert strength['enhanced_trait_params'] == {'category': 'Ability', 'trait_id': 'STR'} and strength['rank'] == 2 # round(5 * 5/10)
+    with pytest.raises(KeyError): build_archetype_character(engine, 'arch_missing')
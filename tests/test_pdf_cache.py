@@ -0,0 +1,41 @@
+# tests/test_pdf_cache.py
+
+import io
+import os
+
+from core_engine import CoreEngine # type: ignore
+from character_state import assoc_in # type: ignore
+from pdf_cache import PdfCache, cached_character_sheet, sheet_cache_key, state_hash # type: ignore
+
+def _fake_renderer(calls):
+    def render(character_state, rule_data, engine):
+        calls.append(character_state.get('name'))
+        return io.BytesIO(b"%PDF-fake " + character_state.get('name', '').encode('utf-8') + b" " * 400)
+    return render
+
+def test_repeated_exports_are_served_from_cache_and_changes_rerender(core_engine_instance: CoreEngine, tmp_path):
+    engine = core_engine_instance; calls = []; render = _fake_renderer(calls); cache = PdfCache(str(tmp_path))
+    hero = engine.recalculate(assoc_in(engine.get_default_character_state(pl=10), ['name'], "Hero"))
+    reordered = dict(reversed(list(hero.items())))
+    assert state_hash(reordered) == state_hash(hero) and sheet_cache_key(hero, engine) != sheet_cache_key(hero, engine, variant='roster')
+
+    first = cached_character_sheet(hero, engine.rule_data, engine, cache=cache, render=render)
+    again = cached_character_sheet(reordered, engine.rule_data, engine, cache=cache, render=render)
+    assert calls == ["Hero"] and again.getvalue() == first.getvalue() and cache.hits == 1
+    edited = engine.recalculate(assoc_in(hero, ['abilities', 'STR'], 3), changed_key_paths=[['abilities', 'STR']])
+    cached_character_sheet(edited, engine.rule_data, engine, cache=cache, render=render)
+    assert calls == ["Hero", "Hero"] and cache.stats()['entries'] == 2
+    assert cached_character_sheet(edited, engine.rule_data, engine, cache=cache, render=lambda *args: None) is not None # Cached despite a broken renderer
+    assert cached_character_sheet(hero, engine.rule_data, engine, cache=None, render=lambda *args: None) is None and cache.stats()['entries'] == 2
+
+def test_cache_evicts_least_recently_used_beyond_max_bytes(core_engine_instance: CoreEngine, tmp_path):
+    engine = core_engine_instance; calls = []; render = _fake_renderer(calls); cache = PdfCache(str(tmp_path), max_bytes=1000)
+    base = engine.get_default_character_state(pl=10)
+    states = [assoc_in(base, ['name'], name) for name in ("A", "B", "C")]
+    for mtime, state in enumerate(states[:2]):
+        cached_character_sheet(state, engine.rule_data, engine, cache=cache, render=render)
+        os.utime(os.path.join(str(tmp_path), sheet_cache_key(state, engine) + ".pdf"), (mtime, mtime))
+    cache.get(sheet_cache_key(states[0], engine)) # "A" becomes most recently used
+    cached_character_sheet(states[2], engine.rule_data, engine, cache=cache, render=render)
+    assert cache.evictions == 1 and cache.stats()['bytes'] <= 1000
+    assert cache.get(sheet_cache_key(states[1], engine)) is None and cache.get(sheet_cache_key(states[0], engine)) is not None
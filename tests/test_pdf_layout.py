@@ -0,0 +1,33 @@
+# tests/test_pdf_layout.py
+
+import pdf_utils # type: ignore
+from core_engine import CoreEngine # type: ignore
+from npc_optimizer import optimize_archetype_build # type: ignore
+
+def test_packing_fills_columns_in_order_and_balances_the_last_page():
+    top = lambda column: 50.0 if column < pdf_utils.COLUMN_COUNT else pdf_utils.TOP_MARGIN
+    placements = pdf_utils._pack_blocks([30.0] * 9, top) # 270 mm: one balanced page of 3 x 90 mm
+    assert [column for column, _ in placements] == [0, 0, 0, 1, 1, 1, 2, 2, 2]
+    assert [y for _, y in placements[:3]] == [50.0, 80.0, 110.0]
+
+    heights = [40.0] * 30 # 1200 mm: overflows the first page
+    placements = pdf_utils._pack_blocks(heights, top)
+    assert all(y + h <= pdf_utils.CONTENT_BOTTOM_Y for (_, y), h in zip(placements, heights))
+    assert [column for column, _ in placements] == sorted(column for column, _ in placements) # Reading order
+    last_page = [column for column, _ in placements if column >= 3]
+    assert max(last_page.count(c) for c in set(last_page)) - min(last_page.count(c) for c in set(last_page)) <= 1
+
+def test_large_character_sheet_stays_inside_the_page_margins(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    character = dict(optimize_archetype_build(engine, 'arch_energy_projector', pl=10)['character'])
+    base_powers = character['powers']
+    character['powers'] = [dict(base_powers[i % len(base_powers)], id=f"pwr_{i}", name=f"Power {i}") for i in range(60)]
+    character = engine.recalculate(character)
+
+    draws = pdf_utils._join_kept_blocks(pdf_utils._sheet_blocks(character, engine.rule_data, engine))
+    heights = pdf_utils._measure_blocks(draws, pdf_utils.COLUMN_WIDTH)
+    placements = pdf_utils._pack_blocks(heights, lambda column: 60.0 if column < pdf_utils.COLUMN_COUNT else pdf_utils.TOP_MARGIN)
+    assert max(heights) < pdf_utils.CONTENT_BOTTOM_Y - pdf_utils.TOP_MARGIN # Every block fits a column on its own
+    assert all(y + h <= pdf_utils.CONTENT_BOTTOM_Y + 1e-6 for (_, y), h in zip(placements, heights))
+    pdf_buffer = pdf_utils.generate_fpdf_character_sheet(character, engine.rule_data, engine)
+    assert pdf_buffer is not None and pdf_buffer.getvalue().count(b"/Type /Page\n") >= 3
@@ -0,0 +1,46 @@
+# tests/test_pdf_roster.py
+
+import io
+import re
+import pytest
+
+from core_engine import CoreEngine # type: ignore
+from npc_optimizer import optimize_archetype_build # type: ignore
+from pdf_roster import _PdfConcatWriter, generate_fpdf_roster # type: ignore
+from pdf_utils import generate_fpdf_character_sheet # type: ignore
+
+def _roster_states(engine: CoreEngine):
+    states = []
+    for i, archetype in enumerate(engine.rule_data.get('archetypes', [])[:3]):
+        character = dict(optimize_archetype_build(engine, archetype['id'], pl=10)['character'])
+        character.update(name=f"Hero {i} — “{archetype['name']}”", complications=[{'description': "Secret identity"}, {'description': "Rival"}],
+                         equipment=[{'id': 'eq_commlink', 'name': "Commlink", 'ep_cost': 1}])
+        states.append(engine.recalculate(character))
+    return states
+
+def test_character_sheet_renders_every_section(core_engine_instance: CoreEngine):
+    pdf_buffer = generate_fpdf_character_sheet(_roster_states(core_engine_instance)[0], core_engine_instance.rule_data, core_engine_instance)
+    assert pdf_buffer is not None and pdf_buffer.getvalue().startswith(b"%PDF")
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_roster_concatenates_sheets_with_index_and_bookmarks(core_engine_instance: CoreEngine, workers: int):
+    engine = core_engine_instance; states = _roster_states(engine) + [{'name': "Broken", 'powers': "not a list"}]
+    out = io.BytesIO()
+    entries = generate_fpdf_roster(iter(states), engine.rule_data, engine, out, workers=workers, title="Table 3")
+    assert [entry['name'] for entry in entries] == [state['name'] for state in states]
+    assert [entry['first_page'] for entry in entries[:3]] == [2, 3, 4] and entries[3]['first_page'] is None and entries[3]['error']
+
+    objects, trailer = _PdfConcatWriter._objects(out.getvalue())
+    catalog = objects[int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))]
+    kids = re.findall(rb"(\d+) 0 R", re.search(rb"/Kids \[([^\]]*)\]", objects[1]).group(1))
+    assert b"/Outlines" in catalog and len(kids) == 4 == sum(entry['pages'] for entry in entries) + 1
+    assert all(b"/Parent 1 0 R" in objects[int(kid)] and b"/MediaBox" in objects[int(kid)] for kid in kids)
+    pdf_bytes = out.getvalue() # Independent of _PdfConcatWriter: every xref offset must land on its own object
+    xref_start = int(re.search(rb"startxref\s+(\d+)\s+%%EOF\s*$", pdf_bytes).group(1))
+    first_obj, count = (int(v) for v in re.match(rb"xref\s+(\d+) (\d+)", pdf_bytes[xref_start:]).groups())
+    xref_entries = re.findall(rb"(\d{10}) (\d{5}) ([nf])", pdf_bytes[xref_start:pdf_bytes.index(b"trailer", xref_start)])
+    assert len(xref_entries) == count and int(re.search(rb"/Size (\d+)", trailer).group(1)) == first_obj + count
+    assert all(pdf_bytes[int(offset):].startswith(b"%d 0 obj" % (first_obj + i)) for i, (offset, _, kind) in enumerate(xref_entries) if kind == b"n")
+    assert not re.search(rb"(?<![\d.])0 0 R", pdf_bytes)
+    bookmark_pages = [int(m) for obj_num, body in sorted(objects.items()) for m in re.findall(rb"/Dest \[(\d+) 0 R", body)]
+    assert bookmark_pages == [int(kid) for kid in kids] # Index first, then one bookmark per rendered character
@@ -0,0 +1,36 @@
+# tests/test_pdf_text_metrics.py
+
+import pytest
+from fpdf import FPDF
+
+import pdf_text_metrics # type: ignore
+
+SAMPLES = ["Effect: Damage 10 (Ranged, Area: Burst)", "Extras: Accurate 2, Increased Range — Perception", "",
+           "Supercalifragilisticexpialidociousandthensome words", "Line one\nLine two is a little bit longer than line one", "  double  spaces  "]
+
+def _pdf(style: str, size: float) -> FPDF:
+    pdf = FPDF('P', 'mm', 'Letter'); pdf.add_page(); pdf.set_font('Helvetica', style, size)
+    return pdf
+
+@pytest.mark.parametrize("style,size", [('', 7), ('B', 7.5), ('I', 9)])
+def test_widths_and_wraps_match_fpdf(style: str, size: float):
+    pdf = _pdf(style, size)
+    for text in SAMPLES:
+        core_text = pdf_text_metrics.to_core_font_text(text)
+        assert pdf_text_metrics.string_width(pdf, text) == pytest.approx(pdf.get_string_width(core_text))
+        for width in (25.0, 40.0, 62.0):
+            assert list(pdf_text_metrics.wrap_text(pdf, width, text)) == pdf.multi_cell(width, text=core_text, border=0, dry_run=True, output="LINES")
+
+@pytest.mark.parametrize("text", ["Line one\n", "\n", "a\n\n", "Line one\nLine two  \n", "word word word ", "Supercalifragilistic   ", "  x  \n\n  "])
+def test_trailing_newlines_and_spaces_add_no_line(text: str):
+    pdf = _pdf('', 7)
+    for width in (8.0, 9.0, 20.0, 40.0):
+        assert list(pdf_text_metrics.wrap_text(pdf, width, text)) == pdf.multi_cell(width, text=text, border=0, dry_run=True, output="LINES")
+
+def test_multi_cell_positions_like_fpdf_and_memoizes():
+    pdf = _pdf('', 7); text = SAMPLES[1] * 3
+    pdf.set_xy(20, 30); bottom = pdf_text_metrics.multi_cell(pdf, 40, 3, text)
+    assert (pdf.get_x(), bottom) == (60, 30 + 3 * len(pdf_text_metrics.wrap_text(pdf, 40, text)))
+    hits = pdf_text_metrics.cache_info()['wrap']['hits']
+    pdf.measuring = True; pdf.set_xy(20, 30); pdf_text_metrics.multi_cell(pdf, 40, 3, text)
+    assert pdf.get_y() == bottom and pdf_text_metrics.cache_info()['wrap']['hits'] > hits
@@ -0,0 +1,84 @@
+# tests/test_rule_catalog.py
+
+import pytest
+from typing import Dict, List, Any
+
+from core_engine import CoreEngine, CharacterState, RuleData # type: ignore
+from rule_catalog import RuleCatalog, SkillResolver, index_rules # type: ignore
+
+def test_index_rules_first_entry_wins_and_is_read_only():
+    rules = [{"id": "a", "v": 1}, {"id": "b", "v": 2}, {"id": "a", "v": 3}, {"name": "no id"}]
+    index = index_rules(rules)
+    assert index["a"]["v"] == 1 # Same result as next((r for r in rules if r['id'] == 'a'))
+    assert set(index.keys()) == {"a", "b"}
+    with pytest.raises(TypeError):
+        index["c"] = {"id": "c"} # type: ignore[index]
+
+def test_catalog_indexes_every_rule_family(core_engine_instance: CoreEngine, rule_data_fixture: RuleData):
+    catalog = core_engine_instance.catalog
+    assert len(catalog.effects) == len(rule_data_fixture['power_effects'])
+    assert len(catalog.modifiers) == len(rule_data_fixture['power_modifiers'])
+    assert len(catalog.advantages) == len(rule_data_fixture['advantages_v1'])
+    assert catalog.effects['eff_damage'] is next(e for e in rule_data_fixture['power_effects'] if e['id'] == 'eff_damage') # No copies
+    size_rule = rule_data_fixture['vehicle_size_stats'][0]
+    assert catalog.vehicle_size_stats[size_rule['size_rank_value']] is size_rule
+
+def test_catalog_skill_resolution(core_engine_instance: CoreEngine):
+    catalog = core_engine_instance.catalog
+    assert catalog.get_skill("skill_stealth")['id'] == "skill_stealth"
+    assert catalog.get_skill("Stealth")['id'] == "skill_stealth" # By display name
+    assert catalog.get_skill("skill_expertise_magic")['id'] == "skill_expertise" # Specialization prefix
+    assert catalog.get_skill("skill_stealth_extra") is None # Stealth does not take specializations
+    assert core_engine_instance.get_skill_rule("skill_close_combat_swords")['ability'] == "FGT"
+
+def test_skill_resolver_names_multi_word_specializations(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    swords = engine.resolve_skill("skill_close_combat_swords")
+    assert (swords.rule['id'], swords.ability, swords.specialization) == ("skill_close_combat", "FGT", "Swords")
+    assert engine.get_skill_name_by_id("skill_close_combat_swords") == "Close Combat: Swords" # Was the raw id
+    assert engine.get_skill_name_by_id("skill_expertise_ancient_history") == "Expertise: Ancient History"
+    assert engine.get_skill_name_by_id("skill_stealth") == "Stealth" and engine.get_skill_name_by_id("skill_unknown") == "skill_unknown"
+    assert engine.resolve_skill("skill_close_combat_swords") is swords # Memoized
+    resolver = SkillResolver([{"id": "sk_lore", "name": "Lore", "ability": "INT", "specialization_possible": True},
+                              {"id": "sk_lore_arcane", "name": "Arcane Lore", "ability": "AWE", "specialization_possible": True}])
+    assert resolver.resolve("sk_lore_arcane_runes").display_name == "Arcane Lore: Runes" # Longest prefix wins
+    assert resolver.resolve("sk_lore_arcane").specialization is None and resolver.resolve("sk_lore_").display_name == "Lore"
+    assert engine.get_skill_name_by_id("sk_lore_arcane_runes", [{"id": "sk_lore", "name": "Lore", "specialization_possible": True}]) == "Lore: Arcane Runes"
+
+def test_hq_and_vehicle_costs_accept_foreign_rule_lists(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    hq = {"size_id": "custom_size", "bought_toughness_ranks": 2, "features": [{"id": "custom_feat", "rank": 3}]}
+    custom_rules = [{"id": "custom_size", "type": "Size", "ep_cost": 4}, {"id": "custom_feat", "ranked": True, "ep_cost_per_rank": 2}]
+    assert engine.calculate_hq_cost(hq, custom_rules) == 4 + 2 + 3 * 2
+    assert engine.calculate_hq_cost(hq) == 2 # Unknown ids in the engine's own catalog
+
+def test_recalculate_power_with_modifiers(core_engine_instance: CoreEngine, fresh_character_state: CharacterState):
+    """Range/duration/action derivation resolves every modifier through the catalog."""
+    state = fresh_character_state
+    state['powers'].append({"id": "pwr_fly", "name": "Flight", "baseEffectId": "eff_flight", "rank": 4,
+                            "modifiersConfig": [{"id": "mod_extra_increased_duration_continuous"}]})
+    recalculated_state = core_engine_instance.recalculate(state)
+    flight = recalculated_state['powers'][0]
+    assert flight['final_duration'] == "Continuous"
+    assert flight['cost'] > 0
+    assert "/round" in flight['measurement_details_display']
+
+def test_measurement_curves_bisect_and_extrapolate(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    curve = engine.catalog.get_measurement_curve('distance')
+    assert list(curve.ranks) == sorted(curve.ranks) and curve.values[curve.ranks.index(30)] == 4.0 # "4 million Kilometers"
+    assert engine.get_measurement_by_rank(30, 'distance') == "4 million Kilometers (2.5 million miles)"
+    assert engine.get_measurement_by_rank(-25, 'time') == "Subatomic (at Rank -30, value for rank -25 not explicitly listed)"
+    assert engine.get_measurement_by_rank(-31, 'mass') == "< Subatomic (Below Table Minimum)"
+    assert engine.get_measurement_by_rank(31, 'distance') == "~8 (Extrapolated Multiplicatively)"
+    assert engine.get_measurement_by_rank(1000, 'mass') == "> 25 Mtons (Above Table Maximum)" # Overflow falls back
+    assert engine.get_measurement_by_rank(3, 'smell') == "Rank 3 (Type N/A in Table Entry)" # Unknown types compile lazily
+
+def test_modifier_cost_programs_precompute_option_adjustments(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    program = engine.catalog.modifier_costs['mod_extra_affects_insubstantial']
+    assert program.cost_type == 'flat' and program.removable_type is None
+    assert [program.flat_cost({'id': 'mod_extra_affects_insubstantial', 'params': {'effectiveness': choice}}) for choice in ('half', 'full', 'other')] == [1.0, 2.0, 1.0]
+    assert program.flat_cost({'id': 'mod_extra_affects_insubstantial'}) == 1.0 and program.cpr_change({'id': 'mod_extra_affects_insubstantial'}) == 0.0
+    assert engine.catalog.modifier_costs['mod_extra_accurate'].flat_cost({'rank': 3}) == 3 * engine.catalog.modifiers['mod_extra_accurate']['flatCost']
+    assert set(engine.catalog.modifier_costs) == set(engine.catalog.modifiers)
@@ -0,0 +1,38 @@
+# tests/test_rule_snapshot.py
+
+import json
+import os
+import shutil
+import pytest
+
+from core_engine import CoreEngine, RULE_SNAPSHOT_FILENAME # type: ignore
+
+@pytest.fixture
+def rule_dir(tmp_path) -> str:
+    rules_copy = tmp_path / "rules"
+    shutil.copytree("rules", rules_copy, ignore=shutil.ignore_patterns(RULE_SNAPSHOT_FILENAME))
+    return str(rules_copy)
+
+def test_snapshot_is_written_then_loaded_without_parsing_json(rule_dir: str, monkeypatch):
+    cold_engine = CoreEngine(rule_dir=rule_dir)
+    assert os.path.exists(os.path.join(rule_dir, RULE_SNAPSHOT_FILENAME))
+    def fail_json_load(*args, **kwargs): raise AssertionError("JSON rules parsed despite a fresh snapshot")
+    monkeypatch.setattr(CoreEngine, "_load_all_rule_data", fail_json_load)
+    warm_engine = CoreEngine(rule_dir=rule_dir)
+    assert warm_engine.rule_data == cold_engine.rule_data
+    assert warm_engine.ruleset_version == cold_engine.ruleset_version
+    assert warm_engine.catalog.effects['eff_damage']['id'] == 'eff_damage'
+
+def test_snapshot_rebuilds_when_a_rule_file_changes(rule_dir: str):
+    original = CoreEngine(rule_dir=rule_dir)
+    effects_path = os.path.join(rule_dir, "power_effects.json")
+    with open(effects_path, encoding='utf-8') as f: effects = json.load(f)
+    next(e for e in effects if e['id'] == 'eff_flight')['costPerRank'] = 5
+    with open(effects_path, 'w', encoding='utf-8') as f: json.dump(effects, f)
+    changed = CoreEngine(rule_dir=rule_dir)
+    assert changed.catalog.effects['eff_flight']['costPerRank'] == 5
+    assert changed.ruleset_version != original.ruleset_version
+
+def test_corrupt_snapshot_falls_back_to_json(rule_dir: str):
+    with open(os.path.join(rule_dir, RULE_SNAPSHOT_FILENAME), 'wb') as f: f.write(b"not a pickle")
+    assert CoreEngine(rule_dir=rule_dir).catalog.effects
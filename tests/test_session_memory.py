@@ -0,0 +1,37 @@
+# tests/test_session_memory.py
+
+import copy
+import json
+import pickle
+import pytest
+
+from core_engine import CoreEngine # type: ignore
+from character_state import assoc_in # type: ignore
+from session_memory import FrozenDict, FrozenList, freeze, measure_session, shared_character_skeleton # type: ignore
+
+def test_frozen_containers_reject_writes_and_copy_to_plain():
+    frozen = freeze({"skills": {"skill_stealth": 2}, "powers": [{"id": "p1"}]})
+    assert isinstance(frozen['skills'], FrozenDict) and isinstance(frozen['powers'], FrozenList)
+    for write in (lambda: frozen.__setitem__('name', "x"), lambda: frozen['skills'].update(a=1), lambda: frozen['powers'].append({}),
+                  lambda: frozen['powers'][0].pop('id'), lambda: frozen.setdefault('x', 1)):
+        with pytest.raises(TypeError): write()
+    thawed = copy.deepcopy(frozen)
+    assert type(thawed) is dict and type(thawed['powers']) is list and type(thawed['powers'][0]) is dict and thawed == frozen
+    assert type(copy.copy(frozen)) is dict and type(pickle.loads(pickle.dumps(frozen))) is dict
+    assert json.loads(json.dumps(frozen)) == frozen
+
+def test_sessions_share_the_skeleton_and_memory_report_separates_it(core_engine_instance: CoreEngine):
+    engine = core_engine_instance
+    skeleton = shared_character_skeleton(engine, 10)
+    assert shared_character_skeleton(engine, 10) is skeleton and shared_character_skeleton(engine, 8)['totalPowerPoints'] == 120
+    character = dict(skeleton)
+    edited = engine.recalculate(assoc_in(character, ['abilities', 'STR'], 4), changed_key_paths=[['abilities', 'STR']])
+    recalculated = engine.recalculate(assoc_in(character, ['skills', 'skill_stealth'], 4))
+    assert edited['abilities']['STR'] == 4 and skeleton['abilities']['STR'] == 0 and recalculated['skills']['skill_stealth'] == 4
+    assert edited['skills'] is skeleton['skills'] # Unedited branches still point at the shared skeleton
+
+    report = measure_session({'character': edited, 'wizard_character_state': character})
+    character_entry, wizard_entry = report['keys']['character'], report['keys']['wizard_character_state']
+    assert character_entry['interned_bytes'] > 0 and report['interned_bytes_total'] >= wizard_entry['interned_bytes']
+    assert wizard_entry['bytes'] + wizard_entry['shared_with_earlier_keys_bytes'] < character_entry['bytes'] # Mostly interned
+    assert report['session_bytes'] == character_entry['bytes'] + wizard_entry['bytes']
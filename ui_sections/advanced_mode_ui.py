@@ -6,7 +6,7 @@ import copy
 import math
 import json # For pretty printing dicts in UI sometimes
 import uuid # For instance_ids
-from typing import Dict, List, Any, Callable, Optional, TYPE_CHECKING
+from typing import Dict, List, Any, Callable, Optional, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from ..core_engine import CoreEngine, CharacterState, RuleData, AdvantageDefinition, PowerDefinition, EquipmentDefinition, HQDefinition, VehicleDefinition, AllyDefinition
@@ -115,7 +115,7 @@ def render_defenses_section_adv(st_obj: Any, char_state: CharacterState, rule_da
     st_obj.header("Defenses")
     defenses_help_text = rule_data.get("help_text", {}).get("defenses_help", "Base from Abilities, buy ranks to increase. PL Caps are crucial!")
     with st_obj.expander("🛡️ Understanding Defenses (Cost: 1 PP per +1 Bought Rank)", expanded=False): st_obj.markdown(defenses_help_text)
-    pl = char_state.get('powerLevel', 10); pl_cap_paired = pl * 2; bought_defenses = char_state.get('defenses', {}); current_abilities = char_state.get('abilities', {})
+    pl = char_state.get('powerLevel', 10); pl_cap_paired = pl * 2; bought_defenses = char_state.get('defenses', {})
     defense_configs = [
         {"id": "Dodge", "name": "Dodge", "base_ability_id": "AGL", "tooltip": "Avoid ranged/area attacks."},
         {"id": "Parry", "name": "Parry", "base_ability_id": "FGT", "tooltip": "Avoid close attacks."},
@@ -124,11 +124,11 @@ def render_defenses_section_adv(st_obj: Any, char_state: CharacterState, rule_da
         {"id": "Will", "name": "Will", "base_ability_id": "AWE", "tooltip": "Resist mental effects."}
     ]
     st_obj.markdown("Enter **bought ranks** for each defense below:")
-    def_cols = st_obj.columns(len(defense_configs)); totals_for_cap_check: Dict[str, int] = {}
+    def_cols = st_obj.columns(len(defense_configs)); totals_for_cap_check: Dict[str, int] = {}; defense_summary = engine.get_trait_summary(char_state)['defenses']
     for i, d_conf in enumerate(defense_configs):
         with def_cols[i]:
-            base_val_from_ability = engine.get_ability_modifier(current_abilities.get(d_conf['base_ability_id'], 0)); bought_val = bought_defenses.get(d_conf['id'], 0)
-            total_val_display = engine.get_total_defense(char_state, d_conf['id'], d_conf['base_ability_id']); totals_for_cap_check[d_conf['id']] = total_val_display
+            base_val_from_ability = defense_summary[d_conf['id']]['base']; bought_val = bought_defenses.get(d_conf['id'], 0)
+            total_val_display = defense_summary[d_conf['id']]['total']; totals_for_cap_check[d_conf['id']] = total_val_display
             key_def_input = _uk("def_input", d_conf['id'])
             new_bought_val = st_obj.number_input(f"{d_conf['name']}", min_value=0, max_value=pl + 15, value=bought_val, key=key_def_input, help=f"{d_conf['tooltip']}\nBase: {base_val_from_ability}, Total: {total_val_display}")
             if new_bought_val != bought_val: update_char_value(['defenses', d_conf['id']], new_bought_val); st_obj.rerun()
@@ -151,14 +151,21 @@ def render_skills_section_adv(st_obj: Any, char_state: CharacterState, rule_data
     skill_bonus_cap = pl + 10; skill_rank_cap = pl + 5; total_skill_cost = engine.calculate_skill_cost(current_skills_state)
     st_obj.subheader(f"Total Skill Cost: {total_skill_cost} PP"); st_obj.markdown("---"); st_obj.markdown("**Modify Skill Ranks:**")
     base_skill_rules: List[Dict[str, Any]] = skills_rules_data.get('list', []); skill_display_cols = st_obj.columns(3); col_idx = 0
-    sorted_base_skill_rules = sorted(base_skill_rules, key=lambda x: x.get('name', ''))
+    sorted_base_skill_rules = sorted(base_skill_rules, key=lambda x: x.get('name', '')); skill_summary = engine.get_trait_summary(char_state)['skills']
+    def skill_bonus(skill_id: str, ability_id: str, rank: int) -> int: # Skills added since the last recalculation are not summarized yet
+        return skill_summary[skill_id]['bonus'] if skill_id in skill_summary else engine.get_ability_modifier(current_abilities.get(ability_id, 0)) + rank
+    specializations_by_base: Dict[str, Dict[str, Tuple[str, int]]] = {} # base skill id -> {specialized id: (specialization name, rank)}
+    for sk_id, r in current_skills_state.items():
+        resolution = engine.resolve_skill(sk_id, base_skill_rules)
+        if resolution and resolution.specialization: specializations_by_base.setdefault(resolution.rule['id'], {})[sk_id] = (resolution.specialization, r)
     for skill_info_idx, skill_info in enumerate(sorted_base_skill_rules):
         base_skill_id = skill_info['id']; base_skill_name = skill_info['name']; gov_ab_id = skill_info.get('ability', ''); skill_desc_help = skill_info.get('description', '') + f"\nMax Ranks: {skill_rank_cap}, Max Bonus: {skill_bonus_cap:+}"
         is_specializable = skill_info.get('specialization_possible', False)
         with skill_display_cols[col_idx % len(skill_display_cols)]:
             st_obj.markdown(f"##### {base_skill_name} ({gov_ab_id})")
             if not is_specializable:
-                bought_rank = current_skills_state.get(base_skill_id, 0); ability_mod = engine.get_ability_modifier(current_abilities.get(gov_ab_id, 0)); total_bonus = ability_mod + bought_rank
+                bought_rank = current_skills_state.get(base_skill_id, 0)
+                total_bonus = skill_bonus(base_skill_id, gov_ab_id, bought_rank)
                 key_skill_input = _uk("skill_input_base", base_skill_id)
                 new_rank = st_obj.number_input("Ranks", min_value=0, max_value=skill_rank_cap, value=bought_rank, key=key_skill_input, label_visibility="visible", help=skill_desc_help)
                 if new_rank != bought_rank: update_char_value(['skills', base_skill_id], new_rank); st_obj.rerun()
@@ -166,10 +173,10 @@ def render_skills_section_adv(st_obj: Any, char_state: CharacterState, rule_data
                 if total_bonus > skill_bonus_cap: st_obj.error(f"{bonus_display_str} (Cap: {skill_bonus_cap:+})", icon="⚠️", key=_uk("skill_err_base", base_skill_id))
                 else: st_obj.caption(bonus_display_str, key=_uk("skill_bonus_disp_base", base_skill_id)) # caption might be ok
             else:
-                specializations_for_this_base = {sk_id: r for sk_id, r in current_skills_state.items() if sk_id.startswith(base_skill_id + "_") and sk_id != base_skill_id}
+                specializations_for_this_base = specializations_by_base.get(base_skill_id, {})
                 if not specializations_for_this_base: st_obj.caption(f"No '{base_skill_name}' specializations yet.", key=_uk("no_spec_caption", base_skill_id)) # caption might be ok
-                for spec_skill_id, spec_rank in sorted(specializations_for_this_base.items()):
-                    spec_name_part = spec_skill_id.replace(base_skill_id + "_", "").replace("_", " ").title(); spec_ability_mod = engine.get_ability_modifier(current_abilities.get(gov_ab_id, 0)); spec_total_bonus = spec_ability_mod + spec_rank
+                for spec_skill_id, (spec_name_part, spec_rank) in sorted(specializations_for_this_base.items()):
+                    spec_total_bonus = skill_bonus(spec_skill_id, gov_ab_id, spec_rank)
                     cols_spec_edit = st_obj.columns([0.7, 0.15, 0.15]);
                     with cols_spec_edit[0]: st_obj.markdown(f"*{spec_name_part}*")
                     with cols_spec_edit[1]:
@@ -216,14 +223,14 @@ def render_advantages_section_adv(st_obj: Any, char_state: CharacterState, rule_
         instance_id = adv_entry.get("instance_id", generate_id_func(f"adv_{adv_entry['id']}_{i}")); adv_entry["instance_id"] = instance_id
         cols_adv_disp = st_obj.columns([0.6, 0.2, 0.2]); cols_adv_disp[0].markdown(f"**{adv_name}**{adv_rank_display}{params_display}", unsafe_allow_html=True)
         if cols_adv_disp[1].button("✏️ Edit", key=_uk("edit_adv_btn", instance_id)):
-            _initialize_editor_config(advantage_editor_config_ref, DEFAULT_ADVANTAGE_EDITOR_CONFIG); advantage_editor_config_ref.update({"show_form":True, "mode":"edit", "advantage_id_rule":adv_entry['id'], "instance_id":instance_id, "current_rank":adv_entry.get('rank',1), "current_params":copy.deepcopy(adv_entry.get('params',{})), "selected_adv_rule":copy.deepcopy(adv_rule)}); st.rerun()
+            _initialize_editor_config(advantage_editor_config_ref, DEFAULT_ADVANTAGE_EDITOR_CONFIG); advantage_editor_config_ref.update({"show_form":True, "mode":"edit", "advantage_id_rule":adv_entry['id'], "instance_id":instance_id, "current_rank":adv_entry.get('rank',1), "current_params":copy.deepcopy(adv_entry.get('params',{})), "selected_adv_rule":adv_rule}); st.rerun()
         if cols_adv_disp[2].button("🗑️ Del", key=_uk("remove_adv_btn", instance_id)):
             new_adv_list = [adv for adv in current_advantages if adv.get("instance_id") != instance_id]; update_char_value(['advantages'], new_adv_list); st.rerun(); return
         st_obj.markdown("---")
     st_obj.markdown("---")
     if st_obj.button("➕ Add New Advantage", key=_uk("add_new_adv_btn_main")):
         _initialize_editor_config(advantage_editor_config_ref, DEFAULT_ADVANTAGE_EDITOR_CONFIG); advantage_editor_config_ref["show_form"]=True; advantage_editor_config_ref["mode"]="add"
-        if adv_rules_list: advantage_editor_config_ref["advantage_id_rule"]=adv_rules_list[0]['id']; advantage_editor_config_ref["selected_adv_rule"]=copy.deepcopy(adv_rules_list[0])
+        if adv_rules_list: advantage_editor_config_ref["advantage_id_rule"]=adv_rules_list[0]['id']; advantage_editor_config_ref["selected_adv_rule"]=adv_rules_list[0] # Shared rule dict, read-only
         else: advantage_editor_config_ref["show_form"]=False; st.warning("No advantage rules loaded.")
         st.rerun()
     if advantage_editor_config_ref.get("show_form"):
@@ -239,6 +246,7 @@ def render_powers_section_adv(st_obj: Any, char_state: CharacterState, rule_data
     if 'show_power_builder_form' not in st.session_state: st.session_state.show_power_builder_form = False
     st_obj.markdown("**Current Powers:**"); current_powers_list: List[PowerDefinition] = char_state.get('powers', [])
     if not current_powers_list: st_obj.caption("No powers defined yet.") # caption might be ok
+    power_arrays = engine.get_power_arrays(char_state)
     for i, pwr_entry in enumerate(current_powers_list):
         pwr_id = pwr_entry.get('id', generate_id_func(f"pwr_unk_{i}_")); pwr_entry["id"] = pwr_id
         pwr_name=pwr_entry.get('name','Unnamed Power'); pwr_rank=pwr_entry.get('rank',0); pwr_cost=pwr_entry.get('cost',0)
@@ -257,6 +265,9 @@ def render_powers_section_adv(st_obj: Any, char_state: CharacterState, rule_data
         if pwr_entry.get('final_range'): details_p.append(f"Range: {pwr_entry['final_range']}")
         if pwr_entry.get('final_duration'): details_p.append(f"Dur: {pwr_entry['final_duration']}")
         if pwr_entry.get('final_action'): details_p.append(f"Act: {pwr_entry['final_action']}")
+        power_array = power_arrays.get(pwr_entry.get('arrayId')) if pwr_entry.get('arrayId') else None
+        if power_array and power_array['base_index'] == i: details_p.append(f"{'Dynamic' if power_array['is_dynamic'] else 'Static'} Array Base: {len(power_array['alternate_effects'])} AE, {power_array['cost']} PP total")
+        elif power_array and i in power_array['alternate_effects']: details_p.append(f"AE of {power_array['base_name']} (+{power_array['ae_cost']} PP)")
         if details_p: st_obj.caption(", ".join(details_p), key=_uk("pwr_details_disp", pwr_id)) # caption might be ok
         st_obj.markdown("---")
     st_obj.markdown("---")
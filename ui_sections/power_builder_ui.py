@@ -2,11 +2,14 @@
 # Version 1.2 (Full Effect UIs, Completed Parameters, Movement UI Finalized)
 
 import streamlit as st
+import pandas as pd
 import copy
 import math
 import uuid # For unique IDs for modifiers in the form state etc.
 from typing import Dict, List, Any, Callable, Optional, TYPE_CHECKING
 
+from session_memory import intern_frozen, thaw
+
 if TYPE_CHECKING:
     from ..core_engine import CoreEngine, CharacterState, RuleData, PowerDefinition, AdvantageDefinition, SkillDefinition, VariableConfigTrait
 else:
@@ -89,6 +92,10 @@ def get_default_power_form_state(rule_data: RuleData) -> Dict[str, Any]:
         }
     }
 
+def get_shared_power_form_defaults(rule_data: RuleData) -> Dict[str, Any]:
+    """Read-only default power form, built once per rule set and shared by all sessions; thaw() the parts you edit."""
+    return intern_frozen('power_form_defaults', lambda: get_default_power_form_state(rule_data), owner=rule_data)
+
 # --- Helper UI Rendering Functions for Power Builder Sub-sections ---
 def _render_modifier_parameter_input(
     st_obj: Any, mod_rule: Dict[str, Any], mod_config_entry: Dict[str, Any],
@@ -362,10 +369,10 @@ def _render_ally_creation_stat_block_ui(st_obj: Any, power_form_state: Dict[str,
     st_obj.subheader(f"🐾 Define {base_effect_rule.get('name','Creation')} Details")
     # Ensure structure exists and has defaults
     if 'ally_notes_and_stats_structured' not in power_form_state or not isinstance(power_form_state['ally_notes_and_stats_structured'], dict):
-        power_form_state['ally_notes_and_stats_structured'] = copy.deepcopy(get_default_power_form_state(rule_data)['ally_notes_and_stats_structured'])
+        power_form_state['ally_notes_and_stats_structured'] = thaw(get_shared_power_form_defaults(rule_data)['ally_notes_and_stats_structured'])
 
     ally_data = power_form_state['ally_notes_and_stats_structured']
-    default_ally_block = get_default_power_form_state(rule_data)['ally_notes_and_stats_structured']
+    default_ally_block = get_shared_power_form_defaults(rule_data)['ally_notes_and_stats_structured'] # Read only: its values are scalars
     for key, default_val in default_ally_block.items():
         ally_data.setdefault(key, default_val) # Ensure all keys from default are present
 
@@ -391,7 +398,7 @@ def _render_ally_creation_stat_block_ui(st_obj: Any, power_form_state: Dict[str,
 # --- Affliction Parameters UI ---
 def _render_affliction_params_ui(st_obj: Any, power_form_state: Dict[str, Any], rule_data: RuleData):
     st_obj.subheader("🤢 Configure Affliction Parameters")
-    if 'affliction_params' not in power_form_state: power_form_state['affliction_params'] = copy.deepcopy(get_default_power_form_state(rule_data)['affliction_params'])
+    if 'affliction_params' not in power_form_state: power_form_state['affliction_params'] = thaw(get_shared_power_form_defaults(rule_data)['affliction_params'])
     aff_params = power_form_state['affliction_params']
     form_key_prefix_aff = _uk_pb(power_form_state.get('editing_power_id','new'), "affliction")
 
@@ -409,7 +416,7 @@ def _render_affliction_params_ui(st_obj: Any, power_form_state: Dict[str, Any],
 # --- Enhanced Trait UI ---
 def _render_enhanced_trait_params_ui(st_obj: Any, power_form_state: Dict[str, Any], char_state: CharacterState, rule_data: RuleData, engine: CoreEngine):
     st_obj.subheader("➕ Configure Enhanced Trait")
-    if 'enhanced_trait_params' not in power_form_state: power_form_state['enhanced_trait_params'] = copy.deepcopy(get_default_power_form_state(rule_data)['enhanced_trait_params'])
+    if 'enhanced_trait_params' not in power_form_state: power_form_state['enhanced_trait_params'] = thaw(get_shared_power_form_defaults(rule_data)['enhanced_trait_params'])
     et_params = power_form_state['enhanced_trait_params']
     form_key_prefix_et = _uk_pb(power_form_state.get('editing_power_id','new'), "enhanced_trait")
 
@@ -457,7 +464,7 @@ def _render_enhanced_trait_params_ui(st_obj: Any, power_form_state: Dict[str, An
 # --- Create Effect Parameters UI ---
 def _render_create_params_ui(st_obj: Any, power_form_state: Dict[str, Any], rule_data: RuleData):
     st_obj.subheader("🛠️ Configure Create Effect")
-    if 'create_params' not in power_form_state: power_form_state['create_params'] = copy.deepcopy(get_default_power_form_state(rule_data)['create_params'])
+    if 'create_params' not in power_form_state: power_form_state['create_params'] = thaw(get_shared_power_form_defaults(rule_data)['create_params'])
     create_params = power_form_state['create_params']
     form_key_prefix_create = _uk_pb(power_form_state.get('editing_power_id','new'), "create_effect")
 
@@ -517,7 +524,7 @@ def _render_movement_params_ui(st_obj: Any, power_form_state: Dict[str, Any], ru
 # --- Morph/Transform Parameters UI ---
 def _render_morph_params_ui(st_obj: Any, power_form_state: Dict[str, Any], rule_data: RuleData):
     st_obj.subheader("🎭 Configure Morph/Transform")
-    if 'morph_params' not in power_form_state: power_form_state['morph_params'] = copy.deepcopy(get_default_power_form_state(rule_data)['morph_params'])
+    if 'morph_params' not in power_form_state: power_form_state['morph_params'] = thaw(get_shared_power_form_defaults(rule_data)['morph_params'])
     morph_params = power_form_state['morph_params']
     form_key_prefix_morph = _uk_pb(power_form_state.get('editing_power_id','new'), "morph_transform")
     base_effect_id_morph = power_form_state.get('baseEffectId')
@@ -541,7 +548,7 @@ def _render_morph_params_ui(st_obj: Any, power_form_state: Dict[str, Any], rule_
 # --- Nullify Parameters UI ---
 def _render_nullify_params_ui(st_obj: Any, power_form_state: Dict[str, Any], rule_data: RuleData):
     st_obj.subheader("🚫 Configure Nullify")
-    if 'nullify_params' not in power_form_state: power_form_state['nullify_params'] = copy.deepcopy(get_default_power_form_state(rule_data)['nullify_params'])
+    if 'nullify_params' not in power_form_state: power_form_state['nullify_params'] = thaw(get_shared_power_form_defaults(rule_data)['nullify_params'])
     null_params = power_form_state['nullify_params']
     form_key_prefix_null = _uk_pb(power_form_state.get('editing_power_id','new'), "nullify_effect")
     null_params['descriptor_to_nullify'] = st_obj.text_input("Descriptor(s) or Specific Power Name to Nullify:",value=null_params.get('descriptor_to_nullify', ""),key=_uk_pb(form_key_prefix_null, "nullify_descriptor"),help="E.g., 'Fire powers', 'Magic', 'Flight power of Target X'. For broader categories, use the Broad extra.")
@@ -626,7 +633,7 @@ def render_power_builder_form(
 
         if new_base_effect_id != current_effect_id:
             power_form_state['baseEffectId'] = new_base_effect_id
-            default_state_for_reset = get_default_power_form_state(rule_data)
+            default_state_for_reset = get_shared_power_form_defaults(rule_data) # Copied per key below
             for param_key in ['sensesConfig', 'immunityConfig', 'variableConfigurations',
                               'affliction_params', 'enhanced_trait_params', 'create_params',
                               'movement_params', 'morph_params', 'nullify_params',
@@ -818,11 +825,11 @@ def render_power_builder_form(
             new_is_ae_val = st.checkbox("Is this an Alternate Effect (AE) of an existing Array Base?", value=is_ae_current_val, key=_uk_pb(form_key_prefix, "is_ae_cb"))
 
             if new_is_ae_val:
-                array_base_options_ae = {"": "Select Array Base Power..."}
+                array_base_options_ae = {"": "Select Array Base Power..."}; array_id_by_base_id: Dict[str, str] = {}
                 editing_power_id_for_ae_check = power_form_state.get('editing_power_id')
-                for p_other_for_ae in char_state.get('powers', []):
-                    if (p_other_for_ae.get('isArrayBase') or p_other_for_ae.get('arrayId')) and p_other_for_ae.get('id') != editing_power_id_for_ae_check:
-                        array_base_options_ae[p_other_for_ae.get('id')] = f"{p_other_for_ae.get('name')} (Array ID: {p_other_for_ae.get('arrayId', 'Default Array')})"
+                for power_array in engine.get_power_arrays(char_state).values(): # Only an array's base discounts its Alternate Effects
+                    if power_array['base_id'] and power_array['base_id'] != editing_power_id_for_ae_check:
+                        array_base_options_ae[power_array['base_id']] = f"{power_array['base_name']} (Array ID: {power_array['array_id']})"; array_id_by_base_id[power_array['base_id']] = power_array['array_id']
 
                 current_ae_base_id_form = power_form_state.get('isAlternateEffectOf')
                 sel_idx_ae_form = list(array_base_options_ae.keys()).index(current_ae_base_id_form) if current_ae_base_id_form in array_base_options_ae else 0
@@ -836,11 +843,7 @@ def render_power_builder_form(
                 )
                 if new_ae_base_id_form != current_ae_base_id_form:
                     power_form_state['isAlternateEffectOf'] = new_ae_base_id_form if new_ae_base_id_form else None
-                    if new_ae_base_id_form:
-                        base_pwr_for_ae_link = next((p_link for p_link in char_state.get('powers',[]) if p_link.get('id') == new_ae_base_id_form), None)
-                        power_form_state['arrayId'] = base_pwr_for_ae_link.get('arrayId') if base_pwr_for_ae_link else None
-                    else:
-                        power_form_state['arrayId'] = None
+                    power_form_state['arrayId'] = array_id_by_base_id.get(new_ae_base_id_form) if new_ae_base_id_form else None
                     st.rerun()
             elif not new_is_ae_val and is_ae_current_val :
                 power_form_state['isAlternateEffectOf'] = None
@@ -850,13 +853,14 @@ def render_power_builder_form(
         st_obj.markdown("---")
         st.subheader("⚔️ Linked Combat Skill")
         skills_list_cs = rule_data.get('skills',{}).get('list',[]); combat_skill_options_cs = {"": "None"}
+        spec_names_by_base_cs: Dict[str, Dict[str, str]] = {} # base skill id -> {specialized id: display name}
+        for sk_id_char_cs in char_state.get('skills',{}):
+            resolution_cs = engine.resolve_skill(sk_id_char_cs, skills_list_cs)
+            if resolution_cs and resolution_cs.specialization: spec_names_by_base_cs.setdefault(resolution_cs.rule['id'], {})[sk_id_char_cs] = resolution_cs.display_name
         for sk_rule_cs in skills_list_cs:
             if sk_rule_cs.get('isCombatSkill'):
                 combat_skill_options_cs[sk_rule_cs['id']] = sk_rule_cs['name'] + " (General)"
-                for sk_id_char_cs, sk_rank_char_cs in char_state.get('skills',{}).items():
-                    if sk_id_char_cs.startswith(sk_rule_cs['id'] + "_"):
-                         spec_name_cs = sk_id_char_cs.replace(sk_rule_cs['id'] + "_", "").replace("_"," ").title()
-                         combat_skill_options_cs[sk_id_char_cs] = f"{sk_rule_cs['name']}: {spec_name_cs}"
+                combat_skill_options_cs.update(spec_names_by_base_cs.get(sk_rule_cs['id'], {}))
 
         current_linked_skill_form = power_form_state.get('linkedCombatSkill')
         sel_idx_lcs_form = list(combat_skill_options_cs.keys()).index(current_linked_skill_form) if current_linked_skill_form in combat_skill_options_cs else 0
@@ -883,6 +887,21 @@ def render_power_builder_form(
         if cost_bd_form.get('senses_total',0) > 0: st.caption(f"Senses Cost: {cost_bd_form['senses_total']:.1f}", key=_uk_pb(form_key_prefix,"senses_cost_cap_form")) # caption might be ok
         if cost_bd_form.get('immunities_total',0) > 0: st.caption(f"Immunities Cost: {cost_bd_form['immunities_total']:.1f}", key=_uk_pb(form_key_prefix,"imm_cost_cap_form")) # caption might be ok
 
+        sweep_effect_rule_form = engine.catalog.effects.get(power_form_state.get('baseEffectId'))
+        if sweep_effect_rule_form and not (sweep_effect_rule_form.get('isSenseContainer') or sweep_effect_rule_form.get('isImmunityContainer')):
+            with st.expander("📈 Cost by Rank (What-If)", expanded=False):
+                # The power as configured next to each of its modifiers removed in turn, priced in one vectorized sweep
+                sweep_mods_form = list(power_form_state.get('modifiersConfig', [])); sweep_variants_form = {"As configured": sweep_mods_form}
+                for mod_idx_sw, mod_conf_sw in enumerate(sweep_mods_form):
+                    mod_rule_sw = engine.catalog.modifiers.get(mod_conf_sw.get('id'))
+                    label_sw = f"Without {mod_rule_sw.get('name') if mod_rule_sw else mod_conf_sw.get('id')}"
+                    if label_sw in sweep_variants_form: label_sw = f"{label_sw} ({mod_idx_sw + 1})"
+                    sweep_variants_form[label_sw] = sweep_mods_form[:mod_idx_sw] + sweep_mods_form[mod_idx_sw + 1:]
+                sweep_ranks_form = range(1, max(20, int(power_form_state.get('rank', 1) or 1)) + 1)
+                sweep_form = engine.sweep_power_costs(preview_power_def_for_cost, sweep_ranks_form, sweep_variants_form, char_state.get('powers', []))
+                st.line_chart(pd.DataFrame(dict(zip(sweep_form['variants'], sweep_form['total_cost'])), index=pd.Index(sweep_form['ranks'], name="Rank")))
+                st.caption("Total PP by power rank for this build and for the build with each modifier removed.")
+
         submit_col_main_form, cancel_col_main_form = st.columns(2)
         with submit_col_main_form:
             if st.form_submit_button("💾 Save Power to Character", use_container_width=True, type="primary"):
@@ -206,8 +206,8 @@ def render_wizard_step4_defskills_guided(
             st_obj.caption(f"Total (base+bought): {total_val_for_input_display} (Cost: {new_bought_val} PP)")
 
     st_obj.markdown("**Defense Cap Check (includes all sources like powers):**")
-    # ... (Defense cap checks as before, using engine.get_total_defense) ...
-    total_dodge_wiz = engine.get_total_defense(char_state, 'Dodge', 'AGL'); total_parry_wiz = engine.get_total_defense(char_state, 'Parry', 'FGT'); total_toughness_wiz = engine.get_total_defense(char_state, 'Toughness', 'STA'); total_fortitude_wiz = engine.get_total_defense(char_state, 'Fortitude', 'STA'); total_will_wiz = engine.get_total_defense(char_state, 'Will', 'AWE')
+    defense_totals_wiz = {def_id: defense['total'] for def_id, defense in engine.get_trait_summary(char_state)['defenses'].items()}
+    total_dodge_wiz = defense_totals_wiz['Dodge']; total_parry_wiz = defense_totals_wiz['Parry']; total_toughness_wiz = defense_totals_wiz['Toughness']; total_fortitude_wiz = defense_totals_wiz['Fortitude']; total_will_wiz = defense_totals_wiz['Will']
     dt_sum = total_dodge_wiz + total_toughness_wiz; pt_sum = total_parry_wiz + total_toughness_wiz; fw_sum = total_fortitude_wiz + total_will_wiz
     st_obj.markdown(f"- Dodge ({total_dodge_wiz}) + Toughness ({total_toughness_wiz}) = **{dt_sum}** / {pl_cap_paired} {'✅ Valid' if dt_sum <= pl_cap_paired else '⚠️ Exceeded Cap!'}")
     st_obj.markdown(f"- Parry ({total_parry_wiz}) + Toughness ({total_toughness_wiz}) = **{pt_sum}** / {pl_cap_paired} {'✅ Valid' if pt_sum <= pl_cap_paired else '⚠️ Exceeded Cap!'}")
@@ -245,8 +245,9 @@ def render_wizard_step4_defskills_guided(
             # This is a simple check for the first found specialized skill of this base type.
             existing_spec_for_base = None
             for sk_id_check in skills_being_edited.keys():
-                if sk_id_check.startswith(base_skill_id_wiz + "_"):
-                    existing_spec_for_base = sk_id_check.split(base_skill_id_wiz + "_", 1)[1].replace("_", " ").title()
+                resolution_check = engine.resolve_skill(sk_id_check)
+                if resolution_check and resolution_check.specialization and resolution_check.rule['id'] == base_skill_id_wiz:
+                    existing_spec_for_base = resolution_check.specialization
                     break # Use the first one found for the wizard's default display
             
             initial_spec_name_in_ss = st.session_state.get(session_key_for_spec_name, existing_spec_for_base or default_spec_name_val)
@@ -461,19 +462,19 @@ def render_wizard_step6_complreview_final(
     
     with st_obj.expander("Quick Stats Overview (Full details in Advanced Mode)", expanded=False):
         # Display logic for Abilities, Defenses, Skills, Advantages, Powers as before...
+        summary_rev = engine.get_trait_summary(recalculated_wiz_state)
         st_obj.write("**Abilities:**"); ability_rules_list_review = rule_data.get('abilities',{}).get('list',[])
-        for ab_id, ab_rank in recalculated_wiz_state.get('abilities', {}).items():
+        for ab_id, ability_rev in summary_rev['abilities'].items():
             ab_rule_rev = next((r for r in ability_rules_list_review if r['id'] == ab_id), None); ab_name_rev = ab_rule_rev['name'] if ab_rule_rev else ab_id
-            st_obj.markdown(f"- {ab_name_rev}: {ab_rank} (Mod: {engine.get_ability_modifier(ab_rank):+})")
-        st_obj.write("**Defenses (Totals):**"); defense_configs_wiz_rev = [{"id":"Dodge","base_ability_id":"AGL"},{"id":"Parry","base_ability_id":"FGT"},{"id":"Toughness","base_ability_id":"STA"},{"id":"Fortitude","base_ability_id":"STA"},{"id":"Will","base_ability_id":"AWE"}]
-        for def_conf_rev in defense_configs_wiz_rev:
-            st_obj.markdown(f"- {def_conf_rev['id']}: {engine.get_total_defense(recalculated_wiz_state, def_conf_rev['id'], def_conf_rev['base_ability_id'])}")
-        st_obj.write("**Key Skills (Bonus > 0):**"); has_skills_rev = False; skill_rules_list_rev = rule_data.get('skills',{}).get('list',[])
-        for sk_id, sk_rank in recalculated_wiz_state.get('skills', {}).items():
-            if sk_rank > 0:
-                has_skills_rev = True; sk_rule_rev = engine.get_skill_rule(sk_id, skill_rules_list_rev); sk_name_rev = engine.get_skill_name_by_id(sk_id, skill_rules_list_rev)
-                gov_ab_rev = sk_rule_rev['ability'] if sk_rule_rev else 'N/A'; ab_mod_rev = engine.get_ability_modifier(recalculated_wiz_state.get('abilities',{}).get(gov_ab_rev,0))
-                st_obj.markdown(f"- {sk_name_rev}: {ab_mod_rev + sk_rank:+}")
+            st_obj.markdown(f"- {ab_name_rev}: {ability_rev['rank']} (Mod: {ability_rev['modifier']:+})")
+        st_obj.write("**Defenses (Totals):**")
+        for def_id_rev, defense_rev in summary_rev['defenses'].items():
+            st_obj.markdown(f"- {def_id_rev}: {defense_rev['total']}")
+        st_obj.write("**Key Skills (Bonus > 0):**"); has_skills_rev = False
+        for skill_rev in summary_rev['skills'].values():
+            if skill_rev['ranks'] > 0:
+                has_skills_rev = True
+                st_obj.markdown(f"- {skill_rev['name']}: {skill_rev['bonus']:+}")
         if not has_skills_rev: st_obj.caption("None with ranks > 0.")
         st_obj.write("**Advantages:**"); adv_rules_list_rev = rule_data.get('advantages_v1',[])
         if not recalculated_wiz_state.get('advantages'): st_obj.caption("None.")
@@ -0,0 +1,196 @@
+# validation_rules.py for HeroForge M&M (Streamlit Edition)
+# Character validation as registered rules that declare the state keys they read.
+
+"""
+Each rule checks one area of a recalculated character and yields issue dicts:
+
+    {'code': 'skill_rank_cap', 'severity': 'error', 'path': ['skills', 'skill_stealth'], 'message': "Skill Rank Cap: ..."}
+
+Rules are registered with @validation_rule(code, reads=...) in the order CoreEngine.validate_all
+reports them. `reads` lists the top-level state keys the rule depends on, directly or through the
+derived values recalculate computes from them (spentPowerPoints, derived_trait_summary, ...). After an
+edit, run_validation_rules reruns only the rules reading an edited key and keeps the other rules'
+issues from the previous run. Messages are only built for the checks that fail.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core_engine import CoreEngine, CharacterState, KeyPath
+
+ValidationIssue = Dict[str, Any] # {'code', 'severity', 'path', 'message'}
+IssuesByRule = Dict[str, List[ValidationIssue]] # Rule code -> issues, in registration order
+RuleCheck = Callable[['CoreEngine', 'CharacterState'], Iterable[ValidationIssue]]
+
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+# Keys whose edits change spentPowerPoints
+POINT_COST_KEYS = ('abilities', 'defenses', 'skills', 'advantages', 'powers')
+
+
+class ValidationRule(NamedTuple):
+    code: str
+    reads: frozenset
+    check: RuleCheck
+
+
+VALIDATION_RULES: List[ValidationRule] = []
+
+
+def validation_rule(code: str, reads: Sequence[str]) -> Callable[[RuleCheck], RuleCheck]:
+    """Registers `check` as the next validation rule; `reads` are the top-level state keys it depends on."""
+    def register(check: RuleCheck) -> RuleCheck:
+        if any(rule.code == code for rule in VALIDATION_RULES): raise ValueError(f"Validation rule '{code}' is already registered.")
+        VALIDATION_RULES.append(ValidationRule(code, frozenset(reads), check)); return check
+    return register
+
+
+def issue(code: str, path: List[Union[str, int]], message: str, severity: str = SEVERITY_ERROR) -> ValidationIssue:
+    return {'code': code, 'severity': severity, 'path': path, 'message': message}
+
+
+def rules_affected_by(changed_key_paths: Iterable['KeyPath']) -> List[ValidationRule]:
+    changed_keys = {key_path[0] for key_path in changed_key_paths if key_path}
+    return [rule for rule in VALIDATION_RULES if rule.reads & changed_keys]
+
+
+def run_validation_rules(engine: 'CoreEngine', state: 'CharacterState', changed_key_paths: Optional[List['KeyPath']] = None,
+                         previous: Optional[IssuesByRule] = None) -> IssuesByRule:
+    """
+    Issues of every rule for `state`. With `changed_key_paths` and the `previous` result of the state
+    before those edits, only the affected rules run again.
+    """
+    if changed_key_paths is None or previous is None or any(rule.code not in previous for rule in VALIDATION_RULES): rerun = VALIDATION_RULES
+    else: rerun = rules_affected_by(changed_key_paths)
+    rerun_codes = {rule.code for rule in rerun}
+    return {rule.code: list(rule.check(engine, state)) if rule.code in rerun_codes else previous[rule.code] for rule in VALIDATION_RULES}
+
+
+def flatten_issues(issues_by_rule: IssuesByRule) -> List[ValidationIssue]:
+    return [found for rule in VALIDATION_RULES for found in issues_by_rule.get(rule.code, [])]
+
+
+# --- Rules, in report order ---
+
+@validation_rule('pp_limit', reads=POINT_COST_KEYS + ('totalPowerPoints',))
+def check_pp_limit(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    if state.get('spentPowerPoints', 0) > state.get('totalPowerPoints', 0):
+        yield issue('pp_limit', ['spentPowerPoints'], f"PP Limit Exceeded: Spent {state['spentPowerPoints']}, Total {state['totalPowerPoints']}.")
+
+
+@validation_rule('defense_caps', reads=('abilities', 'defenses', 'advantages', 'powers', 'powerLevel'))
+def check_defense_caps(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    pl_cap_paired = state.get('powerLevel', 10) * 2
+    totals = {defense_id: defense['total'] for defense_id, defense in engine.get_trait_summary(state)['defenses'].items()}
+    for first, second in (('Dodge', 'Toughness'), ('Parry', 'Toughness'), ('Fortitude', 'Will')):
+        if totals[first] + totals[second] > pl_cap_paired:
+            yield issue('defense_cap', ['defenses', first], f"Defense Cap: {first} ({totals[first]}) + {second} ({totals[second]}) = {totals[first] + totals[second]} exceeds PLx2 ({pl_cap_paired}).")
+
+
+@validation_rule('skill_caps', reads=('skills', 'abilities', 'powerLevel'))
+def check_skill_caps(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    pl = state.get('powerLevel', 10); skill_bonus_cap = pl + 10; skill_rank_cap = pl + 5
+    for skill_id, skill in engine.get_trait_summary(state)['skills'].items():
+        if skill['ranks'] > skill_rank_cap:
+            yield issue('skill_rank_cap', ['skills', skill_id], f"Skill Rank Cap: {skill['name']} ranks ({skill['ranks']}) exceeds PL+5 ({skill_rank_cap}).")
+        if skill['ability'] and skill['bonus'] > skill_bonus_cap: # Unknown skills have no governing ability
+            yield issue('skill_bonus_cap', ['skills', skill_id], f"Skill Bonus Cap: {skill['name']} total bonus ({skill['bonus']}) exceeds PL+10 ({skill_bonus_cap}).")
+
+
+@validation_rule('power_attack_caps', reads=('powers', 'abilities', 'skills', 'powerLevel'))
+def check_power_attack_caps(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    pl = state.get('powerLevel', 10); pl_cap_paired = pl * 2; powers = state.get('powers', [])
+    for attack in engine.get_trait_summary(state)['attacks']:
+        idx = attack['index']; effect_rank = attack['rank']; pwr_name_disp = powers[idx].get('name', 'Unnamed Power')
+        if attack['attack_type'] in ['area', 'perception']:
+            if effect_rank > pl: yield issue('power_attack_cap', ['powers', idx], f"Power Attack Cap: {pwr_name_disp} (Area/Perception) Effect Rank ({effect_rank}) exceeds PL ({pl}).")
+        else:
+            attack_bonus = attack['bonus']
+            if (attack_bonus + effect_rank) > pl_cap_paired:
+                yield issue('power_attack_cap', ['powers', idx], f"Power Attack Cap: {pwr_name_disp} Attack Bonus ({attack_bonus}) + Effect Rank ({effect_rank}) = {attack_bonus + effect_rank} exceeds PLx2 ({pl_cap_paired}).")
+
+
+@validation_rule('power_enhancement_cycles', reads=('powers',))
+def check_power_enhancement_cycles(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    """Enhanced Trait (PowerRank) cycles: costed from 1 PP/rank where the loop is broken."""
+    powers = state.get('powers', [])
+    for cycle in engine.power_rank_graph(powers)['cycles']:
+        loop_names = [powers[idx].get('name') or powers[idx].get('id', 'Unnamed Power') for idx in cycle]
+        yield issue('power_enhancement_cycle', ['powers', cycle[0]], f"Power Enhancement Cycle: {' -> '.join(loop_names + loop_names[:1])} enhance each other's rank; break the loop.")
+
+
+@validation_rule('power_arrays', reads=('powers',))
+def check_power_arrays(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    """Powers marked as Alternate Effects that their array cannot discount."""
+    powers = state.get('powers', [])
+    for power_array in engine.get_power_arrays(state).values():
+        if power_array['base_index'] is None:
+            yield issue('array_without_base', ['powers', power_array['members'][0]], f"Array Validation: Array '{power_array['array_id']}' has no base power; its powers are costed separately."); continue
+        for idx in power_array['members']:
+            if powers[idx].get('isAlternateEffectOf') and idx not in power_array['costed_indexes']:
+                yield issue('array_unlinked_alternate_effect', ['powers', idx], f"Array Validation: {powers[idx].get('name', 'Unnamed Power')} is not an Alternate Effect of the base of array '{power_array['array_id']}' ({power_array['base_name']}); it is costed as a separate power.")
+
+
+@validation_rule('complications', reads=('complications',))
+def check_complications(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    if len(state.get('complications', [])) < 2:
+        yield issue('complications_minimum', ['complications'], "Character Minimum: At least 2 Complications are recommended for Hero Point generation.", SEVERITY_WARNING)
+
+
+@validation_rule('equipment_points', reads=('equipment', 'headquarters', 'vehicles', 'advantages'))
+def check_equipment_points(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    if state.get('derived_spent_ep', 0) > state.get('derived_total_ep', 0):
+        yield issue('ep_limit', ['equipment'], f"EP Limit Exceeded: Spent {state['derived_spent_ep']} EP, Total {state['derived_total_ep']} EP.")
+
+
+@validation_rule('ally_pools', reads=('allies', 'advantages'))
+def check_ally_pools(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    if state.get('derived_spent_minion_pool_pp', 0) > state.get('derived_total_minion_pool_pp', 0):
+        yield issue('minion_pool_overspent', ['allies'], f"Minion Pool Overspent: Used {state['derived_spent_minion_pool_pp']} PP, Available {state['derived_total_minion_pool_pp']} PP.")
+    if state.get('derived_spent_sidekick_pool_pp', 0) > state.get('derived_total_sidekick_pool_pp', 0):
+        yield issue('sidekick_pool_overspent', ['allies'], f"Sidekick Pool Overspent: Used {state['derived_spent_sidekick_pool_pp']} PP, Available {state['derived_total_sidekick_pool_pp']} PP.")
+
+
+@validation_rule('advantages', reads=('advantages', 'abilities'))
+def check_advantages(engine: 'CoreEngine', state: 'CharacterState') -> Iterator[ValidationIssue]:
+    abilities = state.get('abilities', {})
+    for adv_idx, adv_entry in enumerate(state.get('advantages', [])):
+        adv_rule = engine.catalog.advantages.get(adv_entry.get('id'))
+        if not adv_rule: continue
+        adv_name_disp = adv_rule.get('name', adv_entry.get('id')); current_rank = adv_entry.get('rank', 1); path = ['advantages', adv_idx]
+
+        if adv_rule.get('maxRanks_source'): # e.g. "AGL" for Defensive Roll: "Your maximum Defensive Roll rank is equal to your Agility rank."
+            source_ability_id = adv_rule['maxRanks_source']; max_rank_allowed = abilities.get(source_ability_id, 0)
+            if current_rank > max_rank_allowed:
+                yield issue('advantage_max_rank', path, f"Advantage Validation: {adv_name_disp} rank ({current_rank}) cannot exceed {source_ability_id} rank ({max_rank_allowed}).")
+        elif adv_rule.get('maxRanks') is not None: # Numeric maxRanks
+            if current_rank > adv_rule['maxRanks']:
+                yield issue('advantage_max_rank', path, f"Advantage Validation: {adv_name_disp} rank ({current_rank}) cannot exceed max rank of {adv_rule['maxRanks']}.")
+
+        if not adv_rule.get('parameter_needed'): continue
+        params = adv_entry.get('params', {})
+        param_storage_key = adv_rule.get('parameter_storage_key', adv_rule.get('id', 'detail'))
+        # Simplified presence check over the common param keys; specific structures are checked below
+        if not params or not params.get(param_storage_key, params.get('detail', params.get('selected_option', params.get('skill_id', params.get('details_list'))))):
+            if adv_rule.get('parameter_type') == "list_string" and not params.get(adv_rule.get('parameter_list_key', 'details_list'), []):
+                yield issue('advantage_parameter_missing', path, f"Advantage Validation: {adv_name_disp} requires details to be specified (e.g., for Benefit, Languages).")
+            elif adv_rule.get('parameter_type') not in ["list_string", "complex_config_note"] and not params:
+                yield issue('advantage_parameter_missing', path, f"Advantage Validation: {adv_name_disp} requires specific parameter(s) to be set.")
+
+        if adv_rule.get('parameter_type') == 'select_from_options':
+            selected_val = params.get(param_storage_key, params.get('selected_option'))
+            allowed_options = [opt.get('value') for opt in adv_rule.get('parameter_options', [])]
+            if selected_val not in allowed_options:
+                yield issue('advantage_parameter_invalid', path, f"Advantage Validation: Invalid parameter '{selected_val}' for {adv_name_disp}. Allowed: {allowed_options}.")
+        elif adv_rule.get('parameter_type') == 'select_skill':
+            skill_id_param = params.get(param_storage_key, params.get('skill_id'))
+            if not skill_id_param or not engine.get_skill_rule(skill_id_param):
+                yield issue('advantage_parameter_invalid', path, f"Advantage Validation: Invalid or missing skill parameter for {adv_name_disp}.")
+
+        if adv_entry.get('id') == 'adv_languages': # Languages granted vs specified
+            num_granted = current_rank * adv_rule.get('languages_per_rank', 1)
+            num_specified = len(params.get(adv_rule.get('parameter_list_key', 'details_list'), []) or [])
+            if num_specified > num_granted:
+                yield issue('advantage_languages', path, f"Advantage Validation: {adv_name_disp} grants {num_granted} language(s), but {num_specified} are specified.")
+            elif num_specified < num_granted and num_granted > 0: # Ranks bought but not every language named
+                yield issue('advantage_languages', path, f"Advantage Validation: {adv_name_disp} grants {num_granted} language(s), but only {num_specified} are specified.")